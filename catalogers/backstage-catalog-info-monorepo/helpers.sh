@@ -4,11 +4,16 @@
 # cataloger.
 #
 # The entrypoint (main.sh) discovers every catalog-info.yaml in a repo and, for
-# each one, calls `create_component` with a component id it built from the
-# file's path (repo-level for a root file, `…/<dir>` for a file in a
-# subdirectory) and the file body. `create_component` parses the file, picks
-# its single `Component` entity, and writes owner / domain / tags to
+# each one, builds a component id from the file's path (repo-level for a root
+# file, `…/<dir>` for a file in a subdirectory). `component_result` parses the
+# file body, picks its single `Component` entity, and projects owner / domain /
+# tags into a result file; `write_component_result` writes that to
 # `.components["<id>"]` (plus a `.domains` stub) in the Catalog JSON.
+# `create_component` does both in one call.
+#
+# The result depends only on the file body and the transform inputs, never on
+# the component id, so main.sh caches it per blob SHA under
+# `transform_fingerprint` and re-writes unchanged files without re-parsing.
 #
 # The owner/domain/tags transform and the domain-stub write are intentionally
 # identical to the `backstage-catalog-info` cataloger's `helpers.sh` — this
@@ -32,6 +37,21 @@
 # component_id_prefix) and the secret (GH_TOKEN) are handled by the entrypoint,
 # not here.
 
+# transform_fingerprint — hash of every input component_result depends on, so a
+# cached result is reused only while the transform inputs are unchanged.
+transform_fingerprint() {
+    printf '%s\n' "v1" \
+        "${LUNAR_VAR_DOMAIN_ANNOTATION:-}" \
+        "${LUNAR_VAR_TAG_PREFIX-bs-}" \
+        "${LUNAR_VAR_INCLUDE_DERIVED_TAGS:-true}" \
+        "${LUNAR_VAR_OWNER_FORMAT:-as-is}" \
+        "${LUNAR_VAR_DEFAULT_OWNER:-}" \
+        "${LUNAR_VAR_DEFAULT_DOMAIN:-}" \
+        "${LUNAR_VAR_ALLOW_IGNORE_ANNOTATION:-false}" \
+        "${LUNAR_VAR_IGNORE_ANNOTATION:-lunar.io/ignore}" \
+        | sha256sum | cut -d' ' -f1
+}
+
 # create_component <component_id> <catalog_info_yaml> [source_path]
 #
 # Silent-skips (return 0, no write) on an unparseable file, no `Component`
@@ -40,9 +60,32 @@
 # Returns 1 only on a hard write failure, so the run is marked failed (and
 # retried) rather than silently dropping data.
 create_component() {
-    local COMPONENT_ID="$1"
-    local YAML="$2"
-    local SRC_PATH="${3:-catalog-info.yaml}"
+    local RESULT_FILE rc=0
+    RESULT_FILE=$(mktemp)
+    component_result "$2" "${3:-catalog-info.yaml}" "$RESULT_FILE"
+    write_component_result "$1" "$RESULT_FILE" || rc=1
+    rm -f "$RESULT_FILE"
+    return "$rc"
+}
+
+# skip_result <result_file> <source_path> <reason> — log the reason and record
+# it as the result, with the source path it names so a cached result can be
+# logged against another file with the same content.
+skip_result() {
+    echo "$3"
+    jq -n --arg reason "$3" --arg path "$2" '{skip: $reason, path: $path}' > "$1"
+}
+
+# component_result <catalog_info_yaml> <source_path> <result_file>
+#
+# Parses and transforms one catalog-info file into <result_file>:
+#   {"entry": {...}, "domain": "<name>", "domain_value": {...}}   or
+#   {"skip": "<reason>", "path": "<source_path>"}                  (silent skip)
+# No Catalog JSON writes; always returns 0.
+component_result() {
+    local YAML="$1"
+    local SRC_PATH="$2"
+    local RESULT_FILE="$3"
 
     local DOMAIN_ANNOTATION="${LUNAR_VAR_DOMAIN_ANNOTATION:-}"
     # `-` not `:-`: an explicit empty tag_prefix must survive so it can disable
@@ -58,8 +101,7 @@ create_component() {
     local ALLOW_IGNORE_ANNOTATION="${LUNAR_VAR_ALLOW_IGNORE_ANNOTATION:-false}"
     local IGNORE_ANNOTATION="${LUNAR_VAR_IGNORE_ANNOTATION:-lunar.io/ignore}"
 
-    echo ""
-    echo "Creating component '$COMPONENT_ID' from $SRC_PATH"
+    echo "Transforming $SRC_PATH"
     [ -n "$DOMAIN_ANNOTATION" ] && echo "Domain annotation: $DOMAIN_ANNOTATION"
     echo "Tag prefix: $TAG_PREFIX (derived: $INCLUDE_DERIVED_TAGS)"
     echo "Owner format: $OWNER_FORMAT"
@@ -72,7 +114,7 @@ create_component() {
     local ENTITIES YQ_ERR
     YQ_ERR=$(mktemp)
     if ! ENTITIES=$(echo "$YAML" | yq ea '[.]' -o=json 2>"$YQ_ERR"); then
-        echo "yq parse failed for $SRC_PATH — skipping (stderr: $(head -c 200 "$YQ_ERR"))"
+        skip_result "$RESULT_FILE" "$SRC_PATH" "yq parse failed for $SRC_PATH — skipping (stderr: $(head -c 200 "$YQ_ERR"))"
         rm -f "$YQ_ERR"
         return 0
     fi
@@ -86,7 +128,7 @@ create_component() {
     local COMPONENT_COUNT
     COMPONENT_COUNT=$(echo "$ENTITIES" | jq '[.[] | select((.kind // "") == "Component")] | length')
     if [ "$COMPONENT_COUNT" != "1" ]; then
-        echo "Expected exactly one Component in $SRC_PATH (found $COMPONENT_COUNT) — skipping"
+        skip_result "$RESULT_FILE" "$SRC_PATH" "Expected exactly one Component in $SRC_PATH (found $COMPONENT_COUNT) — skipping"
         return 0
     fi
     local ENTITY
@@ -102,7 +144,7 @@ create_component() {
             --arg k "$IGNORE_ANNOTATION" \
             '(.metadata.annotations // {})[$k] // "" | tostring | ascii_downcase')
         if [ "$IGNORE_VAL" = "true" ] || [ "$IGNORE_VAL" = "yes" ] || [ "$IGNORE_VAL" = "1" ]; then
-            echo "$SRC_PATH carries $IGNORE_ANNOTATION=$IGNORE_VAL and allow_ignore_annotation is on — skipping"
+            skip_result "$RESULT_FILE" "$SRC_PATH" "$SRC_PATH carries $IGNORE_ANNOTATION=$IGNORE_VAL and allow_ignore_annotation is on — skipping"
             return 0
         fi
     fi
@@ -156,19 +198,13 @@ create_component() {
            + (if $domain != "" then {domain: $domain} else {} end))
         ')
 
-    echo "Component entry:"
-    echo "$ENTRY" | jq .
-
-    # --- Write to Catalog JSON -------------------------------------------------
-    # Hub `validateDomainRefs` rejects (and silently drops) the entire catalog
-    # merge save if a component references a domain that isn't present under
-    # `.domains`. Write the domain stub first. If the same file carries a
-    # `kind: Domain` / `kind: System` entity with a matching `metadata.name`,
-    # propagate its description + owner so the domain row is informative.
-    local DOMAIN_NAME
+    # --- Domain stub -----------------------------------------------------------
+    # If the same file carries a `kind: Domain` / `kind: System` entity with a
+    # matching `metadata.name`, propagate its description + owner so the domain
+    # row is informative.
+    local DOMAIN_NAME DOMAIN_VALUE="{}"
     DOMAIN_NAME=$(echo "$ENTRY" | jq -r '.domain // ""')
     if [ -n "$DOMAIN_NAME" ]; then
-        local DOMAIN_VALUE
         DOMAIN_VALUE=$(echo "$ENTITIES" | jq \
             --arg name "$DOMAIN_NAME" \
             --arg owner_format "$OWNER_FORMAT" \
@@ -197,6 +233,40 @@ create_component() {
                     + (if $owner != "" then {owner: $owner} else {} end)))
               end
             ')
+    fi
+
+    jq -n --argjson entry "$ENTRY" --arg domain "$DOMAIN_NAME" --argjson domain_value "$DOMAIN_VALUE" \
+        '{entry: $entry, domain: $domain, domain_value: $domain_value}' > "$RESULT_FILE"
+}
+
+# write_component_result <component_id> <result_file>
+#
+# Writes a component_result to the Catalog JSON (nothing for a skip). Returns 1
+# only on a hard write failure.
+write_component_result() {
+    local COMPONENT_ID="$1"
+    local RESULT_FILE="$2"
+
+    local SKIP
+    SKIP=$(jq -r '.skip // ""' "$RESULT_FILE")
+    if [ -n "$SKIP" ]; then
+        return 0
+    fi
+
+    local ENTRY DOMAIN_NAME DOMAIN_VALUE
+    ENTRY=$(jq '.entry' "$RESULT_FILE")
+    DOMAIN_NAME=$(jq -r '.domain // ""' "$RESULT_FILE")
+    DOMAIN_VALUE=$(jq '.domain_value // {}' "$RESULT_FILE")
+
+    echo "Creating component '$COMPONENT_ID'"
+    echo "Component entry:"
+    echo "$ENTRY" | jq .
+
+    # --- Write to Catalog JSON -------------------------------------------------
+    # Hub `validateDomainRefs` rejects (and silently drops) the entire catalog
+    # merge save if a component references a domain that isn't present under
+    # `.domains`. Write the domain stub first.
+    if [ -n "$DOMAIN_NAME" ]; then
         echo "Writing domain '$DOMAIN_NAME':"
         echo "$DOMAIN_VALUE" | jq .
         if echo "$DOMAIN_VALUE" | jq --arg name "$DOMAIN_NAME" '{($name): .}' | lunar catalog raw --json '.domains' -; then
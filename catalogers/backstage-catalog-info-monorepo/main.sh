@@ -8,11 +8,28 @@
 # you can opt monorepos into cataloging with a repo topic instead of a
 # hand-maintained list. For each repo, walks the whole file tree via the GitHub
 # Git Trees API (one recursive call), finds every `catalog-info.yaml` / `.yml`
-# (including files in subdirectories), fetches each via the Contents API, and
+# (including files in subdirectories), fetches each via the Git Blobs API, and
 # CREATES one component per discovered file — keyed to the file's directory so a
 # monorepo becomes one component per service. Owner / domain / tags come from the
 # file's `Component` entity via the shared pipeline in `helpers.sh`.
 #
+# Incremental sync: state is kept between runs under `state_dir`.
+#   http/     last 200 body + ETag of the repo, tree and org-listing calls; they
+#             are sent as conditional requests, and GitHub doesn't count a 304
+#             against the rate limit
+#   blobs/    catalog-info bodies by blob SHA (a blob SHA names its content)
+#   results/  component_result output by transform fingerprint + blob SHA
+# A file whose blob SHA already has a result costs no API call at all; only new
+# or changed blobs are fetched, `fetch_concurrency` at a time. Every discovered
+# component is still written each run. Entries unused for 30 days are pruned.
+#
+# Concurrency: repos are scanned `repo_concurrency` at a time (and org listing
+# pages fetched likewise) as background jobs. All jobs draw on one rate-limit
+# budget (rate_wait / rate_hold) fed by GitHub's X-RateLimit-Remaining /
+# X-RateLimit-Reset and Retry-After headers. Each job's log and results are
+# replayed in scan-list order, and every catalog write happens in the
+# foreground, so output is deterministic and a failed write still aborts.
+#
 # Component id per file (with default component_id_prefix `github.com/`):
 #   catalog-info.yaml (repo root)          -> github.com/<owner>/<repo>
 #   services/payments/catalog-info.yaml    -> github.com/<owner>/<repo>/services/payments
@@ -28,7 +45,7 @@
 #   - No GH_TOKEN, or both `repos` and `orgs` empty (nothing to do)
 #   - Org discovery API error for an org (logged, that org skipped)
 #   - A repo id that isn't `<owner>/<repo>`
-#   - Git Trees / Contents API errors for a repo (logged, repo skipped)
+#   - Git Trees / Blobs API errors for a repo (logged, repo or file skipped)
 #   - Per-file: parse error / not exactly one Component (handled in helpers.sh)
 #
 # Inputs (LUNAR_VAR_*):
@@ -41,6 +58,9 @@
 #   branch               (default empty -> each repo's default branch)
 #   exclude_paths        (default catalog-info.yaml,catalog-info.yml)
 #   component_id_prefix  (default github.com/)
+#   state_dir            (default $XDG_CACHE_HOME/lunar-backstage-catalog-info-monorepo)
+#   fetch_concurrency    (default 8; parallel blob fetches per repo)
+#   repo_concurrency     (default 4; repos scanned / org pages fetched in parallel)
 #   ...transform + ignore-annotation inputs are read in helpers.sh
 #
 # Either `repos` or `orgs` (or both) must be set. Topic filters apply to the
@@ -64,6 +84,9 @@ BRANCH="${LUNAR_VAR_BRANCH:-}"
 # "") when set — so the default only fires for a truly-unset var (local runs).
 EXCLUDE_PATHS="${LUNAR_VAR_EXCLUDE_PATHS-catalog-info.yaml,catalog-info.yml}"
 COMPONENT_ID_PREFIX="${LUNAR_VAR_COMPONENT_ID_PREFIX:-github.com/}"
+STATE_DIR="${LUNAR_VAR_STATE_DIR:-${XDG_CACHE_HOME:-$HOME/.cache}/lunar-backstage-catalog-info-monorepo}"
+FETCH_CONCURRENCY="${LUNAR_VAR_FETCH_CONCURRENCY:-8}"
+REPO_CONCURRENCY="${LUNAR_VAR_REPO_CONCURRENCY:-4}"
 
 if [ -n "${LUNAR_SECRET_GH_TOKEN:-}" ]; then
     export GH_TOKEN="$LUNAR_SECRET_GH_TOKEN"
@@ -94,72 +117,234 @@ source "$(dirname "$0")/helpers.sh"
 
 BODY_FILE=$(mktemp)
 ERR_FILE=$(mktemp)
-trap 'rm -f "$BODY_FILE" "$ERR_FILE"' EXIT
+HDR_FILE=$(mktemp)
+RUN_DIR=$(mktemp -d)
+trap 'rm -rf "$BODY_FILE" "$ERR_FILE" "$HDR_FILE" "$RUN_DIR"' EXIT
 
-# gh_get <url> — GET with auth, body written to $BODY_FILE, prints HTTP code.
-gh_get() {
-    curl -sS -o "$BODY_FILE" -w '%{http_code}' \
-        -H "Authorization: Bearer $GH_TOKEN" \
-        -H "Accept: $1" \
-        -H "X-GitHub-Api-Version: 2022-11-28" \
-        "$2" 2>"$ERR_FILE" || echo "000"
+# private_buffers — give a background job its own body/header/stderr files;
+# the globals above belong to the foreground.
+private_buffers() {
+    BODY_FILE=$(mktemp "$RUN_DIR/body-XXXXXX")
+    ERR_FILE=$(mktemp "$RUN_DIR/err-XXXXXX")
+    HDR_FILE=$(mktemp "$RUN_DIR/hdr-XXXXXX")
 }
 
-# discover_org_repos <org> — prints, one per line, the `<owner>/<repo>` of every
-# repo in <org> that passes the topic allow/blocklist (and the archived filter).
-# Pages through the List-org-repositories API (100/page). Reuses $BODY_FILE, so
-# call it BEFORE the scan loop (which also reuses $BODY_FILE). Emits only repo
-# slugs on stdout — progress/errors go to stderr — so callers can `read` it.
-discover_org_repos() {
-    local org="$1" page=1 code count
-    while :; do
-        code=$(gh_get "application/vnd.github+json" \
-            "https://api.github.com/orgs/${org}/repos?per_page=100&page=${page}&type=all")
-        if [ "$code" != "200" ]; then
-            echo "Org discovery for '$org' failed (HTTP $code): $(head -c 200 "$BODY_FILE" 2>/dev/null) — skipping org" >&2
-            return 0
+# State from previous runs. An unwritable state_dir still works, for this run
+# only.
+if ! mkdir -p "$STATE_DIR/http" "$STATE_DIR/blobs" "$STATE_DIR/results" 2>/dev/null \
+    || [ ! -w "$STATE_DIR" ]; then
+    echo "State dir $STATE_DIR is not writable — syncing without state" >&2
+    STATE_DIR="$RUN_DIR/state"
+    mkdir -p "$STATE_DIR/http" "$STATE_DIR/blobs" "$STATE_DIR/results"
+fi
+FINGERPRINT=$(transform_fingerprint)
+RESULT_DIR="$STATE_DIR/results/$FINGERPRINT"
+mkdir -p "$RESULT_DIR"
+echo "State dir: $STATE_DIR"
+echo "Concurrency: $REPO_CONCURRENCY repo(s) x $FETCH_CONCURRENCY blob fetch(es)"
+
+# Shared rate-limit budget. Every request from every job passes rate_wait,
+# which holds it until the epoch second in $RATE_FILE. Responses move that hold
+# forward: Retry-After (secondary limits) holds for the given seconds, and an
+# X-RateLimit-Remaining no larger than the number of requests that can be in
+# flight at once holds until X-RateLimit-Reset, so concurrent jobs can't
+# overdraw the primary limit between them.
+RATE_FILE="$RUN_DIR/rate-hold"
+echo 0 > "$RATE_FILE"
+MAX_IN_FLIGHT=$((REPO_CONCURRENCY * FETCH_CONCURRENCY))
+
+rate_wait() {
+    local until now
+    until=$(cat "$RATE_FILE" 2>/dev/null || echo 0)
+    now=$(date +%s)
+    if [ "${until:-0}" -gt "$now" ]; then
+        echo "GitHub rate limit reached — waiting $((until - now))s" >&2
+        sleep $((until - now))
+    fi
+}
+
+# rate_hold <epoch> — hold all requests until <epoch>; a later hold wins.
+rate_hold() {
+    local current tmp
+    current=$(cat "$RATE_FILE" 2>/dev/null || echo 0)
+    [ "$1" -le "${current:-0}" ] && return 0
+    tmp=$(mktemp "$RUN_DIR/rate-XXXXXX")
+    echo "$1" > "$tmp"
+    mv "$tmp" "$RATE_FILE"
+}
+
+# header <name> <header_file> — the header's value (empty when absent).
+header() {
+    tr -d '\r' < "$2" | awk -v name="$1:" '
+        tolower($1) == name { sub(/^[^:]*:[ \t]*/, ""); value = $0 }
+        END { print value }'
+}
+
+# gh_request <out> <accept> <url> [curl args...] — one GET through the shared
+# budget: body to <out>, headers to $HDR_FILE, prints the HTTP code. A
+# rate-limited response (429, or 403 with Retry-After or no remaining budget)
+# is retried after the wait GitHub asks for, up to three times.
+gh_request() {
+    local out="$1" accept="$2" url="$3" code attempt remaining reset retry_after
+    shift 3
+    for attempt in 1 2 3 4; do
+        rate_wait
+        # curl prints 000 itself when no response arrives, so a failure only
+        # needs `|| true`; an empty code (curl not run at all) is 000 too.
+        : > "$HDR_FILE"
+        code=$(curl -sS -o "$out" -D "$HDR_FILE" -w '%{http_code}' \
+            -H "Authorization: Bearer $GH_TOKEN" \
+            -H "Accept: $accept" \
+            -H "X-GitHub-Api-Version: 2022-11-28" \
+            "$@" "$url" 2>"$ERR_FILE" || true)
+        code="${code:-000}"
+        remaining=$(header x-ratelimit-remaining "$HDR_FILE")
+        reset=$(header x-ratelimit-reset "$HDR_FILE")
+        retry_after=$(header retry-after "$HDR_FILE")
+        if [[ "$retry_after" =~ ^[0-9]+$ ]]; then
+            rate_hold $(($(date +%s) + retry_after))
+        elif [[ "$remaining" =~ ^[0-9]+$ ]] && [[ "$reset" =~ ^[0-9]+$ ]] \
+            && [ "$remaining" -le "$MAX_IN_FLIGHT" ]; then
+            rate_hold "$reset"
         fi
-        count=$(jq 'length' "$BODY_FILE")
-        if [ "$count" = "0" ]; then
-            break
+        case "$code" in
+            429) ;;
+            403) [ -n "$retry_after" ] || [ "$remaining" = "0" ] || break ;;
+            *) break ;;
+        esac
+        [ "$attempt" -lt 4 ] && echo "Rate limited on $url (HTTP $code) — retrying" >&2
+    done
+    echo "$code"
+}
+
+# gh_get <accept> <url> — GET into $BODY_FILE / $HDR_FILE, prints HTTP code.
+# Sent as a conditional request when an earlier 200 for the same URL left an
+# ETag; a 304 is answered from that cached response and reported as 200.
+gh_get() {
+    local key cached etag code
+    key=$(printf '%s %s' "$1" "$2" | sha256sum | cut -d' ' -f1)
+    cached="$STATE_DIR/http/$key"
+    local -a conditional=()
+    if [ -f "$cached.etag" ] && [ -f "$cached.body" ] && [ -f "$cached.headers" ]; then
+        conditional=(-H "If-None-Match: $(cat "$cached.etag")")
+    fi
+    code=$(gh_request "$BODY_FILE" "$1" "$2" ${conditional[@]+"${conditional[@]}"})
+    if [ "$code" = "304" ]; then
+        cp "$cached.body" "$BODY_FILE"
+        cp "$cached.headers" "$HDR_FILE"
+        touch "$cached.etag" "$cached.body" "$cached.headers"
+        echo "200"
+        return 0
+    fi
+    if [ "$code" = "200" ]; then
+        etag=$(header etag "$HDR_FILE")
+        # Drop the old ETag first so it can never pair with a newer body.
+        rm -f "$cached.etag"
+        if [ -n "$etag" ] && cp "$BODY_FILE" "$cached.body" && cp "$HDR_FILE" "$cached.headers"; then
+            printf '%s' "$etag" > "$cached.etag"
         fi
-        # Filter by archived + topics; emit full_name. Topic set arithmetic:
-        # ($allow - ($allow - $topics)) is the intersection allow ∩ topics.
-        jq -r \
-            --arg allowed "$ALLOWED_TOPICS" \
-            --arg disallowed "$DISALLOWED_TOPICS" \
-            --arg include_archived "$INCLUDE_ARCHIVED" \
-            '
-            def csv_set($s): ($s | split(",") | map(gsub("^\\s+|\\s+$"; "")) | map(select(length > 0)));
-            (csv_set($allowed)) as $allow
-            | (csv_set($disallowed)) as $deny
-            | .[]
-            | select($include_archived == "true" or (.archived != true))
-            | (.topics // []) as $topics
-            | select( ($allow | length) == 0 or (($allow - ($allow - $topics)) | length) > 0 )
-            | select( ($deny  | length) == 0 or (($deny  - ($deny  - $topics)) | length) == 0 )
-            | .full_name
-            ' "$BODY_FILE"
-        # A short page (< per_page) is the last one.
-        if [ "$count" -lt 100 ]; then
-            break
+    fi
+    echo "$code"
+}
+
+# fetch_blob <slug> <sha> — download one blob's raw bytes into the blob store.
+# Runs as a background job.
+fetch_blob() {
+    local tmp code
+    private_buffers
+    tmp=$(mktemp "$STATE_DIR/blobs/.fetch-XXXXXX")
+    code=$(gh_request "$tmp" "application/vnd.github.raw" \
+        "https://api.github.com/repos/$1/git/blobs/$2")
+    if [ "$code" = "200" ]; then
+        mv "$tmp" "$STATE_DIR/blobs/$2"
+    else
+        rm -f "$tmp"
+        echo "Could not fetch blob $2 from $1 (HTTP $code)" >&2
+    fi
+}
+
+# fetch_blobs <slug> <sha>... — fetch the given blobs, FETCH_CONCURRENCY at a time.
+fetch_blobs() {
+    local slug="$1" sha running=0
+    shift
+    for sha in "$@"; do
+        fetch_blob "$slug" "$sha" &
+        running=$((running + 1))
+        if [ "$running" -ge "$FETCH_CONCURRENCY" ]; then
+            wait -n || true
+            running=$((running - 1))
         fi
-        page=$((page + 1))
     done
-    return 0
+    wait || true
 }
 
-# is_catalog_file <path> — true if the path's basename is in FILENAMES.
-is_catalog_file() {
-    local base="${1##*/}"
-    local name
-    IFS=',' read -ra _names <<< "$FILENAMES"
-    for name in "${_names[@]}"; do
-        name="$(echo "$name" | xargs)"
-        [ -z "$name" ] && continue
-        [ "$base" = "$name" ] && return 0
+# org_page <org> <page> <dir> — fetch one page of the org's repositories (100
+# per page). Writes the slugs passing the topic allow/blocklist (and archived
+# filter) to <dir>/<page>.slugs, the page's repo count to <dir>/<page>.count
+# and its Link header to <dir>/<page>.link. Returns 1 on an API error.
+org_page() {
+    local org="$1" page="$2" dir="$3" code
+    code=$(gh_get "application/vnd.github+json" \
+        "https://api.github.com/orgs/${org}/repos?per_page=100&page=${page}&type=all")
+    if [ "$code" != "200" ]; then
+        echo "Org discovery for '$org' failed on page $page (HTTP $code): $(head -c 200 "$BODY_FILE" 2>/dev/null)" >&2
+        return 1
+    fi
+    header link "$HDR_FILE" > "$dir/$page.link"
+    # Filter by archived + topics; emit full_name. Topic set arithmetic:
+    # ($allow - ($allow - $topics)) is the intersection allow ∩ topics.
+    jq -r \
+        --arg allowed "$ALLOWED_TOPICS" \
+        --arg disallowed "$DISALLOWED_TOPICS" \
+        --arg include_archived "$INCLUDE_ARCHIVED" \
+        '
+        def csv_set($s): ($s | split(",") | map(gsub("^\\s+|\\s+$"; "")) | map(select(length > 0)));
+        (csv_set($allowed)) as $allow
+        | (csv_set($disallowed)) as $deny
+        | .[]
+        | select($include_archived == "true" or (.archived != true))
+        | (.topics // []) as $topics
+        | select( ($allow | length) == 0 or (($allow - ($allow - $topics)) | length) > 0 )
+        | select( ($deny  | length) == 0 or (($deny  - ($deny  - $topics)) | length) == 0 )
+        | .full_name
+        ' "$BODY_FILE" > "$dir/$page.slugs"
+    jq 'length' "$BODY_FILE" > "$dir/$page.count"
+}
+
+# discover_org_repos <org> — prints, one per line, the `<owner>/<repo>` of every
+# repo in <org> that passes the topic filters, in the API's page order. Page 1's
+# Link header names the last page; the remaining pages are then fetched
+# REPO_CONCURRENCY at a time. Without a Link header it pages sequentially until
+# a short page. Emits only repo slugs on stdout — progress/errors go to stderr —
+# so callers can `read` it. An API error ends the listing at the failed page.
+discover_org_repos() {
+    local org="$1" dir last page running=0
+    dir=$(mktemp -d "$RUN_DIR/org-XXXXXX")
+    org_page "$org" 1 "$dir" || { echo "Skipping org '$org'" >&2; return 0; }
+    last=$(sed -n 's/.*[?&]page=\([0-9][0-9]*\)[^>]*>; *rel="last".*/\1/p' "$dir/1.link")
+    if [ -n "$last" ]; then
+        for ((page = 2; page <= last; page++)); do
+            ( private_buffers; org_page "$org" "$page" "$dir" ) &
+            running=$((running + 1))
+            if [ "$running" -ge "$REPO_CONCURRENCY" ]; then
+                wait -n || true
+                running=$((running - 1))
+            fi
+        done
+        wait || true
+    else
+        last=1
+        # A short page (< per_page) is the last one.
+        while [ "$(cat "$dir/$last.count")" -ge 100 ]; do
+            org_page "$org" $((last + 1)) "$dir" || break
+            last=$((last + 1))
+        done
+    fi
+    for ((page = 1; page <= last; page++)); do
+        [ -f "$dir/$page.count" ] || break
+        cat "$dir/$page.slugs"
     done
-    return 1
+    return 0
 }
 
 # is_excluded <path> — true if the repo-relative path matches any EXCLUDE_PATHS
@@ -228,80 +413,185 @@ fi
 echo ""
 echo "Total repositories to scan: ${#REPO_ARRAY[@]}"
 
-SCANNED=0
-
-for raw_repo in "${REPO_ARRAY[@]}"; do
-    SLUG="$(echo "$raw_repo" | xargs)"
-    [ -z "$SLUG" ] && continue
-    if [[ "$SLUG" != */* ]] || [[ "$SLUG" == */*/* ]]; then
-        echo "Repo '$SLUG' is not in '<owner>/<repo>' form — skipping" >&2
-        continue
-    fi
+# scan_repo <slug> <dir> — resolve the ref, list the tree, fetch new blobs and
+# transform each catalog-info file. Runs as a background job: writes
+# "<component_id>\t<result_file>" lines to <dir>/components (tree order) and
+# "<scanned> <fetched> <cached>" to <dir>/counts. The catalog writes happen
+# in the foreground, repo by repo in scan-list order (see replay_repo).
+scan_repo() {
+    local slug="$1" dir="$2" ref code path sha dir_path component_id result tmp i
+    local scanned=0 fetched=0 cached=0
+    local -a paths=() shas=() missing=()
+    local -A queued=()
+    : > "$dir/components"
+    echo "0 0 0" > "$dir/counts"
     echo ""
-    echo "=== Scanning $SLUG ==="
+    echo "=== Scanning $slug ==="
 
     # Resolve the ref: explicit branch, or the repo's default branch.
-    REF="$BRANCH"
-    if [ -z "$REF" ]; then
-        CODE=$(gh_get "application/vnd.github+json" "https://api.github.com/repos/$SLUG")
-        if [ "$CODE" != "200" ]; then
-            echo "Could not read repo $SLUG (HTTP $CODE): $(head -c 200 "$BODY_FILE" 2>/dev/null) — skipping" >&2
-            continue
+    ref="$BRANCH"
+    if [ -z "$ref" ]; then
+        code=$(gh_get "application/vnd.github+json" "https://api.github.com/repos/$slug")
+        if [ "$code" != "200" ]; then
+            echo "Could not read repo $slug (HTTP $code): $(head -c 200 "$BODY_FILE" 2>/dev/null) — skipping" >&2
+            return 0
         fi
-        REF=$(jq -r '.default_branch // "main"' "$BODY_FILE")
+        ref=$(jq -r '.default_branch // "main"' "$BODY_FILE")
     fi
-    echo "Ref: $REF"
+    echo "Ref: $ref"
 
     # One recursive Git Trees call enumerates the whole repo.
-    CODE=$(gh_get "application/vnd.github+json" "https://api.github.com/repos/$SLUG/git/trees/$REF?recursive=1")
-    if [ "$CODE" != "200" ]; then
-        echo "Git Trees API returned $CODE for $SLUG@$REF: $(head -c 200 "$BODY_FILE" 2>/dev/null) — skipping" >&2
-        continue
+    code=$(gh_get "application/vnd.github+json" "https://api.github.com/repos/$slug/git/trees/$ref?recursive=1")
+    if [ "$code" != "200" ]; then
+        echo "Git Trees API returned $code for $slug@$ref: $(head -c 200 "$BODY_FILE" 2>/dev/null) — skipping" >&2
+        return 0
     fi
     if [ "$(jq -r '.truncated // false' "$BODY_FILE")" = "true" ]; then
-        echo "WARNING: tree for $SLUG@$REF is truncated — some catalog-info files may be missed" >&2
+        echo "WARNING: tree for $slug@$ref is truncated — some catalog-info files may be missed" >&2
     fi
 
-    # Read ALL blob paths into an array up front — the per-file fetches below
-    # reuse $BODY_FILE, so the tree must be fully consumed before the loop body
-    # overwrites it.
-    mapfile -t ALL_PATHS < <(jq -r '.tree[]? | select(.type == "blob") | .path' "$BODY_FILE")
-
-    # Filter to catalog-info files, create one component per file.
-    for path in "${ALL_PATHS[@]}"; do
+    # Read the catalog-info blobs (basename in FILENAMES) into arrays up front —
+    # later calls reuse $BODY_FILE, so the tree must be fully consumed first.
+    while IFS=$'\t' read -r sha path; do
         [ -z "$path" ] && continue
-        is_catalog_file "$path" || continue
-
         if is_excluded "$path"; then
-            echo "Excluding $path in $SLUG (matches exclude_paths)"
+            echo "Excluding $path in $slug (matches exclude_paths)"
+            continue
+        fi
+        paths+=("$path")
+        shas+=("$sha")
+    done < <(jq -r --arg filenames "$FILENAMES" '
+        ($filenames | split(",") | map(gsub("^\\s+|\\s+$"; "")) | map(select(length > 0))) as $names
+        | .tree[]? | select(.type == "blob")
+        | select((.path | split("/") | last) as $base | any($names[]; . == $base))
+        | [.sha, .path] | @tsv' "$BODY_FILE")
+
+    # Fetch only the blobs that have neither a cached result nor a cached body.
+    for sha in ${shas[@]+"${shas[@]}"}; do
+        if [ -f "$RESULT_DIR/$sha.json" ] || [ -f "$STATE_DIR/blobs/$sha" ] || [ -n "${queued[$sha]:-}" ]; then
             continue
         fi
+        queued[$sha]=1
+        missing+=("$sha")
+    done
+    if [ ${#missing[@]} -gt 0 ]; then
+        echo "Fetching ${#missing[@]} new or changed catalog-info blob(s)"
+        fetch_blobs "$slug" "${missing[@]}"
+        fetched=${#missing[@]}
+    fi
+
+    # Transform each file into a result; the foreground writes them.
+    for i in "${!paths[@]}"; do
+        path="${paths[$i]}"
+        sha="${shas[$i]}"
 
-        dir="$(dirname "$path")"
-        if [ "$dir" = "." ]; then
-            COMPONENT_ID="${COMPONENT_ID_PREFIX}${SLUG}"
+        dir_path="$(dirname "$path")"
+        if [ "$dir_path" = "." ]; then
+            component_id="${COMPONENT_ID_PREFIX}${slug}"
         else
-            COMPONENT_ID="${COMPONENT_ID_PREFIX}${SLUG}/${dir}"
+            component_id="${COMPONENT_ID_PREFIX}${slug}/${dir_path}"
         fi
-        SCANNED=$((SCANNED + 1))
+        scanned=$((scanned + 1))
 
-        # Fetch the file body (raw). Skip this file on any non-200.
-        FILE_URL="https://api.github.com/repos/$SLUG/contents/$path?ref=$REF"
-        CODE=$(gh_get "application/vnd.github.raw" "$FILE_URL")
-        if [ "$CODE" != "200" ]; then
-            echo "Could not fetch $path from $SLUG (HTTP $CODE) — skipping file" >&2
+        echo ""
+        result="$RESULT_DIR/$sha.json"
+        if [ -f "$result" ]; then
+            cached=$((cached + 1))
+            echo "Unchanged $slug/$path (blob $sha) — using cached result"
+            # The result is shared by every file with this blob; log the skip
+            # reason against this file, not the one it was first built for.
+            jq -r --arg path "$slug/$path" \
+                '.path as $built | .skip // empty | if $built then split($built) | join($path) else . end' "$result"
+            touch "$result"
+        elif [ -f "$STATE_DIR/blobs/$sha" ]; then
+            # Private temp name: another repo's job may hold the same blob.
+            tmp=$(mktemp "$RESULT_DIR/.result-XXXXXX")
+            component_result "$(cat "$STATE_DIR/blobs/$sha")" "$slug/$path" "$tmp"
+            mv "$tmp" "$result"
+            touch "$STATE_DIR/blobs/$sha"
+        else
+            echo "Could not fetch $path from $slug — skipping file" >&2
             continue
         fi
-        YAML=$(cat "$BODY_FILE")
-
-        # Bare call — NOT wrapped in `if`. create_component returns non-zero
-        # only on a hard `lunar catalog raw` write failure; the `set -e` at the
-        # top then aborts the run so the hub retries it (the contract documented
-        # in helpers.sh) instead of exiting 0 with a partially-written catalog.
-        # Silent skips (parse error, no/many Components) return 0 and continue.
-        create_component "$COMPONENT_ID" "$YAML" "$SLUG/$path"
+        printf '%s\t%s\n' "$component_id" "$result" >> "$dir/components"
     done
+    echo "$scanned $fetched $cached" > "$dir/counts"
+}
+
+# replay_repo <dir> — foreground half of a repo: print the job's log, then write
+# its components in tree order.
+replay_repo() {
+    local dir="$1" component_id result s f c
+    cat "$dir/log"
+    if [ "$(cat "$dir/status")" != "0" ]; then
+        echo "Scan job failed (see log above) — aborting" >&2
+        return 1
+    fi
+    while IFS=$'\t' read -r component_id result; do
+        echo ""
+        # Bare call — NOT wrapped in `if`. write_component_result returns
+        # non-zero only on a hard `lunar catalog raw` write failure; the
+        # `set -e` at the top then aborts the run so the hub retries it (the
+        # contract documented in helpers.sh) instead of exiting 0 with a
+        # partially-written catalog. Skips return 0 and continue.
+        write_component_result "$component_id" "$result"
+    done < "$dir/components"
+    read -r s f c < "$dir/counts"
+    SCANNED=$((SCANNED + s))
+    FETCHED=$((FETCHED + f))
+    CACHED=$((CACHED + c))
+}
+
+SCANNED=0
+FETCHED=0
+CACHED=0
+
+# Repos are scanned REPO_CONCURRENCY at a time, each job into its own directory.
+# Finished jobs are replayed strictly in scan-list order, so logs and catalog
+# writes come out the same whatever order the jobs finish in.
+declare -a JOB_DIRS=()
+NEXT_REPLAY=0
+RUNNING=0
+
+# replay_finished — replay every finished job at the head of the queue.
+replay_finished() {
+    while [ "$NEXT_REPLAY" -lt ${#JOB_DIRS[@]} ] && [ -f "${JOB_DIRS[$NEXT_REPLAY]}/status" ]; do
+        replay_repo "${JOB_DIRS[$NEXT_REPLAY]}"
+        NEXT_REPLAY=$((NEXT_REPLAY + 1))
+    done
+}
+
+for raw_repo in "${REPO_ARRAY[@]}"; do
+    SLUG="$(echo "$raw_repo" | xargs)"
+    [ -z "$SLUG" ] && continue
+    if [[ "$SLUG" != */* ]] || [[ "$SLUG" == */*/* ]]; then
+        echo "Repo '$SLUG' is not in '<owner>/<repo>' form — skipping" >&2
+        continue
+    fi
+    JOB_DIR=$(mktemp -d "$RUN_DIR/repo-XXXXXX")
+    JOB_DIRS+=("$JOB_DIR")
+    # The job records its exit status on the way out (set -e still applies
+    # inside it); the status file appearing is what marks it finished.
+    (
+        trap 'echo $? > "$JOB_DIR/status.tmp"; mv "$JOB_DIR/status.tmp" "$JOB_DIR/status"' EXIT
+        private_buffers
+        scan_repo "$SLUG" "$JOB_DIR"
+    ) > "$JOB_DIR/log" 2>&1 &
+    RUNNING=$((RUNNING + 1))
+    if [ "$RUNNING" -ge "$REPO_CONCURRENCY" ]; then
+        wait -n || true
+        RUNNING=$((RUNNING - 1))
+    fi
+    replay_finished
 done
+wait || true
+replay_finished
+
+# Drop state no run has used in 30 days (renamed files, retired repos, old
+# transform settings).
+find "$STATE_DIR" -type f -mtime +30 -delete 2>/dev/null || true
+find "$STATE_DIR/results" -mindepth 1 -type d -empty -delete 2>/dev/null || true
 
 echo ""
 echo "Discovery complete: processed $SCANNED catalog-info file(s) across ${#REPO_ARRAY[@]} repo(s)"
+echo "Blobs fetched: $FETCHED, unchanged (no API call): $CACHED"
@@ -3,10 +3,14 @@
 # Local offline test for the backstage-catalog-info-monorepo cataloger.
 #
 # Exercises the `discover` (cron) entrypoint against a fake repository. `curl`
-# is mocked to stand in for the three GitHub API calls the cataloger makes:
+# is mocked to stand in for the GitHub API calls the cataloger makes:
 #   - GET /repos/<slug>                    -> {"default_branch": "main"}
 #   - GET /repos/<slug>/git/trees/<ref>    -> a tree built from the fake repo dir
-#   - GET /repos/<slug>/contents/<path>    -> the file at that path in the dir
+#   - GET /repos/<slug>/git/blobs/<sha>    -> the file with that blob SHA
+# Every response carries an ETag and answers a matching If-None-Match with 304,
+# like GitHub; each call is appended to $TEST_DIR/calls.log. MOCK_SLOW_REPO
+# delays that repo's tree call; MOCK_429_ONCE (a marker path) makes the first
+# call a secondary-rate-limit 429 with Retry-After: 1.
 # `lunar catalog raw` is mocked to capture writes to per-path .out files.
 #
 # Each scenario lays out catalog-info files at chosen paths in a fresh fake
@@ -32,45 +36,88 @@ set -euo pipefail
 REPO_DIR_ENV="${MOCK_REPO_DIR:?MOCK_REPO_DIR must be set}"
 OUT=""
 URL=""
+HDR=""
+IF_NONE_MATCH=""
 while [ $# -gt 0 ]; do
     case "$1" in
         -o) OUT="$2"; shift 2 ;;
-        -H|-w) shift 2 ;;
+        -D) HDR="$2"; shift 2 ;;
+        -H) case "$2" in "If-None-Match: "*) IF_NONE_MATCH="${2#If-None-Match: }" ;; esac; shift 2 ;;
+        -w) shift 2 ;;
         -sS|-s|-S|-L|-sSL) shift ;;
         http*|https*) URL="$1"; shift ;;
         *) shift ;;
     esac
 done
 [ -z "$OUT" ] && { echo "mock curl: -o required" >&2; exit 1; }
+echo "$URL" >> "${MOCK_CALLS_LOG:-/dev/null}"
+EXTRA_HDR=""
+
+if [ -n "${MOCK_429_ONCE:-}" ] && [ ! -e "$MOCK_429_ONCE" ]; then
+    touch "$MOCK_429_ONCE"
+    printf '{"message":"You have exceeded a secondary rate limit."}' > "$OUT"
+    [ -n "$HDR" ] && printf 'HTTP/2 429\r\nretry-after: 1\r\n\r\n' > "$HDR"
+    printf '429'
+    exit 0
+fi
+
+# respond <code> — send $OUT with an ETag header; 304 + empty body when the
+# client's If-None-Match already names this body.
+respond() {
+    local etag="\"$(sha1sum < "$OUT" | cut -d' ' -f1)\""
+    if [ "$1" = "200" ] && [ "$IF_NONE_MATCH" = "$etag" ]; then
+        : > "$OUT"
+        [ -n "$HDR" ] && printf 'HTTP/2 304\r\netag: %s\r\n\r\n' "$etag" > "$HDR"
+        echo "304 $URL" >> "${MOCK_CALLS_LOG:-/dev/null}"
+        printf '304'
+        return
+    fi
+    [ -n "$HDR" ] && printf 'HTTP/2 %s\r\netag: %s\r\n%s\r\n' "$1" "$etag" "$EXTRA_HDR" > "$HDR"
+    printf '%s' "$1"
+}
+
 case "$URL" in
     *"/orgs/"*"/repos"*)
         # Org discovery: emit the fake repo list (with topics) on page 1, an
         # empty page afterwards so pagination terminates. MOCK_ORG_REPOS is a
         # JSON array of {full_name, archived, topics}.
+        # MOCK_ORG_REPOS_PAGE2 adds a second page, announced by page 1's Link
+        # header the way GitHub does.
         case "$URL" in
-            *"page=1&"*) printf '%s' "${MOCK_ORG_REPOS:-[]}" > "$OUT"; printf '200' ;;
-            *)           printf '[]' > "$OUT"; printf '200' ;;
+            *"page=1&"*)
+                if [ -n "${MOCK_ORG_REPOS_PAGE2:-}" ]; then
+                    EXTRA_HDR=$(printf 'link: <%s>; rel="next", <%s>; rel="last"\r\n' "${URL/page=1&/page=2&}" "${URL/page=1&/page=2&}")
+                fi
+                printf '%s' "${MOCK_ORG_REPOS:-[]}" > "$OUT"; respond 200 ;;
+            *"page=2&"*) printf '%s' "${MOCK_ORG_REPOS_PAGE2:-[]}" > "$OUT"; respond 200 ;;
+            *)           printf '[]' > "$OUT"; respond 200 ;;
         esac
         ;;
     *"/git/trees/"*)
-        ( cd "$REPO_DIR_ENV" && find . -type f | sed 's|^\./||' ) \
-            | jq -R -s 'split("\n") | map(select(length > 0))
-                        | {tree: map({path: ., type: "blob"}), truncated: false}' > "$OUT"
-        printf '200'
+        [ -n "${MOCK_SLOW_REPO:-}" ] && [[ "$URL" == *"/repos/$MOCK_SLOW_REPO/"* ]] && sleep 1
+        # Blob SHAs are the sha1 of the content — a stand-in for git's own.
+        ( cd "$REPO_DIR_ENV" && find . -type f | sed 's|^\./||' | sort \
+            | while IFS= read -r f; do printf '%s\t%s\n' "$(sha1sum < "$f" | cut -d' ' -f1)" "$f"; done ) \
+            | jq -R -s 'split("\n") | map(select(length > 0) | split("\t"))
+                        | {tree: map({sha: .[0], path: .[1], type: "blob"}), truncated: false}' > "$OUT"
+        respond 200
         ;;
-    *"/contents/"*)
-        p="${URL#*/contents/}"; p="${p%%\?*}"
-        if [ -f "$REPO_DIR_ENV/$p" ]; then
-            cat "$REPO_DIR_ENV/$p" > "$OUT"; printf '200'
+    *"/git/blobs/"*)
+        sha="${URL##*/git/blobs/}"
+        match=$( cd "$REPO_DIR_ENV" && find . -type f | while IFS= read -r f; do
+            [ "$(sha1sum < "$f" | cut -d' ' -f1)" = "$sha" ] && { echo "$f"; break; }
+        done )
+        if [ -n "$match" ]; then
+            cat "$REPO_DIR_ENV/$match" > "$OUT"; respond 200
         else
-            printf '{"message":"Not Found"}' > "$OUT"; printf '404'
+            printf '{"message":"Not Found"}' > "$OUT"; respond 404
         fi
         ;;
     *"/repos/"*)
-        printf '{"default_branch":"main"}' > "$OUT"; printf '200'
+        printf '{"default_branch":"main"}' > "$OUT"; respond 200
         ;;
     *)
-        printf '{"message":"unhandled"}' > "$OUT"; printf '404'
+        printf '{"message":"unhandled"}' > "$OUT"; respond 404
         ;;
 esac
 exit 0
@@ -98,6 +145,7 @@ chmod +x "$TEST_DIR/lunar"
 export PATH="$TEST_DIR:$PATH"
 export MOCK_REPO_DIR="$REPO_DIR"
 export MOCK_LUNAR_TEST_DIR="$TEST_DIR"
+export MOCK_CALLS_LOG="$TEST_DIR/calls.log"
 
 FAILED=0
 PASSED=0
@@ -113,8 +161,14 @@ reset_env() {
           LUNAR_VAR_INCLUDE_DERIVED_TAGS LUNAR_VAR_OWNER_FORMAT \
           LUNAR_VAR_DEFAULT_OWNER LUNAR_VAR_DEFAULT_DOMAIN \
           LUNAR_VAR_ALLOW_IGNORE_ANNOTATION LUNAR_VAR_IGNORE_ANNOTATION \
+          LUNAR_VAR_FETCH_CONCURRENCY \
+          LUNAR_VAR_REPO_CONCURRENCY MOCK_ORG_REPOS_PAGE2 MOCK_SLOW_REPO MOCK_429_ONCE \
           MOCK_LUNAR_FAIL MOCK_ORG_REPOS 2>/dev/null || true
     export LUNAR_VAR_REPOS="acme/monorepo"
+    : > "$MOCK_CALLS_LOG"
+    # Fresh sync state per scenario, so earlier scenarios' caches don't leak in.
+    export LUNAR_VAR_STATE_DIR
+    LUNAR_VAR_STATE_DIR=$(mktemp -d "$TEST_DIR/state-XXXXXX")
     export LUNAR_SECRET_GH_TOKEN="stub-token"
 }
 
@@ -397,6 +451,95 @@ place payments.yaml "services/payments/catalog-info.yaml"
 export MOCK_LUNAR_FAIL="1"
 assert_main_fails "hard write failure → main.sh exits non-zero"
 
+# ── Scenario: incremental sync — unchanged repo fetches no blobs ─────────
+# calls_matching <pattern> — number of logged API calls matching the pattern.
+calls_matching() { grep -c -- "$1" "$MOCK_CALLS_LOG" || true; }
+check_count() {
+    if [ "$2" = "$3" ]; then
+        echo "  [$1] OK"; PASSED=$((PASSED+1))
+    else
+        echo "  [$1] FAIL — expected $3, got $2"; FAILED=$((FAILED+1))
+    fi
+}
+
+echo "── incremental_unchanged ──"
+fresh_repo; reset_out; reset_env
+place payments.yaml "services/payments/catalog-info.yaml"
+place web.yaml "services/web/catalog-info.yaml"
+run_main
+check_count "first run fetches every catalog-info blob" "$(calls_matching '/git/blobs/')" 2
+reset_out; : > "$MOCK_CALLS_LOG"
+run_main
+check_count "second run fetches no blobs" "$(calls_matching '/git/blobs/')" 0
+check_count "second run's tree call answered 304" "$(calls_matching '^304 .*/git/trees/')" 1
+assert "unchanged components still written" \
+    '(.["github.com/acme/monorepo/services/payments"].owner == "group:default/team-payments")
+     and has("github.com/acme/monorepo/services/web")' ''
+
+echo "── incremental_one_changed ──"
+: > "$MOCK_CALLS_LOG"; reset_out
+printf '\n# edited\n' >> "$REPO_DIR/services/web/catalog-info.yaml"
+run_main
+check_count "only the edited blob is fetched" "$(calls_matching '/git/blobs/')" 1
+assert "edited and unchanged components both written" \
+    'has("github.com/acme/monorepo/services/payments")
+     and has("github.com/acme/monorepo/services/web")' ''
+
+echo "── incremental_transform_change ──"
+: > "$MOCK_CALLS_LOG"; reset_out
+export LUNAR_VAR_TAG_PREFIX="cat-"
+run_main
+check_count "transform change re-uses cached blobs" "$(calls_matching '/git/blobs/')" 0
+assert "transform change applied to cached blobs" \
+    '.["github.com/acme/monorepo/services/payments"].tags | any(startswith("cat-"))' ''
+
+# ── Scenario: a cached skip is reported against the file's current path ─
+echo "── cached_skip_current_path ──"
+fresh_repo; reset_out; reset_env
+place only_system.yaml "services/old/catalog-info.yaml"
+run_main
+mkdir -p "$REPO_DIR/services/new"
+mv "$REPO_DIR/services/old/catalog-info.yaml" "$REPO_DIR/services/new/catalog-info.yaml"
+: > "$MOCK_CALLS_LOG"
+SKIP_LOG=$("$SCRIPT_DIR/main.sh" 2>&1 || true)
+check_count "moved skipped file is answered from the cache" "$(calls_matching '/git/blobs/')" 0
+check_count "cached skip names the new path" \
+    "$(grep -c 'Expected exactly one Component in acme/monorepo/services/new/' <<< "$SKIP_LOG" || true)" 1
+check_count "cached skip does not name the old path" \
+    "$(grep -c 'services/old/' <<< "$SKIP_LOG" || true)" 0
+
+# ── Scenario: concurrent repos — writes follow scan-list order ──────────
+echo "── concurrent_repos_ordered ──"
+fresh_repo; reset_out; reset_env
+export LUNAR_VAR_REPOS="acme/slow,acme/fast,acme/third"
+export MOCK_SLOW_REPO="acme/slow"
+place payments.yaml "services/payments/catalog-info.yaml"
+run_main
+check_count "writes in scan-list order despite the slow first repo" \
+    "$(jq -rs '[.[] | keys_unsorted[]] | join(",")' "$TEST_DIR/components.out")" \
+    "github.com/acme/slow/services/payments,github.com/acme/fast/services/payments,github.com/acme/third/services/payments"
+
+# ── Scenario: org listing pages fetched from the Link header ─────────────
+echo "── org_discovery_link_pages ──"
+fresh_repo; reset_out; reset_env
+export LUNAR_VAR_REPOS="" LUNAR_VAR_ORGS="acme" LUNAR_VAR_ALLOWED_TOPICS="lunar-monorepo"
+export MOCK_ORG_REPOS="$ORG_REPOS_JSON"
+export MOCK_ORG_REPOS_PAGE2='[{"full_name":"acme/svc-e","archived":false,"topics":["lunar-monorepo"]}]'
+place payments.yaml "services/payments/catalog-info.yaml"
+run_main
+assert "repos on the Link-announced second page are scanned" \
+    'has("github.com/acme/svc-a/services/payments") and has("github.com/acme/svc-e/services/payments")' ''
+
+# ── Scenario: a 429 with Retry-After is waited out and retried ───────────
+echo "── rate_limit_retry ──"
+fresh_repo; reset_out; reset_env
+export MOCK_429_ONCE="$TEST_DIR/429-sent"
+rm -f "$MOCK_429_ONCE"
+place payments.yaml "services/payments/catalog-info.yaml"
+run_main
+assert "rate-limited call retried after Retry-After" \
+    'has("github.com/acme/monorepo/services/payments")' ''
+
 echo ""
 echo "=========================================="
 echo "Passed: $PASSED  Failed: $FAILED"
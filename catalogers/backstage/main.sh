@@ -32,6 +32,10 @@
 #   auth_mode                 (default bearer) bearer | sigv4
 #   aws_region                (sigv4 only; falls back to AWS_REGION env)
 #   aws_service               (sigv4 only; default execute-api)
+#   field_projection          (default true) Request only the fields the
+#                             transform reads (Backstage `fields=`)
+#   state_dir                 (default $XDG_CACHE_HOME/lunar-backstage) Page
+#                             cache (ETags) and the resume checkpoint
 #
 # Secrets:
 #   LUNAR_SECRET_BACKSTAGE_TOKEN   (bearer mode; sent as Bearer if present)
@@ -93,6 +97,12 @@ PAGE_SIZE="${PAGE_SIZE:-200}"
 MAX_RETRIES="${MAX_RETRIES:-5}"
 INITIAL_BACKOFF="${INITIAL_BACKOFF:-5}"
 BATCH_SIZE="${BATCH_SIZE:-1000}"
+# A checkpoint older than this is discarded rather than resumed: pages fetched
+# that long ago are too stale to merge with fresh ones.
+CHECKPOINT_MAX_AGE_HOURS="${CHECKPOINT_MAX_AGE_HOURS:-24}"
+
+FIELD_PROJECTION="${LUNAR_VAR_FIELD_PROJECTION:-true}"
+STATE_ROOT="${LUNAR_VAR_STATE_DIR:-${XDG_CACHE_HOME:-$HOME/.cache}/lunar-backstage}"
 
 AUTH_MODE="${LUNAR_VAR_AUTH_MODE:-bearer}"
 
@@ -295,27 +305,79 @@ for kind in "${KIND_ARRAY[@]}"; do
     FILTER_QUERY="${FILTER_QUERY}&filter=$CLAUSE"
 done
 
+# Backstage `fields=` projection: only the attributes the transforms below
+# read. Entities also carry relations, status and the full spec, which are
+# most of the payload on a large catalog.
+FIELDS_QUERY=""
+if [ "$FIELD_PROJECTION" = "true" ]; then
+    FIELDS_QUERY="&fields=kind,metadata.name,metadata.description,metadata.tags,metadata.annotations,spec.owner,spec.type,spec.lifecycle,spec.system,spec.domain,spec.subdomainOf"
+fi
+
+WORK_DIR=$(mktemp -d)
+ALL_ENTITIES="$WORK_DIR/entities.json"
+FETCH_PID=""
+trap '[ -n "$FETCH_PID" ] && kill "$FETCH_PID" 2>/dev/null; rm -rf "$WORK_DIR"' EXIT
+
+# --- State ---------------------------------------------------------------
+# One subdirectory per query (instance, page size, projection, filters), so a
+# cursor or cached page is only ever replayed against the query it came from:
+#   http/<sha>.{etag,json}  last 200 response per page URL, for If-None-Match
+#   pages/<n>.jsonl         entities of each page of an unfinished walk
+#   checkpoint.json         {cursor, pages, fetched, updated} of that walk
+# An unwritable state_dir still works, for this run only.
+STATE_DIR="$STATE_ROOT/$(printf '%s\n' "$BACKSTAGE_URL$API_PATH_PREFIX" "$PAGE_SIZE" "$FIELDS_QUERY" "$FILTER_QUERY" | sha256sum | cut -c1-16)"
+if ! mkdir -p "$STATE_DIR/http" "$STATE_DIR/pages" 2>/dev/null || [ ! -w "$STATE_DIR" ]; then
+    echo "State dir $STATE_DIR is not writable — syncing without state" >&2
+    STATE_DIR="$WORK_DIR/state"
+    mkdir -p "$STATE_DIR/http" "$STATE_DIR/pages"
+fi
+find "$STATE_DIR/http" -type f -mtime +30 -delete 2>/dev/null || true
+CHECKPOINT="$STATE_DIR/checkpoint.json"
+PAGES_DIR="$STATE_DIR/pages"
+echo "State dir: $STATE_DIR"
+
 # --- Paginated fetch -----------------------------------------------------
+# fetch_page <cursor> <out> — write one by-query page to <out>. Sent as a
+# conditional request when an earlier 200 for the same URL left an ETag; a
+# 304 is answered from that cached response. Returns 2 when Backstage rejects
+# the request outright (e.g. a cursor it no longer accepts), 1 when transient
+# failures exhaust the retries. Runs as a background job.
 fetch_page() {
-    local cursor="$1"
-    local url="$BACKSTAGE_URL${API_PATH_PREFIX}/catalog/entities/by-query?limit=$PAGE_SIZE${cursor:+&cursor=$cursor}$FILTER_QUERY"
+    local cursor="$1" out="$2"
+    local url="$BACKSTAGE_URL${API_PATH_PREFIX}/catalog/entities/by-query?limit=$PAGE_SIZE$FIELDS_QUERY${cursor:+&cursor=$cursor}$FILTER_QUERY"
+    local cached etag
+    cached="$STATE_DIR/http/$(printf '%s' "$url" | sha256sum | cut -d' ' -f1)"
+    local -a conditional=()
+    if [ -f "$cached.etag" ] && [ -f "$cached.json" ]; then
+        conditional=(-H "If-None-Match: $(cat "$cached.etag")")
+    fi
 
     local attempt=1
     local backoff=$INITIAL_BACKOFF
     while [ "$attempt" -le "$MAX_RETRIES" ]; do
-        local response_file
-        response_file=$(mktemp)
         local http_status
-        http_status=$(curl -sS -o "$response_file" -w '%{http_code}' \
-            "${AUTH_ARGS[@]}" \
+        http_status=$(curl -sS -o "$out.body" -D "$out.headers" -w '%{http_code}' \
+            ${AUTH_ARGS[@]+"${AUTH_ARGS[@]}"} \
+            ${conditional[@]+"${conditional[@]}"} \
             -H "Accept: application/json" \
             "$url" 2>/dev/null || echo "000")
-        local body
-        body=$(cat "$response_file")
-        rm -f "$response_file"
+
+        if [ "$http_status" = "304" ]; then
+            cp "$cached.json" "$out"
+            touch "$cached.etag" "$cached.json"
+            rm -f "$out.body" "$out.headers"
+            return 0
+        fi
 
         if [ "$http_status" = "200" ]; then
-            echo "$body"
+            mv "$out.body" "$out"
+            etag=$(tr -d '\r' < "$out.headers" | awk 'tolower($1) == "etag:" { sub(/^[^:]*:[ \t]*/, ""); v = $0 } END { print v }')
+            rm -f "$out.headers"
+            # Drop the old ETag first so it can never pair with a newer body.
+            rm -f "$cached.etag"
+            if [ -n "$etag" ] && cp "$out" "$cached.json"; then
+                printf '%s' "$etag" > "$cached.etag"
+            fi
             return 0
         fi
 
@@ -328,46 +390,108 @@ fetch_page() {
         fi
 
         echo "Error from Backstage ($http_status) at cursor=$cursor:" >&2
-        echo "$body" | head -c 500 >&2
+        head -c 500 "$out.body" >&2 2>/dev/null || true
         echo "" >&2
-        return 1
+        rm -f "$out.body" "$out.headers"
+        return 2
     done
+    rm -f "$out.body" "$out.headers"
     echo "Failed to fetch page at cursor=$cursor after $MAX_RETRIES attempts" >&2
     return 1
 }
 
-ALL_ENTITIES=$(mktemp)
-trap 'rm -f "$ALL_ENTITIES" "${ALL_ENTITIES}.chunk" "${ALL_ENTITIES}.new" "${ALL_ENTITIES}.entries"' EXIT
-echo "[]" > "$ALL_ENTITIES"
+# start_fetch <cursor> — fetch a page into $WORK_DIR/next.json in the
+# background, so the next page downloads while the current one is processed.
+start_fetch() {
+    fetch_page "$1" "$WORK_DIR/next.json" &
+    FETCH_PID=$!
+}
+
+# reset_walk — forget any unfinished walk and start again from the first page.
+reset_walk() {
+    rm -f "$CHECKPOINT" "$PAGES_DIR"/*.jsonl
+    CURSOR=""
+    PAGE_NUM=0
+    TOTAL_FETCHED=0
+    RESUMED=false
+}
 
+# A walk that failed part-way left its pages and the cursor of the next page
+# behind; pick up from there instead of the first page.
 CURSOR=""
+PAGE_NUM=0
 TOTAL_FETCHED=0
+RESUMED=false
+if [ -f "$CHECKPOINT" ]; then
+    CHECKPOINT_AGE=$(( $(date +%s) - $(jq -r '.updated // 0' "$CHECKPOINT") ))
+    if [ "$CHECKPOINT_AGE" -le $((CHECKPOINT_MAX_AGE_HOURS * 3600)) ]; then
+        CURSOR=$(jq -r '.cursor' "$CHECKPOINT")
+        PAGE_NUM=$(jq -r '.pages' "$CHECKPOINT")
+        TOTAL_FETCHED=$(jq -r '.fetched' "$CHECKPOINT")
+        RESUMED=true
+        echo "Resuming from checkpoint: $PAGE_NUM page(s), $TOTAL_FETCHED entities already fetched"
+    else
+        echo "Discarding checkpoint older than ${CHECKPOINT_MAX_AGE_HOURS}h"
+        reset_walk
+    fi
+else
+    reset_walk
+fi
+
+start_fetch "$CURSOR"
 while true; do
-    RESPONSE=$(fetch_page "$CURSOR")
-    PAGE=$(echo "$RESPONSE" | jq '.items')
-    PAGE_COUNT=$(echo "$PAGE" | jq 'length')
+    FETCH_STATUS=0
+    wait "$FETCH_PID" || FETCH_STATUS=$?
+    FETCH_PID=""
+    if [ "$FETCH_STATUS" -eq 2 ] && [ "$RESUMED" = "true" ]; then
+        echo "Backstage rejected the checkpoint cursor — restarting from the first page" >&2
+        reset_walk
+        start_fetch ""
+        continue
+    fi
+    if [ "$FETCH_STATUS" -ne 0 ]; then
+        if [ "$PAGE_NUM" -gt 0 ]; then
+            echo "Checkpoint kept after $PAGE_NUM page(s); the next run resumes from there" >&2
+        fi
+        exit 1
+    fi
+    RESUMED=false
+    mv "$WORK_DIR/next.json" "$WORK_DIR/page.json"
 
+    PAGE_COUNT=$(jq '.items | length' "$WORK_DIR/page.json")
     if [ "$PAGE_COUNT" -eq 0 ]; then
         break
     fi
+    NEXT_CURSOR=$(jq -r '.pageInfo.nextCursor // empty' "$WORK_DIR/page.json")
+    if [ -n "$NEXT_CURSOR" ]; then
+        start_fetch "$NEXT_CURSOR"
+    fi
 
-    echo "$PAGE" > "${ALL_ENTITIES}.chunk"
-    jq -s 'add' "$ALL_ENTITIES" "${ALL_ENTITIES}.chunk" > "${ALL_ENTITIES}.new"
-    mv "${ALL_ENTITIES}.new" "$ALL_ENTITIES"
-    rm -f "${ALL_ENTITIES}.chunk"
-
+    PAGE_NUM=$((PAGE_NUM + 1))
+    jq -c '.items[]' "$WORK_DIR/page.json" > "$PAGES_DIR/$(printf '%06d' "$PAGE_NUM").jsonl"
     TOTAL_FETCHED=$((TOTAL_FETCHED + PAGE_COUNT))
     echo "  fetched cursor=${CURSOR:-start} page=$PAGE_COUNT total=$TOTAL_FETCHED"
 
-    NEXT_CURSOR=$(echo "$RESPONSE" | jq -r '.pageInfo.nextCursor // empty')
     if [ -z "$NEXT_CURSOR" ]; then
         break
     fi
     CURSOR="$NEXT_CURSOR"
+    jq -n --arg cursor "$CURSOR" --argjson pages "$PAGE_NUM" --argjson fetched "$TOTAL_FETCHED" \
+        --argjson updated "$(date +%s)" \
+        '{cursor: $cursor, pages: $pages, fetched: $fetched, updated: $updated}' > "$CHECKPOINT.new"
+    mv "$CHECKPOINT.new" "$CHECKPOINT"
 done
 
 echo "Total entities fetched: $TOTAL_FETCHED"
 
+# The walk is complete: assemble it and drop the checkpoint.
+if [ "$PAGE_NUM" -gt 0 ]; then
+    cat "$PAGES_DIR"/*.jsonl | jq -s '.' > "$ALL_ENTITIES"
+else
+    echo "[]" > "$ALL_ENTITIES"
+fi
+rm -f "$CHECKPOINT" "$PAGES_DIR"/*.jsonl
+
 if [ "$TOTAL_FETCHED" -eq 0 ]; then
     echo "No Backstage entities matched the filter; nothing to write"
     exit 0
@@ -13,6 +13,9 @@
 # path a real assertion: a regression to the wrong query-param name re-serves
 # page 1 forever and trips the "exactly 2 requests" / "domains came back" checks
 # below. (This is the bug class that shipped in the by-query migration.)
+#
+# The mock also answers If-None-Match with 304 when the page is unchanged, and
+# MOCK_FAIL_PAGE2=1 makes page 2 fail, for the checkpoint/resume scenarios.
 set -euo pipefail
 
 SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
@@ -22,6 +25,7 @@ COMPONENTS_OUT="$TEST_DIR/components.json"
 DOMAINS_OUT="$TEST_DIR/domains.json"
 CURL_CALLS="$TEST_DIR/curl-calls"
 CURL_URLS="$TEST_DIR/curl-urls"
+CURL_STATUSES="$TEST_DIR/curl-statuses"
 RUN_OUT="$TEST_DIR/run.out"
 
 trap 'rm -rf "$TEST_DIR"' EXIT
@@ -36,12 +40,16 @@ echo "Test directory: $TEST_DIR"
 cat > "$TEST_DIR/curl" << EOF
 #!/bin/bash
 WRITE_FILE=""
+HEADER_FILE=""
+IF_NONE_MATCH=""
 REQ_URL=""
 while [ \$# -gt 0 ]; do
     case "\$1" in
         -o) WRITE_FILE="\$2"; shift 2 ;;
-        -w) shift 2 ;;
-        -sS|-H|-X) shift 1; [ \$# -gt 0 ] && case "\$1" in -*) ;; *) shift 1 ;; esac ;;
+        -D) HEADER_FILE="\$2"; shift 2 ;;
+        -w|-X|--aws-sigv4|--user) shift 2 ;;
+        -H) case "\$2" in "If-None-Match: "*) IF_NONE_MATCH="\${2#If-None-Match: }" ;; esac; shift 2 ;;
+        -*) shift 1 ;;
         *) REQ_URL="\$1"; shift 1 ;;
     esac
 done
@@ -49,12 +57,28 @@ echo "\$REQ_URL" >> "$CURL_URLS"
 CALL_NUM=\$(wc -l < "$CURL_CALLS" 2>/dev/null || echo 0)
 echo "call \$((CALL_NUM + 1))" >> "$CURL_CALLS"
 if [ "\$CALL_NUM" -ge 4 ]; then
-    echo '{"items":[],"pageInfo":{}}' > "\$WRITE_FILE"
+    BODY='{"items":[],"pageInfo":{}}'
 elif echo "\$REQ_URL" | grep -q 'cursor=CURSOR_P2'; then
-    jq -c '{items: .items[5:], pageInfo: {}}' "$FIXTURE" > "\$WRITE_FILE"
+    if [ -n "\${MOCK_FAIL_PAGE2:-}" ]; then
+        echo "503" >> "$CURL_STATUSES"
+        echo '{"error":"unavailable"}' > "\$WRITE_FILE"
+        echo "503"
+        exit 0
+    fi
+    BODY=\$(jq -c '{items: .items[5:], pageInfo: {}}' "$FIXTURE")
 else
-    jq -c '{items: .items[0:5], pageInfo: {nextCursor: "CURSOR_P2"}}' "$FIXTURE" > "\$WRITE_FILE"
+    BODY=\$(jq -c '{items: .items[0:5], pageInfo: {nextCursor: "CURSOR_P2"}}' "$FIXTURE")
+fi
+ETAG="W/\"\$(printf '%s' "\$BODY" | sha1sum | cut -c1-16)\""
+[ -n "\$HEADER_FILE" ] && printf 'HTTP/1.1 200 OK\r\nETag: %s\r\n\r\n' "\$ETAG" > "\$HEADER_FILE"
+if [ "\$IF_NONE_MATCH" = "\$ETAG" ]; then
+    : > "\$WRITE_FILE"
+    echo "304" >> "$CURL_STATUSES"
+    echo "304"
+    exit 0
 fi
+printf '%s\n' "\$BODY" > "\$WRITE_FILE"
+echo "200" >> "$CURL_STATUSES"
 echo "200"
 EOF
 chmod +x "$TEST_DIR/curl"
@@ -95,6 +119,7 @@ export LUNAR_VAR_DEFAULT_OWNER="${TEST_DEFAULT_OWNER:-}"
 export LUNAR_VAR_DOMAIN_DEFAULT_DESCRIPTION="${TEST_DOMAIN_DEFAULT_DESCRIPTION:-}"
 export LUNAR_VAR_FILTER="${TEST_FILTER:-}"
 export LUNAR_SECRET_BACKSTAGE_TOKEN="${TEST_BACKSTAGE_TOKEN:-mock-token}"
+export LUNAR_VAR_STATE_DIR="$TEST_DIR/state"
 
 # Speed up the mocked retry path
 export PAGE_SIZE="${PAGE_SIZE:-200}"
@@ -115,6 +140,7 @@ echo ""
 : > "$DOMAINS_OUT"
 : > "$CURL_CALLS"
 : > "$CURL_URLS"
+: > "$CURL_STATUSES"
 
 echo "=== Cataloger output ==="
 "$SCRIPT_DIR/main.sh" 2>&1 | tee "$RUN_OUT"
@@ -206,6 +232,12 @@ FULFILL_DOMAIN=$(echo "$CAPTURED_COMPONENTS" | jq -r '.["github.com/acme/fulfill
 [ "$FULFILL_DOMAIN" = "commerce.checkout.orders.fulfillment" ] || \
     fail "fulfillment-api domain: expected 'commerce.checkout.orders.fulfillment', got '$FULFILL_DOMAIN'"
 
+# 5b. Only the fields the transform reads are requested (fields= projection),
+#     on every page — Backstage does not carry the projection in the cursor.
+if [ "$(grep -c 'fields=kind,metadata.name,' "$CURL_URLS")" -ne "$CALLS" ]; then
+    fail "every request must carry the fields= projection"
+fi
+
 # --- 6. Structured include/exclude filters -------------------------------
 # Re-run the cataloger against the same fixture with each filter set and assert
 # the resulting component key set (github.com/ prefix stripped, sorted, joined).
@@ -221,7 +253,7 @@ echo "=== Filter scenarios ==="
 # filter_keys inc_types exc_types inc_life exc_life inc_dom exc_dom inc_sys exc_sys
 # -> echoes sorted, comma-joined component keys with the github.com/ prefix stripped.
 filter_keys() {
-    : > "$COMPONENTS_OUT"; : > "$DOMAINS_OUT"; : > "$CURL_CALLS"; : > "$CURL_URLS"
+    : > "$COMPONENTS_OUT"; : > "$DOMAINS_OUT"; : > "$CURL_CALLS"; : > "$CURL_URLS"; : > "$CURL_STATUSES"
     if ! LUNAR_VAR_INCLUDE_TYPES="$1" LUNAR_VAR_EXCLUDE_TYPES="$2" \
          LUNAR_VAR_INCLUDE_LIFECYCLES="$3" LUNAR_VAR_EXCLUDE_LIFECYCLES="$4" \
          LUNAR_VAR_INCLUDE_DOMAINS="$5" LUNAR_VAR_EXCLUDE_DOMAINS="$6" \
@@ -286,9 +318,64 @@ DOMAINS_UNDER_FILTER=$(jq -s 'add // {} | keys | length' "$DOMAINS_OUT")
 [ "$DOMAINS_UNDER_FILTER" -eq "$EXPECTED_DOMAINS" ] || \
     fail "domains must be unaffected by component filters: expected $EXPECTED_DOMAINS, got $DOMAINS_UNDER_FILTER"
 
+# --- 7. Conditional requests and checkpoint/resume ----------------------
+echo ""
+echo "=== Checkpoint scenarios ==="
+
+reset_run() { : > "$COMPONENTS_OUT"; : > "$DOMAINS_OUT"; : > "$CURL_CALLS"; : > "$CURL_URLS"; : > "$CURL_STATUSES"; }
+
+# An unchanged catalog is re-validated with If-None-Match and served from the
+# page cache: every page comes back 304 and the catalog written is unchanged.
+reset_run
+"$SCRIPT_DIR/main.sh" > "$TEST_DIR/etag.out" 2>&1 || fail "[etag] cataloger run failed"
+STATUSES=$(paste -sd, "$CURL_STATUSES")
+[ "$STATUSES" = "304,304" ] || fail "[etag] expected both pages revalidated as 304, got {$STATUSES}"
+ETAG_COMPONENTS=$(jq -s 'add // {}' "$COMPONENTS_OUT")
+[ "$ETAG_COMPONENTS" = "$CAPTURED_COMPONENTS" ] || fail "[etag] catalog from cached pages differs from the original"
+echo "  ok: unchanged pages revalidated ($STATUSES)"
+
+# Page 2 fails: the run fails, but keeps page 1 and the page-2 cursor.
+rm -rf "$LUNAR_VAR_STATE_DIR"
+reset_run
+if MOCK_FAIL_PAGE2=1 MAX_RETRIES=1 "$SCRIPT_DIR/main.sh" > "$TEST_DIR/resume.out" 2>&1; then
+    fail "[resume] run with a failing page 2 must fail"
+fi
+CHECKPOINT_CURSOR=$(cat "$LUNAR_VAR_STATE_DIR"/*/checkpoint.json 2>/dev/null | jq -r '.cursor')
+[ "$CHECKPOINT_CURSOR" = "CURSOR_P2" ] || fail "[resume] expected checkpoint at CURSOR_P2, got '${CHECKPOINT_CURSOR}'"
+[ -s "$COMPONENTS_OUT" ] && fail "[resume] a failed walk must not write the catalog"
+
+# The next run resumes at page 2 — a single request — and writes everything.
+reset_run
+"$SCRIPT_DIR/main.sh" > "$TEST_DIR/resume.out" 2>&1 || fail "[resume] resumed run failed"
+RESUME_CALLS=$(wc -l < "$CURL_CALLS")
+[ "$RESUME_CALLS" -eq 1 ] || fail "[resume] expected 1 request (page 2 only), got $RESUME_CALLS"
+grep -q 'cursor=CURSOR_P2' "$CURL_URLS" || fail "[resume] resumed request must carry cursor=CURSOR_P2"
+grep -q "Total entities fetched: $EXPECTED_TOTAL" "$TEST_DIR/resume.out" || \
+    fail "[resume] expected 'Total entities fetched: $EXPECTED_TOTAL' after resuming"
+RESUME_COMPONENTS=$(jq -s 'add // {}' "$COMPONENTS_OUT")
+[ "$RESUME_COMPONENTS" = "$CAPTURED_COMPONENTS" ] || fail "[resume] resumed catalog differs from a full walk"
+if ls "$LUNAR_VAR_STATE_DIR"/*/checkpoint.json >/dev/null 2>&1; then
+    fail "[resume] checkpoint must be cleared once the walk completes"
+fi
+echo "  ok: failed walk resumed from page 2 ($RESUME_CALLS request)"
+
+# A checkpoint past CHECKPOINT_MAX_AGE_HOURS is discarded: full walk again.
+reset_run
+MOCK_FAIL_PAGE2=1 MAX_RETRIES=1 "$SCRIPT_DIR/main.sh" > /dev/null 2>&1 || true
+for f in "$LUNAR_VAR_STATE_DIR"/*/checkpoint.json; do
+    jq '.updated = 0' "$f" > "$f.tmp" && mv "$f.tmp" "$f"
+done
+reset_run
+"$SCRIPT_DIR/main.sh" > "$TEST_DIR/stale.out" 2>&1 || fail "[stale] run failed"
+STALE_CALLS=$(wc -l < "$CURL_CALLS")
+[ "$STALE_CALLS" -eq 2 ] || fail "[stale] expected a full 2-page walk, got $STALE_CALLS request(s)"
+grep -q "Total entities fetched: $EXPECTED_TOTAL" "$TEST_DIR/stale.out" || \
+    fail "[stale] expected 'Total entities fetched: $EXPECTED_TOTAL'"
+echo "  ok: stale checkpoint discarded"
+
 echo ""
 if [ "$FAILED" -eq 0 ]; then
-    echo "PASS: 2-page cursor pagination, api_path_prefix='${NP:-<none>}', $COMPONENTS_GOT components + $DOMAINS_GOT domains, nested subdomainOf/system paths, and include/exclude filters (type/lifecycle/domain/system) verified"
+    echo "PASS: 2-page cursor pagination, api_path_prefix='${NP:-<none>}', $COMPONENTS_GOT components + $DOMAINS_GOT domains, nested subdomainOf/system paths, include/exclude filters (type/lifecycle/domain/system), fields= projection, ETag revalidation and checkpoint resume verified"
 else
     echo "TEST FAILED" >&2
     exit 1
@@ -63,15 +63,25 @@ MAX_RETRIES=5
 INITIAL_BACKOFF=5  # seconds
 
 # How many repos to fetch per visibility level, from the max_repos_per_visibility
-# input (default 10000). `gh repo list` requires a --limit (it defaults to 30)
-# and paginates up to this number via GitHub's GraphQL repositories connection —
-# cursor-based, so there is NO 1000-result Search-API cap; it keeps paging until
-# the org is exhausted or this ceiling is reached. The default covers most orgs;
-# raise the input for an org with more repos than this in a single visibility. If
-# a fetch comes back at exactly this ceiling we warn instead of silently
-# cataloging a partial org.
+# input (default 10000). Repos are paged through GitHub's GraphQL repositories
+# connection — cursor-based, so there is NO 1000-result Search-API cap; paging
+# continues until the org is exhausted or every enabled visibility has reached
+# this ceiling. The default covers most orgs; raise the input for an org with
+# more repos than this in a single visibility. If a visibility reaches exactly
+# this ceiling we warn instead of silently cataloging a partial org.
 FETCH_LIMIT="${LUNAR_VAR_MAX_REPOS_PER_VISIBILITY:-10000}"
 
+# Components per `lunar catalog raw` call, from the catalog_batch_size input.
+# Peak memory is bounded by this plus one 100-repo page.
+BATCH_SIZE="${LUNAR_VAR_CATALOG_BATCH_SIZE:-1000}"
+
+# Delta sync, from the delta_sync input: keep a snapshot of the org's repos
+# under state_dir and, between full reconciles (every full_sync_interval_hours),
+# fetch only the repos updated since the last run. See "Delta sync" below.
+DELTA_SYNC="${LUNAR_VAR_DELTA_SYNC:-false}"
+FULL_SYNC_INTERVAL_HOURS="${LUNAR_VAR_FULL_SYNC_INTERVAL_HOURS:-24}"
+STATE_ROOT="${LUNAR_VAR_STATE_DIR:-${XDG_CACHE_HOME:-$HOME/.cache}/lunar-github-org}"
+
 # Build list of visibilities to fetch
 VISIBILITIES=()
 if [ "$INCLUDE_PUBLIC" = "true" ]; then
@@ -136,55 +146,82 @@ patterns_to_regex() {
     echo "${regex_parts[*]}"
 }
 
-# Fetch repos with retry and exponential backoff
-fetch_repos_with_retry() {
-    local visibility="$1"
+# One page of the org's repositories (GraphQL, cursor-based — no Search-API
+# cap). Archived repos are filtered server-side unless include_archived is set;
+# visibility is filtered per page below, so all enabled visibilities share one
+# pass over the org. Delta sync instead lists the whole org most recently
+# updated first, so a delta run can stop at the first repo it already has, and
+# a repo that becomes archived still shows up to be dropped.
+ARCHIVED_ARG=""
+ORDER_BY="{field: NAME, direction: ASC}"
+if [ "$DELTA_SYNC" = "true" ]; then
+    ORDER_BY="{field: UPDATED_AT, direction: DESC}"
+elif [ "$INCLUDE_ARCHIVED" = "false" ]; then
+    ARCHIVED_ARG=", isArchived: false"
+fi
+REPOS_QUERY='query($org: String!, $endCursor: String) {
+  organization(login: $org) {
+    repositories(first: 100, after: $endCursor, orderBy: '"$ORDER_BY$ARCHIVED_ARG"') {
+      nodes {
+        name
+        url
+        description
+        isArchived
+        visibility
+        updatedAt
+        repositoryTopics(first: 20) { nodes { topic { name } } }
+      }
+      pageInfo { hasNextPage endCursor }
+    }
+  }
+}'
+
+# Fetch one page with retry and exponential backoff
+# fetch_page_with_retry <cursor> <out_file> — cursor empty for the first page.
+fetch_page_with_retry() {
+    local cursor="$1"
+    local out_file="$2"
     local attempt=1
     local backoff=$INITIAL_BACKOFF
-    
+
     while [ $attempt -le $MAX_RETRIES ]; do
-        # Build gh command
-        local GH_ARGS=(repo list "$ORG_NAME" --visibility "$visibility" --limit "$FETCH_LIMIT")
-        GH_ARGS+=(--json "name,url,description,repositoryTopics,isArchived,visibility")
-        
-        if [ "$INCLUDE_ARCHIVED" = "false" ]; then
-            GH_ARGS+=(--no-archived)
+        local GH_ARGS=(api graphql -F org="$ORG_NAME" -f query="$REPOS_QUERY")
+        if [ -n "$cursor" ]; then
+            GH_ARGS+=(-F endCursor="$cursor")
         fi
-        
+
         # Try to fetch
-        local output
         local exit_code=0
-        output=$(gh "${GH_ARGS[@]}" 2>&1) || exit_code=$?
-        
+        gh "${GH_ARGS[@]}" > "$out_file" 2> "${out_file}.err" || exit_code=$?
+
         if [ $exit_code -eq 0 ]; then
-            echo "$output"
             return 0
         fi
-        
+
         # Check for rate limit error
-        if echo "$output" | grep -qi "rate limit\|secondary rate\|abuse detection"; then
+        if cat "${out_file}.err" "$out_file" | grep -qi "rate limit\|secondary rate\|abuse detection"; then
             echo "Rate limited (attempt $attempt/$MAX_RETRIES), waiting ${backoff}s..." >&2
             sleep $backoff
             backoff=$((backoff * 2))
             attempt=$((attempt + 1))
             continue
         fi
-        
+
         # Check for other retryable errors (network issues, 5xx)
-        if echo "$output" | grep -qiE "timeout|connection|503|502|500"; then
+        if cat "${out_file}.err" "$out_file" | grep -qiE "timeout|connection|503|502|500"; then
             echo "Transient error (attempt $attempt/$MAX_RETRIES), waiting ${backoff}s..." >&2
             sleep $backoff
             backoff=$((backoff * 2))
             attempt=$((attempt + 1))
             continue
         fi
-        
+
         # Non-retryable error
-        echo "Error fetching $visibility repos: $output" >&2
+        echo "Error fetching repos: $(cat "${out_file}.err" "$out_file")" >&2
         return 1
     done
-    
-    echo "Failed to fetch $visibility repos after $MAX_RETRIES attempts" >&2
+
+    echo "Failed to fetch repos after $MAX_RETRIES attempts" >&2
     return 1
 }
 
@@ -195,95 +232,67 @@ EXCLUDE_REGEX=$(patterns_to_regex "$EXCLUDE_REPOS")
 [ -n "$INCLUDE_REGEX" ] && echo "Include regex: $INCLUDE_REGEX"
 [ -n "$EXCLUDE_REGEX" ] && echo "Exclude regex: $EXCLUDE_REGEX"
 
-# Use temp file for large dataset handling
-TEMP_FILE=$(mktemp)
-trap 'rm -f "$TEMP_FILE" "${TEMP_FILE}.chunk" "${TEMP_FILE}.new"' EXIT
-
-# Initialize with empty array
-echo "[]" > "$TEMP_FILE"
-
-# Collect repos from all visibility levels
-for visibility in "${VISIBILITIES[@]}"; do
-    echo "Fetching $visibility repos..."
-    
-    if ! REPOS=$(fetch_repos_with_retry "$visibility"); then
-        echo "Failed to fetch $visibility repos, aborting"
-        exit 1
-    fi
-    
-    REPO_COUNT=$(echo "$REPOS" | jq 'length')
-    echo "Found $REPO_COUNT $visibility repos"
-
-    # gh stops paginating at --limit, so a fetch that returns exactly FETCH_LIMIT
-    # almost certainly means the org has more repos than the configured ceiling.
-    # Warn loudly (pointing at the input to raise) instead of silently cataloging
-    # a partial org.
-    if [ "$REPO_COUNT" -ge "$FETCH_LIMIT" ]; then
-        echo "WARNING: reached the fetch ceiling of $FETCH_LIMIT $visibility repos — results may be TRUNCATED and some repositories not cataloged. Raise the 'max_repos_per_visibility' input to catalog them all." >&2
-    fi
-
-    # Merge into temp file (single jq call, not accumulating in memory)
-    echo "$REPOS" > "${TEMP_FILE}.chunk"
-    jq -s 'add' "$TEMP_FILE" "${TEMP_FILE}.chunk" > "${TEMP_FILE}.new"
-    mv "${TEMP_FILE}.new" "$TEMP_FILE"
-    rm -f "${TEMP_FILE}.chunk"
-done
-
-TOTAL_COUNT=$(jq 'length' "$TEMP_FILE")
-echo "Total repos fetched: $TOTAL_COUNT"
+# Per-page transform. Input: one GraphQL page. $remaining holds how many more
+# repos each enabled visibility may take before the max_repos_per_visibility
+# ceiling. Output (compact JSON, one per line): first a state line
+# {remaining, fetched, hasNextPage, endCursor}, then one {key, value} catalog
+# entry per repo that passes the visibility ceiling and the filters.
+PAGE_JQ='
+# Parse a comma-separated input into a trimmed, non-empty set of topics.
+def csv_set($s): ($s | split(",") | map(gsub("^\\s+|\\s+$"; "")) | map(select(length > 0)));
+(csv_set($allowed_topics)) as $allow |
+(csv_set($disallowed_topics)) as $deny |
+.data.organization.repositories as $conn |
 
-# Batch size for lunar catalog calls
-BATCH_SIZE=1000
-
-# Filter and transform all repos in a single jq call
-# Output as array of {key, value} pairs for easier batching
-CATALOG_ENTRIES=$(jq \
-    --arg prefix "$TAG_PREFIX" \
-    --arg owner "$DEFAULT_OWNER" \
-    --arg domain "$DEFAULT_DOMAIN" \
-    --arg include_regex "$INCLUDE_REGEX" \
-    --arg exclude_regex "$EXCLUDE_REGEX" \
-    --arg allowed_topics "$ALLOWED_TOPICS" \
-    --arg disallowed_topics "$DISALLOWED_TOPICS" \
-    '
-    # Parse a comma-separated input into a trimmed, non-empty set of topics.
-    def csv_set($s): ($s | split(",") | map(gsub("^\\s+|\\s+$"; "")) | map(select(length > 0)));
-    (csv_set($allowed_topics)) as $allow |
-    (csv_set($disallowed_topics)) as $deny |
-
-    # Filter repos based on include/exclude patterns and topic allow/blocklists
-    [.[] |
-        # Apply include filter (if specified, must match)
-        select(
-            ($include_regex == "") or
-            (.name | test($include_regex))
-        ) |
-        # Apply exclude filter (if specified, must not match)
-        select(
-            ($exclude_regex == "") or
-            (.name | test($exclude_regex) | not)
-        ) |
-        # Repo topics as a plain string array
-        ([(.repositoryTopics // [])[] | .name]) as $topics |
-        # Allowlist: if set, the repo must carry at least one allowed topic.
-        # ($allow - ($allow - $topics)) is the intersection (allow ∩ topics).
-        select(
-            ($allow | length) == 0 or
-            (($allow - ($allow - $topics)) | length) > 0
-        ) |
-        # Blocklist: if set, the repo must carry none of the disallowed topics.
-        select(
-            ($deny | length) == 0 or
-            (($deny - ($deny - $topics)) | length) == 0
-        )
-    ] |
+# Take repos of enabled visibilities, up to each one'"'"'s remaining ceiling.
+(reduce (($conn.nodes // [])[] | select(. != null)
+        | select($include_archived == "true" or (.isArchived | not))) as $r (
+    {remaining: $remaining, kept: []};
+    ($r.visibility | ascii_downcase) as $v |
+    if (.remaining[$v] // 0) > 0
+    then .remaining[$v] -= 1 | .kept += [$r]
+    else . end
+)) as $page |
 
-    # Transform to catalog format as array of entries (for batching)
-    [.[] | {
+{
+    remaining: $page.remaining,
+    fetched: ($page.kept | length),
+    hasNextPage: ($conn.pageInfo.hasNextPage // false),
+    endCursor: $conn.pageInfo.endCursor
+},
+(
+    $page.kept[] |
+    # Same shape `gh repo list --json` used: topics as [{name}]
+    .repositoryTopics = [(.repositoryTopics.nodes // [])[] | {name: .topic.name}] |
+    # Apply include filter (if specified, must match)
+    select(
+        ($include_regex == "") or
+        (.name | test($include_regex))
+    ) |
+    # Apply exclude filter (if specified, must not match)
+    select(
+        ($exclude_regex == "") or
+        (.name | test($exclude_regex) | not)
+    ) |
+    # Repo topics as a plain string array
+    ([.repositoryTopics[] | .name]) as $topics |
+    # Allowlist: if set, the repo must carry at least one allowed topic.
+    # ($allow - ($allow - $topics)) is the intersection (allow ∩ topics).
+    select(
+        ($allow | length) == 0 or
+        (($allow - ($allow - $topics)) | length) > 0
+    ) |
+    # Blocklist: if set, the repo must carry none of the disallowed topics.
+    select(
+        ($deny | length) == 0 or
+        (($deny - ($deny - $topics)) | length) == 0
+    ) |
+    # Transform to a catalog entry (batched below)
+    {
         key: (.url | gsub("https://"; "")),
         value: (
             {
-                tags: ([(.repositoryTopics // [])[] | .name | "\($prefix)\(.)"] + ["github-visibility-\(.visibility | ascii_downcase)"]),
+                tags: ([$topics[] | "\($prefix)\(.)"] + ["github-visibility-\(.visibility | ascii_downcase)"]),
                 meta: {
                     description: .description,
                     visibility: .visibility,
@@ -292,25 +301,36 @@ CATALOG_ENTRIES=$(jq \
             } + (if $owner != "" then {owner: $owner} else {} end)
               + (if $domain != "" then {domain: $domain} else {} end)
         )
-    }]
-    ' "$TEMP_FILE")
+    }
+)
+'
 
-# Get total count
-TOTAL_ENTRIES=$(echo "$CATALOG_ENTRIES" | jq 'length')
-echo "Components after filtering: $TOTAL_ENTRIES"
+# Streaming: each page is transformed as it arrives and its entries appended
+# to BATCH_FILE, which is flushed to the catalog every BATCH_SIZE entries. Only
+# one page and one batch are ever held, however large the org.
+WORK_DIR=$(mktemp -d)
+trap 'rm -rf "$WORK_DIR"' EXIT
+PAGE_FILE="$WORK_DIR/page.json"
+ENTRIES_FILE="$WORK_DIR/entries.jsonl"
+BATCH_FILE="$WORK_DIR/batch.jsonl"
+: > "$BATCH_FILE"
 
-if [ "$TOTAL_ENTRIES" -eq 0 ]; then
-    echo "No components to catalog"
-    exit 0
-fi
+BATCH_NUM=0
+SUCCESS_COUNT=0
+FAIL_COUNT=0
+TOTAL_COUNT=0
+TOTAL_ENTRIES=0
+DOMAIN_REGISTERED=false
 
-# Register the default domain BEFORE writing components. Every component above
+# Register the default domain BEFORE writing components. Every component
 # carries `domain: $DEFAULT_DOMAIN`, and the hub's validateDomainRefs drops the
 # entire catalog merge if a component references a domain absent from .domains.
 # Writing it first keeps every intermediate merge-save valid. A higher-precedence
 # definition in lunar-config.yml (or a later cataloger) still wins on merge, so
 # this is just the safety net that keeps the reference valid.
-if [ -n "$DEFAULT_DOMAIN" ]; then
+register_domain() {
+    DOMAIN_REGISTERED=true
+    [ -z "$DEFAULT_DOMAIN" ] && return 0
     echo "Registering domain '$DEFAULT_DOMAIN' under .domains"
     if jq -n --arg d "$DEFAULT_DOMAIN" \
         '{($d): {description: "Created by the github-org cataloger"}}' \
@@ -320,48 +340,207 @@ if [ -n "$DEFAULT_DOMAIN" ]; then
         echo "Failed to register domain '$DEFAULT_DOMAIN'" >&2
         exit 1
     fi
-fi
+}
 
-# Process in batches
-BATCH_NUM=0
-SUCCESS_COUNT=0
-FAIL_COUNT=0
+# flush_batch <count> — write the first <count> buffered entries to the catalog.
+flush_batch() {
+    local count="$1"
+    [ "$count" -gt 0 ] || return 0
+    [ "$DOMAIN_REGISTERED" = "true" ] || register_domain
 
-while true; do
-    START=$((BATCH_NUM * BATCH_SIZE))
-    
-    # Check if we've processed all entries
-    if [ "$START" -ge "$TOTAL_ENTRIES" ]; then
-        break
-    fi
-    
-    END=$((START + BATCH_SIZE))
-    if [ "$END" -gt "$TOTAL_ENTRIES" ]; then
-        END=$TOTAL_ENTRIES
-    fi
-    
     BATCH_NUM=$((BATCH_NUM + 1))
-    BATCH_COUNT=$((END - START))
-    
-    echo "Processing batch $BATCH_NUM: components $((START + 1))-$END of $TOTAL_ENTRIES"
-    
-    # Extract batch and convert to object format for lunar catalog
-    BATCH_COMPONENTS=$(echo "$CATALOG_ENTRIES" | jq \
-        --argjson start "$START" \
-        --argjson count "$BATCH_COUNT" \
-        '.[$start:$start + $count] | from_entries')
-    
+    echo "Processing batch $BATCH_NUM: components $((SUCCESS_COUNT + FAIL_COUNT + 1))-$((SUCCESS_COUNT + FAIL_COUNT + count))"
+
     # Write batch to catalog
-    if echo "$BATCH_COMPONENTS" | lunar catalog raw --json '.components' -; then
-        SUCCESS_COUNT=$((SUCCESS_COUNT + BATCH_COUNT))
-        echo "Batch $BATCH_NUM: successfully cataloged $BATCH_COUNT components"
+    if head -n "$count" "$BATCH_FILE" | jq -s 'from_entries' | lunar catalog raw --json '.components' -; then
+        SUCCESS_COUNT=$((SUCCESS_COUNT + count))
+        echo "Batch $BATCH_NUM: successfully cataloged $count components"
     else
-        FAIL_COUNT=$((FAIL_COUNT + BATCH_COUNT))
-        echo "Batch $BATCH_NUM: FAILED to catalog $BATCH_COUNT components" >&2
+        FAIL_COUNT=$((FAIL_COUNT + count))
+        echo "Batch $BATCH_NUM: FAILED to catalog $count components" >&2
         # Continue with next batch instead of aborting
     fi
+    tail -n "+$((count + 1))" "$BATCH_FILE" > "$BATCH_FILE.rest"
+    mv "$BATCH_FILE.rest" "$BATCH_FILE"
+}
+
+# process_page <page_file> — transform one GraphQL page (or a snapshot chunk in
+# the same shape) and buffer its entries, flushing full batches. Sets
+# PAGE_STATE to the page's state line.
+process_page() {
+    jq -c \
+        --argjson remaining "$REMAINING" \
+        --arg prefix "$TAG_PREFIX" \
+        --arg owner "$DEFAULT_OWNER" \
+        --arg domain "$DEFAULT_DOMAIN" \
+        --arg include_regex "$INCLUDE_REGEX" \
+        --arg exclude_regex "$EXCLUDE_REGEX" \
+        --arg allowed_topics "$ALLOWED_TOPICS" \
+        --arg disallowed_topics "$DISALLOWED_TOPICS" \
+        --arg include_archived "$INCLUDE_ARCHIVED" \
+        "$PAGE_JQ" "$1" > "$ENTRIES_FILE"
+
+    PAGE_STATE=$(head -n 1 "$ENTRIES_FILE")
+    REMAINING=$(echo "$PAGE_STATE" | jq -c '.remaining')
+    TOTAL_COUNT=$((TOTAL_COUNT + $(echo "$PAGE_STATE" | jq '.fetched')))
+    TOTAL_ENTRIES=$((TOTAL_ENTRIES + $(wc -l < "$ENTRIES_FILE") - 1))
+    tail -n +2 "$ENTRIES_FILE" >> "$BATCH_FILE"
+
+    while [ "$(wc -l < "$BATCH_FILE")" -ge "$BATCH_SIZE" ]; do
+        flush_batch "$BATCH_SIZE"
+    done
+}
+
+# Remaining per-visibility budget, e.g. {"public": 10000, "private": 10000}.
+REMAINING=$(printf '%s\n' "${VISIBILITIES[@]}" | jq -R -s --argjson limit "$FETCH_LIMIT" \
+    'split("\n") | map(select(length > 0) | {(.): $limit}) | add')
+
+if [ "$DELTA_SYNC" != "true" ]; then
+    CURSOR=""
+    PAGE_NUM=0
+    echo "Fetching repos..."
+    while true; do
+        PAGE_NUM=$((PAGE_NUM + 1))
+        if ! fetch_page_with_retry "$CURSOR" "$PAGE_FILE"; then
+            echo "Failed to fetch repos (page $PAGE_NUM), aborting"
+            exit 1
+        fi
+        process_page "$PAGE_FILE"
+
+        # Stop at the last page, or once every visibility has hit the ceiling.
+        if [ "$(echo "$PAGE_STATE" | jq -r '.hasNextPage')" != "true" ]; then
+            break
+        fi
+        if [ "$(echo "$REMAINING" | jq '[.[] | select(. > 0)] | length')" -eq 0 ]; then
+            break
+        fi
+        CURSOR=$(echo "$PAGE_STATE" | jq -r '.endCursor')
+    done
+else
+    # Delta sync. STATE_DIR holds, per host + org:
+    #   snapshot.jsonl  every repo node seen (one compact GraphQL node per line)
+    #   state.json      {high_water: newest updatedAt seen, last_full: epoch}
+    # A full reconcile (no snapshot yet, or last_full older than
+    # full_sync_interval_hours) lists the whole org and replaces the snapshot,
+    # which is what drops deleted, renamed and transferred repos. Any other run
+    # pages newest-updated first and stops at the first repo not updated since
+    # high_water, then merges those repos into the snapshot. Topic, visibility,
+    # archive and description changes all bump a repo's updatedAt.
+    #
+    # Either way the catalog is then built from the snapshot, so filters and
+    # the transform always apply to every repo: each run's output is the whole
+    # org, while API cost follows the number of changed repos. Writing only the
+    # changed repos is not an option: `lunar catalog raw` has no removal form,
+    # so a repo leaves the catalog only by being left out of a run's output,
+    # and a partial output would drop every unchanged repo. Deleted repos
+    # therefore linger until the next full reconcile, which is why
+    # full_sync_interval_hours defaults to a day.
+    STATE_DIR="$STATE_ROOT/$(printf '%s/%s' "$GITHUB_HOST" "$ORG_NAME" | sha256sum | cut -c1-16)"
+    mkdir -p "$STATE_DIR"
+    SNAPSHOT="$STATE_DIR/snapshot.jsonl"
+    NODES_FILE="$WORK_DIR/nodes.jsonl"
+    : > "$NODES_FILE"
+
+    HIGH_WATER=""
+    LAST_FULL=0
+    if [ -f "$STATE_DIR/state.json" ] && [ -f "$SNAPSHOT" ]; then
+        HIGH_WATER=$(jq -r '.high_water // ""' "$STATE_DIR/state.json")
+        LAST_FULL=$(jq -r '.last_full // 0' "$STATE_DIR/state.json")
+    fi
+    NOW=$(date +%s)
+    FULL_SYNC=false
+    if [ -z "$HIGH_WATER" ] || [ $((NOW - LAST_FULL)) -ge $((FULL_SYNC_INTERVAL_HOURS * 3600)) ]; then
+        FULL_SYNC=true
+        echo "Delta sync: full reconcile"
+    else
+        echo "Delta sync: fetching repos updated since $HIGH_WATER"
+    fi
+
+    CURSOR=""
+    PAGE_NUM=0
+    while true; do
+        PAGE_NUM=$((PAGE_NUM + 1))
+        if ! fetch_page_with_retry "$CURSOR" "$PAGE_FILE"; then
+            echo "Failed to fetch repos (page $PAGE_NUM), aborting"
+            exit 1
+        fi
+        # Keep the page's repos updated at or after the high-water mark (all
+        # of them on a full reconcile); any older repo ends the delta.
+        jq -c --arg since "$HIGH_WATER" --argjson full "$FULL_SYNC" '
+            .data.organization.repositories as $conn
+            | [($conn.nodes // [])[] | select(. != null)] as $nodes
+            | [$nodes[] | select($full or .updatedAt >= $since)] as $kept
+            | {
+                done: ((($conn.pageInfo.hasNextPage // false) | not) or (($kept | length) < ($nodes | length))),
+                endCursor: $conn.pageInfo.endCursor
+              },
+              $kept[]' "$PAGE_FILE" > "$ENTRIES_FILE"
+        tail -n +2 "$ENTRIES_FILE" >> "$NODES_FILE"
+        PAGE_STATE=$(head -n 1 "$ENTRIES_FILE")
+        if [ "$(echo "$PAGE_STATE" | jq -r '.done')" = "true" ]; then
+            break
+        fi
+        CURSOR=$(echo "$PAGE_STATE" | jq -r '.endCursor')
+    done
+
+    CHANGED=$(wc -l < "$NODES_FILE")
+    NEW_HIGH_WATER=$(head -n 1 "$NODES_FILE" | jq -r '.updatedAt // empty')
+    if [ "$FULL_SYNC" = "true" ]; then
+        echo "Delta sync: listed $CHANGED repos"
+        mv "$NODES_FILE" "$SNAPSHOT.new"
+        LAST_FULL=$NOW
+    else
+        # Replace updated repos in the snapshot (streamed; only the changed
+        # URLs are held in memory), then append their new versions.
+        jq -r '.url' "$NODES_FILE" | LC_ALL=C sort -u > "$WORK_DIR/changed-urls"
+        ADDED=$(LC_ALL=C comm -23 "$WORK_DIR/changed-urls" \
+            <(jq -r '.url' "$SNAPSHOT" | LC_ALL=C sort -u) | wc -l)
+        echo "Delta sync: $CHANGED updated repo(s), $ADDED new"
+        jq -c --rawfile changed "$WORK_DIR/changed-urls" \
+            '($changed | split("\n") | map(select(. != "") | {(.): true}) | add // {}) as $seen
+             | select($seen[.url] | not)' \
+            "$SNAPSHOT" > "$SNAPSHOT.new"
+        cat "$NODES_FILE" >> "$SNAPSHOT.new"
+    fi
+    mv "$SNAPSHOT.new" "$SNAPSHOT"
+    [ -n "$NEW_HIGH_WATER" ] || NEW_HIGH_WATER="$HIGH_WATER"
+
+    # Build the catalog from the snapshot, 100 repos at a time.
+    split -l 100 "$SNAPSHOT" "$WORK_DIR/chunk-"
+    for chunk in "$WORK_DIR"/chunk-*; do
+        [ -f "$chunk" ] || continue
+        jq -c -s '{data: {organization: {repositories: {nodes: ., pageInfo: {hasNextPage: false}}}}}' \
+            "$chunk" > "$PAGE_FILE"
+        rm -f "$chunk"
+        process_page "$PAGE_FILE"
+    done
+fi
+flush_batch "$(wc -l < "$BATCH_FILE")"
+
+echo "Total repos fetched: $TOTAL_COUNT"
+
+# A visibility that used its whole ceiling almost certainly has more repos than
+# the configured limit. Warn loudly (pointing at the input to raise) instead of
+# silently cataloging a partial org.
+for visibility in $(echo "$REMAINING" | jq -r 'to_entries[] | select(.value <= 0) | .key'); do
+    echo "WARNING: reached the fetch ceiling of $FETCH_LIMIT $visibility repos — results may be TRUNCATED and some repositories not cataloged. Raise the 'max_repos_per_visibility' input to catalog them all." >&2
 done
 
+echo "Components after filtering: $TOTAL_ENTRIES"
+
+# Advance the high-water mark. A failed batch still exits non-zero below; the
+# next run re-writes every component from the snapshot either way.
+if [ "$DELTA_SYNC" = "true" ]; then
+    jq -n --arg high_water "$NEW_HIGH_WATER" --argjson last_full "$LAST_FULL" \
+        '{high_water: $high_water, last_full: $last_full}' > "$STATE_DIR/state.json.new"
+    mv "$STATE_DIR/state.json.new" "$STATE_DIR/state.json"
+fi
+
+if [ "$TOTAL_ENTRIES" -eq 0 ]; then
+    echo "No components to catalog"
+    exit 0
+fi
+
 # Summary
 echo ""
 echo "Cataloging complete for $ORG_NAME"
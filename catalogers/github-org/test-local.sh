@@ -2,10 +2,10 @@
 #
 # Local test for the github-org cataloger.
 #
-# By default runs OFFLINE, deterministic scenarios: mocks `gh repo list ...` to
-# return a fixed repo fixture and `lunar catalog raw --json ...` to capture
-# writes, then asserts the resulting tags for a range of tag_prefix values —
-# including the empty-prefix regression guard (ENG-1106): an explicit empty
+# By default runs OFFLINE, deterministic scenarios: mocks `gh api graphql ...`
+# to page through a fixed repo fixture and `lunar catalog raw --json ...` to
+# capture writes, then asserts the resulting tags for a range of tag_prefix
+# values — including the empty-prefix regression guard (ENG-1106): an explicit empty
 # `tag_prefix` must yield un-prefixed topics.
 #
 # All scenarios run; any failure is logged and the script exits non-zero.
@@ -32,27 +32,50 @@ echo "Test directory: $TEST_DIR"
 echo ""
 
 # --- Mock gh --------------------------------------------------------------
-# For `gh repo list <org> --visibility <v> ... --json ... [--no-archived]`,
-# emit the fixture at $MOCK_GH_REPOS_FILE for the "public" visibility (an empty
-# array for any other visibility). If no fixture is configured, delegate to the
-# real gh — that's how the opt-in real-API smoke reuses this same PATH shim.
+# For `gh api graphql -F org=<org> -f query=<q> [-F endCursor=<c>]`, serve the
+# fixture at $MOCK_GH_REPOS_FILE as a GraphQL repositories connection,
+# $MOCK_GH_PAGE_SIZE repos per page (default 1, so paging is always exercised;
+# the cursor is the next index). Archived repos are dropped when the query
+# filters `isArchived: false`, and repos come newest-first by `updatedAt` when
+# the query orders by UPDATED_AT. Each call is counted in $MOCK_GH_CALLS. If no
+# fixture is configured, delegate to the real gh — that's how the opt-in
+# real-API smoke reuses this same PATH shim.
 cat > "$TEST_DIR/gh" << 'EOF'
 #!/bin/bash
 set -euo pipefail
 if [ -z "${MOCK_GH_REPOS_FILE:-}" ]; then
     exec "${REAL_GH:?real gh not found on PATH}" "$@"
 fi
-if [ "${1:-}" = "repo" ] && [ "${2:-}" = "list" ]; then
-    visibility=""
+if [ "${1:-}" = "api" ] && [ "${2:-}" = "graphql" ]; then
+    echo "graphql" >> "${MOCK_GH_CALLS:-/dev/null}"
+    query="" cursor="0"
     while [ $# -gt 0 ]; do
-        [ "$1" = "--visibility" ] && visibility="${2:-}"
-        shift
+        case "$1" in
+            -f|-F)
+                case "$2" in
+                    query=*) query="${2#query=}" ;;
+                    endCursor=*) cursor="${2#endCursor=}" ;;
+                esac
+                shift 2 ;;
+            *) shift ;;
+        esac
     done
-    if [ "$visibility" = "public" ]; then
-        cat "$MOCK_GH_REPOS_FILE"
-    else
-        echo "[]"
-    fi
+    archived_filter=false
+    [[ "$query" == *"isArchived: false"* ]] && archived_filter=true
+    by_updated=false
+    [[ "$query" == *"UPDATED_AT"* ]] && by_updated=true
+    jq --argjson start "$cursor" --argjson size "${MOCK_GH_PAGE_SIZE:-1}" \
+       --argjson no_archived "$archived_filter" --argjson by_updated "$by_updated" '
+        map(select(($no_archived | not) or (.isArchived | not)))
+        | (if $by_updated then sort_by(.updatedAt) | reverse else . end) as $all
+        | ($all[$start:$start + $size]) as $page
+        | {data: {organization: {repositories: {
+            nodes: [$page[] | .repositoryTopics = {nodes: [.repositoryTopics[] | {topic: {name}}]}],
+            pageInfo: {
+                hasNextPage: (($start + $size) < ($all | length)),
+                endCursor: (if ($page | length) > 0 then "\($start + $size)" else null end)
+            }
+        }}}}' "$MOCK_GH_REPOS_FILE"
     exit 0
 fi
 echo "Mock gh: unhandled command: $*" >&2
@@ -109,8 +132,8 @@ cat > "$REPOS_FIXTURE" << 'EOF'
 ]
 EOF
 
-# Shared inputs for the offline scenarios: one org, public only (single gh
-# call), no filters/owner/domain. Each scenario sets LUNAR_VAR_TAG_PREFIX.
+# Shared inputs for the offline scenarios: one org, public only, no
+# filters/owner/domain. Each scenario sets LUNAR_VAR_TAG_PREFIX.
 export MOCK_GH_REPOS_FILE="$REPOS_FIXTURE"
 export LUNAR_SECRET_GH_TOKEN="dummy-token"   # main.sh requires a token to be set
 export LUNAR_VAR_ORG_NAME="acme"
@@ -209,6 +232,101 @@ run_scenario "disallow_beats_allow" \
     '(has("github.com/acme/payment-api") | not) and (has("github.com/acme/frontend-app"))'
 unset LUNAR_VAR_ALLOWED_TOPICS LUNAR_VAR_DISALLOWED_TOPICS
 
+# ── Streaming: entries are flushed in catalog_batch_size batches ─────────
+# Both repos arrive on separate pages; batch size 1 means two catalog writes.
+export LUNAR_VAR_CATALOG_BATCH_SIZE="1"
+run_scenario "batched_writes" \
+    '(has("github.com/acme/payment-api")) and (has("github.com/acme/frontend-app"))'
+if [ "$(jq -s 'length' "$COMPONENTS_OUT")" = "2" ]; then
+    echo "  PASS: two batches written"; PASSED=$((PASSED + 1))
+else
+    echo "  FAIL: expected 2 batch writes, got $(jq -s 'length' "$COMPONENTS_OUT")"; FAILED=$((FAILED + 1))
+fi
+unset LUNAR_VAR_CATALOG_BATCH_SIZE
+
+# ── The per-visibility ceiling stops paging early ─────────────────────────
+# Fixture order is payment-api, frontend-app: a ceiling of 1 keeps only the
+# first and never requests the second page.
+export LUNAR_VAR_MAX_REPOS_PER_VISIBILITY="1"
+export MOCK_GH_CALLS="$TEST_DIR/gh-calls"
+: > "$MOCK_GH_CALLS"
+run_scenario "visibility_ceiling" \
+    '(has("github.com/acme/payment-api")) and (has("github.com/acme/frontend-app") | not)'
+if [ "$(grep -c . "$MOCK_GH_CALLS")" = "1" ]; then
+    echo "  PASS: one page fetched"; PASSED=$((PASSED + 1))
+else
+    echo "  FAIL: expected 1 page request, got $(grep -c . "$MOCK_GH_CALLS")"; FAILED=$((FAILED + 1))
+fi
+grep -q "reached the fetch ceiling of 1 public repos" "$TEST_DIR/visibility_ceiling.log" \
+    && { echo "  PASS: ceiling warning logged"; PASSED=$((PASSED + 1)); } \
+    || { echo "  FAIL: no ceiling warning"; FAILED=$((FAILED + 1)); }
+unset LUNAR_VAR_MAX_REPOS_PER_VISIBILITY MOCK_GH_CALLS
+
+# ── Disabled visibilities are filtered out of the shared pass ─────────────
+export LUNAR_VAR_INCLUDE_PUBLIC="false" LUNAR_VAR_INCLUDE_PRIVATE="true"
+run_scenario "visibility_filtered" '. == null'
+export LUNAR_VAR_INCLUDE_PUBLIC="true" LUNAR_VAR_INCLUDE_PRIVATE="false"
+
+# ── Delta sync ────────────────────────────────────────────────────────────
+# Three repos, one per page. Runs share one state_dir, so each builds on the
+# previous run's snapshot.
+DELTA_FIXTURE="$TEST_DIR/delta-repos.json"
+cat > "$DELTA_FIXTURE" << 'EOF'
+[
+  {"name": "svc-a", "url": "https://github.com/acme/svc-a", "description": "A",
+   "repositoryTopics": [{"name": "go"}], "isArchived": false, "visibility": "PUBLIC",
+   "updatedAt": "2026-01-03T00:00:00Z"},
+  {"name": "svc-b", "url": "https://github.com/acme/svc-b", "description": "B",
+   "repositoryTopics": [], "isArchived": false, "visibility": "PUBLIC",
+   "updatedAt": "2026-01-02T00:00:00Z"},
+  {"name": "svc-c", "url": "https://github.com/acme/svc-c", "description": "C",
+   "repositoryTopics": [], "isArchived": false, "visibility": "PUBLIC",
+   "updatedAt": "2026-01-01T00:00:00Z"}
+]
+EOF
+export MOCK_GH_REPOS_FILE="$DELTA_FIXTURE"
+export LUNAR_VAR_DELTA_SYNC="true" LUNAR_VAR_STATE_DIR="$TEST_DIR/state"
+export MOCK_GH_CALLS="$TEST_DIR/gh-calls"
+ALL_THREE='has("github.com/acme/svc-a") and has("github.com/acme/svc-b") and has("github.com/acme/svc-c")'
+
+# check_calls <label> <expected> — number of GraphQL page requests in the run.
+check_calls() {
+    local got
+    got=$(grep -c . "$MOCK_GH_CALLS" || true)
+    if [ "$got" = "$2" ]; then
+        echo "  PASS: $1"; PASSED=$((PASSED + 1))
+    else
+        echo "  FAIL: $1 — expected $2 page request(s), got $got"; FAILED=$((FAILED + 1))
+    fi
+    : > "$MOCK_GH_CALLS"
+}
+
+: > "$MOCK_GH_CALLS"
+run_scenario "delta_first_run_reconciles" "$ALL_THREE"
+check_calls "first run lists the whole org" 3
+
+run_scenario "delta_unchanged" "$ALL_THREE"
+check_calls "unchanged org: stops at the first older repo" 2
+
+# svc-c gains a topic, svc-b is archived; both bump updatedAt.
+jq '(.[] | select(.name == "svc-c")) |= (.repositoryTopics = [{"name": "rust"}] | .updatedAt = "2026-01-05T00:00:00Z")
+    | (.[] | select(.name == "svc-b")) |= (.isArchived = true | .updatedAt = "2026-01-04T00:00:00Z")' \
+    "$DELTA_FIXTURE" > "$DELTA_FIXTURE.new" && mv "$DELTA_FIXTURE.new" "$DELTA_FIXTURE"
+run_scenario "delta_picks_up_changes" \
+    '(.["github.com/acme/svc-c"].tags | index("gh-rust") != null)
+     and has("github.com/acme/svc-a") and (has("github.com/acme/svc-b") | not)'
+check_calls "changed repos only: two updated + one boundary page" 3
+
+# A deleted repo leaves no updatedAt trail; the periodic reconcile drops it.
+jq 'map(select(.name != "svc-a"))' "$DELTA_FIXTURE" > "$DELTA_FIXTURE.new" && mv "$DELTA_FIXTURE.new" "$DELTA_FIXTURE"
+run_scenario "delta_keeps_deleted_until_reconcile" 'has("github.com/acme/svc-a")'
+: > "$MOCK_GH_CALLS"
+export LUNAR_VAR_FULL_SYNC_INTERVAL_HOURS="0"
+run_scenario "delta_reconcile_drops_deleted" \
+    '(has("github.com/acme/svc-a") | not) and has("github.com/acme/svc-c")'
+unset LUNAR_VAR_DELTA_SYNC LUNAR_VAR_STATE_DIR LUNAR_VAR_FULL_SYNC_INTERVAL_HOURS MOCK_GH_CALLS
+export MOCK_GH_REPOS_FILE="$REPOS_FIXTURE"
+
 echo ""
 echo "Offline scenarios: $PASSED passed, $FAILED failed"
 
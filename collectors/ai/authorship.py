@@ -0,0 +1,133 @@
+"""Build .ai.authorship from commit history in one pass.
+
+Usage: authorship.py --prefix PREFIX (--range REV_RANGE | --window N)
+
+Reads the commits in scope with a single `git log` whose format carries each
+commit's trailers, and the Git AI notes (refs/notes/ai) with a single
+`git notes list`; annotated commits are the intersection of the two. When any
+commit in scope has a Git AI note the provider is `git-ai`, otherwise the
+trailers (PREFIX + model / tokens, e.g. `AI-model: ...`) are reported per
+commit.
+
+Prints the .ai.authorship object on stdout.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+NOTES_REF = "refs/notes/ai"
+# One record per commit: full sha, unit separator, unfolded trailer block.
+LOG_FORMAT = "%H%x1f%(trailers:only,unfold)%x1e"
+
+
+def git(*args):
+    """Run git; return stdout, or None when the command fails."""
+    proc = subprocess.run(["git", *args], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    if proc.returncode != 0:
+        return None
+    return proc.stdout.decode("utf-8", "replace")
+
+
+def parse_log(output):
+    """Return [(sha, [(key, value), ...])] from LOG_FORMAT output."""
+    commits = []
+    for record in (output or "").split("\x1e"):
+        record = record.strip("\n")
+        if not record:
+            continue
+        sha, _, block = record.partition("\x1f")
+        trailers = []
+        for line in block.splitlines():
+            key, sep, value = line.partition(":")
+            if sep:
+                trailers.append((key.strip(), value.strip()))
+        commits.append((sha.strip(), trailers))
+    return commits
+
+
+def noted_commits(output):
+    """Annotated commit shas from `git notes list` (`<note> <commit>` lines)."""
+    noted = set()
+    for line in (output or "").splitlines():
+        fields = line.split()
+        if len(fields) == 2:
+            noted.add(fields[1])
+    return noted
+
+
+def trailer_entry(sha, trailers, prefix):
+    """Per-commit trailer summary; model/tokens come from the first matching trailer."""
+    prefix = prefix.lower()
+    model_key, tokens_key = prefix + "model", prefix + "tokens"
+    has_annotation = bool(prefix) and any(k.lower().startswith(prefix) for k, _ in trailers)
+    model = tokens = None
+    if has_annotation:
+        model = next((v for k, v in trailers if k.lower() == model_key and v), None)
+        raw_tokens = next((v for k, v in trailers if k.lower() == tokens_key and v), None)
+        if raw_tokens is not None:
+            try:
+                tokens = int(raw_tokens)
+            except ValueError:
+                try:
+                    tokens = float(raw_tokens)
+                except ValueError:
+                    tokens = None
+    entry = {"sha": sha[:8], "has_annotation": has_annotation}
+    if model:
+        entry["model"] = model
+    entry["tokens"] = tokens
+    return entry
+
+
+def authorship(commits, noted, notes_ref_exists, prefix):
+    total = len(commits)
+    if not total:
+        return {"provider": "none", "total_commits": 0, "annotated_commits": 0}
+
+    with_notes = sum(1 for sha, _ in commits if sha in noted)
+    if notes_ref_exists and with_notes:
+        return {
+            "provider": "git-ai",
+            "total_commits": total,
+            "annotated_commits": with_notes,
+            "git_ai": {"notes_ref_exists": True, "commits_with_notes": with_notes},
+        }
+
+    details = [trailer_entry(sha, trailers, prefix) for sha, trailers in commits]
+    return {
+        "provider": "trailers",
+        "total_commits": total,
+        "annotated_commits": sum(1 for d in details if d["has_annotation"]),
+        "git_ai": {"notes_ref_exists": notes_ref_exists, "commits_with_notes": 0},
+        "trailers": details,
+    }
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prefix", default="")
+    scope = parser.add_mutually_exclusive_group(required=True)
+    scope.add_argument("--range")
+    scope.add_argument("--window", type=int)
+    args = parser.parse_args(argv[1:])
+
+    log_args = [args.range] if args.range else ["-n", str(args.window)]
+    commits = parse_log(git("log", f"--format={LOG_FORMAT}", *log_args))
+
+    notes = git("notes", f"--ref={NOTES_REF}", "list") if commits else None
+    notes_ref_exists = bool(notes) or (
+        notes is not None and git("rev-parse", "--verify", "--quiet", NOTES_REF) is not None
+    )
+    result = authorship(commits, noted_commits(notes), notes_ref_exists, args.prefix)
+    json.dump(result, sys.stdout)
+    sys.stdout.write("\n")
+    print(
+        f"AI authorship: {result['annotated_commits']}/{result['total_commits']} commits "
+        f"annotated ({result['provider']})",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Tests for the ai collector's authorship history reader."""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import authorship  # noqa: E402
+
+LOG = (
+    "aaaaaaaa11111111\x1fAI-Model: claude-sonnet\nAI-tokens: 1200\nSigned-off-by: a <a@b>\n\x1e\n"
+    "bbbbbbbb22222222\x1f\x1e\n"
+    "cccccccc33333333\x1fai-tokens: 12.5k\n\x1e\n"
+)
+
+
+class TestParsing(unittest.TestCase):
+    def test_parse_log(self):
+        commits = authorship.parse_log(LOG)
+        self.assertEqual([sha for sha, _ in commits], ["aaaaaaaa11111111", "bbbbbbbb22222222", "cccccccc33333333"])
+        self.assertEqual(commits[0][1][0], ("AI-Model", "claude-sonnet"))
+        self.assertEqual(commits[1][1], [])
+
+    def test_trailers_provider(self):
+        result = authorship.authorship(authorship.parse_log(LOG), set(), False, "AI-")
+        self.assertEqual(result["provider"], "trailers")
+        self.assertEqual(result["total_commits"], 3)
+        self.assertEqual(result["annotated_commits"], 2)
+        self.assertEqual(result["trailers"], [
+            {"sha": "aaaaaaaa", "has_annotation": True, "model": "claude-sonnet", "tokens": 1200},
+            {"sha": "bbbbbbbb", "has_annotation": False, "tokens": None},
+            {"sha": "cccccccc", "has_annotation": True, "tokens": None},
+        ])
+
+    def test_git_ai_provider_counts_intersection(self):
+        noted = authorship.noted_commits("n1 aaaaaaaa11111111\nn2 ffffffffffffffff\n")
+        result = authorship.authorship(authorship.parse_log(LOG), noted, True, "AI-")
+        self.assertEqual(result, {
+            "provider": "git-ai",
+            "total_commits": 3,
+            "annotated_commits": 1,
+            "git_ai": {"notes_ref_exists": True, "commits_with_notes": 1},
+        })
+
+    def test_no_commits(self):
+        self.assertEqual(
+            authorship.authorship([], set(), False, "AI-"),
+            {"provider": "none", "total_commits": 0, "annotated_commits": 0},
+        )
+
+
+@unittest.skipIf(shutil.which("git") is None, "git not installed")
+class TestRepository(unittest.TestCase):
+    def setUp(self):
+        self.repo = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.repo)
+        self.env = dict(os.environ, GIT_AUTHOR_NAME="t", GIT_AUTHOR_EMAIL="t@example.com",
+                        GIT_COMMITTER_NAME="t", GIT_COMMITTER_EMAIL="t@example.com")
+        self.git("init", "-q")
+        self.git("commit", "-q", "--allow-empty", "-m", "feat: x\n\nAI-model: gpt\nAI-tokens: 42")
+        self.git("commit", "-q", "--allow-empty", "-m", "fix: y")
+
+    def git(self, *args):
+        return subprocess.run(["git", *args], cwd=self.repo, env=self.env, check=True,
+                              stdout=subprocess.PIPE).stdout.decode()
+
+    def run_main(self, *args):
+        out = subprocess.run(
+            [sys.executable, os.path.join(os.path.dirname(HERE), "authorship.py"), *args],
+            cwd=self.repo, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True,
+        ).stdout.decode()
+        return json.loads(out)
+
+    def test_trailers_from_history(self):
+        result = self.run_main("--prefix", "AI-", "--window", "50")
+        self.assertEqual(result["provider"], "trailers")
+        self.assertFalse(result["git_ai"]["notes_ref_exists"])
+        self.assertEqual([t.get("model") for t in result["trailers"]], [None, "gpt"])
+        self.assertEqual(result["trailers"][1]["tokens"], 42)
+
+    def test_git_ai_notes(self):
+        self.git("notes", "--ref=ai", "add", "-m", "{}", "HEAD")
+        result = self.run_main("--prefix", "AI-", "--window", "50")
+        self.assertEqual(result["provider"], "git-ai")
+        self.assertEqual(result["annotated_commits"], 1)
+
+    def test_unknown_range(self):
+        result = self.run_main("--prefix", "AI-", "--range", "origin/missing..HEAD")
+        self.assertEqual(result["provider"], "none")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,8 +6,14 @@ set -e
 RULES="${LUNAR_VAR_RULES:-}"
 EXCLUDE_PATHS="${LUNAR_VAR_EXCLUDE_PATHS:-vendor,node_modules,.git,dist,build}"
 MAX_MATCHES="${LUNAR_VAR_MAX_MATCHES_PER_RULE:-100}"
+PR_CHANGED_FILES_ONLY="${LUNAR_VAR_PR_CHANGED_FILES_ONLY:-true}"
+PR_MAX_CHANGED_FILES="${LUNAR_VAR_PR_MAX_CHANGED_FILES:-1000}"
+RULES_CACHE_DIR="${LUNAR_VAR_RULES_CACHE_DIR:-}"
+RULES_CACHE_DIR="${RULES_CACHE_DIR:-${XDG_CACHE_HOME:-$HOME/.cache}/lunar-ast-grep}"
 DEBUG="${LUNAR_VAR_DEBUG:-false}"
 
+HERE="$(cd "$(dirname "$0")" && pwd)"
+
 # Debug helper
 debug() {
     if [ "$DEBUG" = "true" ]; then
@@ -21,102 +27,314 @@ if [ -z "$RULES" ]; then
     exit 1
 fi
 
-# Create temp file for rules (BusyBox-compatible)
-RULES_FILE=$(mktemp -t ast-grep-rules-XXXXXX)
-mv "$RULES_FILE" "${RULES_FILE}.yml"
-RULES_FILE="${RULES_FILE}.yml"
-trap "rm -f '$RULES_FILE'" EXIT
+# Scratch space: changed-file lists, baseline tree (BusyBox-compatible)
+WORK=$(mktemp -d -t ast-grep-XXXXXX)
+trap "rm -rf '$WORK'" EXIT
+
+SG_VERSION=$(ast-grep --version 2>/dev/null | head -1 | awk '{print $2}' || echo "unknown")
+SG_VERSION="${SG_VERSION:-unknown}"
+# Results are only reusable across runs with the same rules and exclusions.
+RULES_SHA=$(printf '%s\n%s\n' "$RULES" "$EXCLUDE_PATHS" | sha256sum | awk '{print $1}')
+HEAD_SHA=$(git rev-parse HEAD 2>/dev/null || echo "")
+
+debug "ast-grep version: $SG_VERSION"
+
+# Write a validated rule bundle for RULES into directory $1:
+#   rules.yml        the rules input as given
+#   lang/<lang>.yml  the rules for one language (canonical name, languages.json)
+#   extensions.tsv   file extension -> language, for every language with rules
+# Without extensions.tsv the bundle is unsplit (yq missing, or a rule language
+# languages.json doesn't know) and every file is matched against rules.yml.
+# Sets BUNDLE_CACHEABLE to false when the split was skipped for want of a
+# working yq: that bundle depends on the runner, not just on the rules.
+build_bundle() {
+    local dir="$1" err
+    BUNDLE_CACHEABLE=true
+    mkdir -p "$dir/lang" "$dir/empty"
+    echo "$RULES" > "$dir/rules.yml"
+    # Scanning an empty directory parses and compiles every rule.
+    if ! err=$(ast-grep scan --rule "$dir/rules.yml" --json=stream "$dir/empty" 2>&1 >/dev/null); then
+        echo "Error: ast-grep rejected the rules input:" >&2
+        echo "$err" >&2
+        return 1
+    fi
+    rmdir "$dir/empty"
+
+    local rules_json split lang
+    if ! command -v yq >/dev/null 2>&1 \
+        || ! rules_json=$(yq ea -o=json '[.]' "$dir/rules.yml" 2>/dev/null); then
+        debug "yq (mikefarah/yq) unavailable, rules are not split by language"
+        BUNDLE_CACHEABLE=false
+        return 0
+    fi
+    split=$(echo "$rules_json" | jq -c --slurpfile langs "$HERE/languages.json" '
+        ($langs[0] | to_entries
+         | map({key: .key, value: .key}, (.key as $k | .value.aliases[] | {key: ., value: $k}))
+         | from_entries) as $canonical
+        | map(select(type == "object")
+              | {lang: $canonical[(.language // "" | tostring | ascii_downcase)], rule: .})
+        | if any(.lang == null) then empty
+          else group_by(.lang) | map({lang: .[0].lang, rules: map(.rule)}) end')
+    [ -n "$split" ] || return 0
+    for lang in $(echo "$split" | jq -r '.[].lang'); do
+        echo "$split" | jq -r --arg lang "$lang" \
+            '.[] | select(.lang == $lang) | .rules | map(tojson) | join("\n---\n")' > "$dir/lang/$lang.yml"
+    done
+    echo "$split" | jq -r --slurpfile langs "$HERE/languages.json" \
+        '.[].lang as $lang | $langs[0][$lang].extensions[] | [., $lang] | @tsv' > "$dir/extensions.tsv"
+}
+
+# Find or build the bundle for these rules and this ast-grep version under
+# RULES_CACHE_DIR, so components sharing a rule set validate and split it once
+# per runner. Sets BUNDLE.
+#
+# Bundles are built in their own `.bundle-XXXXXX` directory and published by
+# writing that name to a pointer file, RULES_CACHE_DIR/<sha>, via a temp file
+# in the same directory and a rename. The rename is atomic, so readers only
+# ever follow a pointer to a complete bundle, and concurrent runs each publish
+# a complete one (the last rename wins; a bundle is never deleted, as another
+# run may be using it).
+load_bundle() {
+    local sha pointer name tmp ptr_tmp
+    # "pointer" versions the cache layout: entries from before pointers were
+    # directories named by the same hash.
+    sha=$(printf '%s\n%s\n%s\n' pointer "$SG_VERSION" "$RULES" | sha256sum | awk '{print $1}')
+    pointer="$RULES_CACHE_DIR/$sha"
+    if [ -f "$pointer" ] && read -r name < "$pointer" && [ -f "$RULES_CACHE_DIR/$name/rules.yml" ]; then
+        BUNDLE="$RULES_CACHE_DIR/$name"
+        debug "Rule bundle cache hit: $BUNDLE"
+        return 0
+    fi
+    if mkdir -p "$RULES_CACHE_DIR" 2>/dev/null \
+        && tmp=$(mktemp -d "$RULES_CACHE_DIR/.bundle-XXXXXX" 2>/dev/null); then
+        debug "Building rule bundle: $tmp"
+        build_bundle "$tmp" || { rm -rf "$tmp"; return 1; }
+        BUNDLE="$tmp"
+        if [ "$BUNDLE_CACHEABLE" != "true" ]; then
+            # Unsplit for want of yq: use it for this run only, so a runner
+            # that gains yq later still gets a split bundle.
+            BUNDLE="$WORK/bundle"
+            mv "$tmp" "$BUNDLE"
+        elif ptr_tmp=$(mktemp "$RULES_CACHE_DIR/.pointer-XXXXXX" 2>/dev/null); then
+            { printf '%s\n' "${tmp##*/}" > "$ptr_tmp" && mv -f "$ptr_tmp" "$pointer"; } 2>/dev/null \
+                || rm -f "$ptr_tmp"
+        fi
+    else
+        debug "Rule cache $RULES_CACHE_DIR is not writable, building for this run only"
+        BUNDLE="$WORK/bundle"
+        build_bundle "$BUNDLE"
+    fi
+}
 
-# Write rules to temp file
-echo "$RULES" > "$RULES_FILE"
+load_bundle || exit 1
 
-debug "ast-grep version: $(ast-grep --version 2>/dev/null || echo 'unknown')"
 debug "Rules file content:"
 if [ "$DEBUG" = "true" ]; then
-    cat "$RULES_FILE" >&2
+    cat "$BUNDLE/rules.yml" >&2
 fi
 
 # Build exclusion arguments for ast-grep
 # ast-grep uses --globs for file patterns
 EXCLUDE_ARGS=""
+EXCLUDE_LIST=()
 IFS=',' read -ra EXCLUDE_ARRAY <<< "$EXCLUDE_PATHS"
 for path in "${EXCLUDE_ARRAY[@]}"; do
     path=$(echo "$path" | xargs)  # trim whitespace
     if [ -n "$path" ]; then
         EXCLUDE_ARGS="$EXCLUDE_ARGS --globs !${path}/**"
+        EXCLUDE_LIST+=("$path")
     fi
 done
 
 debug "Exclude args: $EXCLUDE_ARGS"
-debug "Running: ast-grep scan --rule $RULES_FILE --json . $EXCLUDE_ARGS"
 
-# Run ast-grep and capture output
-SG_OUTPUT=$(ast-grep scan --rule "$RULES_FILE" --json . $EXCLUDE_ARGS 2>/dev/null || true)
+# Run ast-grep, one JSON match per line, so nothing holds the whole result.
+# Extra arguments are the paths to scan.
+scan() {
+    debug "Running: ast-grep scan --rule $BUNDLE/rules.yml --json=stream $EXCLUDE_ARGS $*"
+    ast-grep scan --rule "$BUNDLE/rules.yml" --json=stream $EXCLUDE_ARGS "$@" 2>/dev/null || true
+}
 
-debug "Raw ast-grep output:"
-if [ "$DEBUG" = "true" ]; then
-    echo "$SG_OUTPUT" >&2
-fi
+# Scan the NUL-separated paths listed in file $2 with rules file $1 (batched
+# by xargs).
+scan_list() {
+    [ -s "$2" ] || return 0
+    debug "Running: ast-grep scan --rule $1 on $(tr -cd '\0' < "$2" | wc -c) files"
+    xargs -0 ast-grep scan --rule "$1" --json=stream $EXCLUDE_ARGS -- < "$2" 2>/dev/null || true
+}
 
-# If no output or empty array, create empty result
-if [ -z "$SG_OUTPUT" ] || [ "$SG_OUTPUT" = "[]" ] || [ "$SG_OUTPUT" = "null" ]; then
-    SG_OUTPUT="[]"
-fi
+# Scan the NUL-separated paths listed in file $1, each against only the rules
+# for its language; files no rule's language applies to are not scanned.
+scan_by_language() {
+    if [ ! -f "$BUNDLE/extensions.tsv" ]; then
+        scan_list "$BUNDLE/rules.yml" "$1"
+        return
+    fi
+    local -A language_of=()
+    local ext lang path name list
+    while IFS=$'\t' read -r ext lang; do
+        language_of[$ext]=$lang
+    done < "$BUNDLE/extensions.tsv"
+    while IFS= read -r -d '' path; do
+        name="${path##*/}"
+        case "$name" in
+            *.*) lang="${language_of[${name##*.}]:-}" ;;
+            *) lang="" ;;
+        esac
+        [ -z "$lang" ] || printf '%s\0' "$path" >> "$1.lang-$lang"
+    done < "$1"
+    for lang in "${language_of[@]}"; do
+        list="$1.lang-$lang"
+        [ -f "$list" ] || continue
+        scan_list "$BUNDLE/lang/$lang.yml" "$list"
+        rm -f "$list"
+    done
+}
 
-# Process the output with jq to:
-# 1. Group matches by ruleId
-# 2. Split ruleId on '.' to get category and subcategory
-# 3. Build the Component JSON structure
-# 4. Apply max_matches limit
-RESULT=$(echo "$SG_OUTPUT" | jq --argjson max_matches "$MAX_MATCHES" '
-# Group matches by ruleId
-group_by(.ruleId) |
-
-# Transform each group into the desired structure
-map({
-    ruleId: .[0].ruleId,
-    message: .[0].message,
-    severity: .[0].severity,
-    count: length,
-    matches: (.[0:$max_matches] | map({
-        file: .file,
-        range: .range,
-        code: .text
-    }))
-}) |
-
-# Build nested structure from ruleId (category.subcategory)
-reduce .[] as $rule ({};
-    ($rule.ruleId | split(".")) as $parts |
-    if ($parts | length) >= 2 then
-        .[$parts[0]][$parts[1]] = {
-            count: $rule.count,
-            message: $rule.message,
-            severity: $rule.severity,
-            matches: $rule.matches
-        }
+# Group matches by rule and truncate per rule while the stream is read.
+aggregate() {
+    if [ "$DEBUG" = "true" ]; then
+        tee /dev/stderr
     else
-        # If no dot in ruleId, put under "custom" category
-        .custom[$rule.ruleId] = {
-            count: $rule.count,
-            message: $rule.message,
-            severity: $rule.severity,
-            matches: $rule.matches
-        }
-    end
-)
-')
-
-# Get ast-grep version
-SG_VERSION=$(ast-grep --version 2>/dev/null | head -1 | awk '{print $2}' || echo "unknown")
+        cat
+    fi | jq -nc --argjson max_matches "$MAX_MATCHES" -f "$HERE/aggregate.jq"
+}
 
-# Add source metadata
-FINAL_OUTPUT=$(echo "$RESULT" | jq --arg version "$SG_VERSION" '{
-    source: {
+# Would a full scan of `.` pick up this path? ast-grep skips hidden files
+# and the exclude_paths directories; ignored files are filtered separately.
+scannable() {
+    case "/$1" in
+        */.*) return 1 ;;
+    esac
+    local p
+    for p in "${EXCLUDE_LIST[@]}"; do
+        case "$1" in
+            "$p"/*) return 1 ;;
+        esac
+    done
+    return 0
+}
+
+# PR mode: re-scan only the files that differ from the commit the cached
+# default-branch results describe, and patch those results. Prints the merged
+# rules and sets CHANGED_COUNT / BASELINE_SHA, or returns non-zero when a full
+# scan is needed instead.
+changed_files_scan() {
+    [ -n "${LUNAR_COMPONENT_PR:-}" ] && [ -n "${LUNAR_COMPONENT_BASE_BRANCH:-}" ] || return 1
+    [ "$PR_CHANGED_FILES_ONLY" = "true" ] || return 1
+    [ -n "$HEAD_SHA" ] && [ -n "${LUNAR_COMPONENT_ID:-}" ] || return 1
+
+    # Unqualified get-json resolves the default-branch snapshot.
+    local baseline
+    baseline=$(lunar component get-json "$LUNAR_COMPONENT_ID" 2>/dev/null | jq -c '.code_patterns // empty' 2>/dev/null || true)
+    if [ -z "$baseline" ]; then
+        echo "No default-branch .code_patterns to reuse, running a full scan." >&2
+        return 1
+    fi
+    local base_sha
+    base_sha=$(echo "$baseline" | jq -r --arg sha "$RULES_SHA" --arg version "$SG_VERSION" '
+        .source // {}
+        | if .scope == "full" and .rules_sha256 == $sha and .version == $version
+          then .commit // "" else "" end')
+    if [ -z "$base_sha" ]; then
+        echo "Default-branch .code_patterns came from other rules or ast-grep version, running a full scan." >&2
+        return 1
+    fi
+    if ! git cat-file -e "${base_sha}^{commit}" 2>/dev/null; then
+        git fetch -q --no-tags --depth=1 origin "$base_sha" 2>/dev/null || true
+        if ! git cat-file -e "${base_sha}^{commit}" 2>/dev/null; then
+            echo "Baseline commit $base_sha is not available, running a full scan." >&2
+            return 1
+        fi
+    fi
+    echo "Scanning files changed since $base_sha (default-branch results for $LUNAR_COMPONENT_BASE_BRANCH)" >&2
+
+    # Changed paths split by side: before (exists at the baseline commit) and
+    # after (exists at HEAD). Renames show up as a delete plus an add.
+    local diff_file="$WORK/diff" changed="$WORK/changed" before="$WORK/before" after="$WORK/after"
+    git diff --name-status -z --no-renames "$base_sha" HEAD > "$diff_file" || return 1
+    : > "$changed"
+    : > "$before"
+    : > "$after"
+    local status path count=0
+    while IFS= read -r -d '' status && IFS= read -r -d '' path; do
+        case "$path" in
+            .gitignore|*/.gitignore|.ignore|*/.ignore)
+                echo "Ignore rules changed ($path), running a full scan." >&2
+                return 1 ;;
+        esac
+        count=$((count + 1))
+        printf '%s\n' "$path" >> "$changed"
+        scannable "$path" || continue
+        [ "$status" = "A" ] || printf '%s\0' "$path" >> "$before"
+        [ "$status" = "D" ] || printf '%s\0' "$path" >> "$after"
+    done < "$diff_file"
+    if [ "$count" -gt "$PR_MAX_CHANGED_FILES" ]; then
+        echo "$count files changed (more than $PR_MAX_CHANGED_FILES), running a full scan." >&2
+        return 1
+    fi
+    CHANGED_COUNT=$count
+    BASELINE_SHA=$base_sha
+
+    # Tracked files can still match .gitignore, which a full scan skips.
+    local list ignored
+    for list in "$before" "$after"; do
+        [ -s "$list" ] || continue
+        ignored=$(git check-ignore --no-index -z --stdin < "$list" 2>/dev/null | tr '\0' '\n' || true)
+        if [ -n "$ignored" ]; then
+            tr '\0' '\n' < "$list" | grep -vxF -e "$ignored" | tr '\n' '\0' > "$list.kept" || true
+            mv "$list.kept" "$list"
+        fi
+    done
+
+    # Baseline versions of the changed files, in a tree of their own so paths
+    # (and any `files:` globs in the rules) resolve the same way.
+    local base_tree="$WORK/base-tree"
+    mkdir -p "$base_tree"
+    while IFS= read -r -d '' path; do
+        mkdir -p "$base_tree/$(dirname "$path")"
+        git show "$base_sha:$path" > "$base_tree/$path"
+    done < "$before"
+
+    (cd "$base_tree" && scan_by_language "$before") | aggregate > "$WORK/before.json"
+    scan_by_language "$after" | aggregate > "$WORK/after.json"
+    echo "$baseline" > "$WORK/baseline.json"
+
+    jq -nc --argjson max_matches "$MAX_MATCHES" \
+        --slurpfile baseline "$WORK/baseline.json" \
+        --slurpfile before "$WORK/before.json" \
+        --slurpfile after "$WORK/after.json" \
+        --rawfile changed "$changed" \
+        -f "$HERE/merge.jq"
+}
+
+CHANGED_COUNT=""
+BASELINE_SHA=""
+if changed_files_scan > "$WORK/merged.json" && [ -s "$WORK/merged.json" ]; then
+    RESULT=$(< "$WORK/merged.json")
+    SOURCE=$(jq -nc --arg version "$SG_VERSION" --arg commit "$HEAD_SHA" --arg sha "$RULES_SHA" \
+        --arg baseline "$BASELINE_SHA" --argjson changed "${CHANGED_COUNT:-0}" '{
+        tool: "ast-grep",
+        version: $version,
+        commit: $commit,
+        rules_sha256: $sha,
+        scope: "changed-files",
+        baseline_commit: $baseline,
+        changed_files: $changed
+    }')
+else
+    RESULT=$(scan . | aggregate)
+    SOURCE=$(jq -nc --arg version "$SG_VERSION" --arg commit "$HEAD_SHA" --arg sha "$RULES_SHA" '{
         tool: "ast-grep",
-        version: $version
-    }
-} + .')
+        version: $version,
+        commit: $commit,
+        rules_sha256: $sha,
+        scope: "full"
+    }')
+fi
+
+# Add source metadata
+FINAL_OUTPUT=$(echo "$RESULT" | jq --argjson source "$SOURCE" '{source: $source} + .')
 
 # Write to Component JSON
 echo "$FINAL_OUTPUT" | lunar collect -j ".code_patterns" -
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""Tests for the ast-grep collector's full and PR (changed-files) scans.
+
+main.sh runs against a scratch git repository with a stub `ast-grep` that
+reports lines containing a rule's needle (`eval(`, `print(`, `fmt.Printf(`) as
+matches, for the rules present in the --rule file and files of the rule's
+language, and a stub `lunar` that serves the default-branch Component JSON and
+records what is collected. The properties locked in: a PR run that re-scans
+only the changed files reports exactly the per-rule counts a full scan of the
+same commit reports, and the rule bundle is validated and split once per
+rules input.
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import textwrap
+import unittest
+
+HERE = os.path.dirname(__file__)
+COLLECTOR = os.path.abspath(os.path.join(HERE, ".."))
+
+RULES = textwrap.dedent(
+    """\
+    id: security.eval
+    language: python
+    message: Dangerous eval() usage
+    severity: error
+    rule:
+      pattern: eval($EXPR)
+    ---
+    id: print
+    language: python
+    message: Use logging instead of print
+    severity: warning
+    rule:
+      pattern: print($$$ARGS)
+    ---
+    id: logging.printf
+    language: go
+    message: Use structured logging instead of fmt.Printf
+    severity: warning
+    rule:
+      pattern: fmt.Printf($$$ARGS)
+    """
+)
+
+# Stub ast-grep: one match per line containing a rule's needle, for the rules
+# whose id appears in the --rule file (YAML or one-line JSON documents) and
+# files with the rule's extension. Paths are walked the way `ast-grep scan .`
+# walks them (hidden files and --globs exclusions skipped); a rules file
+# containing INVALID is rejected. Every invocation is logged to $CAPTURE.
+AST_GREP_STUB = textwrap.dedent(
+    """\
+    #!/usr/bin/env python3
+    import json, os, re, sys
+    args = sys.argv[1:]
+    if args == ["--version"]:
+        print("ast-grep 0.40.5")
+        sys.exit(0)
+    with open(os.environ["CAPTURE"], "a") as f:
+        f.write("SCAN: " + " ".join(args) + "\\n")
+    excludes, paths, i = [], [], 1
+    rule_file = args[args.index("--rule") + 1]
+    with open(rule_file) as f:
+        rule_text = f.read()
+    if "INVALID" in rule_text:
+        print("Error: Cannot parse rule " + rule_file, file=sys.stderr)
+        sys.exit(2)
+    ids = set(re.findall(r'(?:^id: *|"id": *")([\\w.]+)', rule_text, re.M))
+    while i < len(args):
+        a = args[i]
+        if a in ("--rule", "--globs"):
+            if a == "--globs":
+                excludes.append(args[i + 1].lstrip("!").rstrip("*").rstrip("/"))
+            i += 2
+            continue
+        if not a.startswith("-"):
+            paths.append(a)
+        i += 1
+    RULES = [(n, r, m, s, e) for n, r, m, s, e in [
+        ("eval(", "security.eval", "Dangerous eval() usage", "error", ".py"),
+        ("print(", "print", "Use logging instead of print", "warning", ".py"),
+        ("fmt.Printf(", "logging.printf", "Use structured logging", "warning", ".go"),
+    ] if r in ids]
+    def files():
+        for p in paths:
+            if os.path.isfile(p):
+                yield p
+                continue
+            for root, dirs, names in os.walk(p):
+                dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+                for n in sorted(names):
+                    if not n.startswith("."):
+                        yield os.path.relpath(os.path.join(root, n), ".")
+    found = False
+    for path in files():
+        if any(path == e or path.startswith(e + "/") for e in excludes):
+            continue
+        with open(path) as f:
+            for lineno, line in enumerate(f):
+                for needle, rule, message, severity, ext in RULES:
+                    col = line.find(needle) if path.endswith(ext) else -1
+                    if col >= 0:
+                        found = True
+                        print(json.dumps({
+                            "file": path, "ruleId": rule, "message": message,
+                            "severity": severity, "text": line.strip(),
+                            "range": {"start": {"line": lineno, "column": col},
+                                      "end": {"line": lineno, "column": len(line.rstrip())}},
+                        }))
+    sys.exit(1 if found else 0)
+    """
+)
+
+LUNAR_STUB = textwrap.dedent(
+    """\
+    #!/bin/sh
+    if [ "$1" = "component" ] && [ "$2" = "get-json" ]; then
+      printf 'GETJSON: %s\\n' "$*" >> "$CAPTURE"
+      [ -f "$MOCK_DIR/main.json" ] && cat "$MOCK_DIR/main.json"
+      exit 0
+    fi
+    cat > "$MOCK_DIR/collected.json"
+    """
+)
+
+
+class Base(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="ast-grep-test-")
+        self.bin = os.path.join(self.tmp, "bin")
+        self.mock = os.path.join(self.tmp, "mock")
+        self.repo = os.path.join(self.tmp, "repo")
+        for d in (self.bin, self.mock, self.repo):
+            os.makedirs(d)
+        self.capture = os.path.join(self.tmp, "capture.log")
+        self.cache = os.path.join(self.tmp, "rules-cache")
+        self._stub("ast-grep", AST_GREP_STUB)
+        self._stub("lunar", LUNAR_STUB)
+        self.git("init", "-q", "-b", "main")
+        self.write({
+            "app/main.py": "print('start')\neval(x)\n",
+            "app/util.py": "eval(y)\nprint(1)\nprint(2)\n",
+            "app/old.py": "eval(z)\n",
+            "vendor/lib.py": "eval(v)\n",
+            ".hidden.py": "eval(h)\n",
+        })
+        self.commit("base")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _stub(self, name, body):
+        path = os.path.join(self.bin, name)
+        with open(path, "w") as f:
+            f.write(body)
+        os.chmod(path, 0o755)
+
+    def git(self, *args):
+        return subprocess.run(
+            ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+            cwd=self.repo, check=True, capture_output=True, text=True,
+        ).stdout.strip()
+
+    def write(self, files):
+        for rel, content in files.items():
+            path = os.path.join(self.repo, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+
+    def commit(self, message):
+        self.git("add", "-A")
+        self.git("commit", "-q", "-m", message)
+
+    def run_main(self, env=None, returncode=0):
+        if os.path.exists(self.capture):
+            os.unlink(self.capture)
+        full_env = {
+            "PATH": self.bin + ":" + os.environ["PATH"],
+            "HOME": self.tmp,
+            "MOCK_DIR": self.mock,
+            "CAPTURE": self.capture,
+            "LUNAR_VAR_RULES": RULES,
+            "LUNAR_COMPONENT_ID": "github.com/acme/app",
+            "LUNAR_VAR_RULES_CACHE_DIR": self.cache,
+        }
+        full_env.update(env or {})
+        result = subprocess.run(
+            ["bash", os.path.join(COLLECTOR, "main.sh")],
+            cwd=self.repo, env=full_env, stdin=subprocess.DEVNULL,
+            capture_output=True, text=True,
+        )
+        self.assertEqual(result.returncode, returncode, result.stderr)
+        if returncode:
+            return None, [], result.stderr
+        with open(os.path.join(self.mock, "collected.json")) as f:
+            collected = json.load(f)
+        with open(self.capture) as f:
+            scans = [line for line in f if line.startswith("SCAN: ")]
+        return collected, scans, result.stderr
+
+    def publish_baseline(self, code_patterns):
+        with open(os.path.join(self.mock, "main.json"), "w") as f:
+            json.dump({"code_patterns": code_patterns}, f)
+
+    @staticmethod
+    def counts(patterns):
+        return {
+            f"{c}.{s}": rule["count"]
+            for c, subs in patterns.items() if c != "source"
+            for s, rule in subs.items()
+        }
+
+
+PR_ENV = {"LUNAR_COMPONENT_PR": "42", "LUNAR_COMPONENT_BASE_BRANCH": "main"}
+
+
+class FullScanTest(Base):
+    def test_groups_counts_and_truncates(self):
+        patterns, scans, _ = self.run_main({"LUNAR_VAR_MAX_MATCHES_PER_RULE": "1"})
+        self.assertEqual(self.counts(patterns), {"security.eval": 3, "custom.print": 3})
+        self.assertEqual(len(patterns["security"]["eval"]["matches"]), 1)
+        self.assertEqual(patterns["security"]["eval"]["severity"], "error")
+        self.assertEqual(
+            set(patterns["security"]["eval"]["matches"][0]), {"file", "range", "code"}
+        )
+        source = patterns["source"]
+        self.assertEqual(source["scope"], "full")
+        self.assertEqual(source["version"], "0.40.5")
+        self.assertEqual(source["commit"], self.git("rev-parse", "HEAD"))
+        self.assertEqual(len(source["rules_sha256"]), 64)
+        self.assertIn("--json=stream", scans[-1])
+
+    def test_no_matches(self):
+        self.write({"app/main.py": "x = 1\n", "app/util.py": "", "app/old.py": ""})
+        self.commit("clean")
+        patterns, _, _ = self.run_main()
+        self.assertEqual(self.counts(patterns), {})
+        self.assertEqual(patterns["source"]["tool"], "ast-grep")
+
+
+class ChangedFilesScanTest(Base):
+    def setUp(self):
+        super().setUp()
+        baseline, _, _ = self.run_main()
+        self.publish_baseline(baseline)
+        self.git("checkout", "-q", "-b", "feature")
+        self.write({
+            "app/main.py": "print('start')\neval(x)\neval(again)\n",  # +1 eval
+            "app/new.py": "print('new')\n",                           # +1 print
+            "vendor/lib.py": "eval(v)\neval(w)\n",                    # excluded
+        })
+        os.unlink(os.path.join(self.repo, "app/old.py"))              # -1 eval
+        self.commit("feature")
+
+    def full_scan_counts(self):
+        patterns, _, _ = self.run_main()
+        return self.counts(patterns)
+
+    def test_counts_match_a_full_scan(self):
+        patterns, scans, _ = self.run_main(PR_ENV)
+        self.assertEqual(patterns["source"]["scope"], "changed-files")
+        self.assertEqual(self.counts(patterns), self.full_scan_counts())
+        self.assertEqual(self.counts(patterns), {"security.eval": 3, "custom.print": 4})
+
+    def test_scans_only_changed_files(self):
+        _, scans, _ = self.run_main(PR_ENV)
+        scanned = " ".join(scans)
+        self.assertNotIn(" . ", scanned + " ")
+        self.assertIn("app/main.py", scanned)
+        self.assertIn("app/new.py", scanned)
+        self.assertNotIn("app/util.py", scanned)
+        self.assertNotIn("vendor/lib.py", scanned)
+
+    def test_matches_merge_untouched_and_changed_files(self):
+        patterns, _, _ = self.run_main(PR_ENV)
+        files = sorted(m["file"] for m in patterns["security"]["eval"]["matches"])
+        self.assertEqual(files, ["app/main.py", "app/main.py", "app/util.py"])
+        self.assertEqual(patterns["source"]["changed_files"], 4)
+        self.assertEqual(patterns["source"]["baseline_commit"], self.git("rev-parse", "main"))
+
+    def test_truncation_keeps_exact_counts(self):
+        patterns, _, _ = self.run_main(dict(PR_ENV, LUNAR_VAR_MAX_MATCHES_PER_RULE="1"))
+        self.assertEqual(self.counts(patterns), {"security.eval": 3, "custom.print": 4})
+        self.assertEqual(len(patterns["custom"]["print"]["matches"]), 1)
+
+    def test_rule_dropped_when_last_match_removed(self):
+        self.write({"app/main.py": "eval(x)\n", "app/util.py": "eval(y)\n", "app/new.py": ""})
+        self.commit("no prints")
+        patterns, _, _ = self.run_main(PR_ENV)
+        self.assertEqual(self.counts(patterns), {"security.eval": 2})
+        self.assertEqual(self.counts(patterns), self.full_scan_counts())
+
+    def test_other_rules_fall_back_to_full_scan(self):
+        patterns, scans, stderr = self.run_main(
+            dict(PR_ENV, LUNAR_VAR_EXCLUDE_PATHS="node_modules")
+        )
+        self.assertEqual(patterns["source"]["scope"], "full")
+        self.assertIn("other rules", stderr)
+        self.assertEqual(self.counts(patterns)["security.eval"], 5)
+
+    def test_too_many_changed_files_fall_back_to_full_scan(self):
+        patterns, _, _ = self.run_main(dict(PR_ENV, LUNAR_VAR_PR_MAX_CHANGED_FILES="2"))
+        self.assertEqual(patterns["source"]["scope"], "full")
+
+    def test_disabled_input_runs_full_scan(self):
+        patterns, _, _ = self.run_main(dict(PR_ENV, LUNAR_VAR_PR_CHANGED_FILES_ONLY="false"))
+        self.assertEqual(patterns["source"]["scope"], "full")
+
+    def test_missing_baseline_runs_full_scan(self):
+        os.unlink(os.path.join(self.mock, "main.json"))
+        patterns, _, _ = self.run_main(PR_ENV)
+        self.assertEqual(patterns["source"]["scope"], "full")
+
+    def test_scans_changed_files_with_their_language_rules(self):
+        self.write({"cmd/main.go": 'fmt.Printf("a")\nfmt.Printf("b")\n'})
+        self.commit("go")
+        patterns, scans, _ = self.run_main(PR_ENV)
+        self.assertEqual(self.counts(patterns)["logging.printf"], 2)
+        self.assertEqual(self.counts(patterns), self.full_scan_counts())
+        go = [s for s in scans if "cmd/main.go" in s]
+        self.assertEqual(len(go), 1)
+        self.assertIn("/lang/go.yml", go[0])
+        self.assertNotIn("app/new.py", go[0])
+        python = [s for s in scans if "app/new.py" in s]
+        self.assertTrue(python and all("/lang/python.yml" in s for s in python))
+
+    def test_files_without_applicable_rules_are_not_scanned(self):
+        self.git("checkout", "-q", "main")
+        self.git("checkout", "-q", "-b", "docs")
+        self.write({"README.md": "print(this)\n"})
+        self.commit("docs")
+        patterns, scans, _ = self.run_main(PR_ENV)
+        self.assertEqual(patterns["source"]["scope"], "changed-files")
+        self.assertEqual(scans, [])
+        self.assertEqual(self.counts(patterns), self.full_scan_counts())
+
+
+class RuleBundleTest(Base):
+    def bundles(self):
+        """Published cache keys: pointer files named by the rules hash."""
+        if not os.path.isdir(self.cache):
+            return []
+        return [d for d in os.listdir(self.cache) if not d.startswith(".")]
+
+    def bundle_path(self, key):
+        with open(os.path.join(self.cache, key)) as f:
+            return os.path.join(self.cache, f.read().strip())
+
+    def test_bundle_built_once_and_split_by_language(self):
+        _, first, _ = self.run_main()
+        _, second, _ = self.run_main()
+        self.assertEqual(len([s for s in first if s.rstrip().endswith("/empty")]), 1)
+        self.assertEqual([s for s in second if s.rstrip().endswith("/empty")], [])
+        (bundle,) = self.bundles()
+        self.assertTrue(re.fullmatch(r"[0-9a-f]{64}", bundle))
+        self.assertTrue(os.path.isfile(os.path.join(self.cache, bundle)))
+        path = self.bundle_path(bundle)
+        self.assertTrue(os.path.basename(path).startswith(".bundle-"))
+        self.assertEqual(sorted(os.listdir(os.path.join(path, "lang"))), ["go.yml", "python.yml"])
+        with open(os.path.join(path, "extensions.tsv")) as f:
+            extensions = dict(line.rstrip("\n").split("\t") for line in f)
+        self.assertEqual(extensions["py"], "python")
+        self.assertEqual(extensions["go"], "go")
+        with open(os.path.join(path, "lang", "python.yml")) as f:
+            python_rules = f.read()
+        self.assertIn("security.eval", python_rules)
+        self.assertNotIn("logging.printf", python_rules)
+
+    def test_new_rules_get_a_new_bundle(self):
+        self.run_main()
+        self.run_main({"LUNAR_VAR_RULES": RULES.replace("error", "warning")})
+        self.assertEqual(len(self.bundles()), 2)
+
+    def test_unknown_language_leaves_bundle_unsplit(self):
+        self.run_main({"LUNAR_VAR_RULES": RULES.replace("language: go", "language: cobol")})
+        (bundle,) = self.bundles()
+        self.assertTrue(os.path.isfile(os.path.join(self.bundle_path(bundle), "rules.yml")))
+        self.assertFalse(os.path.exists(os.path.join(self.bundle_path(bundle), "extensions.tsv")))
+
+    def test_bundle_unsplit_for_want_of_yq_is_not_cached(self):
+        self._stub("yq", "#!/bin/sh\nexit 1\n")
+        _, scans, _ = self.run_main()
+        self.assertEqual(self.bundles(), [])
+        # The scan used the run's own copy, not a path under the cache.
+        self.assertFalse(any("rules-cache" in s for s in scans if not s.rstrip().endswith("/empty")))
+        # Nothing was published, so the next run builds (and validates) again.
+        _, scans, _ = self.run_main()
+        self.assertEqual(len([s for s in scans if s.rstrip().endswith("/empty")]), 1)
+
+    def test_pointer_to_missing_bundle_is_rebuilt(self):
+        self.run_main()
+        (bundle,) = self.bundles()
+        shutil.rmtree(self.bundle_path(bundle))
+        _, scans, _ = self.run_main()
+        self.assertEqual(len([s for s in scans if s.rstrip().endswith("/empty")]), 1)
+        self.assertTrue(os.path.isfile(os.path.join(self.bundle_path(bundle), "rules.yml")))
+
+    def test_invalid_rules_fail_and_are_not_cached(self):
+        _, _, stderr = self.run_main({"LUNAR_VAR_RULES": RULES + "INVALID\n"}, returncode=1)
+        self.assertIn("rejected the rules", stderr)
+        self.assertEqual(self.bundles(), [])
+
+    def test_unwritable_cache_still_scans(self):
+        with open(self.cache, "w") as f:
+            f.write("not a directory")
+        patterns, _, _ = self.run_main()
+        self.assertEqual(self.counts(patterns)["security.eval"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -61,5 +61,8 @@ send_span \
   exit 1
 }
 
+# Export the spans still spooled for this job (batch mode) before it ends.
+flush_spool
+
 # Cleanup
 rm -f /tmp/lunar-otel-trace-id-${LUNAR_CI_JOB_ID:-unknown} /tmp/lunar-otel-root-span-id-${LUNAR_CI_JOB_ID:-unknown} /tmp/lunar-otel-job-start-time-${LUNAR_CI_JOB_ID:-unknown}
@@ -13,6 +13,9 @@ echo "$trace_id" > /tmp/lunar-otel-trace-id-${LUNAR_CI_JOB_ID:-unknown}
 echo "$root_span_id" > /tmp/lunar-otel-root-span-id-${LUNAR_CI_JOB_ID:-unknown}
 echo "$start_time" > /tmp/lunar-otel-job-start-time-${LUNAR_CI_JOB_ID:-unknown}
 
+# Spool for this job's spans (batch export mode)
+init_spool
+
 # Structured collection for debugging: Create root trace object
 debug_collect ".ci.traces.$trace_id.trace_id" "$trace_id" \
   ".ci.traces.$trace_id.root_span_id" "$root_span_id" \
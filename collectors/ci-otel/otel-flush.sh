@@ -0,0 +1,205 @@
+#!/bin/bash
+# Background exporter for spans spooled by send_span (export_mode "batch").
+#
+# Usage: otel-flush.sh <spool-dir>
+#
+# Every OTEL_FLUSH_INTERVAL seconds the spans spooled since the last round
+# (spans/*.jsonl whose .ready marker exists) are gathered in end-time order and
+# split into batches of at most batch_size spans, each one OTLP/HTTP request
+# to ${OTEL_ENDPOINT}/v1/traces. A batch is retried with exponential backoff
+# on connection errors, 429 and 5xx, and kept for the next round if it still
+# fails; a batch the endpoint rejects outright (other 4xx) is dropped. The
+# flusher exits once it has been idle for OTEL_FLUSHER_IDLE_SECONDS (the next
+# span starts a new one), or, when job-end drops a `stop` file, after a final
+# drain, removing the spool.
+#
+# Only one flusher runs per spool: the `flusher.lock` directory holds its PID.
+
+source "$(dirname "$0")/otel-helpers.sh"
+
+SPOOL_DIR="$1"
+BATCH_SIZE="${LUNAR_VAR_batch_size:-${LUNAR_VAR_BATCH_SIZE:-512}}"
+PROTOCOL="${LUNAR_VAR_otel_protocol:-${LUNAR_VAR_OTEL_PROTOCOL:-http/json}}"
+COMPRESSION="${LUNAR_VAR_otel_compression:-${LUNAR_VAR_OTEL_COMPRESSION:-none}}"
+FLUSH_INTERVAL="${OTEL_FLUSH_INTERVAL:-2}"
+IDLE_SECONDS="${OTEL_FLUSHER_IDLE_SECONDS:-60}"
+RETRIES="${OTEL_EXPORT_RETRIES:-5}"
+# Batches still failing after this long are dropped.
+MAX_BATCH_AGE_MINUTES="${OTEL_SPOOL_MAX_AGE_MINUTES:-15}"
+
+[ -n "$SPOOL_DIR" ] && [ -d "$SPOOL_DIR" ] || exit 0
+LOCK="$SPOOL_DIR/flusher.lock"
+SPANS="$SPOOL_DIR/spans"
+BATCHES="$SPOOL_DIR/batches"
+
+if ! mkdir "$LOCK" 2>/dev/null; then
+  # A flusher holds the lock — unless it died without releasing it.
+  holder=$(cat "$LOCK/pid" 2>/dev/null || echo "")
+  if [ -z "$holder" ] || kill -0 "$holder" 2>/dev/null; then
+    exit 0
+  fi
+  rm -rf "$LOCK"
+  mkdir "$LOCK" 2>/dev/null || exit 0
+fi
+echo "$$" > "$LOCK/pid"
+trap 'rm -rf "$LOCK"' EXIT
+mkdir -p "$BATCHES"
+
+if [ "$PROTOCOL" = "http/protobuf" ] && ! command -v python3 >/dev/null 2>&1; then
+  echo "OTEL: otel_protocol http/protobuf needs python3 on the runner; exporting http/json" >&2
+  PROTOCOL="http/json"
+fi
+if [ "$COMPRESSION" = "gzip" ] && ! command -v gzip >/dev/null 2>&1; then
+  echo "OTEL: otel_compression gzip needs gzip on the runner; exporting uncompressed" >&2
+  COMPRESSION="none"
+fi
+
+# Gather the ready spans into one file and split it into batch files, named so
+# they sort in spool order. spool_span writes a span's `.ready` marker only
+# after the span file is complete, so spans still being written wait for the
+# next round; the gathered spans are removed before the batches are cut, and
+# a rotated file left by an interrupted flusher is split on the next pass.
+# Returns 1 when there was nothing new to gather.
+rotate_spool() {
+  local ready rotated stamp
+  local -a spans=() done_files=()
+  for ready in "$SPANS"/*.ready; do
+    [ -f "$ready" ] || continue
+    spans+=("${ready%.ready}.jsonl")
+    done_files+=("${ready%.ready}.jsonl" "$ready")
+  done
+  if [ "${#spans[@]}" -gt 0 ]; then
+    stamp=$(date +%s%N)
+    printf '%s\n' "${spans[@]}" | xargs cat > "$SPOOL_DIR/partial-$stamp" \
+      && mv "$SPOOL_DIR/partial-$stamp" "$SPOOL_DIR/rotated-$stamp" \
+      || { rm -f "$SPOOL_DIR/partial-$stamp"; return 1; }
+    printf '%s\n' "${done_files[@]}" | xargs rm -f
+  fi
+  for rotated in "$SPOOL_DIR"/rotated-*; do
+    [ -f "$rotated" ] || continue
+    split -l "$BATCH_SIZE" -d -a 6 "$rotated" "$BATCHES/${rotated##*/rotated-}-" && rm -f "$rotated"
+  done
+  [ "${#spans[@]}" -gt 0 ]
+}
+
+# Build the OTLP request body for a batch file: one resourceSpans entry per
+# service.name, as send_span's sync payload has.
+build_request() {
+  local batch="$1"
+  local out="$2"
+  jq -cs '{
+    resourceSpans: (group_by(.service) | map({
+      resource: {
+        attributes: [
+          {"key": "service.name", "value": {"stringValue": .[0].service}}
+        ]
+      },
+      scopeSpans: [{
+        scope: {
+          name: "lunar-ci-otel",
+          version: "1.0.0"
+        },
+        spans: map(.span)
+      }]
+    }))
+  }' "$batch" > "$out.json" || return 1
+
+  if [ "$PROTOCOL" = "http/protobuf" ]; then
+    python3 "$(dirname "$0")/otlp_proto.py" < "$out.json" > "$out.body" || return 1
+  else
+    cp "$out.json" "$out.body"
+  fi
+  if [ "$COMPRESSION" = "gzip" ]; then
+    gzip -c "$out.body" > "$out.gz" && mv "$out.gz" "$out.body"
+  fi
+}
+
+# POST one batch. Returns 0 when exported, 1 to retry later, 2 to drop.
+export_batch() {
+  local batch="$1"
+  local req="$SPOOL_DIR/request"
+  local content_type="application/json"
+  local -a headers=()
+
+  if ! build_request "$batch" "$req"; then
+    echo "OTEL: ERROR - could not build an OTLP request from $(basename "$batch"); dropping it" >&2
+    return 2
+  fi
+  [ "$PROTOCOL" = "http/protobuf" ] && content_type="application/x-protobuf"
+  headers+=(-H "Content-Type: $content_type")
+  [ "$COMPRESSION" = "gzip" ] && headers+=(-H "Content-Encoding: gzip")
+
+  local attempt=0 delay=1 http_code
+  while :; do
+    http_code=$(curl -s -o /dev/null -w "%{http_code}" -X POST \
+      --connect-timeout "${OTEL_CONNECT_TIMEOUT:-5}" \
+      --max-time "${OTEL_TIMEOUT:-10}" \
+      "${headers[@]}" \
+      --data-binary "@$req.body" \
+      "${OTEL_ENDPOINT}/v1/traces") || http_code="000"
+    case "$http_code" in
+      2??)
+        log_debug "Exported $(wc -l < "$batch" | tr -d ' ') spans (HTTP $http_code)"
+        return 0
+        ;;
+      000|429|5??) ;;
+      *)
+        echo "OTEL: $OTEL_ENDPOINT rejected a batch of $(wc -l < "$batch" | tr -d ' ') spans (HTTP $http_code); dropping it" >&2
+        return 2
+        ;;
+    esac
+    attempt=$((attempt + 1))
+    if [ "$attempt" -gt "$RETRIES" ]; then
+      echo "OTEL: exporting to $OTEL_ENDPOINT failed (HTTP $http_code) after $RETRIES retries; will retry" >&2
+      return 1
+    fi
+    sleep "$delay"
+    delay=$((delay * 2))
+    [ "$delay" -gt 30 ] && delay=30
+  done
+}
+
+# Export every pending batch in order. Stops at the first one that must be
+# retried, so spans go out in the order they ended.
+export_pending() {
+  local batch rc
+  for batch in "$BATCHES"/*; do
+    [ -f "$batch" ] || continue
+    rc=0
+    export_batch "$batch" || rc=$?
+    if [ "$rc" -eq 1 ]; then
+      find "$BATCHES" -type f -mmin +"$MAX_BATCH_AGE_MINUTES" -print -delete 2>/dev/null \
+        | sed 's/^/OTEL: dropped expired batch /' >&2
+      return 1
+    fi
+    rm -f "$batch"
+  done
+  rm -f "$SPOOL_DIR"/request.*
+}
+
+idle=0
+while :; do
+  if rotate_spool; then
+    idle=0
+  fi
+
+  if [ -f "$SPOOL_DIR/stop" ]; then
+    # Final drain for job-end: one more pass for spans spooled meanwhile.
+    export_pending
+    rotate_spool && export_pending
+    remaining=$(cat "$BATCHES"/* 2>/dev/null | wc -l | tr -d ' ')
+    if [ "$remaining" -gt 0 ]; then
+      echo "OTEL: dropping $remaining spans that could not be exported to $OTEL_ENDPOINT" >&2
+    fi
+    trap - EXIT
+    rm -rf "$SPOOL_DIR"
+    exit 0
+  fi
+
+  export_pending || true
+  if [ -z "$(ls -A "$BATCHES")" ]; then
+    idle=$((idle + FLUSH_INTERVAL))
+    [ "$idle" -ge "$IDLE_SECONDS" ] && exit 0
+  fi
+  sleep "$FLUSH_INTERVAL"
+done
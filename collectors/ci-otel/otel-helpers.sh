@@ -5,6 +5,14 @@
 # Send directly to Tempo (port 4318 is OTLP HTTP)
 OTEL_ENDPOINT="${LUNAR_VAR_otel_endpoint:-${LUNAR_VAR_OTEL_ENDPOINT:-http://tempo:4318}}"
 
+# "batch" (default): send_span appends the span to a per-job spool and a
+# background flusher (otel-flush.sh) exports it. "sync": POST each span as it
+# ends, blocking the hook.
+OTEL_EXPORT_MODE="${LUNAR_VAR_export_mode:-${LUNAR_VAR_EXPORT_MODE:-batch}}"
+OTEL_SPOOL_DIR="/tmp/lunar-otel-spool-${LUNAR_CI_JOB_ID:-unknown}"
+OTEL_FLUSHER_LOG="/tmp/lunar-otel-flusher-${LUNAR_CI_JOB_ID:-unknown}.log"
+OTEL_PLUGIN_DIR="${LUNAR_PLUGIN_ROOT:-$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)}"
+
 # Log a debug message to stderr (only when debug mode is enabled)
 log_debug() {
   if [ "${LUNAR_VAR_debug:-${LUNAR_VAR_DEBUG:-false}}" = "true" ]; then
@@ -326,7 +334,7 @@ send_span() {
   
   # Build the span JSON
   local span_json
-  if ! span_json=$(jq -n \
+  if ! span_json=$(jq -cn \
     --arg trace_id "$trace_id" \
     --arg span_id "$span_id" \
     --arg parent_span_id "$parent_span_id" \
@@ -350,6 +358,15 @@ send_span() {
     return 1
   fi
   
+  if [ "$OTEL_EXPORT_MODE" != "sync" ]; then
+    spool_span "$span_json" "$end_time" || {
+      echo "OTEL: ERROR - Failed to spool span '$name' to $OTEL_SPOOL_DIR" >&2
+      return 1
+    }
+    log_debug "Spooled span '$name' (trace_id=$trace_id, span_id=$span_id, parent=$parent_span_id)"
+    return 0
+  fi
+
   # Wrap in OTLP structure
   local otlp_payload
 
@@ -418,3 +435,72 @@ send_span() {
   fi
 }
 
+# Create the job's spool. job-start calls this once, so spool_span only has to
+# write its files.
+init_spool() {
+  [ "$OTEL_EXPORT_MODE" != "sync" ] || return 0
+  mkdir -p "$OTEL_SPOOL_DIR/spans"
+}
+
+# Spool a span as one JSON line, {service, span}, and make sure a flusher is
+# running to export it. This is all the tracing a command pays for on the CI
+# critical path, so it runs on shell builtins only: no jq, no forks.
+#
+# Each span gets its own file, named by end time so the flusher exports spans
+# in the order they ended, plus an empty `.ready` marker written after the
+# span file is closed. The flusher only takes spans whose marker exists, so
+# it never reads a half-written span and never sees the same one twice.
+spool_span() {
+  local span_json="$1"
+  local end_time="${2:-0}"
+  local service="${LUNAR_COMPONENT_ID:-}"
+  local file
+  service="${service//\\/\\\\}"
+  service="${service//\"/\\\"}"
+  # job-start normally created the spool; a job without it still works.
+  [ -d "$OTEL_SPOOL_DIR/spans" ] || mkdir -p "$OTEL_SPOOL_DIR/spans" || return 1
+  OTEL_SPOOL_SEQ=$(( ${OTEL_SPOOL_SEQ:-0} + 1 ))
+  printf -v file '%s/spans/%020d-%d-%06d' "$OTEL_SPOOL_DIR" "$end_time" "$$" "$OTEL_SPOOL_SEQ" || return 1
+  printf '{"service":"%s","span":%s}\n' "$service" "$span_json" > "$file.jsonl" || return 1
+  : > "$file.ready" || return 1
+  start_flusher
+}
+
+# PID of the running flusher for this job's spool, if any.
+flusher_pid() {
+  local pid
+  { read -r pid < "$OTEL_SPOOL_DIR/flusher.lock/pid"; } 2>/dev/null || return 1
+  [ -n "$pid" ] && kill -0 "$pid" 2>/dev/null && echo "$pid"
+}
+
+# Start the background flusher unless one is already running. Concurrent hooks
+# may both start one; the flusher's lock lets only the first stay.
+start_flusher() {
+  flusher_pid >/dev/null && return 0
+  nohup bash "$OTEL_PLUGIN_DIR/otel-flush.sh" "$OTEL_SPOOL_DIR" \
+    </dev/null >>"$OTEL_FLUSHER_LOG" 2>&1 &
+  disown 2>/dev/null || true
+}
+
+# Export everything spooled for this job before the job ends: tell the flusher
+# to drain and exit, then wait for it (up to OTEL_DRAIN_TIMEOUT seconds). The
+# flusher's export errors are repeated on stderr here, where the job shows them.
+flush_spool() {
+  [ "$OTEL_EXPORT_MODE" != "sync" ] || return 0
+  [ -d "$OTEL_SPOOL_DIR" ] || return 0
+  touch "$OTEL_SPOOL_DIR/stop"
+  start_flusher
+  local waited=0 timeout=$(( ${OTEL_DRAIN_TIMEOUT:-60} * 10 ))
+  while [ -d "$OTEL_SPOOL_DIR" ] && [ "$waited" -lt "$timeout" ]; do
+    sleep 0.1
+    waited=$((waited + 1))
+  done
+  if [ -d "$OTEL_SPOOL_DIR" ]; then
+    echo "OTEL: spans still exporting after ${OTEL_DRAIN_TIMEOUT:-60}s; the flusher continues in the background" >&2
+    return 0
+  fi
+  if [ -s "$OTEL_FLUSHER_LOG" ]; then
+    cat "$OTEL_FLUSHER_LOG" >&2
+  fi
+  rm -f "$OTEL_FLUSHER_LOG"
+}
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Encode an OTLP/JSON trace export request as OTLP protobuf.
+
+Used by otel-flush.sh when `otel_protocol` is "http/protobuf". Handles the
+subset of ExportTraceServiceRequest that ci-otel emits (resource and span
+attributes, scope, parent span, kind, status), without a protobuf library.
+
+Stdin: OTLP/JSON request ({"resourceSpans": [...]}).
+Stdout: the same request, protobuf-encoded.
+"""
+
+import json
+import struct
+import sys
+
+
+def _varint(n):
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def _key(field, wire_type):
+    return _varint(field << 3 | wire_type)
+
+
+def _len_field(field, data):
+    return _key(field, 2) + _varint(len(data)) + data
+
+
+def _string(field, s):
+    return _len_field(field, s.encode()) if s else b""
+
+
+def _bytes_hex(field, s):
+    return _len_field(field, bytes.fromhex(s)) if s else b""
+
+
+def _uint(field, n):
+    return _key(field, 0) + _varint(n) if n else b""
+
+
+def _fixed64(field, n):
+    return _key(field, 1) + struct.pack("<Q", n) if n else b""
+
+
+def any_value(v):
+    if "stringValue" in v:
+        return _len_field(1, v["stringValue"].encode())
+    if "boolValue" in v:
+        return _key(2, 0) + _varint(1 if v["boolValue"] else 0)
+    if "intValue" in v:
+        return _key(3, 0) + _varint(int(v["intValue"]) & 0xFFFFFFFFFFFFFFFF)
+    if "doubleValue" in v:
+        return _key(4, 1) + struct.pack("<d", float(v["doubleValue"]))
+    return b""
+
+
+def key_value(kv):
+    return _string(1, kv["key"]) + _len_field(2, any_value(kv.get("value") or {}))
+
+
+def span(s):
+    out = _bytes_hex(1, s["traceId"]) + _bytes_hex(2, s["spanId"])
+    out += _bytes_hex(4, s.get("parentSpanId", ""))
+    out += _string(5, s.get("name", ""))
+    out += _uint(6, int(s.get("kind", 0)))
+    out += _fixed64(7, int(s.get("startTimeUnixNano", 0)))
+    out += _fixed64(8, int(s.get("endTimeUnixNano", 0)))
+    for kv in s.get("attributes") or []:
+        out += _len_field(9, key_value(kv))
+    status = s.get("status")
+    if status:
+        out += _len_field(15, _string(2, status.get("message", "")) + _uint(3, int(status.get("code", 0))))
+    return out
+
+
+def scope_spans(ss):
+    scope = ss.get("scope") or {}
+    out = _len_field(1, _string(1, scope.get("name", "")) + _string(2, scope.get("version", "")))
+    for s in ss.get("spans") or []:
+        out += _len_field(2, span(s))
+    return out
+
+
+def resource_spans(rs):
+    resource = b"".join(
+        _len_field(1, key_value(kv)) for kv in (rs.get("resource") or {}).get("attributes") or []
+    )
+    out = _len_field(1, resource)
+    for ss in rs.get("scopeSpans") or []:
+        out += _len_field(2, scope_spans(ss))
+    return out
+
+
+def main():
+    request = json.load(sys.stdin)
+    body = b"".join(_len_field(1, resource_spans(rs)) for rs in request.get("resourceSpans") or [])
+    sys.stdout.buffer.write(body)
+
+
+if __name__ == "__main__":
+    main()
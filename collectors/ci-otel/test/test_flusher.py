@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""Tests for the ci-otel batch exporter: otel-flush.sh and flush_spool.
+
+In export_mode "batch", send_span writes each span to a per-job spool, one
+file plus a `.ready` marker per span, and otel-flush.sh exports them in
+batches of batch_size. These tests run the real flusher against a local HTTP
+server standing in for the OTLP endpoint, with scripted response codes, and
+lock in the rotation into batches, that spans without a marker are left
+alone, the retry of 5xx, the drop of other 4xx, the drop of what still fails
+at the final drain, the http/protobuf + gzip request, the single-flusher
+lock, and spool_span's files and flush_spool's job-end drain
+(otel-helpers.sh).
+"""
+
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from test_otlp_proto import LEN, decode
+
+HERE = os.path.dirname(__file__)
+COLLECTOR = os.path.abspath(os.path.join(HERE, ".."))
+FLUSHER = os.path.join(COLLECTOR, "otel-flush.sh")
+HELPERS = os.path.join(COLLECTOR, "otel-helpers.sh")
+
+
+class FakeCollector(ThreadingHTTPServer):
+    """An OTLP/HTTP endpoint answering POST /v1/traces with `codes` in turn.
+
+    Once the scripted codes run out it answers `then`. Every request's
+    headers and (still encoded) body are recorded.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, codes=(), then=200):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.codes = list(codes)
+        self.then = then
+        self.lock = threading.Lock()
+        self.requests = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def json_requests(self):
+        with self.lock:
+            return [json.loads(r["body"]) for r in self.requests]
+
+    def exported_names(self, codes=(200,)):
+        """Span names from requests answered with one of `codes`, in order."""
+        with self.lock:
+            requests = [r for r in self.requests if r["code"] in codes]
+        return [
+            span["name"]
+            for r in requests
+            for rs in json.loads(r["body"])["resourceSpans"]
+            for ss in rs["scopeSpans"]
+            for span in ss["spans"]
+        ]
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with server.lock:
+            code = server.codes.pop(0) if server.codes else server.then
+            server.requests.append({"path": self.path, "headers": dict(self.headers), "body": body, "code": code})
+        self.send_response(code)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+
+def spool_line(name, service="acme/api"):
+    span = {
+        "traceId": "0af7651916cd43dd8448eb211c80319c",
+        "spanId": "b7ad6b7169203331",
+        "name": name,
+        "startTimeUnixNano": "1700000000000000000",
+        "endTimeUnixNano": "1700000001000000000",
+        "attributes": [],
+        "kind": 1,
+        "status": {"code": 1},
+    }
+    return json.dumps({"service": service, "span": span})
+
+
+class FlusherTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="ci-otel-test-")
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.spool = os.path.join(self.tmp, "spool")
+        self.spans = os.path.join(self.spool, "spans")
+        os.makedirs(self.spans)
+        self.spooled = 0
+
+    def serve(self, **kwargs):
+        server = FakeCollector(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def spool_spans(self, *lines, ready=True):
+        """Writes spans as spool_span does, marked ready unless told not to."""
+        for line in lines:
+            self.spooled += 1
+            name = os.path.join(self.spans, f"{self.spooled:020d}-1-000001")
+            with open(name + ".jsonl", "w") as f:
+                f.write(line + "\n")
+            if ready:
+                open(name + ".ready", "w").close()
+
+    def env(self, server, **extra):
+        env = {k: v for k, v in os.environ.items() if not k.startswith("LUNAR_")}
+        env.update(
+            {
+                "LUNAR_VAR_otel_endpoint": server.url,
+                "OTEL_FLUSH_INTERVAL": "1",
+                "OTEL_FLUSHER_IDLE_SECONDS": "1",
+                "OTEL_EXPORT_RETRIES": "0",
+                "LUNAR_VAR_batch_size": "2",
+            }
+        )
+        env.update(extra)
+        return env
+
+    def run_flusher(self, server, stop=True, **extra):
+        if stop:
+            open(os.path.join(self.spool, "stop"), "w").close()
+        return subprocess.run(
+            ["bash", FLUSHER, self.spool],
+            env=self.env(server, **extra),
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+
+    def test_drain_exports_in_batches_and_removes_spool(self):
+        server = self.serve()
+        self.spool_spans(*(spool_line(f"s{i}", service="a" if i < 4 else "b") for i in range(1, 6)))
+        result = self.run_flusher(server)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stderr, "")
+        self.assertFalse(os.path.exists(self.spool))
+        self.assertEqual(server.exported_names(), ["s1", "s2", "s3", "s4", "s5"])
+
+        requests = server.json_requests()
+        # batch_size 2: five spans in three requests, one resourceSpans per
+        # service within each.
+        self.assertEqual(len(requests), 3)
+        self.assertEqual(
+            [[rs["resource"]["attributes"][0]["value"]["stringValue"] for rs in r["resourceSpans"]] for r in requests],
+            [["a"], ["a", "b"], ["b"]],
+        )
+        with server.lock:
+            self.assertTrue(all(r["path"] == "/v1/traces" for r in server.requests))
+            self.assertTrue(all(r["headers"]["Content-Type"] == "application/json" for r in server.requests))
+
+    def test_5xx_is_retried(self):
+        server = self.serve(codes=[503, 500])
+        self.spool_spans(spool_line("s1"))
+        result = self.run_flusher(server, OTEL_EXPORT_RETRIES="2")
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stderr, "")
+        with server.lock:
+            self.assertEqual([r["code"] for r in server.requests], [503, 500, 200])
+        self.assertEqual(server.exported_names(), ["s1"])
+        self.assertFalse(os.path.exists(self.spool))
+
+    def test_5xx_at_drain_drops_remaining_spans(self):
+        server = self.serve(then=503)
+        self.spool_spans(spool_line("s1"), spool_line("s2"), spool_line("s3"))
+        result = self.run_flusher(server)
+
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("failed (HTTP 503) after 0 retries", result.stderr)
+        self.assertIn("dropping 3 spans that could not be exported", result.stderr)
+        # Export stops at the first batch that must be retried, so the
+        # second batch is never sent out of order.
+        with server.lock:
+            self.assertEqual(len(server.requests), 1)
+        self.assertFalse(os.path.exists(self.spool))
+
+    def test_4xx_batch_is_dropped_and_the_rest_exported(self):
+        server = self.serve(codes=[400])
+        self.spool_spans(spool_line("s1"), spool_line("s2"), spool_line("s3"))
+        result = self.run_flusher(server)
+
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("rejected a batch of 2 spans (HTTP 400); dropping it", result.stderr)
+        self.assertNotIn("dropping 1 spans", result.stderr)
+        self.assertEqual(server.exported_names(codes=(400,)), ["s1", "s2"])
+        self.assertEqual(server.exported_names(), ["s3"])
+        self.assertFalse(os.path.exists(self.spool))
+
+    def test_protobuf_gzip_request(self):
+        server = self.serve()
+        self.spool_spans(spool_line("s1"))
+        result = self.run_flusher(
+            server, LUNAR_VAR_otel_protocol="http/protobuf", LUNAR_VAR_otel_compression="gzip"
+        )
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        with server.lock:
+            (request,) = server.requests
+        self.assertEqual(request["headers"]["Content-Type"], "application/x-protobuf")
+        self.assertEqual(request["headers"]["Content-Encoding"], "gzip")
+        body = decode(gzip.decompress(request["body"]))
+        resource_spans = decode(body[1][0][1])
+        scope_spans = decode(resource_spans[2][0][1])
+        span = decode(scope_spans[2][0][1])
+        self.assertEqual(span[5], [(LEN, b"s1")])
+
+    def test_exports_in_background_and_exits_when_idle(self):
+        server = self.serve()
+        self.spool_spans(spool_line("s1"), spool_line("s2"), spool_line("s3"))
+        result = self.run_flusher(server, stop=False)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(server.exported_names(), ["s1", "s2", "s3"])
+        # Without a stop file the spool stays for later spans, emptied and
+        # unlocked.
+        self.assertEqual(sorted(os.listdir(self.spool)), ["batches", "spans"])
+        self.assertEqual(os.listdir(os.path.join(self.spool, "batches")), [])
+        self.assertEqual(os.listdir(self.spans), [])
+
+    def test_span_without_ready_marker_is_left_alone(self):
+        server = self.serve()
+        self.spool_spans(spool_line("s1"))
+        self.spool_spans(spool_line("s2"), ready=False)
+        result = self.run_flusher(server, stop=False)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        # s2 is still being written as far as the flusher knows: it is
+        # neither read nor removed, and goes out once its marker appears.
+        self.assertEqual(server.exported_names(), ["s1"])
+        (pending,) = os.listdir(self.spans)
+        self.assertTrue(pending.endswith(".jsonl"))
+        open(os.path.join(self.spans, pending[: -len(".jsonl")] + ".ready"), "w").close()
+        result = self.run_flusher(server)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(server.exported_names(), ["s1", "s2"])
+        self.assertFalse(os.path.exists(self.spool))
+
+    def test_interrupted_rotation_is_exported_once(self):
+        server = self.serve()
+        # A flusher killed after gathering spans but before cutting batches
+        # leaves a rotated file; the next one exports it without re-reading
+        # the (already removed) span files.
+        with open(os.path.join(self.spool, "rotated-1"), "w") as f:
+            f.write(spool_line("s1") + "\n")
+        self.spool_spans(spool_line("s2"))
+        result = self.run_flusher(server)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(server.exported_names(), ["s1", "s2"])
+
+    def test_failed_batch_is_kept_for_the_next_round(self):
+        server = self.serve(codes=[503])
+        self.spool_spans(spool_line("s1"))
+        result = self.run_flusher(server, stop=False, OTEL_FLUSHER_IDLE_SECONDS="2")
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("will retry", result.stderr)
+        with server.lock:
+            self.assertEqual([r["code"] for r in server.requests], [503, 200])
+        self.assertEqual(os.listdir(os.path.join(self.spool, "batches")), [])
+
+    def test_one_flusher_per_spool(self):
+        server = self.serve()
+        self.spool_spans(spool_line("s1"))
+        lock = os.path.join(self.spool, "flusher.lock")
+        os.mkdir(lock)
+        with open(os.path.join(lock, "pid"), "w") as f:
+            f.write(str(os.getpid()))
+        result = self.run_flusher(server)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        with server.lock:
+            self.assertEqual(server.requests, [])
+        self.assertEqual(len(os.listdir(self.spans)), 2)
+
+    def test_stale_lock_is_taken_over(self):
+        server = self.serve()
+        self.spool_spans(spool_line("s1"))
+        lock = os.path.join(self.spool, "flusher.lock")
+        os.mkdir(lock)
+        dead = subprocess.Popen(["true"])
+        dead.wait()
+        with open(os.path.join(lock, "pid"), "w") as f:
+            f.write(str(dead.pid))
+        result = self.run_flusher(server)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(server.exported_names(), ["s1"])
+        self.assertFalse(os.path.exists(self.spool))
+
+
+class FlushSpoolTest(unittest.TestCase):
+    """job-end's drain: spool_span starts the flusher, flush_spool waits."""
+
+    def setUp(self):
+        self.job_id = f"test-{uuid.uuid4().hex[:12]}"
+        self.spool = f"/tmp/lunar-otel-spool-{self.job_id}"
+        self.log = f"/tmp/lunar-otel-flusher-{self.job_id}.log"
+        self.addCleanup(shutil.rmtree, self.spool, ignore_errors=True)
+        self.addCleanup(lambda: os.path.exists(self.log) and os.remove(self.log))
+
+    def serve(self, **kwargs):
+        server = FakeCollector(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def run_job(self, server, script, **extra):
+        env = {k: v for k, v in os.environ.items() if not k.startswith("LUNAR_")}
+        env.update(
+            {
+                "LUNAR_CI_JOB_ID": self.job_id,
+                "LUNAR_COMPONENT_ID": "acme/api",
+                "LUNAR_PLUGIN_ROOT": COLLECTOR,
+                "LUNAR_VAR_otel_endpoint": server.url,
+                "OTEL_FLUSH_INTERVAL": "1",
+                "OTEL_EXPORT_RETRIES": "0",
+            }
+        )
+        env.update(extra)
+        return subprocess.run(
+            ["bash", "-c", f'source "{HELPERS}"\n{script}'],
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+
+    def spool_and_flush(self, *names):
+        spool = "\n".join(
+            f"""spool_span '{json.dumps(json.loads(spool_line(n))["span"])}' {i} || exit 1"""
+            for i, n in enumerate(names, 1)
+        )
+        return f"init_spool\n{spool}\nflush_spool"
+
+    def test_spool_span_files(self):
+        server = self.serve()
+        span = json.loads(spool_line("s1"))["span"]
+        # The flusher is kept out of it so the files can be inspected.
+        script = (
+            "start_flusher() { :; }\n"
+            "init_spool\n"
+            f"spool_span '{json.dumps(span)}' 1700000001000000000 || exit 1\n"
+            f"spool_span '{json.dumps(span)}' 999 || exit 1\n"
+        )
+        result = self.run_job(server, script, LUNAR_COMPONENT_ID='acme/"api"\\x')
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        spans = os.path.join(self.spool, "spans")
+        names = sorted(os.listdir(spans))
+        self.assertEqual(len(names), 4)
+        # Named by zero-padded end time, so they sort in the order the spans
+        # ended regardless of which process wrote them.
+        self.assertTrue(names[0].startswith("00000000000000000999-"))
+        self.assertTrue(names[2].startswith("01700000001000000000-"))
+        for name in names[0::2]:
+            self.assertTrue(name.endswith(".jsonl"))
+            with open(os.path.join(spans, name)) as f:
+                (line,) = f.read().splitlines()
+            self.assertEqual(json.loads(line), {"service": 'acme/"api"\\x', "span": span})
+        self.assertTrue(all(name.endswith(".ready") for name in names[1::2]))
+
+    def test_init_spool_skipped_in_sync_mode(self):
+        server = self.serve()
+        result = self.run_job(server, "init_spool", LUNAR_VAR_export_mode="sync")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertFalse(os.path.exists(self.spool))
+
+    def test_flush_spool_drains_and_removes_spool(self):
+        server = self.serve()
+        start = time.monotonic()
+        result = self.run_job(server, self.spool_and_flush("s1", "s2", "s3"))
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stderr, "")
+        self.assertEqual(server.exported_names(), ["s1", "s2", "s3"])
+        services = {
+            rs["resource"]["attributes"][0]["value"]["stringValue"]
+            for r in server.json_requests()
+            for rs in r["resourceSpans"]
+        }
+        self.assertEqual(services, {"acme/api"})
+        self.assertFalse(os.path.exists(self.spool))
+        self.assertFalse(os.path.exists(self.log))
+        # The drain doesn't wait out the flusher's idle timeout.
+        self.assertLess(time.monotonic() - start, 20)
+
+    def test_flush_spool_repeats_flusher_errors(self):
+        server = self.serve(codes=[400])
+        result = self.run_job(server, self.spool_and_flush("s1"))
+
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("rejected a batch of 1 spans (HTTP 400)", result.stderr)
+        self.assertFalse(os.path.exists(self.spool))
+        self.assertFalse(os.path.exists(self.log))
+
+    def test_flush_spool_gives_up_after_drain_timeout(self):
+        server = self.serve(then=503)
+        result = self.run_job(
+            server,
+            self.spool_and_flush("s1"),
+            OTEL_DRAIN_TIMEOUT="1",
+            OTEL_EXPORT_RETRIES="2",
+        )
+
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("spans still exporting after 1s", result.stderr)
+        self.assertTrue(os.path.exists(self.spool))
+        # Let the background flusher finish its retries before cleanup.
+        deadline = time.monotonic() + 30
+        while os.path.exists(self.spool) and time.monotonic() < deadline:
+            time.sleep(0.5)
+        self.assertFalse(os.path.exists(self.spool))
+
+    def test_sync_mode_sends_directly(self):
+        server = self.serve()
+        span = json.loads(spool_line("s1"))["span"]
+        script = (
+            f"send_span {span['traceId']} {span['spanId']} '' s1 1 2 '[]' || exit 1\n"
+            "flush_spool"
+        )
+        result = self.run_job(server, script, LUNAR_VAR_export_mode="sync")
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(server.exported_names(), ["s1"])
+        self.assertFalse(os.path.exists(self.spool))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Tests for otlp_proto.py, the OTLP/JSON to OTLP protobuf encoder.
+
+The encoder writes ExportTraceServiceRequest without a protobuf library, so
+these tests decode its output with a minimal wire-format reader and check
+every field number and wire type against the OTLP proto definitions
+(opentelemetry/proto/{collector/trace,trace,common,resource}/v1):
+
+    ExportTraceServiceRequest  resource_spans = 1
+    ResourceSpans              resource = 1, scope_spans = 2
+    Resource                   attributes = 1
+    ScopeSpans                 scope = 1, spans = 2
+    InstrumentationScope       name = 1, version = 2
+    Span                       trace_id = 1, span_id = 2, parent_span_id = 4,
+                               name = 5, kind = 6, start_time_unix_nano = 7
+                               (fixed64), end_time_unix_nano = 8 (fixed64),
+                               attributes = 9, status = 15
+    Status                     message = 2, code = 3
+    KeyValue                   key = 1, value = 2
+    AnyValue                   string_value = 1, bool_value = 2,
+                               int_value = 3, double_value = 4 (double)
+"""
+
+import json
+import os
+import struct
+import subprocess
+import sys
+import unittest
+
+HERE = os.path.dirname(__file__)
+ENCODER = os.path.abspath(os.path.join(HERE, "..", "otlp_proto.py"))
+
+VARINT, I64, LEN = 0, 1, 2
+
+TRACE_ID = "0af7651916cd43dd8448eb211c80319c"
+SPAN_ID = "b7ad6b7169203331"
+PARENT_ID = "00f067aa0ba902b7"
+START = 1_700_000_000_123_456_789
+END = 1_700_000_002_987_654_321
+
+
+def _read_varint(buf, pos):
+    shift = n = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return n, pos
+        shift += 7
+
+
+def decode(buf):
+    """Decodes one message into {field: [(wire_type, raw value), ...]}."""
+    fields = {}
+    pos = 0
+    while pos < len(buf):
+        key, pos = _read_varint(buf, pos)
+        field, wire_type = key >> 3, key & 7
+        if wire_type == VARINT:
+            value, pos = _read_varint(buf, pos)
+        elif wire_type == I64:
+            value, pos = buf[pos : pos + 8], pos + 8
+        elif wire_type == LEN:
+            length, pos = _read_varint(buf, pos)
+            value, pos = buf[pos : pos + length], pos + length
+        else:
+            raise AssertionError(f"unexpected wire type {wire_type} for field {field}")
+        fields.setdefault(field, []).append((wire_type, value))
+    if pos != len(buf):
+        raise AssertionError("message overruns its buffer")
+    return fields
+
+
+def span_json(**overrides):
+    span = {
+        "traceId": TRACE_ID,
+        "spanId": SPAN_ID,
+        "parentSpanId": PARENT_ID,
+        "name": "go test ./...",
+        "kind": 1,
+        "startTimeUnixNano": str(START),
+        "endTimeUnixNano": str(END),
+        "attributes": [{"key": "ci.span_type", "value": {"stringValue": "command"}}],
+        "status": {"code": 1},
+    }
+    span.update(overrides)
+    return span
+
+
+def request_json(spans, service="acme/api"):
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+                "scopeSpans": [{"scope": {"name": "lunar-ci-otel", "version": "1.0.0"}, "spans": spans}],
+            }
+        ]
+    }
+
+
+def encode(request):
+    result = subprocess.run(
+        [sys.executable, ENCODER], input=json.dumps(request).encode(), capture_output=True, check=True
+    )
+    return result.stdout
+
+
+class OtlpProtoTest(unittest.TestCase):
+    def one(self, fields, field, wire_type):
+        """The single occurrence of `field`, asserting its wire type."""
+        self.assertIn(field, fields)
+        self.assertEqual(len(fields[field]), 1, f"field {field} repeated")
+        actual, value = fields[field][0]
+        self.assertEqual(actual, wire_type, f"field {field} wire type")
+        return value
+
+    def string(self, fields, field):
+        return self.one(fields, field, LEN).decode()
+
+    def key_values(self, fields, field):
+        out = {}
+        for wire_type, raw in fields.get(field, []):
+            self.assertEqual(wire_type, LEN)
+            kv = decode(raw)
+            out[self.string(kv, 1)] = decode(self.one(kv, 2, LEN))
+        return out
+
+    def spans(self, buf):
+        """Walks request -> ResourceSpans -> ScopeSpans, returning spans."""
+        request = decode(buf)
+        self.assertEqual(set(request), {1})
+        resource_spans = decode(self.one(request, 1, LEN))
+        self.assertEqual(set(resource_spans), {1, 2})
+        scope_spans = decode(self.one(resource_spans, 2, LEN))
+        return [decode(raw) for wire_type, raw in scope_spans.get(2, []) if wire_type == LEN]
+
+    def test_resource_and_scope(self):
+        request = decode(encode(request_json([span_json()])))
+        resource_spans = decode(self.one(request, 1, LEN))
+
+        resource = decode(self.one(resource_spans, 1, LEN))
+        attrs = self.key_values(resource, 1)
+        self.assertEqual(self.string(attrs["service.name"], 1), "acme/api")
+
+        scope_spans = decode(self.one(resource_spans, 2, LEN))
+        scope = decode(self.one(scope_spans, 1, LEN))
+        self.assertEqual(self.string(scope, 1), "lunar-ci-otel")
+        self.assertEqual(self.string(scope, 2), "1.0.0")
+        self.assertEqual(len(scope_spans[2]), 1)
+
+    def test_span_fields(self):
+        (span,) = self.spans(encode(request_json([span_json()])))
+        self.assertEqual(self.one(span, 1, LEN).hex(), TRACE_ID)
+        self.assertEqual(self.one(span, 2, LEN).hex(), SPAN_ID)
+        self.assertEqual(self.one(span, 4, LEN).hex(), PARENT_ID)
+        self.assertEqual(self.string(span, 5), "go test ./...")
+        self.assertEqual(self.one(span, 6, VARINT), 1)
+        self.assertEqual(struct.unpack("<Q", self.one(span, 7, I64))[0], START)
+        self.assertEqual(struct.unpack("<Q", self.one(span, 8, I64))[0], END)
+        attrs = self.key_values(span, 9)
+        self.assertEqual(self.string(attrs["ci.span_type"], 1), "command")
+
+        status = decode(self.one(span, 15, LEN))
+        self.assertEqual(self.one(status, 3, VARINT), 1)
+        self.assertNotIn(2, status)
+
+    def test_any_value_types(self):
+        attributes = [
+            {"key": "s", "value": {"stringValue": "x"}},
+            {"key": "t", "value": {"boolValue": True}},
+            {"key": "f", "value": {"boolValue": False}},
+            {"key": "i", "value": {"intValue": "42"}},
+            {"key": "neg", "value": {"intValue": -3}},
+            {"key": "d", "value": {"doubleValue": 2.5}},
+        ]
+        (span,) = self.spans(encode(request_json([span_json(attributes=attributes)])))
+        attrs = self.key_values(span, 9)
+        self.assertEqual(self.string(attrs["s"], 1), "x")
+        self.assertEqual(self.one(attrs["t"], 2, VARINT), 1)
+        self.assertEqual(self.one(attrs["f"], 2, VARINT), 0)
+        self.assertEqual(self.one(attrs["i"], 3, VARINT), 42)
+        # int64 is a two's-complement varint: negatives take ten bytes.
+        self.assertEqual(self.one(attrs["neg"], 3, VARINT), (1 << 64) - 3)
+        self.assertEqual(struct.unpack("<d", self.one(attrs["d"], 4, I64))[0], 2.5)
+
+    def test_defaults_are_omitted(self):
+        # proto3 leaves zero values off the wire: no parent on a root span,
+        # no status message, kind 0.
+        root = span_json(kind=0, status={"code": 2, "message": ""})
+        del root["parentSpanId"]
+        (span,) = self.spans(encode(request_json([root])))
+        self.assertNotIn(4, span)
+        self.assertNotIn(6, span)
+        status = decode(self.one(span, 15, LEN))
+        self.assertEqual(status, {3: [(VARINT, 2)]})
+
+    def test_status_message(self):
+        (span,) = self.spans(encode(request_json([span_json(status={"code": 2, "message": "exit 1"})])))
+        status = decode(self.one(span, 15, LEN))
+        self.assertEqual(self.string(status, 2), "exit 1")
+        self.assertEqual(self.one(status, 3, VARINT), 2)
+
+    def test_spans_keep_order(self):
+        spans = [span_json(spanId=f"{i:016x}", name=f"s{i}") for i in range(1, 4)]
+        decoded = self.spans(encode(request_json(spans)))
+        self.assertEqual([self.string(s, 5) for s in decoded], ["s1", "s2", "s3"])
+
+    def test_one_resource_spans_per_service(self):
+        request = request_json([span_json()], service="a")
+        request["resourceSpans"] += request_json([span_json()], service="b")["resourceSpans"]
+        decoded = decode(encode(request))
+        self.assertEqual(len(decoded[1]), 2)
+        services = []
+        for _, raw in decoded[1]:
+            resource = decode(self.one(decode(raw), 1, LEN))
+            services.append(self.string(self.key_values(resource, 1)["service.name"], 1))
+        self.assertEqual(services, ["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+#!/bin/bash
+# helpers.sh — Org-wide monitor/SLO snapshot for the Datadog service collector.
+#
+# In snapshot mode, the monitors and SLOs of the whole Datadog org are paged
+# through once per snapshot_interval_minutes and indexed by `service:` tag
+# under snapshot_dir, one file per service. Every component run in that
+# interval reads its service's file instead of listing monitors and SLOs
+# itself, so Datadog sees O(pages) list calls per interval, not
+# O(components) — provided the runs share snapshot_dir.
+#
+# Layout, per org (site + API key, hashed):
+#   <org>/<bucket>/services/<service>.json  {monitors: [...], slos: [...]}
+#   <org>/.lock                             serializes snapshot builds
+# <bucket> is the current interval number (epoch / interval), so a snapshot
+# is fresh exactly while its directory is the current bucket.
+
+SNAPSHOT_PAGE_SIZE="${SNAPSHOT_PAGE_SIZE:-1000}"
+
+# snapshot_service_file: Maps a service tag value to its index file name.
+# Datadog lowercases tags; `%` and `/` are escaped so any value is one name.
+snapshot_service_file() {
+  local name="${1,,}"
+  name="${name//%/%25}"
+  name="${name//\//%2F}"
+  printf '%s.json' "$name"
+}
+
+# snapshot_page: Fetches one page of a Datadog list endpoint into a file.
+# curl retries 429 and 5xx itself, honoring Retry-After.
+#
+# Arguments:
+#   $1 - API path with query string
+#   $2 - output file
+snapshot_page() {
+  curl -fsS --retry 3 --retry-delay 5 -H "$H_API" -H "$H_APP" \
+    -o "$2" "${API_BASE}$1"
+}
+
+# build_snapshot: Pages through every monitor and SLO and writes the
+# per-service index into a directory.
+#
+# Arguments:
+#   $1 - empty directory to build into
+#
+# Returns 1 if any page fails; the directory is then incomplete.
+build_snapshot() {
+  local dir="$1" page=0 offset=0 count pages=0
+
+  : > "$dir/monitors.jsonl"
+  while true; do
+    snapshot_page "/api/v1/monitor?page=${page}&page_size=${SNAPSHOT_PAGE_SIZE}" "$dir/page.json" || return 1
+    jq -c '.[]' "$dir/page.json" >> "$dir/monitors.jsonl"
+    count="$(jq 'length' "$dir/page.json")"
+    pages=$((pages + 1))
+    [ "$count" -lt "$SNAPSHOT_PAGE_SIZE" ] && break
+    page=$((page + 1))
+  done
+
+  : > "$dir/slos.jsonl"
+  while true; do
+    snapshot_page "/api/v1/slo?limit=${SNAPSHOT_PAGE_SIZE}&offset=${offset}" "$dir/page.json" || return 1
+    jq -c '(.data // [])[]' "$dir/page.json" >> "$dir/slos.jsonl"
+    count="$(jq '.data // [] | length' "$dir/page.json")"
+    pages=$((pages + 1))
+    [ "$count" -lt "$SNAPSHOT_PAGE_SIZE" ] && break
+    offset=$((offset + SNAPSHOT_PAGE_SIZE))
+  done
+
+  # One line per service: "<service>\t<{monitors, slos}>". An object tagged
+  # with several services is listed under each, as the tag filters would.
+  mkdir -p "$dir/services"
+  local service entry
+  while IFS=$'\t' read -r service entry; do
+    printf '%s\n' "$entry" > "$dir/services/$(snapshot_service_file "$service")"
+  done < <(jq -n -r --slurpfile monitors "$dir/monitors.jsonl" --slurpfile slos "$dir/slos.jsonl" '
+    def by_service:
+      reduce .[] as $o ({};
+        reduce ([$o.tags // [] | .[]
+                 | select(type == "string" and startswith("service:"))
+                 | .[8:] | ascii_downcase] | unique)[] as $s
+          (.; .[$s] += [$o]));
+    ($monitors | by_service) as $m
+    | ($slos | by_service) as $l
+    | ($m + $l | keys[]) as $s
+    | "\($s)\t\({monitors: ($m[$s] // []), slos: ($l[$s] // [])} | tojson)"
+  ')
+
+  echo "Datadog snapshot: $(wc -l < "$dir/monitors.jsonl") monitors, $(wc -l < "$dir/slos.jsonl") SLOs in ${pages} pages" >&2
+  rm -f "$dir/monitors.jsonl" "$dir/slos.jsonl" "$dir/page.json"
+}
+
+# ensure_snapshot: Sets SNAPSHOT to the current interval's snapshot directory,
+# building it if no other run has yet. Concurrent runs wait for the one
+# building instead of paging Datadog themselves.
+#
+# Returns 1 (SNAPSHOT empty) when the snapshot can't be built; the caller
+# then queries Datadog per component as without snapshot mode.
+ensure_snapshot() {
+  local interval="${LUNAR_VAR_SNAPSHOT_INTERVAL_MINUTES:-60}"
+  local root="${LUNAR_VAR_SNAPSHOT_DIR:-${XDG_CACHE_HOME:-$HOME/.cache}/lunar-datadog}"
+  local org bucket tmp
+  SNAPSHOT=""
+  [[ "$interval" =~ ^[0-9]+$ ]] && [ "$interval" -gt 0 ] || interval=60
+
+  org="$root/$(printf '%s %s' "$SITE" "$LUNAR_SECRET_DATADOG_API_KEY" | sha256sum | cut -c1-16)"
+  bucket=$(( $(date +%s) / (interval * 60) ))
+  if [ -d "$org/$bucket/services" ]; then
+    SNAPSHOT="$org/$bucket"
+    return 0
+  fi
+
+  if ! mkdir -p "$org" 2>/dev/null || [ ! -w "$org" ]; then
+    echo "Snapshot dir $root is not writable, querying Datadog for this component only." >&2
+    return 1
+  fi
+
+  (
+    if command -v flock > /dev/null; then
+      exec 9> "$org/.lock"
+      flock -w 600 9 || exit 1
+    fi
+    [ -d "$org/$bucket/services" ] && exit 0
+    tmp="$(mktemp -d "$org/.build-XXXXXX")" || exit 1
+    if ! build_snapshot "$tmp"; then
+      rm -rf "$tmp"
+      exit 1
+    fi
+    [ -d "$org/$bucket" ] || mv "$tmp" "$org/$bucket" 2>/dev/null || true
+    rm -rf "$tmp"
+    # Earlier intervals' snapshots, and builds that died part-way.
+    find "$org" -mindepth 1 -maxdepth 1 -type d ! -name "$bucket" \
+      -mmin +$((interval * 2)) -exec rm -rf {} + 2>/dev/null || true
+  ) || {
+    echo "Datadog snapshot unavailable, querying Datadog for this component only." >&2
+    return 1
+  }
+
+  SNAPSHOT="$org/$bucket"
+}
+
+# snapshot_lookup: Prints the monitors or SLOs the snapshot holds for a
+# service — an empty list when it holds none.
+#
+# Arguments:
+#   $1 - service tag value
+#   $2 - "monitors" or "slos"
+snapshot_lookup() {
+  local file
+  file="$SNAPSHOT/services/$(snapshot_service_file "$1")"
+  if [ -f "$file" ]; then
+    jq -c --arg k "$2" '.[$k]' "$file"
+  else
+    echo "[]"
+  fi
+}
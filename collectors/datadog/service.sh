@@ -1,6 +1,8 @@
 #!/bin/bash
 set -e
 
+source "$(dirname "$0")/helpers.sh"
+
 SERVICE_NAME=""
 if [ -n "${LUNAR_COMPONENT_META:-}" ]; then
   SERVICE_NAME="$(echo "$LUNAR_COMPONENT_META" | jq -r '."datadog/service-name" // empty')"
@@ -70,9 +72,18 @@ if [ -n "$DASHBOARD_ID" ]; then
   fi
 fi
 
+# Snapshot mode: read this service's monitors and SLOs from the org-wide
+# snapshot (see helpers.sh) rather than listing them per component.
+SNAPSHOT=""
+if [ -n "$SERVICE_NAME" ] && [ "${LUNAR_VAR_SNAPSHOT_MODE:-false}" = "true" ]; then
+  ensure_snapshot || true
+fi
+
 if [ -n "$SERVICE_NAME" ]; then
   MONITORS_JSON="[]"
-  if RESP="$(dd_get "/api/v1/monitor?monitor_tags=service:${SERVICE_NAME}")"; then
+  if [ -n "$SNAPSHOT" ]; then
+    MONITORS_JSON="$(snapshot_lookup "$SERVICE_NAME" monitors)"
+  elif RESP="$(dd_get "/api/v1/monitor?monitor_tags=service:${SERVICE_NAME}")"; then
     MONITORS_JSON="$RESP"
   fi
   ALERTS_COUNT="$(echo "$MONITORS_JSON" | jq 'length')"
@@ -88,7 +99,9 @@ if [ -n "$SERVICE_NAME" ]; then
   echo "$MONITORS_JSON" | lunar collect -j ".observability.native.datadog.api.monitors" -
 
   SLOS_JSON="[]"
-  if RESP="$(dd_get "/api/v1/slo?tags_query=service%3A${SERVICE_NAME}")"; then
+  if [ -n "$SNAPSHOT" ]; then
+    SLOS_JSON="$(snapshot_lookup "$SERVICE_NAME" slos)"
+  elif RESP="$(dd_get "/api/v1/slo?tags_query=service%3A${SERVICE_NAME}")"; then
     SLOS_JSON="$(echo "$RESP" | jq '.data // []')"
   fi
   SLO_COUNT="$(echo "$SLOS_JSON" | jq 'length')"
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""Tests for the datadog collector's org-wide snapshot mode.
+
+With snapshot_mode on, service.sh pages through every monitor and SLO in the
+org once per interval (build_snapshot / ensure_snapshot in helpers.sh) and
+each component reads its service's slice (snapshot_lookup). These tests lock
+in the paging, the case-insensitive `service:` tag index, reuse of a
+snapshot by later runs, and the per-component fallback when no snapshot can
+be built.
+
+`curl` is stubbed: it logs every URL to $CURL_LOG and serves the monitor and
+SLO list endpoints (paged or tag-filtered) from $MOCK_DIR/monitors.json and
+$MOCK_DIR/slos.json. `lunar` logs `collect` calls and any piped stdin to
+$CAPTURE.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import textwrap
+import unittest
+
+HERE = os.path.dirname(__file__)
+COLLECTOR = os.path.abspath(os.path.join(HERE, ".."))
+
+MONITORS = [
+    {"id": 1, "tags": ["service:web", "env:prod"]},
+    {"id": 2, "tags": ["service:Web"]},
+    {"id": 3, "tags": ["service:api", "service:web"]},
+    {"id": 4, "tags": ["service:api"]},
+    {"id": 5, "tags": ["team:core"]},
+]
+SLOS = [
+    {"id": "a", "tags": ["service:WEB"], "thresholds": [{"target": 99.9}]},
+    {"id": "b", "tags": ["service:api"]},
+    {"id": "c", "tags": []},
+]
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="datadog-test-")
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.bin = os.path.join(self.tmp, "bin")
+        self.mock = os.path.join(self.tmp, "mock")
+        os.makedirs(self.bin)
+        os.makedirs(self.mock)
+        self.snapshot_dir = os.path.join(self.tmp, "snapshots")
+        self.curl_log = os.path.join(self.tmp, "curl.log")
+        self.fixture("monitors.json", MONITORS)
+        self.fixture("slos.json", SLOS)
+        self._stub(
+            "curl",
+            textwrap.dedent(
+                """\
+                #!/usr/bin/env python3
+                import json, os, sys
+                from urllib.parse import parse_qs, unquote, urlsplit
+
+                args = sys.argv[1:]
+                url = args[-1]
+                out = args[args.index("-o") + 1] if "-o" in args else None
+                with open(os.environ["CURL_LOG"], "a") as log:
+                    log.write(unquote(url) + "\\n")
+                parts = urlsplit(url)
+                q = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                mock = os.environ["MOCK_DIR"]
+                if os.path.exists(os.path.join(mock, "fail")):
+                    sys.exit(22)
+                with open(os.path.join(mock, "monitors.json")) as f:
+                    monitors = json.load(f)
+                with open(os.path.join(mock, "slos.json")) as f:
+                    slos = json.load(f)
+
+                def tagged(items, tag):
+                    return [i for i in items if tag in i.get("tags", [])]
+
+                if parts.path == "/api/v1/monitor" and "page" in q:
+                    size, page = int(q["page_size"]), int(q["page"])
+                    body = monitors[page * size:(page + 1) * size]
+                elif parts.path == "/api/v1/monitor":
+                    body = tagged(monitors, q["monitor_tags"])
+                elif parts.path == "/api/v1/slo" and "offset" in q:
+                    limit, offset = int(q["limit"]), int(q["offset"])
+                    body = {"data": slos[offset:offset + limit]}
+                elif parts.path == "/api/v1/slo":
+                    body = {"data": tagged(slos, q["tags_query"])}
+                else:
+                    sys.exit(22)
+                if out:
+                    with open(out, "w") as f:
+                        json.dump(body, f)
+                else:
+                    json.dump(body, sys.stdout)
+                """
+            ),
+        )
+        self._stub(
+            "lunar",
+            textwrap.dedent(
+                """\
+                #!/bin/sh
+                printf 'ARGS: %s\\n' "$*" >> "$CAPTURE"
+                if [ "$4" = "-" ]; then
+                  printf 'STDIN: %s\\n' "$(cat | tr -d '\\n')" >> "$CAPTURE"
+                fi
+                """
+            ),
+        )
+
+    def _stub(self, name, body):
+        path = os.path.join(self.bin, name)
+        with open(path, "w") as f:
+            f.write(body)
+        os.chmod(path, 0o755)
+
+    def fixture(self, name, data):
+        with open(os.path.join(self.mock, name), "w") as f:
+            json.dump(data, f)
+
+    def run_service(self, service="web", **env):
+        capture = os.path.join(self.tmp, "collect.log")
+        if os.path.exists(capture):
+            os.unlink(capture)
+        full_env = {
+            "PATH": f"{self.bin}:{os.environ['PATH']}",
+            "HOME": self.tmp,
+            "CURL_LOG": self.curl_log,
+            "MOCK_DIR": self.mock,
+            "CAPTURE": capture,
+            "LUNAR_SECRET_DATADOG_API_KEY": "api-key",
+            "LUNAR_SECRET_DATADOG_APP_KEY": "app-key",
+            "LUNAR_VAR_SERVICE_NAME": service,
+            "LUNAR_VAR_SNAPSHOT_MODE": "true",
+            "LUNAR_VAR_SNAPSHOT_DIR": self.snapshot_dir,
+            "SNAPSHOT_PAGE_SIZE": "2",
+        }
+        full_env.update(env)
+        result = subprocess.run(
+            ["bash", os.path.join(COLLECTOR, "service.sh")],
+            env=full_env, capture_output=True, text=True,
+        )
+        self.assertEqual(result.returncode, 0, msg=result.stderr)
+        with open(capture) as f:
+            lines = f.read().splitlines()
+        collected = {}
+        for i, line in enumerate(lines):
+            if line.startswith("ARGS: collect -j ") and line.endswith(" -"):
+                collected[line.split()[3]] = json.loads(lines[i + 1][len("STDIN: "):])
+        return result, collected
+
+    def requests(self):
+        if not os.path.exists(self.curl_log):
+            return []
+        with open(self.curl_log) as f:
+            return [line.split("datadoghq.com", 1)[1] for line in f.read().splitlines()]
+
+    @staticmethod
+    def ids(items):
+        return sorted(i["id"] for i in items)
+
+    def test_pages_through_monitors_and_slos(self):
+        _, collected = self.run_service()
+        self.assertEqual(
+            self.requests(),
+            [
+                "/api/v1/monitor?page=0&page_size=2",
+                "/api/v1/monitor?page=1&page_size=2",
+                "/api/v1/monitor?page=2&page_size=2",
+                "/api/v1/slo?limit=2&offset=0",
+                "/api/v1/slo?limit=2&offset=2",
+            ],
+        )
+        self.assertEqual(collected[".observability.alerts"], {"configured": True, "count": 3})
+        self.assertEqual(
+            collected[".observability.slo"],
+            {"defined": True, "count": 1, "has_error_budget": True},
+        )
+
+    def test_full_last_page_fetches_one_more(self):
+        self.fixture("monitors.json", MONITORS[:4])
+        self.run_service()
+        monitor_pages = [r for r in self.requests() if r.startswith("/api/v1/monitor")]
+        self.assertEqual(len(monitor_pages), 3)
+
+    def test_service_tags_match_case_insensitively(self):
+        _, collected = self.run_service(service="WEB")
+        monitors = collected[".observability.native.datadog.api.monitors"]
+        # service:web, service:Web, and the monitor tagged with two services.
+        self.assertEqual(self.ids(monitors), [1, 2, 3])
+        self.assertEqual(self.ids(collected[".observability.native.datadog.api.slos"]), ["a"])
+
+    def test_service_without_objects_gets_empty_lists(self):
+        _, collected = self.run_service(service="billing")
+        self.assertEqual(collected[".observability.alerts"], {"configured": False, "count": 0})
+        self.assertEqual(collected[".observability.native.datadog.api.slos"], [])
+
+    def test_second_run_reuses_the_snapshot(self):
+        self.run_service()
+        first = len(self.requests())
+        _, collected = self.run_service(service="api")
+        self.assertEqual(len(self.requests()), first)
+        self.assertEqual(self.ids(collected[".observability.native.datadog.api.monitors"]), [3, 4])
+        self.assertEqual(self.ids(collected[".observability.native.datadog.api.slos"]), ["b"])
+
+    def test_unwritable_snapshot_dir_falls_back_to_per_component(self):
+        blocker = os.path.join(self.tmp, "not-a-dir")
+        with open(blocker, "w"):
+            pass
+        result, collected = self.run_service(
+            LUNAR_VAR_SNAPSHOT_DIR=os.path.join(blocker, "snapshots")
+        )
+        self.assertIn("not writable", result.stderr)
+        self.assertEqual(
+            self.requests(),
+            ["/api/v1/monitor?monitor_tags=service:web", "/api/v1/slo?tags_query=service:web"],
+        )
+        self.assertEqual(self.ids(collected[".observability.native.datadog.api.monitors"]), [1, 3])
+
+    def test_failed_build_leaves_no_snapshot(self):
+        open(os.path.join(self.mock, "fail"), "w").close()
+        result, _ = self.run_service()
+        self.assertIn("snapshot unavailable", result.stderr)
+        os.unlink(os.path.join(self.mock, "fail"))
+        self.run_service()
+        # The next run builds it from scratch rather than reading a partial one.
+        self.assertIn("/api/v1/monitor?page=0&page_size=2", self.requests()[3:])
+
+    def test_snapshot_mode_off_queries_per_component(self):
+        self.run_service(LUNAR_VAR_SNAPSHOT_MODE="false")
+        self.assertFalse(os.path.exists(self.snapshot_dir))
+        self.assertEqual(len(self.requests()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,258 @@
+"""Parse git-ecosystem config files into their .git.<sub> objects in one pass.
+
+Usage: parse_config.py {pre-commit|gitattributes|gitmodules} PATH
+
+  pre-commit     reads the config as JSON on stdin (`yq -o json PATH`);
+                 PATH is only recorded in the output
+  gitattributes  parses PATH and matches its patterns against `git ls-files`
+  gitmodules     reads PATH through `git config --file PATH --null --list`
+
+Prints the object for .git.pre_commit / .git.attributes / .git.submodules on
+stdout; `{"valid": false, "path": ...}` when the file can't be parsed.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+
+# Revs that track a moving branch rather than pin a release.
+FLOATING_REFS = re.compile(r"^(main|master|HEAD|develop|trunk)$", re.IGNORECASE)
+
+# Attribute tests, matched against a rule's attribute list as written.
+LFS = re.compile(r"(^|\s)filter=lfs(\s|$)")
+BINARY = re.compile(r"(^|\s)binary(\s|$)")
+EXPORT_IGNORE = re.compile(r"(^|\s)export-ignore(\s|$)")
+# EOL normalization: `text=auto`, bare `text`, `text=true`, or `eol=`. Pattern
+# `*` covering all files is the canonical case but project-specific patterns
+# also count.
+EOL = re.compile(r"(^|\s)(text(=auto|=true)?|eol=(lf|crlf))(\s|$)")
+
+# Built-in macro: `binary` is `-diff -merge -text`.
+BUILTIN_MACROS = {"binary": ["-diff", "-merge", "-text"]}
+
+
+def parse_pre_commit(config, path):
+    if not isinstance(config, dict):
+        return {"valid": False, "path": path}
+    repos = []
+    for repo in config.get("repos") or []:
+        repo = repo if isinstance(repo, dict) else {}
+        rev = repo.get("rev")
+        repos.append({
+            "repo": repo.get("repo"),
+            "rev": None if rev is False else rev,
+            "hooks": [{"id": (h if isinstance(h, dict) else {}).get("id")} for h in repo.get("hooks") or []],
+        })
+    hook_ids = [h["id"] for r in repos for h in r["hooks"]]
+    ci = config.get("ci")
+
+    # all_pinned: every repo has a rev that's not a floating ref. The "meta"
+    # repo is special-cased — pre-commit itself permits omitting rev there.
+    def pinned(repo):
+        rev = "" if repo["rev"] is None else repo["rev"]
+        return repo["repo"] == "meta" or (rev != "" and not FLOATING_REFS.match(str(rev)))
+
+    return {
+        "valid": True,
+        "path": path,
+        "repos": repos,
+        "hook_ids": sorted(set(hook_ids), key=lambda v: (v is not None, str(v))),
+        "hook_count": len(hook_ids),
+        "repo_count": len(repos),
+        "ci_skip": (ci.get("skip") or []) if isinstance(ci, dict) else [],
+        "all_pinned": all(pinned(r) for r in repos),
+    }
+
+
+def attribute_rules(text):
+    """[(pattern, attrs)] for each non-blank, non-comment line, in file order."""
+    rules = []
+    for line in text.splitlines():
+        fields = line.split()
+        if not fields or fields[0].startswith("#"):
+            continue
+        rules.append((fields[0], " ".join(fields[1:])))
+    return rules
+
+
+def wildmatch_regex(pattern):
+    """Compile a gitattributes pattern (gitignore syntax, no negation).
+
+    Returns None for patterns that can't match a file: a trailing `/` only
+    matches directories, which attributes never apply to recursively.
+    """
+    if pattern.endswith("/"):
+        return None
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    out, i, n = [], 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i) and i + 2 == n and (i == 0 or pattern[i - 1] == "/"):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern[i + 1:i + 2] in ("!", "^") else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+                i += 1
+                continue
+            body = pattern[i + 1:end]
+            if body[:1] in ("!", "^"):
+                body = "^" + body[1:]
+            out.append("[" + body.replace("\\", "\\\\") + "]")
+            i = end + 1
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    body = "".join(out)
+    return re.compile(body if anchored else "(?:.*/)?" + body)
+
+
+def attribute_states(attrs, macros):
+    """{attribute: value} for one rule; True = set, False = unset, None = unspecified."""
+    states = {}
+    for token in attrs.split():
+        if token.startswith("-"):
+            states[token[1:]] = False
+        elif token.startswith("!"):
+            states[token[1:]] = None
+        elif "=" in token:
+            name, value = token.split("=", 1)
+            states[name] = value
+        else:
+            states[token] = True
+            if token in macros:
+                states.update(attribute_states(" ".join(macros[token]), {}))
+    return states
+
+
+def tracked_files(base):
+    """Tracked files under directory `base`, relative to it; None outside a repo."""
+    try:
+        out = subprocess.run(
+            ["git", "ls-files", "-z", "--", base or "."],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True,
+        ).stdout.decode("utf-8", "surrogateescape")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    prefix = base + "/" if base else ""
+    return [f[len(prefix):] for f in out.split("\0") if f and f.startswith(prefix)]
+
+
+def file_counts(rules, files):
+    """(lfs_files, binary_files) among `files`, git's last-rule-wins semantics."""
+    macros = dict(BUILTIN_MACROS)
+    compiled = []
+    for pattern, attrs in rules:
+        if pattern.startswith("[attr]"):
+            macros[pattern[len("[attr]"):]] = attrs.split()
+            continue
+        regex = wildmatch_regex(pattern)
+        if regex is None:
+            continue
+        states = attribute_states(attrs, macros)
+        relevant = {k: states[k] for k in ("filter", "binary") if k in states}
+        if relevant:
+            compiled.append((regex, relevant))
+    compiled.reverse()  # later rules take precedence: first hit per attribute wins
+
+    missing = object()
+    lfs = binary = 0
+    for path in files:
+        filter_value = binary_value = missing
+        for regex, states in compiled:
+            if not regex.fullmatch(path):
+                continue
+            if filter_value is missing and "filter" in states:
+                filter_value = states["filter"]
+            if binary_value is missing and "binary" in states:
+                binary_value = states["binary"]
+            if filter_value is not missing and binary_value is not missing:
+                break
+        lfs += filter_value == "lfs"
+        binary += binary_value is True
+    return lfs, binary
+
+
+def parse_gitattributes(path):
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            rules = attribute_rules(f.read())
+    except OSError:
+        return {"valid": False, "path": path}
+    files = tracked_files(os.path.dirname(path))
+    lfs_files = binary_files = None
+    if files is not None:
+        lfs_files, binary_files = file_counts(rules, files)
+    return {
+        "valid": True,
+        "path": path,
+        "rules_count": len(rules),
+        "lfs_patterns": [p for p, attrs in rules if LFS.search(attrs)],
+        "binary_patterns": [p for p, attrs in rules if BINARY.search(attrs)],
+        "eol_normalized": any(EOL.search(attrs) for _, attrs in rules),
+        "export_ignore_patterns": [p for p, attrs in rules if EXPORT_IGNORE.search(attrs)],
+        "lfs_files_count": lfs_files,
+        "binary_files_count": binary_files,
+    }
+
+
+def parse_gitmodules(path):
+    # git config handles the INI quoting/escaping; --null keeps values intact.
+    try:
+        listing = subprocess.run(
+            ["git", "config", "--file", path, "--null", "--list"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True,
+        ).stdout.decode("utf-8", "replace")
+    except (OSError, subprocess.CalledProcessError):
+        return {"valid": False, "path": path}
+    modules = {}
+    for entry in listing.split("\0"):
+        key, _, value = entry.partition("\n")
+        if not key.startswith("submodule."):
+            continue
+        name, dot, field = key[len("submodule."):].rpartition(".")
+        if not dot or not name:
+            continue
+        module = modules.setdefault(name, {"name": name, "path": None, "url": None, "branch": None})
+        if field in ("path", "url", "branch") and module[field] is None:
+            module[field] = value
+    return {"valid": True, "path": path, "modules": [modules[n] for n in sorted(modules)]}
+
+
+def main(argv):
+    if len(argv) != 3 or argv[1] not in ("pre-commit", "gitattributes", "gitmodules"):
+        print(__doc__.strip().splitlines()[2], file=sys.stderr)
+        return 2
+    kind, path = argv[1], argv[2]
+    if kind == "pre-commit":
+        try:
+            config = json.load(sys.stdin)
+        except ValueError:
+            config = None
+        result = parse_pre_commit(config, path)
+    elif kind == "gitattributes":
+        result = parse_gitattributes(path)
+    else:
+        result = parse_gitmodules(path)
+    json.dump(result, sys.stdout)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
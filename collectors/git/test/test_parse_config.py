@@ -0,0 +1,217 @@
+"""Tests for parse_config.py (run: python -m unittest discover -s test)."""
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import parse_config  # noqa: E402
+
+HAS_GIT = shutil.which("git") is not None
+
+GITATTRIBUTES = """\
+# Normalize line endings
+* text=auto
+
+[attr]lfs filter=lfs diff=lfs merge=lfs -text
+*.psd filter=lfs diff=lfs merge=lfs -text
+*.zip lfs
+assets/**/*.bin binary
+/docs/*.pdf binary
+*.exe binary
+legacy.exe -binary
+vendor/keep.zip !filter
+.github/ export-ignore
+tests/ export-ignore
+"""
+
+FILES = [
+    "a.psd", "art/b.psd", "c.zip", "vendor/keep.zip", "vendor/other.zip",
+    "assets/x.bin", "assets/deep/y.bin", "other/z.bin",
+    "docs/guide.pdf", "sub/docs/nested.pdf",
+    "tool.exe", "bin/legacy.exe", "legacy.exe", "README.md",
+]
+
+
+class PreCommitTest(unittest.TestCase):
+    def test_derived_fields(self):
+        config = {
+            "repos": [
+                {"repo": "https://github.com/pre-commit/pre-commit-hooks", "rev": "v4.5.0",
+                 "hooks": [{"id": "trailing-whitespace"}, {"id": "end-of-file-fixer", "args": []}]},
+                {"repo": "https://github.com/gitleaks/gitleaks", "rev": "v8.18.0",
+                 "hooks": [{"id": "gitleaks"}, {"id": "trailing-whitespace"}]},
+                {"repo": "meta", "hooks": [{"id": "check-hooks-apply"}]},
+            ],
+            "ci": {"skip": ["gitleaks"]},
+        }
+        result = parse_config.parse_pre_commit(config, ".pre-commit-config.yaml")
+        self.assertTrue(result["valid"])
+        self.assertEqual(result["repos"][0]["hooks"], [{"id": "trailing-whitespace"}, {"id": "end-of-file-fixer"}])
+        self.assertIsNone(result["repos"][2]["rev"])
+        self.assertEqual(
+            result["hook_ids"],
+            ["check-hooks-apply", "end-of-file-fixer", "gitleaks", "trailing-whitespace"],
+        )
+        self.assertEqual(result["hook_count"], 5)
+        self.assertEqual(result["repo_count"], 3)
+        self.assertEqual(result["ci_skip"], ["gitleaks"])
+        self.assertTrue(result["all_pinned"])
+
+    def test_floating_or_missing_rev_is_not_pinned(self):
+        for rev in ("main", "HEAD", "Master", "", None):
+            config = {"repos": [{"repo": "https://example.com/hooks", "rev": rev, "hooks": []}]}
+            self.assertFalse(parse_config.parse_pre_commit(config, "p")["all_pinned"], rev)
+
+    def test_empty_and_invalid(self):
+        self.assertEqual(
+            parse_config.parse_pre_commit({}, "p"),
+            {"valid": True, "path": "p", "repos": [], "hook_ids": [], "hook_count": 0,
+             "repo_count": 0, "ci_skip": [], "all_pinned": True},
+        )
+        self.assertEqual(parse_config.parse_pre_commit(None, "p"), {"valid": False, "path": "p"})
+        self.assertEqual(parse_config.parse_pre_commit(["x"], "p"), {"valid": False, "path": "p"})
+
+
+class WildmatchTest(unittest.TestCase):
+    def match(self, pattern, path):
+        regex = parse_config.wildmatch_regex(pattern)
+        return bool(regex and regex.fullmatch(path))
+
+    def test_patterns(self):
+        cases = [
+            ("*.psd", "a.psd", True),
+            ("*.psd", "deep/dir/a.psd", True),
+            ("*.psd", "a.psd.bak", False),
+            ("/docs/*.pdf", "docs/a.pdf", True),
+            ("/docs/*.pdf", "x/docs/a.pdf", False),
+            ("docs/*.pdf", "x/docs/a.pdf", False),
+            ("docs/*.pdf", "docs/sub/a.pdf", False),
+            ("assets/**/*.bin", "assets/a.bin", True),
+            ("assets/**/*.bin", "assets/x/y/a.bin", True),
+            ("**/build/*.o", "build/a.o", True),
+            ("**/build/*.o", "x/build/a.o", True),
+            ("vendor/**", "vendor/a/b.c", True),
+            ("file?.txt", "file1.txt", True),
+            ("file?.txt", "file10.txt", False),
+            ("[ab].c", "b.c", True),
+            ("[!ab].c", "b.c", False),
+            ("[!ab].c", "c.c", True),
+            ("\\#hash", "#hash", True),
+        ]
+        for pattern, path, expected in cases:
+            self.assertEqual(self.match(pattern, path), expected, (pattern, path))
+
+    def test_directory_pattern_matches_no_file(self):
+        self.assertIsNone(parse_config.wildmatch_regex("tests/"))
+
+
+class GitattributesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp)
+
+    def write(self, name, content=""):
+        os.makedirs(os.path.dirname(name) or ".", exist_ok=True)
+        with open(name, "w") as f:
+            f.write(content)
+
+    def test_pattern_fields(self):
+        self.write(".gitattributes", GITATTRIBUTES)
+        result = parse_config.parse_gitattributes(".gitattributes")
+        self.assertEqual(result["rules_count"], 11)
+        self.assertEqual(result["lfs_patterns"], ["[attr]lfs", "*.psd"])
+        self.assertEqual(result["binary_patterns"], ["assets/**/*.bin", "/docs/*.pdf", "*.exe"])
+        self.assertEqual(result["export_ignore_patterns"], [".github/", "tests/"])
+        self.assertTrue(result["eol_normalized"])
+        # Not a git repository: no file counts.
+        self.assertIsNone(result["lfs_files_count"])
+        self.assertIsNone(result["binary_files_count"])
+
+    def test_file_counts(self):
+        files = ["a.psd", "b.zip", "x/c.zip", "img.png"]
+        rules = parse_config.attribute_rules("*.psd filter=lfs\n*.zip filter=lfs\nx/*.zip -filter\n*.png binary\n")
+        self.assertEqual(parse_config.file_counts(rules, files), (2, 1))
+
+    @unittest.skipUnless(HAS_GIT, "git not installed")
+    def test_file_counts_agree_with_git_check_attr(self):
+        subprocess.run(["git", "init", "-q"], check=True)
+        self.write(".gitattributes", GITATTRIBUTES)
+        for name in FILES:
+            self.write(name, "x\n")
+        subprocess.run(["git", "add", "-A"], check=True)
+
+        out = subprocess.run(
+            ["git", "check-attr", "-z", "filter", "binary", "--"] + FILES,
+            check=True, capture_output=True, text=True,
+        ).stdout.split("\0")
+        states = {}
+        for i in range(0, len(out) - 2, 3):
+            states.setdefault(out[i], {})[out[i + 1]] = out[i + 2]
+        lfs = sum(1 for s in states.values() if s["filter"] == "lfs")
+        binary = sum(1 for s in states.values() if s["binary"] == "set")
+
+        result = parse_config.parse_gitattributes(".gitattributes")
+        self.assertEqual((result["lfs_files_count"], result["binary_files_count"]), (lfs, binary))
+        self.assertEqual((lfs, binary), (4, 4))
+
+
+@unittest.skipUnless(HAS_GIT, "git not installed")
+class GitmodulesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, ".gitmodules")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_modules(self):
+        with open(self.path, "w") as f:
+            f.write(
+                '[submodule "vendor/foo"]\n'
+                "\tpath = vendor/foo\n"
+                "\turl = https://github.com/example/foo.git\n"
+                '[submodule "lib.v2"]\n'
+                "\tpath = lib\n"
+                "\turl = https://github.com/example/lib.git\n"
+                "\tbranch = main\n"
+            )
+        result = parse_config.parse_gitmodules(self.path)
+        self.assertEqual(result["modules"], [
+            {"name": "lib.v2", "path": "lib", "url": "https://github.com/example/lib.git", "branch": "main"},
+            {"name": "vendor/foo", "path": "vendor/foo", "url": "https://github.com/example/foo.git", "branch": None},
+        ])
+        self.assertTrue(result["valid"])
+
+    def test_invalid(self):
+        with open(self.path, "w") as f:
+            f.write("[submodule \"broken\n")
+        self.assertEqual(parse_config.parse_gitmodules(self.path), {"valid": False, "path": self.path})
+
+
+class MainTest(unittest.TestCase):
+    def test_pre_commit_reads_stdin(self):
+        out = io.StringIO()
+        stdin = sys.stdin
+        sys.stdin = io.StringIO("null")
+        try:
+            with redirect_stdout(out):
+                parse_config.main(["parse_config.py", "pre-commit", ".pre-commit-config.yaml"])
+        finally:
+            sys.stdin = stdin
+        self.assertEqual(json.loads(out.getvalue()), {"valid": False, "path": ".pre-commit-config.yaml"})
+
+
+if __name__ == "__main__":
+    unittest.main()
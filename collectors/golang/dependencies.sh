@@ -10,57 +10,27 @@ if [[ ! -f "go.mod" ]]; then
     exit 0
 fi
 
-# Process modules and build JSON
-direct_deps=()
-transitive_deps=()
+PLUGIN_DIR="$(cd "$(dirname "$0")" && pwd)"
 
-while IFS= read -r mod_json; do
-  if [[ -z "$mod_json" ]]; then
-    continue
-  fi
-  
-  path=$(echo "$mod_json" | jq -r '.Path // ""')
-  version=$(echo "$mod_json" | jq -r '.Version // ""')
-  indirect=$(echo "$mod_json" | jq -r '.Indirect // false')
-  main=$(echo "$mod_json" | jq -r '.Main // false')
-  replace=$(echo "$mod_json" | jq -r '.Replace // null')
-  
-  # Skip main module
-  if [[ "$main" == "true" ]]; then
-    continue
-  fi
-  
-  # Build dependency object
-  dep_obj=$(jq -n \
-    --arg path "$path" \
-    --arg version "$version" \
-    --argjson indirect "$indirect" \
-    --argjson replace "$replace" \
-    '{
-      path: $path,
-      version: $version,
-      indirect: $indirect,
-      replace: (if $replace then {path: $replace.Path, version: ($replace.Version // "")} else null end)
-    }')
-  
-  if [[ "$indirect" == "true" ]]; then
-    transitive_deps+=("$dep_obj")
-  else
-    direct_deps+=("$dep_obj")
-  fi
-done < <(go list -m -json all 2>/dev/null | jq -c '.')
+# `go list -m -json all` needs every module in the graph in the module cache
+# and downloads whatever is missing. "go-sum" reads the graph from
+# go.mod/go.sum instead; "auto" does so only when the cache is cold.
+MODE="${LUNAR_VAR_DEPENDENCIES_SOURCE:-go-list}"
+if [[ "$MODE" == "auto" ]]; then
+    MODCACHE=$(go env GOMODCACHE 2>/dev/null || true)
+    if [[ -n "$MODCACHE" && -d "$MODCACHE/cache/download" ]]; then
+        MODE="go-list"
+    else
+        MODE="go-sum"
+    fi
+fi
 
-# Build final JSON structure with source metadata
-deps_json=$(jq -n \
-  --argjson direct "$(printf '%s\n' "${direct_deps[@]}" | jq -s '. // []')" \
-  --argjson transitive "$(printf '%s\n' "${transitive_deps[@]}" | jq -s '. // []')" \
-  '{
-      direct: $direct,
-      transitive: $transitive,
-      source: {
-        tool: "go mod",
-        integration: "code"
-      }
-  }')
+# A single parser process streams the module graph; no per-module jq forks.
+if [[ "$MODE" == "go-sum" ]]; then
+    echo "Reading Go module graph from go.mod/go.sum" >&2
+    deps_json=$(python3 "$PLUGIN_DIR/parse_go_modules.py" --go-sum go.mod go.sum)
+else
+    deps_json=$(go list -m -json all 2>/dev/null | python3 "$PLUGIN_DIR/parse_go_modules.py")
+fi
 
 echo "$deps_json" | lunar collect -j ".lang.go.dependencies" -
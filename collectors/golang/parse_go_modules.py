@@ -0,0 +1,189 @@
+"""Build .lang.go.dependencies from the Go module graph in one pass.
+
+Usage:
+  go list -m -json all | parse_go_modules.py
+  parse_go_modules.py --go-sum [GO_MOD] [GO_SUM]
+
+The default mode streams the concatenated JSON objects printed by
+`go list -m -json all` from stdin, one module at a time, and splits them into
+direct and transitive dependencies (the main module is skipped).
+
+`--go-sum` reads go.mod and go.sum directly instead, for when the module cache
+is cold and `go list` would have to download the whole graph. Direct and
+indirect requirements come from go.mod (complete for go >= 1.17 modules, which
+list every module needed to build); modules only present in go.sum are added
+as transitive at their highest recorded version. replace directives from go.mod
+are applied in both modes.
+
+Prints the dependencies object on stdout, ready for
+`lunar collect -j .lang.go.dependencies -`.
+"""
+import json
+import re
+import sys
+
+CHUNK_SIZE = 1 << 16
+SOURCE = {"tool": "go mod", "integration": "code"}
+
+SEMVER = re.compile(r"^v?(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:-([0-9A-Za-z.-]+))?")
+
+
+def iter_json_objects(stream):
+    """Yield each value from a stream of concatenated JSON documents."""
+    decoder = json.JSONDecoder()
+    buf = ""
+    eof = False
+    while True:
+        buf = buf.lstrip()
+        if buf:
+            try:
+                obj, end = decoder.raw_decode(buf)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield obj
+                buf = buf[end:]
+                continue
+        elif eof:
+            return
+        data = stream.read(CHUNK_SIZE)
+        if not data:
+            eof = True
+        buf += data
+
+
+def dependency(path, version, indirect, replace):
+    return {
+        "path": path,
+        "version": version,
+        "indirect": indirect,
+        "replace": replace,
+    }
+
+
+def from_go_list(stream):
+    direct, transitive = [], []
+    for mod in iter_json_objects(stream):
+        if not isinstance(mod, dict) or mod.get("Main"):
+            continue
+        replace = mod.get("Replace")
+        dep = dependency(
+            mod.get("Path") or "",
+            mod.get("Version") or "",
+            bool(mod.get("Indirect")),
+            {"path": replace.get("Path"), "version": replace.get("Version") or ""} if replace else None,
+        )
+        (transitive if dep["indirect"] else direct).append(dep)
+    return direct, transitive
+
+
+def _directive_lines(text):
+    """Yield (verb, args, comment) for each directive in a go.mod file.
+
+    Block forms (`require (...)`) are flattened so every requirement is yielded
+    with its own verb.
+    """
+    block = None
+    for raw in text.splitlines():
+        line, _, comment = raw.partition("//")
+        fields = line.split()
+        if not fields:
+            continue
+        if block:
+            if fields == [")"]:
+                block = None
+            else:
+                yield block, fields, comment.strip()
+        elif len(fields) == 2 and fields[1] == "(":
+            block = fields[0]
+        else:
+            yield fields[0], fields[1:], comment.strip()
+
+
+def parse_go_mod(text):
+    """Return (requires, replaces) from go.mod source.
+
+    requires: [(path, version, indirect)] in file order.
+    replaces: {(path, version-or-None): (new_path, new_version)}.
+    """
+    requires, replaces = [], {}
+    for verb, args, comment in _directive_lines(text):
+        args = [a.strip('"`') for a in args]
+        if verb == "require" and len(args) >= 2:
+            requires.append((args[0], args[1], comment == "indirect" or comment.startswith("indirect;")))
+        elif verb == "replace" and "=>" in args:
+            i = args.index("=>")
+            old, new = args[:i], args[i + 1:]
+            if old and new:
+                key = (old[0], old[1] if len(old) > 1 else None)
+                replaces[key] = (new[0], new[1] if len(new) > 1 else "")
+    return requires, replaces
+
+
+def version_key(version):
+    """Sort key approximating Go's semver ordering (pseudo-versions included)."""
+    m = SEMVER.match(version)
+    if not m:
+        return (-1, 0, 0, 0, version)
+    major, minor, patch, pre = m.groups()
+    # A release sorts above any prerelease (and pseudo-version) of itself.
+    return (int(major), int(minor or 0), int(patch or 0), 0 if pre else 1, pre or "")
+
+
+def parse_go_sum(text):
+    """Return {path: highest version} for modules whose content is in go.sum.
+
+    `/go.mod`-only lines are skipped: those modules were consulted for their
+    requirements but never built.
+    """
+    best = {}
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) < 2 or fields[1].endswith("/go.mod"):
+            continue
+        path, version = fields[0], fields[1]
+        if path not in best or version_key(version) > version_key(best[path]):
+            best[path] = version
+    return best
+
+
+def from_go_sum(go_mod_path, go_sum_path):
+    with open(go_mod_path) as f:
+        requires, replaces = parse_go_mod(f.read())
+    try:
+        with open(go_sum_path) as f:
+            summed = parse_go_sum(f.read())
+    except OSError:
+        summed = {}
+
+    def replacement(path, version):
+        new = replaces.get((path, version)) or replaces.get((path, None))
+        return {"path": new[0], "version": new[1]} if new else None
+
+    direct, transitive = [], []
+    required = set()
+    for path, version, indirect in requires:
+        required.add(path)
+        dep = dependency(path, version, indirect, replacement(path, version))
+        (transitive if indirect else direct).append(dep)
+    for path in sorted(summed):
+        if path not in required:
+            transitive.append(dependency(path, summed[path], True, replacement(path, summed[path])))
+    return direct, transitive
+
+
+def main(argv):
+    if len(argv) > 1 and argv[1] == "--go-sum":
+        go_mod = argv[2] if len(argv) > 2 else "go.mod"
+        go_sum = argv[3] if len(argv) > 3 else "go.sum"
+        direct, transitive = from_go_sum(go_mod, go_sum)
+    else:
+        direct, transitive = from_go_list(sys.stdin)
+    json.dump({"direct": direct, "transitive": transitive, "source": SOURCE}, sys.stdout)
+    sys.stdout.write("\n")
+    print(f"Go modules: {len(direct)} direct, {len(transitive)} transitive", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
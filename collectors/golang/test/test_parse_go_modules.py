@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Tests for the golang collector's module graph parser."""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(os.path.dirname(HERE), "parse_go_modules.py")
+
+# `go list -m -json all` prints indented objects back to back, not an array.
+GO_LIST = textwrap.dedent(
+    """\
+    {
+    	"Path": "example.com/app",
+    	"Main": true,
+    	"Dir": "/src/app"
+    }
+    {
+    	"Path": "github.com/stretchr/testify",
+    	"Version": "v1.8.4"
+    }
+    {
+    	"Path": "github.com/davecgh/go-spew",
+    	"Version": "v1.1.1",
+    	"Indirect": true
+    }
+    {
+    	"Path": "golang.org/x/net",
+    	"Version": "v0.17.0",
+    	"Replace": {
+    		"Path": "../net",
+    		"Dir": "/src/net"
+    	}
+    }
+    """
+)
+
+GO_MOD = textwrap.dedent(
+    """\
+    module example.com/app
+
+    go 1.22
+
+    require (
+    	github.com/stretchr/testify v1.8.4
+    	github.com/davecgh/go-spew v1.1.1 // indirect
+    )
+
+    require golang.org/x/net v0.17.0
+
+    replace golang.org/x/net => ../net
+    """
+)
+
+GO_SUM = textwrap.dedent(
+    """\
+    github.com/davecgh/go-spew v1.1.1 h1:aaa=
+    github.com/davecgh/go-spew v1.1.1/go.mod h1:bbb=
+    github.com/stretchr/testify v1.8.4 h1:ccc=
+    gopkg.in/yaml.v3 v3.0.0-20200313102051-9f266ea9e77c h1:ddd=
+    gopkg.in/yaml.v3 v3.0.1 h1:eee=
+    github.com/only/modfile v1.0.0/go.mod h1:fff=
+    """
+)
+
+
+def run(args, stdin=""):
+    proc = subprocess.run(
+        [sys.executable, SCRIPT, *args],
+        input=stdin, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout)
+
+
+class GoListTest(unittest.TestCase):
+    def test_splits_direct_and_transitive(self):
+        out = run([], GO_LIST)
+        self.assertEqual([d["path"] for d in out["direct"]], ["github.com/stretchr/testify", "golang.org/x/net"])
+        self.assertEqual(out["transitive"], [
+            {"path": "github.com/davecgh/go-spew", "version": "v1.1.1", "indirect": True, "replace": None},
+        ])
+        self.assertEqual(out["direct"][1]["replace"], {"path": "../net", "version": ""})
+        self.assertEqual(out["source"], {"tool": "go mod", "integration": "code"})
+
+    def test_empty_input(self):
+        out = run([], "")
+        self.assertEqual((out["direct"], out["transitive"]), ([], []))
+
+
+class GoSumTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="golang-test-")
+        for name, body in (("go.mod", GO_MOD), ("go.sum", GO_SUM)):
+            with open(os.path.join(self.tmp, name), "w") as f:
+                f.write(body)
+
+    def test_matches_go_list_for_required_modules(self):
+        out = run(["--go-sum", os.path.join(self.tmp, "go.mod"), os.path.join(self.tmp, "go.sum")])
+        self.assertEqual(out["direct"], run([], GO_LIST)["direct"])
+
+    def test_sum_only_modules_are_transitive_at_highest_version(self):
+        out = run(["--go-sum", os.path.join(self.tmp, "go.mod"), os.path.join(self.tmp, "go.sum")])
+        transitive = {d["path"]: d["version"] for d in out["transitive"]}
+        self.assertEqual(transitive, {
+            "github.com/davecgh/go-spew": "v1.1.1",
+            "gopkg.in/yaml.v3": "v3.0.1",
+        })
+
+    def test_missing_go_sum(self):
+        out = run(["--go-sum", os.path.join(self.tmp, "go.mod"), os.path.join(self.tmp, "absent")])
+        self.assertEqual(len(out["direct"]), 2)
+        self.assertEqual(len(out["transitive"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -81,7 +81,23 @@ fi
 # Keep Go's heap tight during package cataloging + matching.
 export GOGC=40
 
+# Compact native storage (opt-in). The raw matches are kept under .native so
+# policies can reach fields we don't normalize, but they are usually most of the
+# document. compact_native=true keeps only a pruned projection (identity keys
+# plus the native_fields allowlist) and dedupes .findings by (package, version,
+# CVE) — Grype emits one match per artifact location. Counts and summary are
+# still computed over every match, so policy results are unchanged. Both are
+# handled by scan_normalize.py.
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+case "${LUNAR_VAR_COMPACT_NATIVE:-false}" in
+  true|1|yes) COMPACT=true ;;
+  *)          COMPACT=false ;;
+esac
+NATIVE_FIELDS="${LUNAR_VAR_NATIVE_FIELDS-cvss,cwe,references}"
+
 RESULTS_FILE="/tmp/grype-results.json"
+NATIVE_FILE="/tmp/grype-native.json"
+NORMALIZED_FILE="/tmp/grype-normalized.json"
 
 if ! grype "dir:." -o json > "$RESULTS_FILE" 2>/tmp/grype-stderr.log; then
   echo "Grype scan failed — skipping vulnerability collection" >&2
@@ -92,10 +108,6 @@ fi
 # Grype version comes straight from the scan descriptor — no separate version call.
 GRYPE_VERSION=$(jq -r '.descriptor.version // empty' "$RESULTS_FILE")
 
-# Preserve the raw Grype matches so policies can read fields we don't normalize
-# (CVSS scores, dataSource, relatedVulnerabilities, full fix state, etc.).
-jq -c '.matches // []' "$RESULTS_FILE" | lunar collect -j ".sca.native.grype.matches" -
-
 # Build source metadata JSON. collected_at dates each scan so a snapshot pushed
 # into .sca.history[] is self-describing — integration + timestamp identify the
 # release-time "code" scan vs a scheduled "cron" re-scan.
@@ -107,7 +119,7 @@ SOURCE_JSON=$(jq -n --arg version "$GRYPE_VERSION" --arg integration "$INTEGRATI
 } + (if $version != "" then {version: $version} else {} end)')
 
 # Build the .sca.history + rescan_count fragment, merged into the .sca write
-# below via `+ $extra`. rescan_count is bumped whenever EITHER input is set, so
+# below via --extra. rescan_count is bumped whenever EITHER input is set, so
 # max_rescans works standalone (no dependency on scan_history_size). The history
 # array is maintained only when scan_history_size > 0. The prior scan is
 # snapshotted as a compact {source, vulnerabilities, summary} entry — no
@@ -130,51 +142,26 @@ if [ "$IS_RESCAN" = true ] && { [ "$HIST_SIZE" -gt 0 ] || [ "$MAX_RESCANS" -gt 0
   [ -n "$HISTORY_JSON" ] || HISTORY_JSON="{}"
 fi
 
-# Check if any vulnerabilities found
-VULN_COUNT=$(jq '.matches | length' "$RESULTS_FILE")
-if [ "$VULN_COUNT" = "0" ] || [ -z "$VULN_COUNT" ]; then
-  echo "No vulnerabilities found" >&2
-  # Write everything in a single collect call to avoid merge fragmentation
-  jq -n --argjson source "$SOURCE_JSON" --argjson extra "$HISTORY_JSON" '{
-    source: $source,
-    vulnerabilities: {critical: 0, high: 0, medium: 0, low: 0, total: 0},
-    summary: {has_critical: false, has_high: false, all_fixable: true}
-  } + $extra' | lunar collect -j ".sca" -
-  exit 0
-fi
-
-# Normalize into the tool-agnostic .sca schema.
+# Normalize into the tool-agnostic .sca schema in one pass over the matches
+# (counts, summary flags and findings together), with source + history merged
+# in so everything lands in a single collect call. scan_normalize.py is shared
+# with the trivy collector.
 # Grype severities are Critical/High/Medium/Low/Negligible/Unknown. The .sca
 # schema has only critical/high/medium/low buckets, so:
 #   - Negligible folds into `low` (both in counts and in finding severity)
 #   - Unknown has no bucket but still counts toward `total`
-# fixable = (fix.state == "fixed"); fix_version = first fixed version.
-jq -c --argjson source "$SOURCE_JSON" --argjson extra "$HISTORY_JSON" '
-  def sev: (.vulnerability.severity // "Unknown") | ascii_downcase;
-  {
-    source: $source,
-    vulnerabilities: {
-      critical: [.matches[] | select(sev == "critical")] | length,
-      high:     [.matches[] | select(sev == "high")]     | length,
-      medium:   [.matches[] | select(sev == "medium")]   | length,
-      low:      [.matches[] | select(sev == "low" or sev == "negligible")] | length,
-      total:    (.matches | length)
-    },
-    findings: [.matches[] | {
-      severity:    (if sev == "negligible" then "low" else sev end),
-      package:     .artifact.name,
-      version:     .artifact.version,
-      ecosystem:   .artifact.type,
-      cve:         .vulnerability.id,
-      title:       (.vulnerability.description // null),
-      fix_version: ((.vulnerability.fix.versions // [])[0] // null),
-      fixable:     (.vulnerability.fix.state == "fixed")
-    }],
-    summary: {
-      has_critical: ([.matches[] | select(sev == "critical")] | length > 0),
-      has_high:     ([.matches[] | select(sev == "high")]     | length > 0),
-      all_fixable:  ([.matches[] | select(.vulnerability.fix.state != "fixed")] | length == 0)
-    }
-  } + $extra' "$RESULTS_FILE" | lunar collect -j ".sca" -
+# fixable = (fix.state == "fixed"); fix_version = first fixed version. The same
+# pass writes the .native payload: the raw matches, or in compact mode the
+# pruned projection, with findings deduped by (package, version, CVE).
+NORMALIZE_ARGS=(--source "$SOURCE_JSON" --extra "$HISTORY_JSON" --native-out "$NATIVE_FILE")
+if [ "$COMPACT" = true ]; then
+  NORMALIZE_ARGS+=(--compact --native-fields "$NATIVE_FIELDS")
+fi
+python3 "$SCRIPT_DIR/scan_normalize.py" grype "$RESULTS_FILE" "${NORMALIZE_ARGS[@]}" > "$NORMALIZED_FILE"
 
-echo "Found $VULN_COUNT vulnerabilities" >&2
+# Store the native record so policies can read fields we don't normalize: the
+# raw Grype matches (CVSS scores, dataSource, relatedVulnerabilities, full fix
+# state, etc.), or in compact mode the identity keys plus the native_fields
+# allowlist.
+lunar collect -j ".sca.native.grype.matches" - < "$NATIVE_FILE"
+lunar collect -j ".sca" - < "$NORMALIZED_FILE"
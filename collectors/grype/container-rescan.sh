@@ -21,6 +21,14 @@ case "${LUNAR_COLLECTOR_NAME:-}" in
   *)               INTEGRATION="cron" ;;
 esac
 
+# Compact native storage (opt-in; same inputs and semantics as auto.sh).
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+case "${LUNAR_VAR_COMPACT_NATIVE:-false}" in
+  true|1|yes) COMPACT=true ;;
+  *)          COMPACT=false ;;
+esac
+NATIVE_FIELDS="${LUNAR_VAR_NATIVE_FIELDS-cvss,cwe,references}"
+
 # --- 1. Resolve the image reference to scan ---
 IMAGE_REF="${LUNAR_VAR_CONTAINER_IMAGE:-}"
 
@@ -109,64 +117,26 @@ if ! grype "$IMAGE_REF" -o json > "$RESULTS_FILE" 2>/tmp/grype-container-stderr.
 fi
 
 GRYPE_VERSION=$(jq -r '.descriptor.version // empty' "$RESULTS_FILE")
-OS_FAMILY=$(jq -r '.distro.name // empty' "$RESULTS_FILE")
-OS_VERSION=$(jq -r '.distro.version // empty' "$RESULTS_FILE")
-
-# Preserve the raw matches so policies can read fields we don't normalize.
-jq -c '.matches // []' "$RESULTS_FILE" | lunar collect -j ".container_scan.native.grype.matches" -
-
 # Source metadata (integration set above: after-json on-push, or cron re-scan).
 SOURCE_JSON=$(jq -n --arg version "$GRYPE_VERSION" --arg integration "$INTEGRATION" '{
   tool: "grype",
   integration: $integration
 } + (if $version != "" then {version: $version} else {} end)')
 
-# os{} block, included only when Grype reported a distro.
-OS_JSON=$(jq -n --arg f "$OS_FAMILY" --arg v "$OS_VERSION" '
-  if $f != "" then {os: ({family: $f} + (if $v != "" then {version: $v} else {} end))} else {} end')
-
-VULN_COUNT=$(jq '.matches | length' "$RESULTS_FILE")
-if [ "$VULN_COUNT" = "0" ] || [ -z "$VULN_COUNT" ]; then
-  echo "No vulnerabilities found in $IMAGE_REF" >&2
-  jq -n --argjson source "$SOURCE_JSON" --argjson os "$OS_JSON" --arg image "$IMAGE_REF" '{
-    source: $source,
-    image: $image,
-    vulnerabilities: {critical: 0, high: 0, medium: 0, low: 0, total: 0},
-    summary: {has_critical: false, has_high: false, all_fixable: true}
-  } + $os' | lunar collect -j ".container_scan" -
-  exit 0
+# Normalize into the tool-agnostic .container_scan schema in one pass (same
+# normalizer as auto.sh's .sca, plus image + the os{} block when Grype reported
+# a distro). Negligible folds into low; Unknown still counts toward total. The
+# same pass writes the .native payload — raw matches, or the compact projection
+# with deduped findings.
+NATIVE_FILE="/tmp/grype-container-native.json"
+NORMALIZED_FILE="/tmp/grype-container-normalized.json"
+NORMALIZE_ARGS=(--source "$SOURCE_JSON" --image "$IMAGE_REF" --os --native-out "$NATIVE_FILE")
+if [ "$COMPACT" = true ]; then
+  NORMALIZE_ARGS+=(--compact --native-fields "$NATIVE_FIELDS")
 fi
+python3 "$SCRIPT_DIR/scan_normalize.py" grype "$RESULTS_FILE" "${NORMALIZE_ARGS[@]}" > "$NORMALIZED_FILE"
 
-# Normalize into the tool-agnostic .container_scan schema (mirrors auto.sh's
-# .sca normalization; adds image + os). Negligible folds into low; Unknown
-# still counts toward total.
-jq -c --argjson source "$SOURCE_JSON" --argjson os "$OS_JSON" --arg image "$IMAGE_REF" '
-  def sev: (.vulnerability.severity // "Unknown") | ascii_downcase;
-  {
-    source: $source,
-    image: $image,
-    vulnerabilities: {
-      critical: [.matches[] | select(sev == "critical")] | length,
-      high:     [.matches[] | select(sev == "high")]     | length,
-      medium:   [.matches[] | select(sev == "medium")]   | length,
-      low:      [.matches[] | select(sev == "low" or sev == "negligible")] | length,
-      total:    (.matches | length)
-    },
-    findings: [.matches[] | {
-      severity:    (if sev == "negligible" then "low" else sev end),
-      package:     .artifact.name,
-      version:     .artifact.version,
-      ecosystem:   .artifact.type,
-      cve:         .vulnerability.id,
-      title:       (.vulnerability.description // null),
-      fix_version: ((.vulnerability.fix.versions // [])[0] // null),
-      fixable:     (.vulnerability.fix.state == "fixed")
-    }],
-    summary: {
-      has_critical: ([.matches[] | select(sev == "critical")] | length > 0),
-      has_high:     ([.matches[] | select(sev == "high")]     | length > 0),
-      all_fixable:  ([.matches[] | select(.vulnerability.fix.state != "fixed")] | length == 0)
-    }
-  } + $os' "$RESULTS_FILE" | lunar collect -j ".container_scan" -
-
-echo "Found $VULN_COUNT vulnerabilities in $IMAGE_REF" >&2
+# Store the native record (raw matches, or the compact projection) so policies
+# can read fields we don't normalize.
+lunar collect -j ".container_scan.native.grype.matches" - < "$NATIVE_FILE"
+lunar collect -j ".container_scan" - < "$NORMALIZED_FILE"
@@ -262,5 +262,49 @@ class SkipSafetyTest(Base):
         self.assertIn("Scanning image: ghcr.io/acme/api:v1", result.stderr)
 
 
+
+class CompactNativeTest(Base):
+    # The same CVE matched at two artifact locations, with the bulky fields
+    # compact mode should prune.
+    DUP_RESULTS = json.dumps({
+        "descriptor": {"version": "0.87.0"},
+        "distro": {"name": "debian", "version": "12"},
+        "matches": [{
+            "vulnerability": {
+                "id": "CVE-2026-0001", "severity": "High",
+                "description": "curl flaw",
+                "fix": {"state": "fixed", "versions": ["8.2.0"]},
+                "cvss": [{"metrics": {"baseScore": 7.5}}],
+                "urls": ["https://example.test/CVE-2026-0001"],
+            },
+            "artifact": {"name": "curl", "version": "8.1.0", "type": "deb",
+                         "locations": [{"path": p}]},
+            "matchDetails": [{"matcher": "dpkg-matcher"}],
+        } for p in ("/var/lib/dpkg/a", "/var/lib/dpkg/b")],
+    })
+
+    def test_default_keeps_full_native_and_every_finding(self):
+        self.fixture("grype-results.json", self.DUP_RESULTS)
+        result, log = self.run_script(dict(self.CRON_ENV))
+        self.assertEqual(result.returncode, 0, msg=result.stderr)
+        native = self.collected(log, ".container_scan.native.grype.matches")
+        self.assertEqual(native, json.loads(self.DUP_RESULTS)["matches"])
+        self.assertEqual(len(self.collected(log, ".container_scan")["findings"]), 2)
+
+    def test_compact_prunes_native_and_dedupes_findings(self):
+        self.fixture("grype-results.json", self.DUP_RESULTS)
+        env = dict(self.CRON_ENV, LUNAR_VAR_COMPACT_NATIVE="true")
+        result, log = self.run_script(env)
+        self.assertEqual(result.returncode, 0, msg=result.stderr)
+        native = self.collected(log, ".container_scan.native.grype.matches")
+        self.assertEqual(len(native), 2)
+        self.assertEqual(set(native[0]), {"vulnerability", "artifact"})
+        self.assertEqual(set(native[0]["vulnerability"]), {"id", "severity", "fix", "cvss", "urls"})
+        self.assertNotIn("locations", native[0]["artifact"])
+        scan = self.collected(log, ".container_scan")
+        self.assertEqual(len(scan["findings"]), 1)
+        # Counts still cover every match, so policy thresholds are unchanged.
+        self.assertEqual(scan["vulnerabilities"]["high"], 2)
+
 if __name__ == "__main__":
     unittest.main()
@@ -11,68 +11,10 @@ fi
 
 # Try Maven pom.xml first
 if [[ -f "pom.xml" ]]; then
-    python3 - <<'PY' | lunar collect -j ".lang.java.dependencies" - || true
-import json
-import xml.etree.ElementTree as ET
-
-try:
-    tree = ET.parse("pom.xml")
-    root = tree.getroot()
-except Exception:
-    import sys
-    sys.exit(0)
-
-# Handle Maven namespace
-ns = {}
-prefix = ""
-if root.tag.startswith("{"):
-    uri = root.tag[root.tag.find("{") + 1:root.tag.find("}")]
-    ns["m"] = uri
-    prefix = "m:"
-
-# Collect <properties> for resolving ${variable} references
-properties = {}
-props_elem = root.find(f"./{prefix}properties", ns)
-if props_elem is not None:
-    for child in list(props_elem):
-        tag = child.tag
-        if tag.startswith("{"):
-            tag = tag[tag.find("}") + 1:]
-        properties[tag] = (child.text or "").strip()
-
-deps = []
-# Prefer direct <dependencies> block; fall back to <dependencyManagement> for parent POMs
-deps_elem = root.find(f"./{prefix}dependencies", ns)
-if deps_elem is None:
-    dm = root.find(f"./{prefix}dependencyManagement", ns)
-    if dm is not None:
-        deps_elem = dm.find(f"./{prefix}dependencies", ns)
-dep_list = deps_elem.findall(f"{prefix}dependency", ns) if deps_elem is not None else []
-for dep in dep_list:
-    group = dep.findtext(f"{prefix}groupId", default="", namespaces=ns)
-    artifact = dep.findtext(f"{prefix}artifactId", default="", namespaces=ns)
-    version = dep.findtext(f"{prefix}version", default="", namespaces=ns) or ""
-    version = version.strip()
-
-    # Resolve property references like ${junit.version}
-    if version.startswith("${") and version.endswith("}"):
-        prop_name = version[2:-1].strip()
-        resolved = properties.get(prop_name)
-        if resolved:
-            version = resolved
-
-    deps.append({
-        "path": f"{group}:{artifact}",
-        "version": version,
-        "indirect": False,
-    })
-
-print(json.dumps({
-    "direct": deps,
-    "transitive": [],
-    "source": {"tool": "maven", "integration": "code"},
-}))
-PY
+    # Effective-POM resolution across the reactor: parents, <modules>,
+    # dependencyManagement and imported BOMs, all offline.
+    python3 "$(dirname "$0")/effective_pom.py" --mark-indirect pom.xml | \
+        lunar collect -j ".lang.java.dependencies" - || true
     exit 0
 fi
 
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""Tests for the offline effective-POM resolver (java and kotlin collectors)."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import effective_pom  # noqa: E402
+
+NS = 'xmlns="http://maven.apache.org/POM/4.0.0"'
+
+ROOT_POM = f"""\
+<project {NS}>
+  <modelVersion>4.0.0</modelVersion>
+  <parent>
+    <groupId>com.corp</groupId>
+    <artifactId>corp-parent</artifactId>
+    <version>7</version>
+    <relativePath/>
+  </parent>
+  <groupId>com.acme</groupId>
+  <artifactId>acme-root</artifactId>
+  <version>1.4.0</version>
+  <packaging>pom</packaging>
+  <modules>
+    <module>bom</module>
+    <module>core</module>
+    <module>services/api</module>
+  </modules>
+  <properties>
+    <jackson.version>2.16.1</jackson.version>
+    <slf4j.version>2.0.9</slf4j.version>
+  </properties>
+  <dependencyManagement>
+    <dependencies>
+      <dependency>
+        <groupId>com.acme</groupId>
+        <artifactId>acme-bom</artifactId>
+        <version>${{project.version}}</version>
+        <type>pom</type>
+        <scope>import</scope>
+      </dependency>
+      <dependency>
+        <groupId>com.fasterxml.jackson.core</groupId>
+        <artifactId>jackson-databind</artifactId>
+        <version>${{jackson.version}}</version>
+      </dependency>
+      <dependency>
+        <groupId>org.slf4j</groupId>
+        <artifactId>slf4j-api</artifactId>
+        <version>${{slf4j.version}}</version>
+      </dependency>
+    </dependencies>
+  </dependencyManagement>
+  <dependencies>
+    <dependency>
+      <groupId>org.slf4j</groupId>
+      <artifactId>slf4j-api</artifactId>
+    </dependency>
+  </dependencies>
+</project>
+"""
+
+BOM_POM = f"""\
+<project {NS}>
+  <groupId>com.acme</groupId>
+  <artifactId>acme-bom</artifactId>
+  <version>1.4.0</version>
+  <packaging>pom</packaging>
+  <properties><guava.version>33.0.0-jre</guava.version></properties>
+  <dependencyManagement>
+    <dependencies>
+      <dependency>
+        <groupId>com.google.guava</groupId>
+        <artifactId>guava</artifactId>
+        <version>${{guava.version}}</version>
+      </dependency>
+      <dependency>
+        <groupId>com.fasterxml.jackson.core</groupId>
+        <artifactId>jackson-databind</artifactId>
+        <version>2.0.0</version>
+      </dependency>
+    </dependencies>
+  </dependencyManagement>
+</project>
+"""
+
+CORE_POM = f"""\
+<project {NS}>
+  <parent>
+    <groupId>com.acme</groupId>
+    <artifactId>acme-root</artifactId>
+    <version>1.4.0</version>
+  </parent>
+  <artifactId>acme-core</artifactId>
+  <properties><slf4j.version>2.0.12</slf4j.version></properties>
+  <dependencies>
+    <dependency>
+      <groupId>com.google.guava</groupId>
+      <artifactId>guava</artifactId>
+    </dependency>
+    <dependency>
+      <groupId>com.fasterxml.jackson.core</groupId>
+      <artifactId>jackson-databind</artifactId>
+    </dependency>
+  </dependencies>
+</project>
+"""
+
+API_POM = f"""\
+<project {NS}>
+  <parent>
+    <groupId>com.acme</groupId>
+    <artifactId>acme-root</artifactId>
+    <version>1.4.0</version>
+    <relativePath>../../pom.xml</relativePath>
+  </parent>
+  <artifactId>acme-api</artifactId>
+  <dependencies>
+    <dependency>
+      <groupId>${{project.groupId}}</groupId>
+      <artifactId>acme-core</artifactId>
+      <version>${{project.version}}</version>
+    </dependency>
+    <dependency>
+      <groupId>io.micronaut</groupId>
+      <artifactId>micronaut-http</artifactId>
+      <version>${{micronaut.version}}</version>
+    </dependency>
+  </dependencies>
+</project>
+"""
+
+
+class ReactorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        # Keep ~/.m2 out of the tests unless a test provides its own.
+        self.repo = os.path.join(self.root, ".m2")
+        patcher = mock.patch.dict(os.environ, {"MAVEN_REPO_LOCAL": self.repo})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, rel, text):
+        path = os.path.join(self.root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def collect(self, **kwargs):
+        return effective_pom.collect(os.path.join(self.root, "pom.xml"), **kwargs)
+
+    @staticmethod
+    def versions(result):
+        return {d["path"]: d["version"] for d in result["direct"]}
+
+
+class TestReactor(ReactorTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("pom.xml", ROOT_POM)
+        self.write("bom/pom.xml", BOM_POM)
+        self.write("core/pom.xml", CORE_POM)
+        self.write("services/api/pom.xml", API_POM)
+
+    def test_resolves_across_modules(self):
+        versions = self.versions(self.collect())
+        # Imported BOM manages guava; explicit management beats the BOM.
+        self.assertEqual(versions["com.google.guava:guava"], "33.0.0-jre")
+        self.assertEqual(versions["com.fasterxml.jackson.core:jackson-databind"], "2.16.1")
+        # Undefined property: version left empty rather than a raw ${...}.
+        self.assertEqual(versions["io.micronaut:micronaut-http"], "")
+        # Modules depending on each other are not external dependencies.
+        self.assertNotIn("com.acme:acme-core", versions)
+
+    def test_child_property_override_applies_to_inherited_dependency(self):
+        result = self.collect()
+        slf4j = [d["version"] for d in result["direct"] if d["path"] == "org.slf4j:slf4j-api"]
+        self.assertEqual(slf4j, ["2.0.9", "2.0.12"])
+
+    def test_each_pom_parsed_once(self):
+        reactor = effective_pom.Reactor()
+        with mock.patch.object(effective_pom.ET, "parse", wraps=effective_pom.ET.parse) as parse:
+            for pom in reactor.walk(os.path.join(self.root, "pom.xml")):
+                reactor.resolve(pom.path)
+        self.assertEqual(parse.call_count, 4)
+
+    def test_mark_indirect(self):
+        result = self.collect(mark_indirect=True)
+        self.assertTrue(all(d["indirect"] is False for d in result["direct"]))
+        self.assertEqual(result["source"], {"tool": "maven", "integration": "code"})
+
+
+class TestParents(ReactorTestCase):
+    def test_parent_from_local_repository(self):
+        self.write(
+            ".m2/com/corp/corp-parent/7/corp-parent-7.pom",
+            f"""<project {NS}><groupId>com.corp</groupId><artifactId>corp-parent</artifactId>
+            <version>7</version><properties><junit.version>5.10.1</junit.version></properties>
+            <dependencyManagement><dependencies><dependency><groupId>org.junit.jupiter</groupId>
+            <artifactId>junit-jupiter</artifactId><version>${{junit.version}}</version>
+            </dependency></dependencies></dependencyManagement></project>""",
+        )
+        self.write("pom.xml", f"""<project {NS}>
+          <parent><groupId>com.corp</groupId><artifactId>corp-parent</artifactId><version>7</version></parent>
+          <artifactId>app</artifactId>
+          <dependencies><dependency><groupId>org.junit.jupiter</groupId>
+          <artifactId>junit-jupiter</artifactId><scope>test</scope></dependency></dependencies>
+        </project>""")
+        self.assertEqual(self.versions(self.collect()), {"org.junit.jupiter:junit-jupiter": "5.10.1"})
+
+    def test_parent_only_pom_falls_back_to_managed_versions(self):
+        self.write("pom.xml", f"""<project {NS}><groupId>g</groupId><artifactId>parent</artifactId>
+          <properties><v>1.0</v></properties>
+          <dependencyManagement><dependencies>
+            <dependency><groupId>a</groupId><artifactId>x</artifactId><version>${{v}}</version></dependency>
+          </dependencies></dependencyManagement></project>""")
+        self.assertEqual(self.versions(self.collect()), {"a:x": "1.0"})
+
+    def test_unreadable_pom(self):
+        self.write("pom.xml", "<project>")
+        self.assertIsNone(self.collect())
+
+
+class TestInterpolate(unittest.TestCase):
+    def test_nested_and_cyclic(self):
+        props = {"a": "${b}", "b": "1.2", "x": "${y}", "y": "${x}"}
+        self.assertEqual(effective_pom.interpolate("${a}-SNAPSHOT", props), "1.2-SNAPSHOT")
+        self.assertEqual(effective_pom.interpolate("${x}", props), "")
+        self.assertEqual(effective_pom.interpolate("3.0", props), "3.0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -293,3 +293,49 @@ fetch_pr_metadata() {
   fi
   return 0
 }
+
+# --- Ticket reuse lookup ----------------------------------------------------
+#
+# The ticket id lives inside component_json, so counting the PRs that share it
+# scans every PR snapshot in components_latest. An administrator can turn that
+# into an index lookup by provisioning an expression index over the ticket id,
+# partial on pr IS NOT NULL (see "Ticket reuse lookups" in the README). The
+# count query filters on exactly that expression and predicate, so the planner
+# uses the index as is. The collector never creates it: DDL on the hub's
+# snapshots from a per-PR run would contend with the hub's own refreshes.
+TICKET_SNAPSHOTS="components_latest"
+TICKET_ID_EXPR="component_json->'vcs'->'pr'->'ticket'->>'id'"
+
+# ticket_sql: Runs SQL against CONN_STRING and prints the unaligned,
+# tuples-only result of its last statement. Fails on the first SQL error.
+ticket_sql() {
+  psql "$CONN_STRING" -X -q -t -A -v ON_ERROR_STOP=1 -c "$1" 2>&1
+}
+
+# sql_quote: Escapes a value for use inside a single-quoted SQL literal.
+sql_quote() {
+  printf '%s' "$1" | sed "s/'/''/g"
+}
+
+# ticket_reuse_count: Counts the other PRs (component, PR pairs) that reference
+# a ticket. Requires CONN_STRING, LUNAR_COMPONENT_ID and LUNAR_COMPONENT_PR.
+#
+# Arguments:
+#   $1 - ticket key
+#
+# Outputs:
+#   Prints the count, or psql's error output and returns 1.
+ticket_reuse_count() {
+  local ticket component pr
+  ticket="$(sql_quote "$1")"
+  component="$(sql_quote "$LUNAR_COMPONENT_ID")"
+  pr="$(sql_quote "$LUNAR_COMPONENT_PR")"
+
+  ticket_sql "
+    SELECT COUNT(DISTINCT (component_id, pr))
+    FROM ${TICKET_SNAPSHOTS}
+    WHERE pr IS NOT NULL
+      AND ${TICKET_ID_EXPR} = '${ticket}'
+      AND NOT (component_id = '${component}' AND pr::text = '${pr}')
+  "
+}
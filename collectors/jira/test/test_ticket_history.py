@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Tests for how the jira ticket-history collector looks ticket reuse up.
+
+The ticket id lives inside component_json, so counting the PRs that share it
+scans every PR snapshot unless an administrator has provisioned an expression
+index on components_latest. These tests lock in that the count query matches
+that index and that the collector never issues DDL or writes to the database.
+
+`psql` is stubbed: it logs each statement to $SQL_LOG, answers the count
+query with a fixed count, and fails anything else. `curl` serves the PR from GitHub and `lunar` hands out a
+connection string and logs `collect` calls to $CAPTURE. No Jira is configured,
+so the ticket is the first candidate in the PR title.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import textwrap
+import unittest
+
+HERE = os.path.dirname(__file__)
+COLLECTOR = os.path.abspath(os.path.join(HERE, ".."))
+
+REUSE_COUNT = "3"
+
+
+class Base(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="jira-history-test-")
+        self.bin = os.path.join(self.tmp, "bin")
+        os.makedirs(self.bin)
+        self.capture = os.path.join(self.tmp, "collect.log")
+        self.sql_log = os.path.join(self.tmp, "sql.log")
+        self._write_stubs()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _stub(self, name, body):
+        path = os.path.join(self.bin, name)
+        with open(path, "w") as f:
+            f.write(textwrap.dedent(body))
+        os.chmod(path, 0o755)
+
+    def _write_stubs(self):
+        self._stub(
+            "curl",
+            """\
+            #!/bin/sh
+            echo '{"title": "[ABC-123] Add healthz", "body": ""}'
+            """,
+        )
+        self._stub(
+            "lunar",
+            """\
+            #!/bin/sh
+            if [ "$1" = "sql" ] && [ "$2" = "connection-string" ]; then
+              echo "postgres://lunar@hub/lunar"
+              exit 0
+            fi
+            printf 'ARGS: %s\\n' "$*" >> "$CAPTURE"
+            """,
+        )
+        self._stub(
+            "psql",
+            """\
+            #!/bin/bash
+            while [ $# -gt 0 ]; do
+              case "$1" in
+                -c) sql="$2"; shift 2 ;;
+                -v) shift 2 ;;
+                *) shift ;;
+              esac
+            done
+            printf '%s\\n--\\n' "$sql" >> "$SQL_LOG"
+            case "$sql" in
+              *CREATE*|*INSERT*|*UPDATE*|*DELETE*) echo "unexpected write"; exit 3 ;;
+              *"SELECT COUNT(DISTINCT (component_id, pr))"*) echo "REUSE_COUNT" ;;
+              *) echo "unexpected statement"; exit 3 ;;
+            esac
+            """.replace("REUSE_COUNT", REUSE_COUNT),
+        )
+
+    def run_script(self, env=None):
+        full_env = {
+            "PATH": self.bin + ":" + os.environ["PATH"],
+            "CAPTURE": self.capture,
+            "SQL_LOG": self.sql_log,
+            "LUNAR_COMPONENT_ID": "github.com/acme/backend",
+            "LUNAR_COMPONENT_PR": "8",
+            "LUNAR_SECRET_GH_TOKEN": "gh-token",
+        }
+        full_env.update(env or {})
+        result = subprocess.run(
+            ["bash", os.path.join(COLLECTOR, "ticket-history.sh")],
+            env=full_env,
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+        )
+        statements = []
+        if os.path.exists(self.sql_log):
+            with open(self.sql_log) as f:
+                statements = [s.strip() for s in f.read().split("\n--\n") if s.strip()]
+        collected = ""
+        if os.path.exists(self.capture):
+            with open(self.capture) as f:
+                collected = f.read()
+        return result, statements, collected
+
+    def assertCollected(self, collected, count):
+        self.assertIn("collect -j .vcs.pr.ticket.reuse_count %s" % count, collected)
+
+
+class TicketHistoryLookupTest(Base):
+    def assertNoWrites(self, statements):
+        for statement in statements:
+            for keyword in ("CREATE", "INSERT", "UPDATE", "DELETE"):
+                self.assertNotIn(keyword, statement)
+
+    def test_count_matches_the_provisioned_index(self):
+        result, statements, collected = self.run_script()
+        self.assertEqual(result.returncode, 0, msg=result.stderr)
+        # One statement, no catalog lookups. The count must filter on exactly
+        # the indexed expression, with the index's predicate, for the planner
+        # to use a provisioned index.
+        self.assertEqual(len(statements), 1)
+        count = statements[0]
+        self.assertIn("FROM components_latest\n", count)
+        self.assertIn("component_json->'vcs'->'pr'->'ticket'->>'id' = 'ABC-123'", count)
+        self.assertIn("pr IS NOT NULL", count)
+        self.assertNoWrites(statements)
+        self.assertCollected(collected, REUSE_COUNT)
+
+    def test_quotes_in_the_component_id_are_escaped(self):
+        result, statements, _ = self.run_script(
+            {"LUNAR_COMPONENT_ID": "github.com/acme/o'brien"}
+        )
+        self.assertEqual(result.returncode, 0, msg=result.stderr)
+        self.assertIn("component_id = 'github.com/acme/o''brien'", statements[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -51,21 +51,9 @@ if ! command -v psql &> /dev/null; then
   exit 1
 fi
 
-# Sanitize inputs for SQL.
-SAFE_TICKET_KEY=$(echo "$TICKET_KEY" | sed "s/'/''/g")
-SAFE_COMPONENT_ID=$(echo "$LUNAR_COMPONENT_ID" | sed "s/'/''/g")
-SAFE_PR=$(echo "$LUNAR_COMPONENT_PR" | sed "s/'/''/g")
-
-# Query for other PRs using the same ticket.
-QUERY="
-  SELECT COUNT(DISTINCT (component_id, pr))
-  FROM components_latest
-  WHERE pr IS NOT NULL
-    AND component_json->'vcs'->'pr'->'ticket'->>'id' = '${SAFE_TICKET_KEY}'
-    AND NOT (component_id = '${SAFE_COMPONENT_ID}' AND pr::text = '${SAFE_PR}')
-"
-
-REUSE_COUNT=$(psql "$CONN_STRING" -t -A -c "$QUERY" 2>&1) || true
+# Count other PRs using the same ticket (see ticket_reuse_count in helpers.sh
+# for the optional administrator-provisioned index).
+REUSE_COUNT=$(ticket_reuse_count "$TICKET_KEY") || true
 
 # Validate result is a number.
 if ! [[ "$REUSE_COUNT" =~ ^[0-9]+$ ]]; then
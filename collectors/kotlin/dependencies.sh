@@ -10,52 +10,11 @@ if ! is_kotlin_project; then
     exit 0
 fi
 
-# Maven (kotlin-maven-plugin): parse pom.xml with property resolution.
+# Maven (kotlin-maven-plugin): resolve the effective POM across the reactor
+# (parents, <modules>, dependencyManagement, imported BOMs), offline.
 if pom_has_kotlin_plugin; then
-    python3 - <<'PY' | lunar collect -j ".lang.kotlin.dependencies" - || true
-import json
-import sys
-import xml.etree.ElementTree as ET
-
-try:
-    tree = ET.parse("pom.xml")
-    root = tree.getroot()
-except Exception:
-    sys.exit(0)
-
-prefix = ""
-ns = {}
-if root.tag.startswith("{"):
-    uri = root.tag[root.tag.find("{") + 1:root.tag.find("}")]
-    ns["m"] = uri
-    prefix = "m:"
-
-properties = {}
-props_elem = root.find(f"./{prefix}properties", ns)
-if props_elem is not None:
-    for child in list(props_elem):
-        tag = child.tag
-        if tag.startswith("{"):
-            tag = tag[tag.find("}") + 1:]
-        properties[tag] = (child.text or "").strip()
-
-deps = []
-deps_elem = root.find(f"./{prefix}dependencies", ns)
-dep_list = deps_elem.findall(f"{prefix}dependency", ns) if deps_elem is not None else []
-for dep in dep_list:
-    group = dep.findtext(f"{prefix}groupId", default="", namespaces=ns)
-    artifact = dep.findtext(f"{prefix}artifactId", default="", namespaces=ns)
-    version = (dep.findtext(f"{prefix}version", default="", namespaces=ns) or "").strip()
-    if version.startswith("${") and version.endswith("}"):
-        version = properties.get(version[2:-1].strip(), "")
-    deps.append({"path": f"{group}:{artifact}", "version": version})
-
-print(json.dumps({
-    "direct": deps,
-    "transitive": [],
-    "source": {"tool": "maven", "integration": "code"},
-}))
-PY
+    python3 "$(dirname "$0")/effective_pom.py" pom.xml | \
+        lunar collect -j ".lang.kotlin.dependencies" - || true
     exit 0
 fi
 
@@ -0,0 +1,310 @@
+"""Resolve Maven dependencies from the effective POM of a whole reactor, offline.
+
+Usage: effective_pom.py [--mark-indirect] [POM]
+
+Starting at POM (default pom.xml), every `<modules>` entry is followed within
+the repository and each module's effective model is built the way Maven does
+it: `<parent>` chains are inherited (found via `relativePath`, the reactor, or
+the local repository at $MAVEN_REPO_LOCAL / ~/.m2/repository), properties are
+interpolated late so child overrides apply to inherited declarations, and
+versions missing from `<dependencies>` come from `<dependencyManagement>`,
+including `import`-scoped BOMs. Nothing is downloaded; parents or BOMs that
+are not on disk are skipped and the affected versions stay empty.
+
+Every POM is parsed once and every effective model built once, so shared
+parents and BOMs cost nothing per additional module.
+
+Prints the dependencies object on stdout: `direct` holds each external
+group:artifact@version declared across the reactor (modules depending on each
+other are left out). A parent/BOM-only build with no `<dependencies>` falls
+back to its managed versions. With --mark-indirect each entry carries
+`"indirect": false`.
+
+The same file ships in the java and kotlin collectors (plugins are standalone
+directories); keep the copies identical.
+"""
+import json
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+
+PROPERTY = re.compile(r"\$\{([^}]+)\}")
+MAX_INTERPOLATION_DEPTH = 10
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def _child(elem, name):
+    if elem is None:
+        return None
+    for c in elem:
+        if _local_name(c.tag) == name:
+            return c
+    return None
+
+
+def _children(elem, name):
+    if elem is None:
+        return []
+    return [c for c in elem if _local_name(c.tag) == name]
+
+
+def _text(elem, name):
+    c = _child(elem, name)
+    return (c.text or "").strip() if c is not None and c.text else ""
+
+
+def _dependency_list(container):
+    out = []
+    for dep in _children(_child(container, "dependencies"), "dependency"):
+        out.append({
+            "groupId": _text(dep, "groupId"),
+            "artifactId": _text(dep, "artifactId"),
+            "version": _text(dep, "version"),
+            "scope": _text(dep, "scope"),
+            "type": _text(dep, "type") or "jar",
+        })
+    return out
+
+
+class Pom:
+    """The raw (uninherited, uninterpolated) contents of one pom.xml."""
+
+    def __init__(self, path, root):
+        self.path = path
+        self.dir = os.path.dirname(path)
+        parent = _child(root, "parent")
+        self.parent = None
+        if parent is not None:
+            self.parent = {
+                "groupId": _text(parent, "groupId"),
+                "artifactId": _text(parent, "artifactId"),
+                "version": _text(parent, "version"),
+                "relativePath": _text(parent, "relativePath") if _child(parent, "relativePath") is not None else "../pom.xml",
+            }
+        self.group = _text(root, "groupId") or (self.parent or {}).get("groupId", "")
+        self.artifact = _text(root, "artifactId")
+        self.version = _text(root, "version")
+        props = _child(root, "properties")
+        self.properties = {
+            _local_name(c.tag): (c.text or "").strip() for c in (props if props is not None else [])
+        }
+        self.managed = _dependency_list(_child(root, "dependencyManagement"))
+        self.dependencies = _dependency_list(root)
+        self.modules = [(m.text or "").strip() for m in _children(_child(root, "modules"), "module") if m.text]
+
+    @property
+    def key(self):
+        return f"{self.group}:{self.artifact}"
+
+
+class Effective:
+    """Inherited model of one POM, as raw declarations plus merged properties.
+
+    `managed` ({group:artifact: version}) and `dependencies` are filled in,
+    interpolated, by `Reactor.resolve`.
+    """
+
+    def __init__(self, pom, properties, raw_managed, raw_dependencies):
+        self.pom = pom
+        self.properties = properties
+        self.raw_managed = raw_managed
+        self.raw_dependencies = raw_dependencies
+        self.managed = None
+        self.dependencies = None
+
+
+class Reactor:
+    def __init__(self, repo_local=None):
+        self.repo_local = repo_local or os.environ.get("MAVEN_REPO_LOCAL") or os.path.expanduser("~/.m2/repository")
+        self._poms = {}  # realpath -> Pom (None when unreadable)
+        self._effective = {}  # realpath -> Effective (None when unresolvable)
+        self._in_progress = set()
+        self.modules = {}  # group:artifact -> realpath, for every reactor module
+
+    def load(self, path):
+        real = os.path.realpath(path)
+        if real not in self._poms:
+            try:
+                self._poms[real] = Pom(real, ET.parse(real).getroot())
+            except (OSError, ET.ParseError) as e:
+                print(f"Could not parse {path}: {e}", file=sys.stderr)
+                self._poms[real] = None
+        return self._poms[real]
+
+    def walk(self, root_path):
+        """Load the reactor rooted at `root_path`; return module POMs in build order."""
+        order, queue, seen = [], [root_path], set()
+        while queue:
+            path = queue.pop(0)
+            if os.path.isdir(path):
+                path = os.path.join(path, "pom.xml")
+            pom = self.load(path)
+            if pom is None or pom.path in seen:
+                continue
+            seen.add(pom.path)
+            order.append(pom)
+            self.modules.setdefault(pom.key, pom.path)
+            queue.extend(os.path.join(pom.dir, m) for m in pom.modules)
+        return order
+
+    def _find(self, group, artifact, version, relative=None, base=None):
+        """Locate a parent/BOM POM: relativePath, then the reactor, then ~/.m2."""
+        if relative and base:
+            candidate = os.path.join(base, relative)
+            if os.path.isdir(candidate):
+                candidate = os.path.join(candidate, "pom.xml")
+            if os.path.isfile(candidate):
+                pom = self.load(candidate)
+                if pom is not None and pom.artifact == artifact and pom.group == group:
+                    return pom.path
+        key = f"{group}:{artifact}"
+        if key in self.modules:
+            return self.modules[key]
+        if group and artifact and version:
+            candidate = os.path.join(
+                self.repo_local, *group.split("."), artifact, version, f"{artifact}-{version}.pom"
+            )
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def effective(self, path):
+        real = os.path.realpath(path)
+        if real in self._effective:
+            return self._effective[real]
+        if real in self._in_progress:  # parent cycle
+            return None
+        self._in_progress.add(real)
+        try:
+            result = self._build(real)
+        finally:
+            self._in_progress.discard(real)
+        self._effective[real] = result
+        return result
+
+    def _build(self, path):
+        pom = self.load(path)
+        if pom is None:
+            return None
+        parent = None
+        if pom.parent:
+            p = pom.parent
+            parent_path = self._find(p["groupId"], p["artifactId"], p["version"], p["relativePath"], pom.dir)
+            if parent_path:
+                parent = self.effective(parent_path)
+        properties = dict(parent.properties) if parent else {}
+        properties.update(pom.properties)
+        version = pom.version or (pom.parent or {}).get("version", "")
+        for prefix in ("project.", "pom."):
+            properties[prefix + "groupId"] = pom.group
+            properties[prefix + "artifactId"] = pom.artifact
+            properties[prefix + "version"] = version
+        if pom.parent:
+            properties["project.parent.groupId"] = pom.parent["groupId"]
+            properties["project.parent.artifactId"] = pom.parent["artifactId"]
+            properties["project.parent.version"] = pom.parent["version"]
+        properties["project.basedir"] = properties["basedir"] = pom.dir
+        return Effective(
+            pom,
+            properties,
+            (parent.raw_managed if parent else []) + pom.managed,
+            (parent.raw_dependencies if parent else []) + pom.dependencies,
+        )
+
+    def resolve(self, path):
+        """Effective model of `path` with managed versions and dependencies resolved."""
+        eff = self.effective(path)
+        if eff is None or eff.managed is not None:
+            return eff
+        props = eff.properties
+        # Explicit entries win over BOM imports (later, i.e. child, entries
+        # override inherited ones); among imports the first to manage a key wins.
+        managed, imports = {}, []
+        for dep in eff.raw_managed:
+            group = interpolate(dep["groupId"], props)
+            artifact = interpolate(dep["artifactId"], props)
+            version = interpolate(dep["version"], props)
+            if dep["scope"] == "import" and dep["type"] == "pom":
+                imports.append((group, artifact, version))
+            else:
+                managed[f"{group}:{artifact}"] = version
+        eff.managed = managed  # set before importing BOMs: guards import cycles
+        for group, artifact, version in imports:
+            bom_path = self._find(group, artifact, version)
+            bom = self.resolve(bom_path) if bom_path else None
+            if bom is None:
+                print(f"BOM {group}:{artifact}:{version} not found locally, skipping", file=sys.stderr)
+                continue
+            for key, managed_version in bom.managed.items():
+                managed.setdefault(key, managed_version)
+
+        deps = {}
+        for dep in eff.raw_dependencies:
+            group = interpolate(dep["groupId"], props)
+            artifact = interpolate(dep["artifactId"], props)
+            key = f"{group}:{artifact}"
+            version = interpolate(dep["version"], props) or managed.get(key, "")
+            deps[key] = version  # child declarations override inherited ones
+        eff.dependencies = deps
+        return eff
+
+
+def interpolate(value, properties):
+    """Expand ${...} references; anything left unresolved becomes ""."""
+    for _ in range(MAX_INTERPOLATION_DEPTH):
+        expanded = PROPERTY.sub(lambda m: properties.get(m.group(1).strip(), m.group(0)), value)
+        if expanded == value:
+            break
+        value = expanded
+    return "" if "${" in value else value
+
+
+def collect(root_pom="pom.xml", mark_indirect=False):
+    """Return the dependencies object for the reactor, or None if POM is unreadable."""
+    reactor = Reactor()
+    modules = reactor.walk(root_pom)
+    if not modules:
+        return None
+    direct, seen = [], set()
+    fallback = []
+    for pom in modules:
+        eff = reactor.resolve(pom.path)
+        if eff is None:
+            continue
+        for key, version in eff.dependencies.items():
+            if key in reactor.modules or (key, version) in seen:
+                continue
+            seen.add((key, version))
+            direct.append({"path": key, "version": version})
+        if not fallback:
+            fallback = [{"path": k, "version": v} for k, v in eff.managed.items() if k not in reactor.modules]
+    if not direct:
+        direct = fallback
+    if mark_indirect:
+        for dep in direct:
+            dep["indirect"] = False
+    print(f"Maven reactor: {len(modules)} modules, {len(direct)} dependencies", file=sys.stderr)
+    return {
+        "direct": direct,
+        "transitive": [],
+        "source": {"tool": "maven", "integration": "code"},
+    }
+
+
+def main(argv):
+    args = argv[1:]
+    mark_indirect = "--mark-indirect" in args
+    args = [a for a in args if a != "--mark-indirect"]
+    result = collect(args[0] if args else "pom.xml", mark_indirect)
+    if result is None:
+        return
+    json.dump(result, sys.stdout)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Tests for the kotlin collector's Maven dependency resolution.
+
+dependencies.sh hands a kotlin-maven-plugin pom.xml to effective_pom.py, so
+Kotlin-on-Maven reactors resolve like Java ones: versions come from `<modules>`
+siblings, `<parent>` chains (including the local repository) and imported BOMs.
+The real script runs as a subprocess in a scratch project with `lunar` stubbed
+on PATH; the stub writes whatever is piped to `lunar collect` to $CAPTURE.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import textwrap
+import unittest
+
+HERE = os.path.dirname(__file__)
+COLLECTOR = os.path.abspath(os.path.join(HERE, ".."))
+
+NS = 'xmlns="http://maven.apache.org/POM/4.0.0"'
+
+KOTLIN_PLUGIN = """\
+  <build>
+    <plugins>
+      <plugin>
+        <groupId>org.jetbrains.kotlin</groupId>
+        <artifactId>kotlin-maven-plugin</artifactId>
+        <version>${kotlin.version}</version>
+      </plugin>
+    </plugins>
+  </build>
+"""
+
+ROOT_POM = f"""\
+<project {NS}>
+  <parent>
+    <groupId>com.corp</groupId>
+    <artifactId>corp-parent</artifactId>
+    <version>7</version>
+    <relativePath/>
+  </parent>
+  <groupId>com.acme</groupId>
+  <artifactId>acme-root</artifactId>
+  <version>2.0.0</version>
+  <packaging>pom</packaging>
+  <modules>
+    <module>bom</module>
+    <module>app</module>
+  </modules>
+  <properties>
+    <kotlin.version>1.9.22</kotlin.version>
+  </properties>
+  <dependencyManagement>
+    <dependencies>
+      <dependency>
+        <groupId>com.acme</groupId>
+        <artifactId>acme-bom</artifactId>
+        <version>${{project.version}}</version>
+        <type>pom</type>
+        <scope>import</scope>
+      </dependency>
+      <dependency>
+        <groupId>org.jetbrains.kotlin</groupId>
+        <artifactId>kotlin-stdlib</artifactId>
+        <version>${{kotlin.version}}</version>
+      </dependency>
+    </dependencies>
+  </dependencyManagement>
+  <dependencies>
+    <dependency>
+      <groupId>org.jetbrains.kotlin</groupId>
+      <artifactId>kotlin-stdlib</artifactId>
+    </dependency>
+  </dependencies>
+{KOTLIN_PLUGIN}</project>
+"""
+
+BOM_POM = f"""\
+<project {NS}>
+  <groupId>com.acme</groupId>
+  <artifactId>acme-bom</artifactId>
+  <version>2.0.0</version>
+  <packaging>pom</packaging>
+  <dependencyManagement>
+    <dependencies>
+      <dependency>
+        <groupId>io.ktor</groupId>
+        <artifactId>ktor-server-core</artifactId>
+        <version>2.3.8</version>
+      </dependency>
+    </dependencies>
+  </dependencyManagement>
+</project>
+"""
+
+APP_POM = f"""\
+<project {NS}>
+  <parent>
+    <groupId>com.acme</groupId>
+    <artifactId>acme-root</artifactId>
+    <version>2.0.0</version>
+  </parent>
+  <artifactId>acme-app</artifactId>
+  <dependencies>
+    <dependency>
+      <groupId>io.ktor</groupId>
+      <artifactId>ktor-server-core</artifactId>
+    </dependency>
+    <dependency>
+      <groupId>org.junit.jupiter</groupId>
+      <artifactId>junit-jupiter</artifactId>
+      <scope>test</scope>
+    </dependency>
+    <dependency>
+      <groupId>com.acme</groupId>
+      <artifactId>acme-bom</artifactId>
+      <version>${{project.version}}</version>
+      <type>pom</type>
+    </dependency>
+  </dependencies>
+</project>
+"""
+
+CORP_PARENT_POM = f"""\
+<project {NS}>
+  <groupId>com.corp</groupId>
+  <artifactId>corp-parent</artifactId>
+  <version>7</version>
+  <properties><junit.version>5.10.1</junit.version></properties>
+  <dependencyManagement>
+    <dependencies>
+      <dependency>
+        <groupId>org.junit.jupiter</groupId>
+        <artifactId>junit-jupiter</artifactId>
+        <version>${{junit.version}}</version>
+      </dependency>
+    </dependencies>
+  </dependencyManagement>
+</project>
+"""
+
+
+class KotlinMavenTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="kotlin-test-")
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.project = os.path.join(self.tmp, "project")
+        self.repo = os.path.join(self.tmp, "m2")
+        self.bin = os.path.join(self.tmp, "bin")
+        self.capture = os.path.join(self.tmp, "collect.json")
+        os.makedirs(self.bin)
+        self.write("src/main/kotlin/App.kt", "fun main() {}\n")
+        stub = os.path.join(self.bin, "lunar")
+        with open(stub, "w") as f:
+            f.write(textwrap.dedent("""\
+                #!/bin/sh
+                cat > "$CAPTURE"
+                """))
+        os.chmod(stub, 0o755)
+
+    def write(self, rel, text, root=None):
+        path = os.path.join(root or self.project, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def run_collector(self):
+        env = dict(
+            os.environ,
+            PATH=f"{self.bin}:{os.environ['PATH']}",
+            CAPTURE=self.capture,
+            MAVEN_REPO_LOCAL=self.repo,
+        )
+        subprocess.run(
+            ["bash", os.path.join(COLLECTOR, "dependencies.sh")],
+            cwd=self.project, env=env, check=True, capture_output=True, text=True,
+        )
+        if not os.path.exists(self.capture):
+            return None
+        with open(self.capture) as f:
+            return json.load(f)
+
+    @staticmethod
+    def versions(result):
+        return {d["path"]: d["version"] for d in result["direct"]}
+
+    def test_reactor_parent_and_bom(self):
+        self.write("pom.xml", ROOT_POM)
+        self.write("bom/pom.xml", BOM_POM)
+        self.write("app/pom.xml", APP_POM)
+        self.write("com/corp/corp-parent/7/corp-parent-7.pom", CORP_PARENT_POM, root=self.repo)
+        result = self.run_collector()
+        self.assertEqual(
+            self.versions(result),
+            {
+                # Root pom's own dependencyManagement.
+                "org.jetbrains.kotlin:kotlin-stdlib": "1.9.22",
+                # Imported from the reactor's BOM module.
+                "io.ktor:ktor-server-core": "2.3.8",
+                # Managed by the parent in the local repository.
+                "org.junit.jupiter:junit-jupiter": "5.10.1",
+            },
+        )
+        self.assertEqual(result["source"], {"tool": "maven", "integration": "code"})
+
+    def test_parent_missing_from_local_repository(self):
+        self.write("pom.xml", ROOT_POM)
+        self.write("bom/pom.xml", BOM_POM)
+        self.write("app/pom.xml", APP_POM)
+        versions = self.versions(self.run_collector())
+        # Nothing is downloaded: the version stays empty, not "${junit.version}".
+        self.assertEqual(versions["org.junit.jupiter:junit-jupiter"], "")
+        self.assertEqual(versions["io.ktor:ktor-server-core"], "2.3.8")
+
+    def test_parent_only_pom_reports_managed_versions(self):
+        self.write("pom.xml", f"""<project {NS}><groupId>g</groupId><artifactId>parent</artifactId>
+          <properties><kotlin.version>2.0.0</kotlin.version></properties>
+          <dependencyManagement><dependencies><dependency>
+            <groupId>org.jetbrains.kotlin</groupId><artifactId>kotlin-stdlib</artifactId>
+            <version>${{kotlin.version}}</version>
+          </dependency></dependencies></dependencyManagement>
+        {KOTLIN_PLUGIN}</project>""")
+        self.assertEqual(
+            self.versions(self.run_collector()),
+            {"org.jetbrains.kotlin:kotlin-stdlib": "2.0.0"},
+        )
+
+    def test_java_only_pom_is_skipped(self):
+        self.write("pom.xml", BOM_POM)
+        self.assertIsNone(self.run_collector())
+
+
+if __name__ == "__main__":
+    unittest.main()
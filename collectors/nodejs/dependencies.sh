@@ -9,15 +9,32 @@ if ! is_nodejs_project; then
     exit 0
 fi
 
-# Determine primary build system for source metadata
+# Determine primary build system (and its lockfile) for source metadata
 build_tool="npm"
+lockfile=""
 if [[ -f "yarn.lock" ]]; then
     build_tool="yarn"
+    lockfile="yarn.lock"
 elif [[ -f "pnpm-lock.yaml" ]]; then
     build_tool="pnpm"
+    lockfile="pnpm-lock.yaml"
+elif [[ -f "npm-shrinkwrap.json" ]]; then
+    lockfile="npm-shrinkwrap.json"
+elif [[ -f "package-lock.json" ]]; then
+    lockfile="package-lock.json"
 fi
 
-# Extract dependencies from package.json
+# With a lockfile, resolve exact versions (and the indirect tree) from it.
+# The parser streams the lockfile and never runs npm/yarn/pnpm.
+if [[ -n "$lockfile" && -f "package.json" ]] && command -v python3 >/dev/null 2>&1; then
+    if deps_json=$(python3 "$(dirname "$0")/parse_lockfile.py" package.json "$lockfile" "$build_tool"); then
+        echo "$deps_json" | lunar collect -j ".lang.nodejs.dependencies" -
+        exit 0
+    fi
+    echo "Could not parse $lockfile, falling back to package.json ranges" >&2
+fi
+
+# Extract declared dependencies from package.json
 jq -n --slurpfile pkg package.json \
     --arg tool "$build_tool" \
     '{
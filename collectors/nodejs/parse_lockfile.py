@@ -0,0 +1,362 @@
+"""Resolve Node.js dependencies from the project's lockfile.
+
+Usage: parse_lockfile.py PACKAGE_JSON LOCKFILE TOOL
+
+LOCKFILE is a package-lock.json (v2/v3), yarn.lock (classic or berry) or
+pnpm-lock.yaml. The declared dependencies in PACKAGE_JSON are matched against
+the lockfile and the .lang.nodejs.dependencies object is printed on stdout:
+
+  direct / dev  declared dependencies, `version` resolved from the lockfile,
+                `range` as declared, plus `integrity` when the lockfile has one
+  indirect      every other resolved package (name@version, deduped)
+
+Lockfiles are read incrementally — package-lock.json one `packages` entry at a
+time, yarn and pnpm lockfiles line by line — so memory is bounded by the
+output rather than the lockfile size. npm is never invoked.
+"""
+import json
+import re
+import sys
+
+CHUNK_SIZE = 1 << 20
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Peer-dependency suffixes pnpm appends to versions: 1.0.0(react@18.2.0), 1.0.0_react@18.2.0
+PNPM_PEER_SUFFIX = re.compile(r"(\(.*|_.*)$")
+
+
+class JSONStream:
+    """Incremental reader over one JSON document (values decoded one at a time)."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        data = self.f.read(max(CHUNK_SIZE, len(self.buf) - self.pos))
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars):
+        ch = self.peek()
+        if not ch or ch not in chars:
+            raise ValueError(f"expected one of {chars!r} in lockfile, got {ch!r}")
+        self.pos += 1
+        return ch
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def members(self):
+        """Yield (key, value) for the object at the cursor, one member at a time."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key, self.value()
+            if self.expect(",}") == "}":
+                return
+
+
+def split_descriptor(descriptor):
+    """Split "name@range" (scoped names keep their leading @)."""
+    at = descriptor.find("@", 1)
+    if at < 0:
+        return descriptor, ""
+    return descriptor[:at], descriptor[at + 1:]
+
+
+class Resolver:
+    """Collects resolved packages and matches them to declared dependencies."""
+
+    def __init__(self, declared):
+        # declared: {name: range} across dependencies and devDependencies
+        self.declared = declared
+        self.direct = {}  # name -> {"version", "integrity"}
+        self.indirect = {}  # (name, version) -> integrity
+
+    def add(self, name, version, integrity, direct=False):
+        if not name or not version:
+            return
+        if direct and name not in self.direct:
+            self.direct[name] = {"version": version, "integrity": integrity}
+        elif not direct:
+            self.indirect.setdefault((name, version), integrity)
+
+    def finish(self):
+        # A direct dependency's own entry may also have been seen as indirect
+        # (e.g. matched by name in pnpm's packages section); drop that copy.
+        for name, info in self.direct.items():
+            self.indirect.pop((name, info["version"]), None)
+
+
+def parse_package_lock(f, resolver):
+    """package-lock.json v2/v3: stream the `packages` map entry by entry."""
+    stream = JSONStream(f)
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        if key in ("packages", "dependencies") and stream.peek() == "{":
+            # `dependencies` is the v2 legacy tree duplicating `packages`;
+            # stream past it without materializing it.
+            for path, meta in stream.members():
+                if key == "packages":
+                    _package_lock_entry(path, meta, resolver)
+        else:
+            stream.value()
+        if stream.expect(",}") == "}":
+            return
+
+
+def _package_lock_entry(path, meta, resolver):
+    marker = "node_modules/"
+    if marker not in path or not isinstance(meta, dict) or meta.get("link"):
+        return
+    name = meta.get("name") or path.rsplit(marker, 1)[1]
+    top_level = path.startswith(marker) and path.count(marker) == 1
+    resolver.add(
+        name,
+        meta.get("version"),
+        meta.get("integrity"),
+        direct=top_level and name in resolver.declared,
+    )
+
+
+def _unquote(text):
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        return text[1:-1]
+    return text
+
+
+def parse_yarn_lock(f, resolver):
+    """yarn.lock, classic (v1) and berry (v2+), one entry at a time."""
+    descriptors, fields = None, {}
+
+    def flush():
+        if not descriptors:
+            return
+        if fields.get("linkType") == "soft" or "@workspace:" in fields.get("resolution", ""):
+            return
+        version = fields.get("version")
+        integrity = fields.get("integrity") or fields.get("checksum")
+        name = None
+        direct = False
+        for desc in descriptors:
+            dname, drange = split_descriptor(desc)
+            name = name or dname
+            declared = resolver.declared.get(dname)
+            if declared is not None and drange in (declared, f"npm:{declared}"):
+                name, direct = dname, True
+                break
+        resolver.add(name, version, integrity, direct=direct)
+
+    for raw in f:
+        line = raw.rstrip("\n")
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        indent = len(line) - len(line.lstrip(" "))
+        if indent == 0:
+            flush()
+            header = line.rstrip(":")
+            if header == "__metadata":
+                descriptors, fields = None, {}
+                continue
+            descriptors = [d.strip().strip("\"'") for d in header.split(",")]
+            fields = {}
+        elif indent == 2 and descriptors is not None:
+            # berry: `key: value`; classic: `key "value"` (nested maps skipped)
+            key, _, value = line.strip().partition(" ")
+            if not value:
+                continue
+            fields[key.rstrip(":")] = _unquote(value)
+    flush()
+
+
+def _yaml_pair(body):
+    """Split a `key: value` line; quoted keys may themselves contain colons."""
+    if body[:1] in ("'", '"'):
+        end = body.find(body[0], 1)
+        if end > 0:
+            return body[1:end], body[end + 1:].lstrip(":").strip()
+    key, _, value = body.partition(":")
+    return key.strip(), value.strip()
+
+
+def _pnpm_version(value):
+    return PNPM_PEER_SUFFIX.sub("", _unquote(value))
+
+
+def _pnpm_package_key(key, major):
+    """Return (name, version) for a pnpm `packages:` key."""
+    key = _unquote(key).lstrip("/")
+    key = re.sub(r"\(.*$", "", key)
+    if major < 6:
+        # v5: /name/1.0.0 or /@scope/name/1.0.0_peer@1
+        name, _, version = key.rpartition("/")
+        return name, PNPM_PEER_SUFFIX.sub("", version)
+    name, version = split_descriptor(key)
+    return name, version
+
+
+def parse_pnpm_lock(f, resolver):
+    """pnpm-lock.yaml v5, v6 and v9, line by line."""
+    major = 6
+    section = None  # top-level key we're in
+    importer = None  # v6+/v9 importers: current importer id
+    dep_group = None  # dependencies / devDependencies / optionalDependencies
+    dep_name = None
+    pkg = None  # (name, version) of the packages: entry being read
+    pkg_integrity = None
+    root_versions = {}
+
+    def flush_pkg():
+        if pkg:
+            resolver.add(pkg[0], pkg[1], pkg_integrity)
+
+    for raw in f:
+        line = raw.rstrip("\n")
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        indent = len(line) - len(line.lstrip(" "))
+        key, value = _yaml_pair(line.strip())
+
+        if indent == 0:
+            if section == "packages":
+                flush_pkg()
+                pkg = None
+            section = key
+            dep_group = importer = None
+            if key == "lockfileVersion":
+                try:
+                    major = int(float(_unquote(value)))
+                except ValueError:
+                    pass
+            continue
+
+        if section in ("dependencies", "devDependencies", "optionalDependencies"):
+            # v5/v6 single-project layout: root deps at the top level.
+            if indent == 2:
+                dep_name = key
+                if value:  # v5: name: version
+                    root_versions[dep_name] = _pnpm_version(value)
+            elif indent == 4 and key == "version" and dep_name:
+                root_versions[dep_name] = _pnpm_version(value)
+        elif section == "importers":
+            if indent == 2:
+                importer = key
+                dep_group = None
+            elif importer == "." and indent == 4:
+                dep_group = key if key in ("dependencies", "devDependencies", "optionalDependencies") else None
+            elif importer == "." and dep_group and indent == 6:
+                dep_name = key
+                if value:
+                    root_versions[dep_name] = _pnpm_version(value)
+            elif importer == "." and dep_group and indent == 8 and key == "version" and dep_name:
+                root_versions[dep_name] = _pnpm_version(value)
+        elif section == "packages":
+            if indent == 2:
+                flush_pkg()
+                pkg = _pnpm_package_key(key, major)
+                pkg_integrity = None
+            elif pkg and key == "resolution":
+                m = re.search(r"integrity:\s*([^,}\s]+)", value)
+                if m:
+                    pkg_integrity = m.group(1)
+            elif pkg and key == "integrity" and indent == 6:
+                pkg_integrity = _unquote(value)
+    if section == "packages":
+        flush_pkg()
+
+    for name, version in root_versions.items():
+        if name not in resolver.declared or version.startswith(("link:", "file:", "workspace:")):
+            continue
+        integrity = resolver.indirect.get((name, version))
+        resolver.add(name, version, integrity, direct=True)
+
+
+PARSERS = {
+    "package-lock.json": parse_package_lock,
+    "npm-shrinkwrap.json": parse_package_lock,
+    "yarn.lock": parse_yarn_lock,
+    "pnpm-lock.yaml": parse_pnpm_lock,
+}
+
+
+def declared_entries(deps, resolver):
+    out = []
+    for name, spec in (deps or {}).items():
+        entry = {"path": name, "version": spec, "range": spec}
+        resolved = resolver.direct.get(name)
+        if resolved:
+            entry["version"] = resolved["version"]
+            if resolved["integrity"]:
+                entry["integrity"] = resolved["integrity"]
+        out.append(entry)
+    return out
+
+
+def main(argv):
+    package_json, lockfile, tool = argv[1], argv[2], argv[3]
+    with open(package_json) as f:
+        pkg = json.load(f)
+    deps = pkg.get("dependencies") or {}
+    dev = pkg.get("devDependencies") or {}
+
+    resolver = Resolver({**dev, **deps})
+    parser = PARSERS[lockfile.rsplit("/", 1)[-1]]
+    with open(lockfile, encoding="utf-8") as f:
+        parser(f, resolver)
+    resolver.finish()
+
+    indirect = [
+        dict({"path": name, "version": version}, **({"integrity": integrity} if integrity else {}))
+        for (name, version), integrity in sorted(resolver.indirect.items())
+    ]
+    result = {
+        "direct": declared_entries(deps, resolver),
+        "dev": declared_entries(dev, resolver),
+        "indirect": indirect,
+        "lockfile": lockfile.rsplit("/", 1)[-1],
+        "source": {"tool": tool, "integration": "code"},
+    }
+    json.dump(result, sys.stdout)
+    sys.stdout.write("\n")
+    print(
+        f"Resolved {len(resolver.direct)} direct and {len(indirect)} indirect dependencies from {lockfile}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv)
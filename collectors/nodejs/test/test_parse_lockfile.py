@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Tests for the nodejs collector's lockfile parser."""
+
+import io
+import json
+import os
+import sys
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import parse_lockfile  # noqa: E402
+
+DECLARED_DEPS = {"express": "^4.18.2", "@scope/x": "~1.0.0"}
+DECLARED_DEV = {"jest": "^29.7.0"}
+
+PACKAGE_LOCK = """\
+{"name":"app","lockfileVersion":3,"requires":true,"packages":{
+"":{"name":"app","dependencies":{"express":"^4.18.2","@scope/x":"~1.0.0"},"devDependencies":{"jest":"^29.7.0"}},
+"node_modules/express":{"version":"4.18.2","resolved":"https://r/e.tgz","integrity":"sha512-E"},
+"node_modules/@scope/x":{"version":"1.0.3","integrity":"sha512-X"},
+"node_modules/jest":{"version":"29.7.0","dev":true,"integrity":"sha512-J"},
+"node_modules/debug":{"version":"2.6.9","integrity":"sha512-D"},
+"node_modules/express/node_modules/debug":{"version":"3.0.0","integrity":"sha512-D3"},
+"node_modules/local":{"resolved":"packages/local","link":true}
+},"dependencies":{"express":{"version":"4.18.2","requires":{"debug":"2.6.9"}}}}
+"""
+
+YARN_CLASSIC = """\
+# THIS IS AN AUTOGENERATED FILE. DO NOT EDIT THIS FILE DIRECTLY.
+# yarn lockfile v1
+
+
+"@scope/x@~1.0.0":
+  version "1.0.3"
+  resolved "https://registry.yarnpkg.com/@scope/x/-/x-1.0.3.tgz#abc"
+  integrity sha512-X
+
+debug@2.6.9, debug@^2.0.0:
+  version "2.6.9"
+  resolved "https://registry.yarnpkg.com/debug/-/debug-2.6.9.tgz"
+  integrity sha512-D
+  dependencies:
+    ms "2.0.0"
+
+express@^4.18.2:
+  version "4.18.2"
+  integrity sha512-E
+
+jest@^29.7.0:
+  version "29.7.0"
+  integrity sha512-J
+"""
+
+YARN_BERRY = """\
+__metadata:
+  version: 6
+  cacheKey: 8
+
+"@scope/x@npm:~1.0.0":
+  version: 1.0.3
+  resolution: "@scope/x@npm:1.0.3"
+  checksum: abc123
+  languageName: node
+  linkType: hard
+
+"app@workspace:.":
+  version: 0.0.0-use.local
+  resolution: "app@workspace:."
+  dependencies:
+    express: ^4.18.2
+  languageName: unknown
+  linkType: soft
+
+"debug@npm:2.6.9, debug@npm:^2.0.0":
+  version: 2.6.9
+  resolution: "debug@npm:2.6.9"
+  checksum: def456
+  languageName: node
+  linkType: hard
+
+"express@npm:^4.18.2":
+  version: 4.18.2
+  resolution: "express@npm:4.18.2"
+  checksum: e1
+  linkType: hard
+"""
+
+PNPM_V5 = """\
+lockfileVersion: 5.4
+
+specifiers:
+  express: ^4.18.2
+
+dependencies:
+  express: 4.18.2_supports-color@5.0.0
+
+packages:
+
+  /@scope/x/1.0.3:
+    resolution: {integrity: sha512-X}
+
+  /express/4.18.2_supports-color@5.0.0:
+    resolution: {integrity: sha512-E}
+    dev: false
+"""
+
+PNPM_V6 = """\
+lockfileVersion: '6.0'
+
+dependencies:
+  '@scope/x':
+    specifier: ~1.0.0
+    version: 1.0.3
+  express:
+    specifier: ^4.18.2
+    version: 4.18.2(supports-color@5.0.0)
+
+devDependencies:
+  jest:
+    specifier: ^29.7.0
+    version: 29.7.0
+
+packages:
+
+  /@scope/x@1.0.3:
+    resolution: {integrity: sha512-X}
+    dev: false
+
+  /debug@2.6.9:
+    resolution: {integrity: sha512-D}
+    dependencies:
+      ms: 2.0.0
+
+  /express@4.18.2(supports-color@5.0.0):
+    resolution: {integrity: sha512-E}
+
+  /jest@29.7.0:
+    resolution: {integrity: sha512-J}
+    dev: true
+"""
+
+PNPM_V9 = """\
+lockfileVersion: '9.0'
+
+importers:
+
+  .:
+    dependencies:
+      express:
+        specifier: ^4.18.2
+        version: 4.18.2
+    devDependencies:
+      jest:
+        specifier: ^29.7.0
+        version: 29.7.0
+
+  packages/lib:
+    dependencies:
+      lodash:
+        specifier: ^4
+        version: 4.17.21
+
+packages:
+
+  '@scope/x@1.0.3':
+    resolution: {integrity: sha512-X}
+
+  debug@2.6.9:
+    resolution: {integrity: sha512-D}
+
+  express@4.18.2:
+    resolution: {integrity: sha512-E}
+
+  jest@29.7.0:
+    resolution: {integrity: sha512-J}
+
+snapshots:
+
+  express@4.18.2:
+    dependencies:
+      debug: 2.6.9
+"""
+
+
+def resolve(parser, text):
+    resolver = parse_lockfile.Resolver({**DECLARED_DEV, **DECLARED_DEPS})
+    parser(io.StringIO(text), resolver)
+    resolver.finish()
+    return resolver
+
+
+class PackageLockTest(unittest.TestCase):
+    def test_resolves_direct_and_nested_indirect(self):
+        r = resolve(parse_lockfile.parse_package_lock, PACKAGE_LOCK)
+        self.assertEqual(r.direct["express"], {"version": "4.18.2", "integrity": "sha512-E"})
+        self.assertEqual(r.direct["jest"]["version"], "29.7.0")
+        self.assertEqual(set(r.indirect), {("debug", "2.6.9"), ("debug", "3.0.0")})
+
+    def test_streams_with_tiny_buffer(self):
+        old = parse_lockfile.CHUNK_SIZE
+        parse_lockfile.CHUNK_SIZE = 7
+        try:
+            r = resolve(parse_lockfile.parse_package_lock, PACKAGE_LOCK)
+        finally:
+            parse_lockfile.CHUNK_SIZE = old
+        self.assertEqual(r.direct["@scope/x"]["version"], "1.0.3")
+        self.assertEqual(len(r.indirect), 2)
+
+
+class YarnLockTest(unittest.TestCase):
+    def test_classic(self):
+        r = resolve(parse_lockfile.parse_yarn_lock, YARN_CLASSIC)
+        self.assertEqual(r.direct["@scope/x"], {"version": "1.0.3", "integrity": "sha512-X"})
+        self.assertEqual(r.indirect, {("debug", "2.6.9"): "sha512-D"})
+
+    def test_berry_skips_workspaces(self):
+        r = resolve(parse_lockfile.parse_yarn_lock, YARN_BERRY)
+        self.assertEqual(r.direct["express"], {"version": "4.18.2", "integrity": "e1"})
+        self.assertNotIn("app", {name for name, _ in r.indirect})
+        self.assertEqual(r.indirect, {("debug", "2.6.9"): "def456"})
+
+
+class PnpmLockTest(unittest.TestCase):
+    def test_v5(self):
+        r = resolve(parse_lockfile.parse_pnpm_lock, PNPM_V5)
+        self.assertEqual(r.direct["express"], {"version": "4.18.2", "integrity": "sha512-E"})
+        self.assertIn(("@scope/x", "1.0.3"), r.indirect)
+
+    def test_v6_strips_peer_suffix(self):
+        r = resolve(parse_lockfile.parse_pnpm_lock, PNPM_V6)
+        self.assertEqual(r.direct["express"], {"version": "4.18.2", "integrity": "sha512-E"})
+        self.assertEqual(r.direct["jest"]["integrity"], "sha512-J")
+        self.assertEqual(set(r.indirect), {("debug", "2.6.9")})
+
+    def test_v9_reads_root_importer_only(self):
+        r = resolve(parse_lockfile.parse_pnpm_lock, PNPM_V9)
+        self.assertEqual(set(r.direct), {"express", "jest"})
+        self.assertNotIn("lodash", r.direct)
+
+
+class MainTest(unittest.TestCase):
+    def test_unresolved_direct_keeps_range(self):
+        resolver = parse_lockfile.Resolver(DECLARED_DEPS)
+        entries = parse_lockfile.declared_entries({"left-pad": "^1.3.0"}, resolver)
+        self.assertEqual(entries, [{"path": "left-pad", "version": "^1.3.0", "range": "^1.3.0"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,8 @@
 #!/bin/bash
 set -e
 
+source "$(dirname "$0")/helpers.sh"
+
 # Resolve team_id: cataloger-set meta annotation first, then explicit input.
 TEAM_ID=""
 if [ -n "${LUNAR_COMPONENT_META:-}" ]; then
@@ -24,6 +26,7 @@ fi
 BASE_URL="${LUNAR_VAR_OPSGENIE_BASE_URL:-https://api.opsgenie.com}"
 BASE_URL="${BASE_URL%/}"
 AUTH="Authorization: GenieKey ${LUNAR_SECRET_OPSGENIE_API_KEY}"
+cache_init "${BASE_URL} ${LUNAR_SECRET_OPSGENIE_API_KEY}"
 
 og_get() {
   local path="$1"
@@ -42,7 +45,7 @@ og_get() {
 jq -n '{"tool": "opsgenie", "integration": "api"}' | lunar collect -j ".oncall.source" -
 
 # Fetch team.
-TEAM_JSON="$(og_get "/v2/teams/${TEAM_ID}")" || {
+TEAM_JSON="$(cached_get og_get "/v2/teams/${TEAM_ID}")" || {
   echo "Unable to fetch OpsGenie team ${TEAM_ID}." >&2
   exit 0
 }
@@ -64,12 +67,12 @@ HAS_SCHEDULE=false
 PARTICIPANTS=0
 ROTATION="unknown"
 
-if SCHEDULES_JSON="$(og_get "/v2/schedules")"; then
+if SCHEDULES_JSON="$(cached_get og_get "/v2/schedules")"; then
   SCHEDULE_OBJ="$(echo "$SCHEDULES_JSON" | jq --arg tid "$TEAM_ID" '[.data[] | select(.ownerTeam.id == $tid)] | .[0] // empty')"
   if [ -n "$SCHEDULE_OBJ" ]; then
     SCHEDULE_ID="$(echo "$SCHEDULE_OBJ" | jq -r '.id // empty')"
     echo "$SCHEDULE_OBJ" | lunar collect -j ".oncall.native.opsgenie.schedule" -
-    if [ -n "$SCHEDULE_ID" ] && ROTATIONS_JSON="$(og_get "/v2/schedules/${SCHEDULE_ID}/rotations")"; then
+    if [ -n "$SCHEDULE_ID" ] && ROTATIONS_JSON="$(cached_get og_get "/v2/schedules/${SCHEDULE_ID}/rotations")"; then
       HAS_SCHEDULE=true
       PARTICIPANTS="$(echo "$ROTATIONS_JSON" | jq '[.data[]?.participants[]? | select(.type == "user") | .id] | unique | length')"
       ROT_TYPE="$(echo "$ROTATIONS_JSON" | jq -r '.data[0].type // empty')"
@@ -96,7 +99,7 @@ HAS_ESCALATION=false
 ESCALATION_LEVELS=0
 ESCALATION_NAME=""
 
-if ESCALATIONS_JSON="$(og_get "/v2/escalations")"; then
+if ESCALATIONS_JSON="$(cached_get og_get "/v2/escalations")"; then
   ESC_OBJ="$(echo "$ESCALATIONS_JSON" | jq --arg tid "$TEAM_ID" '[.data[] | select(.ownerTeam.id == $tid)] | .[0] // empty')"
   if [ -n "$ESC_OBJ" ]; then
     HAS_ESCALATION=true
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Tests for the opsgenie collector's response cache.
+
+oncall.sh fetches the team, the org's schedules and escalations, and the
+team schedule's rotations through cached_get (helpers.sh), so components run
+within cache_ttl_minutes of each other share one fetch per API path. These
+tests lock in the cache hits, the TTL (including 0 to disable it), per-key
+isolation, that failed fetches aren't cached, and the unwritable-dir
+fallback.
+
+`curl` is stubbed: it logs every URL to $CURL_LOG and answers from fixed
+responses, failing any path listed in $MOCK_DIR/fail. `lunar` logs `collect`
+calls and any piped stdin to $CAPTURE.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import textwrap
+import time
+import unittest
+
+HERE = os.path.dirname(__file__)
+COLLECTOR = os.path.abspath(os.path.join(HERE, ".."))
+
+ALL_PATHS = [
+    "/v2/teams/t1",
+    "/v2/schedules",
+    "/v2/schedules/s1/rotations",
+    "/v2/escalations",
+]
+
+
+class OncallCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="opsgenie-test-")
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.bin = os.path.join(self.tmp, "bin")
+        self.mock = os.path.join(self.tmp, "mock")
+        os.makedirs(self.bin)
+        os.makedirs(self.mock)
+        self.cache_dir = os.path.join(self.tmp, "cache")
+        self.curl_log = os.path.join(self.tmp, "curl.log")
+        self._stub(
+            "curl",
+            textwrap.dedent(
+                """\
+                #!/bin/bash
+                for a; do url="$a"; done
+                path="${url#https://api.opsgenie.com}"
+                echo "$path" >> "$CURL_LOG"
+                if [ -f "$MOCK_DIR/fail" ] && grep -qxF "$path" "$MOCK_DIR/fail"; then
+                  echo "curl: (22) The requested URL returned error: 503" >&2
+                  exit 22
+                fi
+                case "$path" in
+                  /v2/teams/*) echo '{"data":{"id":"t1","name":"Payments"}}' ;;
+                  */rotations) echo '{"data":[{"type":"weekly","participants":[{"type":"user","id":"u1"},{"type":"user","id":"u2"}]}]}' ;;
+                  /v2/schedules) echo '{"data":[{"id":"s1","ownerTeam":{"id":"t1"}}]}' ;;
+                  /v2/escalations) echo '{"data":[{"name":"Payments","rules":[{},{}],"ownerTeam":{"id":"t1"}}]}' ;;
+                  *) exit 22 ;;
+                esac
+                """
+            ),
+        )
+        self._stub(
+            "lunar",
+            textwrap.dedent(
+                """\
+                #!/bin/sh
+                printf 'ARGS: %s\\n' "$*" >> "$CAPTURE"
+                if [ "$4" = "-" ]; then
+                  printf 'STDIN: %s\\n' "$(cat | tr -d '\\n')" >> "$CAPTURE"
+                fi
+                """
+            ),
+        )
+
+    def _stub(self, name, body):
+        path = os.path.join(self.bin, name)
+        with open(path, "w") as f:
+            f.write(body)
+        os.chmod(path, 0o755)
+
+    def run_oncall(self, **env):
+        capture = os.path.join(self.tmp, "collect.log")
+        if os.path.exists(capture):
+            os.unlink(capture)
+        full_env = {
+            "PATH": f"{self.bin}:{os.environ['PATH']}",
+            "HOME": self.tmp,
+            "CURL_LOG": self.curl_log,
+            "MOCK_DIR": self.mock,
+            "CAPTURE": capture,
+            "LUNAR_VAR_TEAM_ID": "t1",
+            "LUNAR_SECRET_OPSGENIE_API_KEY": "key-1",
+            "LUNAR_VAR_CACHE_DIR": self.cache_dir,
+        }
+        full_env.update(env)
+        result = subprocess.run(
+            ["bash", os.path.join(COLLECTOR, "oncall.sh")],
+            env=full_env, capture_output=True, text=True,
+        )
+        self.assertEqual(result.returncode, 0, msg=result.stderr)
+        with open(capture) as f:
+            lines = f.read().splitlines()
+        collected = {}
+        for i, line in enumerate(lines):
+            if line.startswith("ARGS: collect -j ") and line.endswith(" -"):
+                collected[line.split()[3]] = json.loads(lines[i + 1][len("STDIN: "):])
+        return result, collected
+
+    def requests(self):
+        """Returns and clears the paths requested so far."""
+        if not os.path.exists(self.curl_log):
+            return []
+        with open(self.curl_log) as f:
+            paths = f.read().splitlines()
+        os.unlink(self.curl_log)
+        return paths
+
+    def fail(self, *paths):
+        with open(os.path.join(self.mock, "fail"), "w") as f:
+            f.write("".join(p + "\n" for p in paths))
+
+    def cache_files(self):
+        found = []
+        for dirpath, _, files in os.walk(self.cache_dir):
+            found.extend(os.path.join(dirpath, f) for f in files if not f.startswith("."))
+        return found
+
+    def test_second_run_is_served_from_cache(self):
+        _, first = self.run_oncall()
+        self.assertEqual(self.requests(), ALL_PATHS)
+        _, second = self.run_oncall()
+        self.assertEqual(self.requests(), [])
+        self.assertEqual(second, first)
+        self.assertEqual(
+            second[".oncall.summary"],
+            {"has_oncall": True, "has_escalation": True, "min_participants": 2},
+        )
+
+    def test_cache_is_per_api_key(self):
+        self.run_oncall()
+        self.requests()
+        self.run_oncall(LUNAR_SECRET_OPSGENIE_API_KEY="key-2")
+        self.assertEqual(self.requests(), ALL_PATHS)
+
+    def test_ttl_zero_disables_the_cache(self):
+        self.run_oncall(LUNAR_VAR_CACHE_TTL_MINUTES="0")
+        self.run_oncall(LUNAR_VAR_CACHE_TTL_MINUTES="0")
+        self.assertEqual(self.requests(), ALL_PATHS * 2)
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_expired_entries_are_refetched(self):
+        self.run_oncall(LUNAR_VAR_CACHE_TTL_MINUTES="5")
+        self.requests()
+        old = time.time() - 6 * 60
+        for path in self.cache_files():
+            if path.endswith("schedules.json"):
+                os.utime(path, (old, old))
+        self.run_oncall(LUNAR_VAR_CACHE_TTL_MINUTES="5")
+        self.assertEqual(self.requests(), ["/v2/schedules"])
+
+    def test_failed_fetch_is_not_cached(self):
+        self.fail("/v2/escalations")
+        _, collected = self.run_oncall()
+        self.assertEqual(collected[".oncall.escalation"]["exists"], False)
+        self.requests()
+        os.unlink(os.path.join(self.mock, "fail"))
+        _, collected = self.run_oncall()
+        self.assertEqual(self.requests(), ["/v2/escalations"])
+        self.assertEqual(collected[".oncall.escalation"]["levels"], 2)
+
+    def test_unwritable_cache_dir_fetches_without_cache(self):
+        blocker = os.path.join(self.tmp, "not-a-dir")
+        open(blocker, "w").close()
+        cache_dir = os.path.join(blocker, "cache")
+        result, collected = self.run_oncall(LUNAR_VAR_CACHE_DIR=cache_dir)
+        self.assertIn("not writable", result.stderr)
+        self.assertEqual(collected[".oncall.service"]["name"], "Payments")
+        self.run_oncall(LUNAR_VAR_CACHE_DIR=cache_dir)
+        self.assertEqual(self.requests(), ALL_PATHS * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/bin/bash
+# helpers.sh — On-disk TTL cache for PagerDuty API responses, shared by every
+# component run that can see the same cache_dir.
+#
+# Most components share a handful of escalation policies and schedules, so
+# the same objects would otherwise be fetched once per component per run.
+# Responses are cached by API path (which carries the object id) under
+#   <cache_dir>/<hash of base URL + API key>/<path>.json
+# and reused for cache_ttl_minutes. Only successful responses are cached; a
+# failed lookup is retried by the next run.
+
+# cache_init: Sets CACHE_DIR for this run, or leaves it empty when caching is
+# off (cache_ttl_minutes is 0) or the directory isn't writable.
+#
+# Arguments:
+#   $1 - identity of the account the responses belong to
+cache_init() {
+  local root
+  CACHE_DIR=""
+  CACHE_TTL_MINUTES="${LUNAR_VAR_CACHE_TTL_MINUTES:-15}"
+  if ! [[ "$CACHE_TTL_MINUTES" =~ ^[0-9]+$ ]] || [ "$CACHE_TTL_MINUTES" -eq 0 ]; then
+    return 0
+  fi
+  root="${LUNAR_VAR_CACHE_DIR:-${XDG_CACHE_HOME:-$HOME/.cache}/lunar-pagerduty}"
+  root="$root/$(printf '%s' "$1" | sha256sum | cut -c1-16)"
+  if ! mkdir -p "$root" 2>/dev/null || [ ! -w "$root" ]; then
+    echo "Cache dir $root is not writable, fetching without a cache." >&2
+    return 0
+  fi
+  CACHE_DIR="$root"
+  # Entries well past their TTL are only ever overwritten; drop them.
+  find "$CACHE_DIR" -type f -mmin +$((CACHE_TTL_MINUTES * 2)) -delete 2>/dev/null || true
+}
+
+# cache_file: Maps an API path to its cache file.
+cache_file() {
+  local key="${1#/}"
+  key="${key//%/%25}"
+  key="${key//\//%2F}"
+  printf '%s/%s.json' "$CACHE_DIR" "$key"
+}
+
+# cache_fresh: True when a file exists and is younger than the TTL.
+cache_fresh() {
+  [ -f "$1" ] && [ -z "$(find "$1" -mmin +"$CACHE_TTL_MINUTES" 2>/dev/null)" ]
+}
+
+# cache_write: Stores stdin as the response for an API path.
+#
+# Arguments:
+#   $1 - API path
+cache_write() {
+  local tmp
+  if [ -z "$CACHE_DIR" ] || ! tmp="$(mktemp "$CACHE_DIR/.tmp-XXXXXX" 2>/dev/null)"; then
+    cat > /dev/null
+    return 0
+  fi
+  cat > "$tmp" && mv "$tmp" "$(cache_file "$1")"
+}
+
+# cached_get: Prints the response for an API path from the cache, or fetches
+# it with the given function and caches it.
+#
+# Arguments:
+#   $1 - fetch function, called as `<fn> <path>`
+#   $2 - API path
+#
+# Returns the fetch function's status on a cache miss.
+cached_get() {
+  local fetch="$1" path="$2" file body
+  if [ -n "$CACHE_DIR" ]; then
+    file="$(cache_file "$path")"
+    if cache_fresh "$file"; then
+      cat "$file"
+      return 0
+    fi
+  fi
+  body="$("$fetch" "$path")" || return 1
+  printf '%s\n' "$body" | cache_write "$path"
+  printf '%s\n' "$body"
+}
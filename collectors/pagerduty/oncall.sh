@@ -1,6 +1,8 @@
 #!/bin/bash
 set -e
 
+source "$(dirname "$0")/helpers.sh"
+
 # ---------------------------------------------------------------------------
 # Backstage discovery (opt-in). When the service ID isn't set via component
 # meta or the service_id input, and backstage_discovery is "true", read the
@@ -81,6 +83,7 @@ BASE_URL="${LUNAR_VAR_PAGERDUTY_BASE_URL:-https://api.pagerduty.com}"
 BASE_URL="${BASE_URL%/}"
 AUTH="Authorization: Token token=${LUNAR_SECRET_PAGERDUTY_API_KEY}"
 ACCEPT="Accept: application/vnd.pagerduty+json;version=2"
+cache_init "${BASE_URL} ${LUNAR_SECRET_PAGERDUTY_API_KEY}"
 
 # pd_get <path> — GET a PagerDuty API path. Echoes the response body on stdout
 # and returns 0 on success; returns 1 on any failure.
@@ -140,11 +143,65 @@ pd_get() {
   esac
 }
 
+# prefetch_services — page through every service, with its escalation policy
+# inlined (include[]=escalation_policies), and seed the cache with both, so
+# the per-component lookups below are cache hits. Runs at most once per
+# cache_ttl_minutes for all components sharing the cache: concurrent runs wait
+# on the lock for the one prefetching. The services-list entry is the same
+# object GET /services/{id} returns, with its escalation policy cut back to
+# the reference that endpoint gives.
+#
+# A failed page leaves the pages before it cached and is not retried until the
+# next TTL; anything it missed is fetched per component as without prefetch.
+PREFETCH_PAGE_SIZE="${PREFETCH_PAGE_SIZE:-100}"
+prefetch_pages() {
+  local offset=0 page more path body count=0
+  while true; do
+    page="$(pd_get "/services?include%5B%5D=escalation_policies&limit=${PREFETCH_PAGE_SIZE}&offset=${offset}")" || return 1
+    while IFS=$'\t' read -r path body; do
+      printf '%s\n' "$body" | cache_write "$path"
+    done < <(echo "$page" | jq -r '
+      .services[]?
+      | . as $s
+      | "/services/\($s.id)\t\({service: ($s | if .escalation_policy then .escalation_policy |= {id, type: "escalation_policy_reference", summary, self, html_url} else . end)} | tojson)",
+        ($s.escalation_policy // empty
+         | select(.escalation_rules)
+         | "/escalation_policies/\(.id)\t\({escalation_policy: .} | tojson)")
+    ')
+    count=$((count + $(echo "$page" | jq '.services // [] | length')))
+    more="$(echo "$page" | jq -r '.more // false')"
+    [ "$more" = "true" ] || break
+    offset=$((offset + PREFETCH_PAGE_SIZE))
+  done
+  echo "PagerDuty prefetch: cached ${count} services." >&2
+}
+
+prefetch_services() {
+  local marker="$CACHE_DIR/.services-prefetched"
+  [ -n "$CACHE_DIR" ] || return 0
+  cache_fresh "$marker" && return 0
+  (
+    if command -v flock > /dev/null; then
+      exec 9> "$CACHE_DIR/.lock"
+      flock -w 300 9 || exit 1
+    fi
+    cache_fresh "$marker" && exit 0
+    ok=0
+    prefetch_pages || ok=1
+    touch "$marker"
+    exit "$ok"
+  ) || echo "PagerDuty prefetch incomplete, fetching what it missed per component." >&2
+}
+
+if [ "${LUNAR_VAR_PREFETCH_SERVICES:-false}" = "true" ]; then
+  prefetch_services
+fi
+
 # Always write source metadata.
 jq -n '{"tool": "pagerduty", "integration": "api"}' | lunar collect -j ".oncall.source" -
 
 # Fetch service.
-SERVICE_JSON="$(pd_get "/services/${SERVICE_ID}")" || {
+SERVICE_JSON="$(cached_get pd_get "/services/${SERVICE_ID}")" || {
   echo "Unable to fetch PagerDuty service ${SERVICE_ID}." >&2
   exit 0
 }
@@ -170,7 +227,7 @@ ESCALATION_NAME=""
 SCHEDULE_IDS=()
 
 if [ -n "$ESCALATION_POLICY_ID" ]; then
-  if EP_JSON="$(pd_get "/escalation_policies/${ESCALATION_POLICY_ID}")"; then
+  if EP_JSON="$(cached_get pd_get "/escalation_policies/${ESCALATION_POLICY_ID}")"; then
     HAS_ESCALATION=true
     ESCALATION_LEVELS="$(echo "$EP_JSON" | jq '.escalation_policy.escalation_rules | length')"
     ESCALATION_NAME="$(echo "$EP_JSON" | jq -r '.escalation_policy.name // empty')"
@@ -195,7 +252,7 @@ ROTATION="unknown"
 
 if [ ${#SCHEDULE_IDS[@]} -gt 0 ]; then
   FIRST_SCHEDULE_ID="${SCHEDULE_IDS[0]}"
-  if SCHED_JSON="$(pd_get "/schedules/${FIRST_SCHEDULE_ID}")"; then
+  if SCHED_JSON="$(cached_get pd_get "/schedules/${FIRST_SCHEDULE_ID}")"; then
     HAS_SCHEDULE=true
     PARTICIPANTS="$(echo "$SCHED_JSON" | jq '[.schedule.schedule_layers[].users[].user.id] | unique | length')"
     ROTATION_SECS="$(echo "$SCHED_JSON" | jq '.schedule.schedule_layers[0].rotation_turn_length_seconds // 0')"
@@ -14,7 +14,10 @@
 #
 # Asserts that discovery resolves the service ID from the annotation and drives
 # the PagerDuty query (`.oncall.service.id`), plus precedence / opt-in / missing
-# -file behaviour.
+# -file behaviour. Then checks the response cache: runs sharing a cache_dir
+# fetch each escalation policy and schedule once, entries expire after the
+# TTL, and prefetch_services seeds services and policies from the paged list.
+# Every requested URL is logged to <case>/urls.
 
 set -euo pipefail
 
@@ -47,11 +50,34 @@ emit() {
   if [ -n "$OUT" ]; then printf '%s' "$1" > "$OUT"; else printf '%s' "$1"; fi
 }
 
+echo "$URL" >> "$D/urls"
+
+EP='{"id":"PEP0001","type":"escalation_policy","name":"Payments","escalation_rules":[{"targets":[{"id":"PSCHED1","type":"schedule_reference"}]}]}'
+
 case "$URL" in
+  */services\?*)
+    # Two one-service pages, both on the same escalation policy.
+    case "$URL" in
+      *offset=0*) emit '{"services":[{"id":"PABC123","name":"Test Service","status":"active","escalation_policy":'"$EP"'}],"more":true}' ;;
+      *) emit '{"services":[{"id":"PDEF456","name":"Other Service","status":"active","escalation_policy":'"$EP"'}],"more":false}' ;;
+    esac
+    printf '200'
+    exit 0
+    ;;
   */services/P*)
     sid="${URL##*/services/}"; sid="${sid%%\?*}"
     printf '%s' "$sid" > "$D/requested_service"
-    emit '{"service":{"name":"Test Service","status":"active"}}'
+    emit '{"service":{"name":"Test Service","status":"active","escalation_policy":{"id":"PEP0001","type":"escalation_policy_reference"}}}'
+    printf '200'
+    exit 0
+    ;;
+  */escalation_policies/*)
+    emit '{"escalation_policy":'"$EP"'}'
+    printf '200'
+    exit 0
+    ;;
+  */schedules/*)
+    emit '{"schedule":{"id":"PSCHED1","schedule_layers":[{"rotation_turn_length_seconds":604800,"users":[{"user":{"id":"U1"}},{"user":{"id":"U2"}}]}]}}'
     printf '200'
     exit 0
     ;;
@@ -83,29 +109,60 @@ export PATH="$TEST_DIR:$PATH"
 
 PASS=0; FAIL=0
 
-# run_case <name> <fixture-or-NONE> <expected-service-id-or-NONE> <env KEY=VAL ...>
-run_case() {
-  local name="$1" fixture="$2" expected="$3"; shift 3
-  local casedir="$TEST_DIR/$name"
+# run_oncall <casedir> <env KEY=VAL ...> — runs oncall.sh in the case dir with
+# a fresh collector env; each run gets its own cache unless it sets cache_dir.
+run_oncall() {
+  local casedir="$1"; shift
   mkdir -p "$casedir"
   export MOCK_DIR="$casedir"
 
-  # Stage the checkout: a catalog-info.yaml in the case dir (the cwd), or none.
-  [ "$fixture" != "NONE" ] && cp "$FIXTURES_DIR/$fixture.yaml" "$casedir/catalog-info.yaml"
-
-  # Reset collector env each case.
   unset LUNAR_VAR_BACKSTAGE_DISCOVERY LUNAR_VAR_BACKSTAGE_ANNOTATIONS \
-        LUNAR_VAR_BACKSTAGE_CATALOG_PATHS LUNAR_VAR_SERVICE_ID LUNAR_COMPONENT_META
+        LUNAR_VAR_BACKSTAGE_CATALOG_PATHS LUNAR_VAR_SERVICE_ID LUNAR_COMPONENT_META \
+        LUNAR_VAR_CACHE_TTL_MINUTES LUNAR_VAR_PREFETCH_SERVICES PREFETCH_PAGE_SIZE
   export LUNAR_COMPONENT_ID="github.com/acme/payment-api"
   export LUNAR_SECRET_PAGERDUTY_API_KEY="pd-test-key"
+  export LUNAR_VAR_CACHE_DIR="$casedir/cache"
 
   local kv
   for kv in "$@"; do export "${kv?}"; done
 
-  echo "── case: $name ──"
   ( cd "$casedir" && bash "$SCRIPT_DIR/oncall.sh" ) > "$casedir/stdout" 2> "$casedir/stderr" || {
-    echo "  FAIL — oncall.sh exited non-zero"; echo "    $(tail -1 "$casedir/stderr")"; FAIL=$((FAIL+1)); return
+    echo "  FAIL — oncall.sh exited non-zero"; echo "    $(tail -1 "$casedir/stderr")"; FAIL=$((FAIL+1)); return 1
   }
+}
+
+# requests <casedir> <url-glob> — how many requested URLs match.
+requests() {
+  local n=0 url
+  [ -f "$1/urls" ] || { echo 0; return; }
+  while IFS= read -r url; do
+    # shellcheck disable=SC2053
+    [[ "$url" == $2 ]] && n=$((n + 1))
+  done < "$1/urls"
+  echo "$n"
+}
+
+# check <desc> <actual> <expected>
+check() {
+  if [ "$2" = "$3" ]; then
+    echo "  OK ($1)"; PASS=$((PASS+1))
+  else
+    echo "  FAIL — $1: expected '$3', got '$2'"; FAIL=$((FAIL+1))
+  fi
+}
+
+# run_case <name> <fixture-or-NONE> <expected-service-id-or-NONE> <env KEY=VAL ...>
+run_case() {
+  local name="$1" fixture="$2" expected="$3"; shift 3
+  local casedir="$TEST_DIR/$name"
+  mkdir -p "$casedir"
+  export MOCK_DIR="$casedir"
+
+  # Stage the checkout: a catalog-info.yaml in the case dir (the cwd), or none.
+  [ "$fixture" != "NONE" ] && cp "$FIXTURES_DIR/$fixture.yaml" "$casedir/catalog-info.yaml"
+
+  echo "── case: $name ──"
+  run_oncall "$casedir" "$@" || return
 
   local got_service="" got_id=""
   [ -f "$casedir/requested_service" ] && got_service="$(cat "$casedir/requested_service")"
@@ -147,6 +204,54 @@ run_case "discovery_off" "catalog-info-dotcom" "NONE"
 run_case "no_file" "NONE" "NONE" \
   LUNAR_VAR_BACKSTAGE_DISCOVERY=true
 
+# 6. Two components on the same escalation policy, sharing a cache: the
+#    second fetches only its own service.
+SHARED="$TEST_DIR/shared-cache"
+echo "── case: cache_shared ──"
+run_oncall "$TEST_DIR/cache_a" LUNAR_VAR_SERVICE_ID=PABC123 LUNAR_VAR_CACHE_DIR="$SHARED" &&
+run_oncall "$TEST_DIR/cache_b" LUNAR_VAR_SERVICE_ID=PDEF456 LUNAR_VAR_CACHE_DIR="$SHARED" && {
+  check "first run fetches the policy" "$(requests "$TEST_DIR/cache_a" '*/escalation_policies/PEP0001')" 1
+  check "second run fetches its service" "$(requests "$TEST_DIR/cache_b" '*/services/PDEF456')" 1
+  check "second run reuses the policy" "$(requests "$TEST_DIR/cache_b" '*/escalation_policies/*')" 0
+  check "second run reuses the schedule" "$(requests "$TEST_DIR/cache_b" '*/schedules/*')" 0
+  check "cached schedule still collected" \
+    "$(jq -c '.' "$TEST_DIR/cache_b/collect_oncall_schedule.out")" \
+    '{"exists":true,"participants":2,"rotation":"weekly"}'
+}
+
+# 7. An entry older than the TTL is fetched again.
+echo "── case: cache_expired ──"
+find "$SHARED" -type f -exec touch -d '-20 minutes' {} +
+run_oncall "$TEST_DIR/cache_c" LUNAR_VAR_SERVICE_ID=PDEF456 LUNAR_VAR_CACHE_DIR="$SHARED" \
+  LUNAR_VAR_CACHE_TTL_MINUTES=15 &&
+  check "expired policy refetched" "$(requests "$TEST_DIR/cache_c" '*/escalation_policies/*')" 1
+
+# 8. cache_ttl_minutes=0 turns the cache off.
+echo "── case: cache_off ──"
+run_oncall "$TEST_DIR/cache_d" LUNAR_VAR_SERVICE_ID=PDEF456 LUNAR_VAR_CACHE_DIR="$SHARED" \
+  LUNAR_VAR_CACHE_TTL_MINUTES=0 &&
+  check "policy fetched with cache off" "$(requests "$TEST_DIR/cache_d" '*/escalation_policies/*')" 1
+
+# 9. Prefetch pages the services list once and seeds services and policies;
+#    a second component run in the TTL doesn't list again.
+PREFETCHED="$TEST_DIR/prefetch-cache"
+echo "── case: prefetch ──"
+run_oncall "$TEST_DIR/prefetch_a" LUNAR_VAR_SERVICE_ID=PABC123 LUNAR_VAR_CACHE_DIR="$PREFETCHED" \
+  LUNAR_VAR_PREFETCH_SERVICES=true PREFETCH_PAGE_SIZE=1 &&
+run_oncall "$TEST_DIR/prefetch_b" LUNAR_VAR_SERVICE_ID=PDEF456 LUNAR_VAR_CACHE_DIR="$PREFETCHED" \
+  LUNAR_VAR_PREFETCH_SERVICES=true PREFETCH_PAGE_SIZE=1 && {
+  check "list paged with included policies" \
+    "$(requests "$TEST_DIR/prefetch_a" '*/services\?include%5B%5D=escalation_policies&limit=1&offset=*')" 2
+  check "no per-id service or policy fetch" \
+    "$(requests "$TEST_DIR/prefetch_a" '*/services/*') $(requests "$TEST_DIR/prefetch_a" '*/escalation_policies/*')" "0 0"
+  check "second run doesn't list again" "$(requests "$TEST_DIR/prefetch_b" '*')" 0
+  check "prefetched service collected" "$(jq -r '.name' "$TEST_DIR/prefetch_b/collect_oncall_service.out")" "Other Service"
+  check "prefetched policy is a reference on the service" \
+    "$(jq -r '.service.escalation_policy.type' "$TEST_DIR/prefetch_b/collect_oncall_native_pagerduty_service.out")" \
+    escalation_policy_reference
+  check "prefetched policy collected" "$(jq -r '.levels' "$TEST_DIR/prefetch_b/collect_oncall_escalation.out")" 1
+}
+
 echo ""
 echo "=========================================="
 echo "Passed: $PASS  Failed: $FAIL"
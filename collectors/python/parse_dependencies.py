@@ -0,0 +1,312 @@
+"""Extract Python dependencies from manifests and lockfiles in one pass.
+
+Usage: parse_dependencies.py [PROJECT_DIR]
+
+Declared (direct) dependencies come from the first manifest that lists any:
+pyproject.toml ([project] or [tool.poetry]), requirements.txt (following
+-r/--requirement includes) or Pipfile. PEP 508 extras are dropped from the
+name and environment markers are kept as `markers`. Development dependencies
+declared in pyproject.toml (Poetry groups and dev-dependencies, PEP 735
+[dependency-groups], uv dev-dependencies) are listed under `dev`.
+
+When a lockfile is present (poetry.lock, uv.lock or Pipfile.lock), each direct
+and dev dependency gets its resolved `version` (the declared constraint moves
+to `specifier`) and every other locked package is listed under `transitive`.
+
+Prints the .lang.python.dependencies object on stdout, or nothing when no
+dependencies were found.
+"""
+import json
+import os
+import re
+import sys
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# PEP 508: name, optional [extras], then version specifiers / URL, then ; markers
+REQUIREMENT = re.compile(
+    r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*(.*?)\s*(?:;\s*(.*))?$"
+)
+SPECIFIER = re.compile(r"^\s*(===|==|~=|>=|<=|!=|>|<)\s*([^\s,;]+)")
+EGG = re.compile(r"#egg=([A-Za-z0-9._-]+)")
+# Operators whose version is a useful "version" for the dependency: an exact
+# pin, or the lower bound of a range.
+VERSION_OPERATORS = ("===", "==", "~=", ">=")
+
+
+def canonical(name):
+    """PEP 503 normalized name, used to match manifests against lockfiles."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def load_toml(path):
+    if tomllib is None:
+        print(f"tomllib unavailable, skipping {path}", file=sys.stderr)
+        return None
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        print(f"Could not parse {path}: {e}", file=sys.stderr)
+        return None
+
+
+def dependency(name, specifier="", markers=None):
+    """Build a direct dependency entry from a name and PEP 440 specifier."""
+    dep = {"path": name, "indirect": False}
+    m = SPECIFIER.match(specifier or "")
+    if m and m.group(1) in VERSION_OPERATORS:
+        dep["version"] = m.group(2)
+    if specifier:
+        dep["specifier"] = specifier
+    if markers:
+        dep["markers"] = markers
+    return dep
+
+
+def parse_requirement(line):
+    """Parse one PEP 508 requirement string; None if it isn't one."""
+    m = REQUIREMENT.match(line)
+    if not m:
+        return None
+    name, spec, markers = m.group(1), m.group(2), m.group(3)
+    if spec.startswith("@"):  # direct URL reference
+        spec = ""
+    return dependency(name, spec.strip(), markers.strip() if markers else None)
+
+
+def from_pyproject(path):
+    """Return (direct, dev, tool) declared in a pyproject.toml."""
+    data = load_toml(path)
+    if not data:
+        return [], [], None
+    deps = _requirements(data.get("project", {}).get("dependencies"))
+    tool_table = data.get("tool", {})
+    poetry = tool_table.get("poetry", {})
+    if not deps:
+        deps = _poetry_dependencies(poetry.get("dependencies"))
+
+    dev = _poetry_dependencies(poetry.get("dev-dependencies"))
+    for group in (poetry.get("group") or {}).values():
+        dev += _poetry_dependencies((group or {}).get("dependencies"))
+    for group in (data.get("dependency-groups") or {}).values():
+        dev += _requirements(group)  # {include-group = ...} entries are skipped
+    dev += _requirements(tool_table.get("uv", {}).get("dev-dependencies"))
+    tool = "poetry" if poetry else "pip"
+    return deps, dev, tool
+
+
+def _requirements(lines):
+    """Parse a list of PEP 508 strings, skipping anything else."""
+    return [
+        d for d in (parse_requirement(r) for r in lines or [] if isinstance(r, str)) if d
+    ]
+
+
+def _poetry_dependencies(table):
+    deps = []
+    for name, spec in (table or {}).items():
+        if name.lower() == "python":
+            continue
+        markers = None
+        if isinstance(spec, dict):
+            markers = spec.get("markers")
+            spec = spec.get("version", "")
+        spec = spec.strip() if isinstance(spec, str) else ""
+        dep = dependency(name, _poetry_specifier(spec), markers)
+        if spec and spec != "*":
+            dep["specifier"] = spec
+        deps.append(dep)
+    return deps
+
+
+def _poetry_specifier(spec):
+    """Translate a Poetry constraint (^1.2, ~1.2, 1.2) into a PEP 440 one."""
+    if spec in ("", "*"):
+        return ""
+    if spec[0] in "^~" and not spec.startswith("~="):
+        return ">=" + spec[1:]
+    if spec[0].isdigit():
+        return "==" + spec
+    return spec
+
+
+def _requirement_lines(path, seen):
+    """Yield logical requirement lines, following -r includes (once each)."""
+    real = os.path.realpath(path)
+    if real in seen:
+        return
+    seen.add(real)
+    try:
+        with open(path) as f:
+            text = f.read()
+    except OSError as e:
+        print(f"Could not read {path}: {e}", file=sys.stderr)
+        return
+    text = text.replace("\\\n", " ")
+    base = os.path.dirname(path)
+    for raw in text.splitlines():
+        line = re.sub(r"(^|\s)#.*$", "", raw).strip()
+        if not line:
+            continue
+        m = re.match(r"^(-r|--requirement)(?:\s+|=)(\S+)", line)
+        if m:
+            yield from _requirement_lines(os.path.join(base, m.group(2)), seen)
+            continue
+        m = re.match(r"^(-e|--editable)(?:\s+|=)(\S+)", line)
+        if m:
+            egg = EGG.search(m.group(2))
+            if egg:
+                yield egg.group(1)
+            continue
+        if line.startswith("-"):
+            continue  # -c, --index-url, --hash-only lines, ...
+        # Strip per-requirement options (e.g. --hash=sha256:...).
+        yield re.split(r"\s+--", line, 1)[0]
+
+
+def from_requirements(path):
+    deps, seen_names = [], set()
+    for line in _requirement_lines(path, set()):
+        dep = parse_requirement(line)
+        if dep and canonical(dep["path"]) not in seen_names:
+            seen_names.add(canonical(dep["path"]))
+            deps.append(dep)
+    return deps
+
+
+def from_pipfile(path):
+    data = load_toml(path)
+    if not data:
+        return []
+    deps = []
+    for name, spec in (data.get("packages") or {}).items():
+        markers = None
+        if isinstance(spec, dict):
+            markers = spec.get("markers")
+            spec = spec.get("version", "")
+        spec = spec if isinstance(spec, str) and spec != "*" else ""
+        deps.append(dependency(name, spec, markers))
+    return deps
+
+
+def locked_poetry(path):
+    data = load_toml(path) or {}
+    return [(p.get("name"), p.get("version")) for p in data.get("package", [])]
+
+
+def locked_uv(path):
+    data = load_toml(path) or {}
+    out = []
+    for p in data.get("package", []):
+        source = p.get("source") or {}
+        # The project itself (and workspace members) are editable/virtual.
+        if "editable" in source or "virtual" in source:
+            continue
+        out.append((p.get("name"), p.get("version")))
+    return out
+
+
+def locked_pipfile(path):
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not parse {path}: {e}", file=sys.stderr)
+        return []
+    out = []
+    for name, meta in (data.get("default") or {}).items():
+        version = (meta or {}).get("version") or ""
+        out.append((name, version.lstrip("=")))
+    return out
+
+
+LOCKFILES = {
+    "poetry.lock": locked_poetry,
+    "uv.lock": locked_uv,
+    "Pipfile.lock": locked_pipfile,
+}
+# Which lockfile belongs to which manifest tool; others are used as fallback.
+PREFERRED_LOCKFILE = {"poetry": "poetry.lock", "pipenv": "Pipfile.lock"}
+
+
+def pick_lockfile(root, tool):
+    preferred = PREFERRED_LOCKFILE.get(tool)
+    for name in ([preferred] if preferred else []) + ["uv.lock", "poetry.lock", "Pipfile.lock"]:
+        if os.path.isfile(os.path.join(root, name)):
+            return name
+    return None
+
+
+def collect(root="."):
+    """Return the .lang.python.dependencies object, or None if none found."""
+    deps, dev, tool = [], [], "pip"
+    pyproject = os.path.join(root, "pyproject.toml")
+    if os.path.isfile(pyproject):
+        deps, dev, pyproject_tool = from_pyproject(pyproject)
+        if deps:
+            tool = pyproject_tool
+    if not deps and os.path.isfile(os.path.join(root, "requirements.txt")):
+        deps, tool = from_requirements(os.path.join(root, "requirements.txt")), "pip"
+    if not deps and os.path.isfile(os.path.join(root, "Pipfile")):
+        deps, tool = from_pipfile(os.path.join(root, "Pipfile")), "pipenv"
+    if not deps:
+        return None
+
+    # A package declared both as a runtime and a dev dependency is direct.
+    direct_names = {canonical(d["path"]) for d in deps}
+    dev_names, unique_dev = set(), []
+    for dep in dev:
+        key = canonical(dep["path"])
+        if key not in direct_names and key not in dev_names:
+            dev_names.add(key)
+            unique_dev.append(dep)
+    dev = unique_dev
+
+    result = {"direct": deps, "transitive": []}
+    if dev:
+        result["dev"] = dev
+    lockfile = pick_lockfile(root, tool)
+    if lockfile:
+        if lockfile == "uv.lock" and tool == "pip":
+            tool = "uv"
+        locked = {}
+        for name, version in LOCKFILES[lockfile](os.path.join(root, lockfile)):
+            if name and version:
+                locked.setdefault(canonical(name), (name, version))
+        for dep in deps + dev:
+            key = canonical(dep["path"])
+            if key in locked:
+                dep["version"] = locked[key][1]
+        result["transitive"] = [
+            {"path": name, "version": version, "indirect": True}
+            for key, (name, version) in sorted(locked.items())
+            if key not in direct_names | dev_names
+        ]
+        result["lockfile"] = lockfile
+    result["source"] = {"tool": tool, "integration": "code"}
+    return result
+
+
+def main(argv):
+    result = collect(argv[1] if len(argv) > 1 else ".")
+    if result is None:
+        print("No dependencies found", file=sys.stderr)
+        return
+    json.dump(result, sys.stdout)
+    sys.stdout.write("\n")
+    print(
+        f"Python dependencies: {len(result['direct'])} direct, {len(result.get('dev', []))} dev,"
+        f" {len(result['transitive'])} transitive",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""Tests for the python collector's dependency parser."""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import parse_dependencies  # noqa: E402
+
+PYPROJECT_PEP621 = """\
+[project]
+name = "app"
+dependencies = [
+    "requests[socks]>=2.31,<3",
+    "click==8.1.7",
+    "rich",
+    "pywin32 ; sys_platform == 'win32'",
+]
+"""
+
+PYPROJECT_POETRY = """\
+[tool.poetry]
+name = "app"
+
+[tool.poetry.dependencies]
+python = "^3.11"
+Flask = "^3.0"
+pydantic = { version = "~2.5", markers = "sys_platform != 'win32'" }
+"""
+
+PYPROJECT_POETRY_GROUPS = PYPROJECT_POETRY + """
+[tool.poetry.group.dev.dependencies]
+pytest = "^8.0"
+
+[tool.poetry.group.lint.dependencies]
+ruff = "0.3.0"
+flask = "*"
+
+[tool.poetry.dev-dependencies]
+mypy = "^1.8"
+"""
+
+POETRY_LOCK = """\
+[[package]]
+name = "flask"
+version = "3.0.2"
+
+[[package]]
+name = "pydantic"
+version = "2.5.3"
+
+[[package]]
+name = "pydantic-core"
+version = "2.14.6"
+"""
+
+POETRY_GROUPS_LOCK = POETRY_LOCK + """
+[[package]]
+name = "pytest"
+version = "8.0.2"
+
+[[package]]
+name = "pluggy"
+version = "1.4.0"
+
+[[package]]
+name = "ruff"
+version = "0.3.0"
+
+[[package]]
+name = "mypy"
+version = "1.8.0"
+"""
+
+PYPROJECT_UV_DEV = PYPROJECT_PEP621 + """
+[dependency-groups]
+test = ["pytest>=8", {include-group = "lint"}]
+lint = ["ruff"]
+
+[tool.uv]
+dev-dependencies = ["mypy>=1.8"]
+"""
+
+UV_LOCK = """\
+version = 1
+
+[[package]]
+name = "app"
+version = "0.1.0"
+source = { editable = "." }
+
+[[package]]
+name = "requests"
+version = "2.31.0"
+source = { registry = "https://pypi.org/simple" }
+
+[[package]]
+name = "click"
+version = "8.1.7"
+source = { registry = "https://pypi.org/simple" }
+
+[[package]]
+name = "urllib3"
+version = "2.2.1"
+source = { registry = "https://pypi.org/simple" }
+"""
+
+REQUIREMENTS = """\
+# runtime
+Django==4.2.11 \\
+    --hash=sha256:abc
+-r requirements-base.txt
+-e git+https://github.com/org/lib.git#egg=internal-lib
+--index-url https://pypi.org/simple
+gunicorn>=21.2  # server
+"""
+
+REQUIREMENTS_BASE = """\
+celery~=5.3
+django==4.2.11
+-r requirements.txt
+"""
+
+PIPFILE = """\
+[packages]
+requests = "*"
+boto3 = "==1.34.0"
+uvloop = { version = ">=0.19", markers = "sys_platform == 'linux'" }
+
+[dev-packages]
+pytest = "*"
+"""
+
+PIPFILE_LOCK = """\
+{
+  "_meta": {},
+  "default": {
+    "requests": {"version": "==2.31.0"},
+    "boto3": {"version": "==1.34.0"},
+    "botocore": {"version": "==1.34.10"}
+  },
+  "develop": {"pytest": {"version": "==8.0.0"}}
+}
+"""
+
+
+class ProjectTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def write(self, name, text):
+        with open(os.path.join(self.root, name), "w") as f:
+            f.write(text)
+
+    def collect(self):
+        return parse_dependencies.collect(self.root)
+
+    @staticmethod
+    def by_path(entries):
+        return {e["path"]: e for e in entries}
+
+
+@unittest.skipIf(parse_dependencies.tomllib is None, "tomllib unavailable")
+class TestPyproject(ProjectTestCase):
+    def test_pep621_requirements(self):
+        self.write("pyproject.toml", PYPROJECT_PEP621)
+        result = self.collect()
+        direct = self.by_path(result["direct"])
+        self.assertEqual(list(direct), ["requests", "click", "rich", "pywin32"])
+        self.assertEqual(direct["requests"]["version"], "2.31")
+        self.assertEqual(direct["requests"]["specifier"], ">=2.31,<3")
+        self.assertEqual(direct["click"]["version"], "8.1.7")
+        self.assertNotIn("version", direct["rich"])
+        self.assertEqual(direct["pywin32"]["markers"], "sys_platform == 'win32'")
+        self.assertEqual(result["transitive"], [])
+        self.assertNotIn("lockfile", result)
+        self.assertEqual(result["source"], {"tool": "pip", "integration": "code"})
+
+    def test_poetry_with_lockfile(self):
+        self.write("pyproject.toml", PYPROJECT_POETRY)
+        self.write("poetry.lock", POETRY_LOCK)
+        result = self.collect()
+        direct = self.by_path(result["direct"])
+        self.assertEqual(direct["Flask"]["version"], "3.0.2")
+        self.assertEqual(direct["Flask"]["specifier"], "^3.0")
+        self.assertEqual(direct["pydantic"]["version"], "2.5.3")
+        self.assertEqual(direct["pydantic"]["markers"], "sys_platform != 'win32'")
+        self.assertNotIn("python", direct)
+        self.assertEqual(
+            result["transitive"],
+            [{"path": "pydantic-core", "version": "2.14.6", "indirect": True}],
+        )
+        self.assertEqual(result["lockfile"], "poetry.lock")
+        self.assertEqual(result["source"]["tool"], "poetry")
+
+    def test_poetry_groups_are_dev(self):
+        self.write("pyproject.toml", PYPROJECT_POETRY_GROUPS)
+        self.write("poetry.lock", POETRY_GROUPS_LOCK)
+        result = self.collect()
+        dev = self.by_path(result["dev"])
+        # flask in the lint group is already a runtime dependency.
+        self.assertEqual(list(dev), ["mypy", "pytest", "ruff"])
+        self.assertEqual(dev["pytest"]["version"], "8.0.2")
+        self.assertEqual(dev["pytest"]["specifier"], "^8.0")
+        self.assertFalse(dev["pytest"]["indirect"])
+        self.assertEqual(list(self.by_path(result["direct"])), ["Flask", "pydantic"])
+        # Only packages nothing declares are transitive.
+        self.assertEqual(
+            [t["path"] for t in result["transitive"]], ["pluggy", "pydantic-core"]
+        )
+
+    def test_uv_lock(self):
+        self.write("pyproject.toml", PYPROJECT_PEP621)
+        self.write("uv.lock", UV_LOCK)
+        result = self.collect()
+        direct = self.by_path(result["direct"])
+        self.assertEqual(direct["requests"]["version"], "2.31.0")
+        self.assertEqual(direct["requests"]["specifier"], ">=2.31,<3")
+        # The project itself (editable source) is not a dependency.
+        self.assertEqual([t["path"] for t in result["transitive"]], ["urllib3"])
+        self.assertEqual(result["lockfile"], "uv.lock")
+        self.assertEqual(result["source"]["tool"], "uv")
+        self.assertNotIn("dev", result)
+
+    def test_uv_dependency_groups_are_dev(self):
+        self.write("pyproject.toml", PYPROJECT_UV_DEV)
+        self.write("uv.lock", UV_LOCK + """
+[[package]]
+name = "pytest"
+version = "8.1.1"
+source = { registry = "https://pypi.org/simple" }
+""")
+        result = self.collect()
+        dev = self.by_path(result["dev"])
+        self.assertEqual(list(dev), ["pytest", "ruff", "mypy"])
+        self.assertEqual(dev["pytest"]["version"], "8.1.1")
+        self.assertEqual([t["path"] for t in result["transitive"]], ["urllib3"])
+
+
+class TestRequirements(ProjectTestCase):
+    def test_includes_options_and_continuations(self):
+        self.write("requirements.txt", REQUIREMENTS)
+        self.write("requirements-base.txt", REQUIREMENTS_BASE)
+        result = self.collect()
+        direct = self.by_path(result["direct"])
+        # django from the include is a duplicate of Django and is dropped.
+        self.assertEqual(list(direct), ["Django", "celery", "internal-lib", "gunicorn"])
+        self.assertEqual(direct["Django"]["version"], "4.2.11")
+        self.assertEqual(direct["Django"]["specifier"], "==4.2.11")
+        self.assertEqual(direct["celery"]["version"], "5.3")
+        self.assertNotIn("version", direct["internal-lib"])
+        self.assertEqual(direct["gunicorn"]["version"], "21.2")
+        self.assertEqual(result["source"]["tool"], "pip")
+
+    def test_nothing_found(self):
+        self.write("requirements.txt", "# empty\n--index-url https://x\n")
+        self.assertIsNone(self.collect())
+
+
+@unittest.skipIf(parse_dependencies.tomllib is None, "tomllib unavailable")
+class TestPipfile(ProjectTestCase):
+    def test_pipfile_without_lock(self):
+        self.write("Pipfile", PIPFILE)
+        result = self.collect()
+        direct = self.by_path(result["direct"])
+        self.assertEqual(list(direct), ["requests", "boto3", "uvloop"])
+        self.assertNotIn("specifier", direct["requests"])
+        self.assertEqual(direct["boto3"]["version"], "1.34.0")
+        self.assertEqual(direct["uvloop"]["markers"], "sys_platform == 'linux'")
+        self.assertEqual(result["source"]["tool"], "pipenv")
+
+    def test_pipfile_lock_default_section_only(self):
+        self.write("Pipfile", PIPFILE)
+        self.write("Pipfile.lock", PIPFILE_LOCK)
+        result = self.collect()
+        direct = self.by_path(result["direct"])
+        self.assertEqual(direct["requests"]["version"], "2.31.0")
+        self.assertEqual(
+            result["transitive"],
+            [{"path": "botocore", "version": "1.34.10", "indirect": True}],
+        )
+        self.assertEqual(result["lockfile"], "Pipfile.lock")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -66,3 +66,88 @@ lunar collect ".$CATEGORY.source.integration" "ci"
 if [ -n "$SEMGREP_VERSION" ] && [ "$SEMGREP_VERSION" != "unknown" ]; then
     lunar collect ".$CATEGORY.source.version" "$SEMGREP_VERSION"
 fi
+
+# --- Raw results + normalized SCA counts (Supply Chain scans only) ---
+# The hook only sees the command line, so findings are read back from the JSON
+# file Semgrep wrote: `--json-output=<path>`, or `--json` with `-o/--output`.
+if [ "$CATEGORY" != "sca" ]; then
+    exit 0
+fi
+
+RESULTS_FILE=""
+if echo "$CMD_STR" | grep -qE '\-\-json-output[[:space:]=]+[^[:space:]]+'; then
+    RESULTS_FILE=$(echo "$CMD_STR" | grep -oE '\-\-json-output[[:space:]=]+[^[:space:]]+' | head -1 | sed -E 's/--json-output[[:space:]=]+//')
+elif echo "$CMD_STR" | grep -qE '(^|[[:space:]])--json([[:space:]]|$)'; then
+    RESULTS_FILE=$(echo "$CMD_STR" | grep -oE '(^|[[:space:]])(-o|--output)[[:space:]=]+[^[:space:]]+' | head -1 | sed -E 's/^[[:space:]]*(-o|--output)[[:space:]=]+//')
+fi
+
+if [ -z "$RESULTS_FILE" ] || [ ! -f "$RESULTS_FILE" ]; then
+    exit 0
+fi
+
+echo "Found Semgrep JSON results at $RESULTS_FILE" >&2
+
+lunar collect -j ".sca.native.semgrep.cicd.raw" - < "$RESULTS_FILE" || \
+    echo "Warning: failed to collect raw Semgrep output from $RESULTS_FILE" >&2
+
+# Supply Chain findings share the .sca schema with snyk/trivy/grype.
+# Normalization needs jq (provided by install.sh). Degrade gracefully if it's
+# missing — raw results are already captured above.
+if ! command -v jq >/dev/null 2>&1; then
+    echo "jq not available — skipping SCA normalization (raw results still captured)" >&2
+    exit 0
+fi
+
+if [ "$(jq 'type == "object" and (.results | type == "array")' "$RESULTS_FILE" 2>/dev/null)" != "true" ]; then
+    echo "No results array in Semgrep JSON — skipping normalization" >&2
+    exit 0
+fi
+
+# Only results carrying sca_info are Supply Chain findings. The advisory's
+# sca-severity is used when it has one; otherwise the rule severity maps
+# ERROR/WARNING/INFO to high/medium/low. The fix version is the first
+# sca-fix-versions entry, preferring the key for the matched package.
+if NORMALIZED=$(jq -c '
+  [ .results[]
+    | select(.extra.sca_info)
+    | (.extra.metadata // {}) as $m
+    | (.extra.sca_info.dependency_match.found_dependency // {}) as $dep
+    | (($m["sca-severity"] // "") | ascii_downcase) as $advisory
+    | (if ($advisory | IN("critical", "high", "medium", "low")) then $advisory
+       else ({"error": "high", "warning": "medium", "info": "low"}[(.extra.severity // "") | ascii_downcase] // $advisory)
+       end) as $severity
+    | ([ ($m["sca-fix-versions"] // [])[] | objects | select(length > 0) ] | first) as $fixes
+    | (if $fixes then ($fixes[$dep.package // ""] // ($fixes | to_entries[0].value)) else null end) as $fix
+    | {
+        severity:    $severity,
+        package:     ($dep.package // null),
+        version:     ($dep.version // null),
+        ecosystem:   ($dep.ecosystem // null),
+        cve:         ($m["sca-vuln-database-identifier"] // ($m.cve | if type == "array" then .[0] else . end)),
+        title:       ($m.short_description // .extra.message // null),
+        fix_version: $fix,
+        fixable:     ($fix != null),
+        reachable:   (if .extra.sca_info.reachable then true else false end)
+      } ] as $findings
+  | {
+      vulnerabilities: {
+        critical: ([$findings[] | select(.severity == "critical")] | length),
+        high:     ([$findings[] | select(.severity == "high")]     | length),
+        medium:   ([$findings[] | select(.severity == "medium")]   | length),
+        low:      ([$findings[] | select(.severity == "low")]      | length),
+        total:    ($findings | length)
+      },
+      findings: $findings,
+      summary: {
+        has_critical: ([$findings[] | select(.severity == "critical")] | length > 0),
+        has_high:     ([$findings[] | select(.severity == "high")]     | length > 0),
+        has_medium:   ([$findings[] | select(.severity == "medium")]   | length > 0),
+        has_low:      ([$findings[] | select(.severity == "low")]      | length > 0),
+        all_fixable:  ([$findings[] | select(.fixable | not)] | length == 0)
+      }
+    }' "$RESULTS_FILE" 2>/dev/null); then
+    echo "$NORMALIZED" | lunar collect -j ".sca" -
+    echo "Collected SCA vulnerability counts from Semgrep results" >&2
+else
+    echo "Warning: failed to parse Semgrep JSON for normalization" >&2
+fi
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Tests for the semgrep CI collector's .sca normalization (cli.sh).
+
+For `semgrep ci --supply-chain` runs that write JSON (`--json-output=<path>`,
+or `--json -o <path>`), cli.sh captures the report raw and normalizes its
+Supply Chain results into .sca. These tests lock in that shape — `findings`
+is always present, `[]` for a clean scan — and that SAST runs record only the
+command, never the report.
+
+The real script runs as a subprocess with `lunar` and `semgrep` stubbed on
+PATH; the `lunar` stub logs its arguments and any piped stdin to $CAPTURE.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import textwrap
+import unittest
+
+HERE = os.path.dirname(__file__)
+COLLECTOR = os.path.abspath(os.path.join(HERE, ".."))
+
+
+def sca_result(package, sca_severity, fix=None, cve="CVE-2024-0001", reachable=False):
+    meta = {"sca-severity": sca_severity, "sca-vuln-database-identifier": cve}
+    if fix:
+        meta["sca-fix-versions"] = [{package: fix}]
+    return {
+        "check_id": f"ssc-{package}",
+        "extra": {
+            "severity": "WARNING",
+            "message": f"{package} is vulnerable",
+            "metadata": meta,
+            "sca_info": {
+                "reachable": reachable,
+                "dependency_match": {
+                    "found_dependency": {
+                        "package": package, "version": "1.0.0", "ecosystem": "pypi",
+                    },
+                },
+            },
+        },
+    }
+
+
+class SemgrepCliTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="semgrep-test-")
+        self.bin = os.path.join(self.tmp, "bin")
+        os.makedirs(self.bin)
+        self.capture = os.path.join(self.tmp, "collect.log")
+        self.results = os.path.join(self.tmp, "semgrep.json")
+        self._stub(
+            "lunar",
+            textwrap.dedent(
+                """\
+                #!/bin/sh
+                printf 'ARGS: %s\\n' "$*" >> "$CAPTURE"
+                if [ "$4" = "-" ]; then
+                  printf 'STDIN: %s\\n' "$(cat)" >> "$CAPTURE"
+                fi
+                """
+            ),
+        )
+        self._stub("semgrep", "#!/bin/sh\necho 1.90.0\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _stub(self, name, body):
+        path = os.path.join(self.bin, name)
+        with open(path, "w") as f:
+            f.write(body)
+        os.chmod(path, 0o755)
+
+    def run_cli(self, report, command=None):
+        with open(self.results, "w") as f:
+            json.dump(report, f)
+        env = dict(
+            os.environ,
+            PATH=f"{self.bin}:{os.environ['PATH']}",
+            CAPTURE=self.capture,
+            LUNAR_CI_COMMAND=command or f"semgrep ci --supply-chain --json-output={self.results}",
+        )
+        subprocess.run(
+            ["bash", os.path.join(COLLECTOR, "cli.sh")],
+            env=env, check=True, capture_output=True, text=True,
+        )
+        with open(self.capture) as f:
+            return f.read().splitlines()
+
+    def collected(self, lines, path):
+        """Returns the JSON piped to `lunar collect -j <path> -`, or None."""
+        for i, line in enumerate(lines):
+            if line == f"ARGS: collect -j {path} -":
+                return json.loads(lines[i + 1][len("STDIN: "):])
+        return None
+
+    def test_supply_chain_results_normalized(self):
+        lines = self.run_cli({"results": [
+            sca_result("requests", "HIGH", fix="2.32.0", reachable=True),
+            sca_result("urllib3", "", cve="CVE-2024-0002"),
+            {"check_id": "python.lang.eval", "extra": {"severity": "ERROR"}},
+        ]})
+        sca = self.collected(lines, ".sca")
+        # urllib3 has no advisory severity: rule WARNING maps to medium.
+        self.assertEqual(
+            sca["vulnerabilities"],
+            {"critical": 0, "high": 1, "medium": 1, "low": 0, "total": 2},
+        )
+        self.assertEqual([f["package"] for f in sca["findings"]], ["requests", "urllib3"])
+        self.assertEqual(sca["findings"][0]["fix_version"], "2.32.0")
+        self.assertTrue(sca["findings"][0]["fixable"])
+        self.assertEqual(
+            [f["reachable"] for f in sca["findings"]], [True, False]
+        )
+        self.assertEqual(sca["findings"][1]["fix_version"], None)
+        self.assertEqual(sca["findings"][1]["cve"], "CVE-2024-0002")
+        self.assertFalse(sca["summary"]["all_fixable"])
+
+    def test_report_without_results_not_normalized(self):
+        lines = self.run_cli({"errors": []})
+        self.assertIsNotNone(self.collected(lines, ".sca.native.semgrep.cicd.raw"))
+        self.assertIsNone(self.collected(lines, ".sca"))
+
+    def test_clean_scan_emits_empty_findings(self):
+        sca = self.collected(self.run_cli({"results": []}), ".sca")
+        self.assertEqual(sca["vulnerabilities"]["total"], 0)
+        self.assertEqual(sca["findings"], [])
+
+    def test_json_with_output_flag(self):
+        lines = self.run_cli(
+            {"results": [sca_result("jinja2", "critical")]},
+            command=f"semgrep ci --supply-chain --json -o {self.results}",
+        )
+        self.assertEqual(self.collected(lines, ".sca")["vulnerabilities"]["critical"], 1)
+        self.assertIsNotNone(self.collected(lines, ".sca.native.semgrep.cicd.raw"))
+
+    def test_sast_scan_records_command_only(self):
+        lines = self.run_cli(
+            {"results": [{"check_id": "python.lang.eval", "extra": {"severity": "ERROR"}}]},
+            command=f"semgrep ci --json-output={self.results}",
+        )
+        self.assertIsNotNone(self.collected(lines, ".sast.native.semgrep.cicd"))
+        self.assertIsNone(self.collected(lines, ".sast.native.semgrep.cicd.raw"))
+        self.assertIsNone(self.collected(lines, ".sca"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Tests for the snyk CI collector's .sca normalization (cli.sh).
+
+cli.sh reads back the JSON file `snyk test --json-file-output=<path>` wrote
+and normalizes it with jq. These tests lock in the .sca shape
+policies read: severity counts, `findings` deduped by Snyk id — present, as
+`[]`, even when the scan is clean — and nothing under .sca for reports that
+are not vulnerability scans (`snyk monitor`).
+
+The real script runs as a subprocess with `lunar` and `snyk` stubbed on PATH;
+the `lunar` stub logs its arguments and any piped stdin to $CAPTURE.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import textwrap
+import unittest
+
+HERE = os.path.dirname(__file__)
+COLLECTOR = os.path.abspath(os.path.join(HERE, ".."))
+
+
+def vuln(vid, severity, package, fixed_in=(), cve=None):
+    return {
+        "id": vid,
+        "severity": severity,
+        "packageName": package,
+        "version": "1.0.0",
+        "packageManager": "npm",
+        "title": f"Issue in {package}",
+        "fixedIn": list(fixed_in),
+        "identifiers": {"CVE": [cve] if cve else []},
+    }
+
+
+class SnykCliTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="snyk-test-")
+        self.bin = os.path.join(self.tmp, "bin")
+        os.makedirs(self.bin)
+        self.capture = os.path.join(self.tmp, "collect.log")
+        self.results = os.path.join(self.tmp, "snyk.json")
+        self._stub(
+            "lunar",
+            textwrap.dedent(
+                """\
+                #!/bin/sh
+                printf 'ARGS: %s\\n' "$*" >> "$CAPTURE"
+                if [ "$4" = "-" ]; then
+                  printf 'STDIN: %s\\n' "$(cat)" >> "$CAPTURE"
+                fi
+                """
+            ),
+        )
+        self._stub("snyk", "#!/bin/sh\necho 1.1290.0\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _stub(self, name, body):
+        path = os.path.join(self.bin, name)
+        with open(path, "w") as f:
+            f.write(body)
+        os.chmod(path, 0o755)
+
+    def run_cli(self, report, command=None):
+        with open(self.results, "w") as f:
+            json.dump(report, f)
+        env = dict(
+            os.environ,
+            PATH=f"{self.bin}:{os.environ['PATH']}",
+            CAPTURE=self.capture,
+            LUNAR_CI_COMMAND=command or f"snyk test --json-file-output={self.results}",
+        )
+        subprocess.run(
+            ["bash", os.path.join(COLLECTOR, "cli.sh")],
+            env=env, check=True, capture_output=True, text=True,
+        )
+        with open(self.capture) as f:
+            return f.read().splitlines()
+
+    def collected(self, lines, path):
+        """Returns the JSON piped to `lunar collect -j <path> -`, or None."""
+        for i, line in enumerate(lines):
+            if line == f"ARGS: collect -j {path} -":
+                return json.loads(lines[i + 1][len("STDIN: "):])
+        return None
+
+    def test_counts_and_dedupes_findings(self):
+        lines = self.run_cli({"vulnerabilities": [
+            vuln("SNYK-JS-A-1", "high", "a", ["1.0.1"], "CVE-2024-1"),
+            vuln("SNYK-JS-A-1", "high", "a", ["1.0.1"], "CVE-2024-1"),
+            vuln("SNYK-JS-B-2", "critical", "b"),
+        ]})
+        sca = self.collected(lines, ".sca")
+        self.assertEqual(
+            sca["vulnerabilities"],
+            {"critical": 1, "high": 1, "medium": 0, "low": 0, "total": 2},
+        )
+        self.assertEqual([f["snyk_id"] for f in sca["findings"]], ["SNYK-JS-A-1", "SNYK-JS-B-2"])
+        self.assertEqual(sca["findings"][0]["cve"], "CVE-2024-1")
+        self.assertEqual(sca["findings"][0]["fix_version"], "1.0.1")
+        self.assertEqual(
+            sca["summary"],
+            {
+                "has_critical": True, "has_high": True, "has_medium": False,
+                "has_low": False, "all_fixable": False,
+            },
+        )
+
+    def test_clean_scan_emits_empty_findings(self):
+        sca = self.collected(self.run_cli({"vulnerabilities": []}), ".sca")
+        self.assertEqual(sca["vulnerabilities"]["total"], 0)
+        self.assertEqual(sca["findings"], [])
+        self.assertTrue(sca["summary"]["all_fixable"])
+
+    def test_all_projects_report(self):
+        lines = self.run_cli([
+            {"vulnerabilities": [vuln("SNYK-1", "low", "a", ["2"])]},
+            {"vulnerabilities": [vuln("SNYK-2", "medium", "b", ["3"])]},
+        ])
+        sca = self.collected(lines, ".sca")
+        self.assertEqual(sca["vulnerabilities"]["total"], 2)
+        self.assertTrue(sca["summary"]["all_fixable"])
+
+    def test_raw_results_collected(self):
+        report = {"vulnerabilities": []}
+        raw = self.collected(self.run_cli(report), ".sca.native.snyk.cicd.raw")
+        self.assertEqual(raw, report)
+
+    def test_monitor_snapshot_not_normalized(self):
+        lines = self.run_cli({"id": "snapshot", "uri": "https://app.snyk.io/x"})
+        self.assertIsNone(self.collected(lines, ".sca"))
+
+    def test_code_scan_not_normalized(self):
+        lines = self.run_cli(
+            {"runs": []},
+            command=f"snyk code test --json-file-output={self.results}",
+        )
+        self.assertIsNotNone(self.collected(lines, ".sast.native.snyk.cicd.raw"))
+        self.assertIsNone(self.collected(lines, ".sca"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,8 +6,9 @@ set -e
 # pullRequest=<n> on PR commits. Polls api/project_analyses/search until the
 # analysis for LUNAR_COMPONENT_GIT_SHA appears or api_poll_timeout_seconds
 # elapses, then fetches measures + quality-gate status + issue severity facet
-# and writes both tool-agnostic (.code_quality.*) and native
-# (.code_quality.native.sonarqube.*) fields.
+# concurrently over one keep-alive session (sq_client.py) and writes both
+# tool-agnostic (.code_quality.*) and native (.code_quality.native.sonarqube.*)
+# fields.
 
 source "$(dirname "$0")/helpers.sh"
 
@@ -22,9 +23,9 @@ if [ -z "$PROJECT_KEY" ]; then
     exit 0
 fi
 
-if ! sq_poll_analysis "$PROJECT_KEY"; then
+if ! ANALYSIS="$(sq_fetch_analysis "$PROJECT_KEY")"; then
     sq_write_source "$PROJECT_KEY" "api" "pending"
     exit 0
 fi
 
-sq_collect_measures "$PROJECT_KEY" "api"
+sq_collect_measures "$PROJECT_KEY" "api" "$ANALYSIS"
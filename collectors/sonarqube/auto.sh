@@ -103,9 +103,9 @@ jq -n \
     '{status: $status, version: $version, exit_code: $exit_code, duration_seconds: $duration}' \
     | lunar collect -j ".code_quality.native.sonarqube.auto" -
 
-if ! sq_poll_analysis "$PROJECT_KEY"; then
+if ! ANALYSIS="$(sq_fetch_analysis "$PROJECT_KEY")"; then
     sq_write_source "$PROJECT_KEY" "auto" "pending"
     exit 0
 fi
 
-sq_collect_measures "$PROJECT_KEY" "auto"
+sq_collect_measures "$PROJECT_KEY" "auto" "$ANALYSIS"
@@ -1,8 +1,8 @@
 #!/bin/bash
 
-# Shared helpers for the sonarqube collector — API auth, project key resolution,
-# polling, and Component JSON writes. Sourced from api.sh, auto.sh, and
-# github-app.sh. config.sh and cicd.sh do not need this.
+# Shared helpers for the sonarqube collector — project key resolution, the
+# Web API fetch (via sq_client.py), and Component JSON writes. Sourced from
+# api.sh, auto.sh, and github-app.sh. config.sh and cicd.sh do not need this.
 
 # Resolve the SonarQube/SonarCloud base URL.
 sq_base_url() {
@@ -23,16 +23,6 @@ sq_project_key() {
     echo "$key"
 }
 
-# Authenticated GET against the SonarQube Web API. Uses token-as-basic-user
-# (empty password) per the documented convention. Echoes body on success,
-# non-zero exit on failure.
-sq_api_get() {
-    local path="$1"
-    local base
-    base="$(sq_base_url)"
-    curl -fsS -u "${LUNAR_SECRET_SONARQUBE_TOKEN}:" "${base}${path}"
-}
-
 # Convert SonarQube numeric rating ("1.0".."5.0") to letter (A..E).
 # Echoes "A".."E", or empty string if the value is unparseable.
 sq_rating_to_letter() {
@@ -62,53 +52,32 @@ sq_scope_query() {
     fi
 }
 
-# Poll api/project_analyses/search until the newest analysis's revision matches
-# LUNAR_COMPONENT_GIT_SHA, or until api_poll_timeout_seconds elapses.
-# Returns 0 on match, 1 on timeout or error. Silent on success; logs on timeout.
-sq_poll_analysis() {
+# Wait for the analysis of LUNAR_COMPONENT_GIT_SHA (polling
+# api/project_analyses/search for up to api_poll_timeout_seconds), then fetch
+# measures, quality gate and issue facets concurrently over one keep-alive
+# session — see sq_client.py. Echoes the client's JSON:
+# {analysis_status, measures, quality_gate, issues}. Returns 1 if the analysis
+# is still pending (or the client failed); logs on timeout.
+sq_fetch_analysis() {
     local project_key="$1"
-    local timeout="${LUNAR_VAR_API_POLL_TIMEOUT_SECONDS:-180}"
-    local interval="${LUNAR_VAR_API_POLL_INTERVAL_SECONDS:-10}"
-    local scope
-    scope="$(sq_scope_query)"
-    local expected="${LUNAR_COMPONENT_GIT_SHA:-}"
-    local elapsed=0
-
-    if [ -z "$expected" ]; then
-        # No SHA to match against — single-shot query.
-        sq_api_get "/api/project_analyses/search?project=${project_key}${scope}&ps=1" >/dev/null 2>&1 && return 0
-        return 1
-    fi
-
-    while [ "$elapsed" -lt "$timeout" ]; do
-        local resp revision
-        resp="$(sq_api_get "/api/project_analyses/search?project=${project_key}${scope}&ps=1" 2>/dev/null || echo '{"analyses":[]}')"
-        revision="$(echo "$resp" | jq -r '.analyses[0].revision // empty')"
-        if [ -n "$revision" ] && [ "$revision" = "$expected" ]; then
-            return 0
-        fi
-        sleep "$interval"
-        elapsed=$((elapsed + interval))
-    done
-
-    echo "sonarqube: analysis for ${expected} did not appear within ${timeout}s — writing analysis_status=pending" >&2
-    return 1
+    local result
+    result="$(python3 "$(dirname "${BASH_SOURCE[0]}")/sq_client.py" \
+        "$(sq_base_url)" "$project_key" "$(sq_scope_query)")" || return 1
+    [ "$(echo "$result" | jq -r '.analysis_status')" = "complete" ] || return 1
+    echo "$result"
 }
 
-# Fetch and map SonarQube measures for the current scope.
+# Map the SonarQube measures fetched by sq_fetch_analysis.
 # Writes the full tool-agnostic + native payload to Component JSON.
-# Args: $1 = project_key, $2 = integration ("api"|"auto").
+# Args: $1 = project_key, $2 = integration ("api"|"auto"),
+#       $3 = sq_fetch_analysis output.
 sq_collect_measures() {
     local project_key="$1"
     local integration="$2"
-    local scope
-    scope="$(sq_scope_query)"
-
-    local metric_keys
-    metric_keys="alert_status,coverage,duplicated_lines_density,bugs,vulnerabilities,code_smells,security_hotspots,ncloc,reliability_rating,security_rating,sqale_rating,security_review_rating,sqale_index"
+    local analysis="$3"
 
     local measures_json
-    measures_json="$(sq_api_get "/api/measures/component?component=${project_key}&metricKeys=${metric_keys}${scope}" 2>/dev/null || echo '{}')"
+    measures_json="$(echo "$analysis" | jq -c '.measures // {}')"
 
     if [ -z "$measures_json" ] || [ "$(echo "$measures_json" | jq -r '.component.measures // empty')" = "" ]; then
         echo "sonarqube: no measures returned for ${project_key} — writing analysis_status=pending" >&2
@@ -138,7 +107,7 @@ sq_collect_measures() {
     # Quality gate detail (status + failed condition count). Fall back to
     # alert_status if the structured endpoint is unavailable.
     local gate_json gate_status gate_failed
-    gate_json="$(sq_api_get "/api/qualitygates/project_status?projectKey=${project_key}${scope}" 2>/dev/null || echo '{}')"
+    gate_json="$(echo "$analysis" | jq -c '.quality_gate // {}')"
     gate_status="$(echo "$gate_json" | jq -r '.projectStatus.status // empty')"
     gate_failed="$(echo "$gate_json" | jq -r '[.projectStatus.conditions[]? | select(.status == "ERROR")] | length')"
     if [ -z "$gate_status" ]; then
@@ -150,7 +119,7 @@ sq_collect_measures() {
 
     # Severity-bucketed issue counts via the issues/search facets endpoint.
     local issues_json issues_out
-    issues_json="$(sq_api_get "/api/issues/search?componentKeys=${project_key}&facets=severities&ps=1${scope}" 2>/dev/null || echo '{}')"
+    issues_json="$(echo "$analysis" | jq -c '.issues // {}')"
     issues_out="$(echo "$issues_json" | jq -c '
       (.facets // [] | map(select(.property=="severities"))[0].values // []) as $f
       | (reduce $f[] as $v ({}; .[$v.val] = $v.count)) as $by
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Fetch a SonarQube analysis over one keep-alive session, concurrently.
+
+Waits for the analysis of the expected commit the way `api` and `auto`
+always have. Then it issues the measures, quality-gate and issue-facet
+calls at the same time instead of one after another. Every request reuses
+an idle keep-alive connection from a shared pool, so TLS is negotiated
+once per concurrent request rather than once per call — the analysis polls
+and one of the data calls all ride the same connection.
+
+The `.code_quality` mapping stays in helpers.sh; this only fetches.
+
+Usage: sq_client.py <base-url> <project-key> <scope-query>
+Inputs (env): LUNAR_SECRET_SONARQUBE_TOKEN, LUNAR_COMPONENT_GIT_SHA,
+    LUNAR_VAR_API_POLL_TIMEOUT_SECONDS, LUNAR_VAR_API_POLL_INTERVAL_SECONDS
+Stdout: {"analysis_status": "complete"|"pending",
+         "measures": {...}, "quality_gate": {...}, "issues": {...}}
+    A call that fails yields {} in its slot, as the sequential curl calls
+    it replaces did. The three slots are omitted when the analysis is
+    pending.
+"""
+
+import base64
+import http.client
+import json
+import os
+import ssl
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+METRIC_KEYS = (
+    "alert_status,coverage,duplicated_lines_density,bugs,vulnerabilities,"
+    "code_smells,security_hotspots,ncloc,reliability_rating,security_rating,"
+    "sqale_rating,security_review_rating,sqale_index"
+)
+
+REQUEST_TIMEOUT_SECONDS = 30
+
+
+class ApiError(Exception):
+    pass
+
+
+class Session:
+    """A pool of keep-alive connections to one SonarQube server.
+
+    An http.client connection serves one request at a time, so each request
+    takes an idle connection from the pool (opening one only if none is idle)
+    and puts it back once the response is read.
+    """
+
+    def __init__(self, base_url, token):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.context = ssl.create_default_context() if self.scheme == "https" else None
+        auth = base64.b64encode(f"{token}:".encode()).decode()
+        self.headers = {
+            "Authorization": f"Basic {auth}",
+            "Accept": "application/json",
+            "Connection": "keep-alive",
+        }
+        self.proxy = self._proxy()
+        self.proxy_headers = self._proxy_headers()
+        if self.proxy_headers and self.scheme == "http":
+            self.headers.update(self.proxy_headers)
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _proxy(self):
+        proxy = getproxies().get(self.scheme)
+        if not proxy or proxy_bypass(self.host):
+            return None
+        return urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+
+    def _proxy_headers(self):
+        # user:pass@ in the proxy URL is sent as Basic auth, as curl does: on
+        # the CONNECT for HTTPS, on every request for plain HTTP.
+        if not self.proxy or self.proxy.username is None:
+            return {}
+        creds = f"{unquote(self.proxy.username)}:{unquote(self.proxy.password or '')}"
+        return {"Proxy-Authorization": "Basic " + base64.b64encode(creds.encode()).decode()}
+
+    def _connect(self):
+        # Like curl, honour HTTPS_PROXY/HTTP_PROXY and NO_PROXY: HTTPS goes
+        # through a CONNECT tunnel, plain HTTP to the proxy directly.
+        if self.proxy:
+            host, port = self.proxy.hostname, self.proxy.port or 80
+        else:
+            host, port = self.host, self.port
+        if self.scheme == "https":
+            conn = http.client.HTTPSConnection(
+                host, port, timeout=REQUEST_TIMEOUT_SECONDS, context=self.context
+            )
+            if self.proxy:
+                conn.set_tunnel(self.host, self.port, headers=self.proxy_headers)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=REQUEST_TIMEOUT_SECONDS)
+        return conn
+
+    def _target(self, path):
+        if self.proxy and self.scheme == "http":
+            netloc = self.host if self.port is None else f"{self.host}:{self.port}"
+            return f"http://{netloc}{self.prefix}{path}"
+        return f"{self.prefix}{path}"
+
+    def _checkout(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def _checkin(self, conn):
+        with self._lock:
+            self._idle.append(conn)
+
+    def get(self, path):
+        """GETs a Web API path and returns the decoded JSON body.
+
+        A keep-alive connection the server has since closed is reopened and
+        the request sent once more; anything else raises ApiError.
+        """
+        for attempt in (1, 2):
+            conn = self._checkout()
+            try:
+                conn.request("GET", self._target(path), headers=self.headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                conn.close()
+                if attempt == 2:
+                    raise ApiError(f"{path}: {e}") from e
+                continue
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                raise ApiError(f"{path}: {e}") from e
+            if resp.will_close:
+                conn.close()
+            else:
+                self._checkin(conn)
+            if not 200 <= resp.status < 300:
+                raise ApiError(f"{path}: HTTP {resp.status}")
+            try:
+                return json.loads(body)
+            except ValueError as e:
+                raise ApiError(f"{path}: invalid JSON") from e
+
+
+def _or_empty(future):
+    try:
+        return future.result()
+    except ApiError as e:
+        print(f"sonarqube: {e}", file=sys.stderr)
+        return {}
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name) or default)
+    except ValueError:
+        return default
+
+
+def main():
+    base_url, project_key, scope = sys.argv[1:4]
+    session = Session(base_url, os.environ.get("LUNAR_SECRET_SONARQUBE_TOKEN", ""))
+    expected = os.environ.get("LUNAR_COMPONENT_GIT_SHA", "")
+    timeout = _env_int("LUNAR_VAR_API_POLL_TIMEOUT_SECONDS", 180)
+    interval = _env_int("LUNAR_VAR_API_POLL_INTERVAL_SECONDS", 10)
+
+    analyses = f"/api/project_analyses/search?project={project_key}{scope}&ps=1"
+    data_paths = {
+        "measures": f"/api/measures/component?component={project_key}&metricKeys={METRIC_KEYS}{scope}",
+        "quality_gate": f"/api/qualitygates/project_status?projectKey={project_key}{scope}",
+        "issues": f"/api/issues/search?componentKeys={project_key}&facets=severities&ps=1{scope}",
+    }
+    out = {"analysis_status": "pending"}
+
+    with ThreadPoolExecutor(max_workers=len(data_paths) + 1) as pool:
+        if not expected:
+            # No commit to wait for: the analysis check is a single shot and
+            # rides along with the data calls.
+            check = pool.submit(session.get, analyses)
+            data = {k: pool.submit(session.get, p) for k, p in data_paths.items()}
+            try:
+                check.result()
+            except ApiError:
+                return out
+        else:
+            # The data calls wait until the analysis of this commit is
+            # published, so they never read the previous analysis.
+            elapsed = 0
+            while True:
+                if elapsed >= timeout:
+                    print(
+                        f"sonarqube: analysis for {expected} did not appear within {timeout}s"
+                        " — writing analysis_status=pending",
+                        file=sys.stderr,
+                    )
+                    return out
+                try:
+                    found = session.get(analyses).get("analyses") or []
+                except ApiError:
+                    found = []
+                if found and found[0].get("revision") == expected:
+                    break
+                time.sleep(interval)
+                elapsed += interval
+            data = {k: pool.submit(session.get, p) for k, p in data_paths.items()}
+
+        out["analysis_status"] = "complete"
+        for key, future in data.items():
+            out[key] = _or_empty(future)
+    return out
+
+
+if __name__ == "__main__":
+    json.dump(main(), sys.stdout)
+    sys.stdout.write("\n")
@@ -3,6 +3,8 @@ set -e
 
 echo "Running syft generate collector" >&2
 
+PLUGIN_DIR="${LUNAR_PLUGIN_ROOT:-$(cd "$(dirname "${BASH_SOURCE[0]:-$0}")" 2>/dev/null && pwd)}"
+
 # Record source metadata
 SYFT_VERSION=$(syft version -o json 2>/dev/null | jq -r '.version // empty' || syft version 2>/dev/null | head -1 | grep -oE '[0-9]+\.[0-9]+(\.[0-9]+)?' || echo "")
 lunar collect ".sbom.auto.source.tool" "syft"
@@ -42,22 +44,24 @@ fi
 # For Rust projects: fetch crate sources so we can extract license metadata
 # Syft's Rust cataloger reads Cargo.lock for deps but doesn't resolve licenses,
 # so we build a license map from the downloaded crate Cargo.toml files and inject
-# it into the SBOM as a post-processing step.
+# it into the SBOM as a post-processing step. Only the crates pinned in
+# Cargo.lock are resolved, through a crate@version cache kept next to the cargo
+# registry (or at rust_license_cache), so warm runners skip the manifest reads.
 RUST_LICENSE_MAP="/tmp/rust-license-map.json"
 if command -v cargo >/dev/null 2>&1 && { [[ -f "Cargo.lock" ]] || [[ -f "Cargo.toml" ]]; }; then
   echo "Detected Rust project; fetching crate sources for license detection..." >&2
-  PLUGIN_DIR="${LUNAR_PLUGIN_ROOT:-$(cd "$(dirname "${BASH_SOURCE[0]:-$0}")" 2>/dev/null && pwd)}"
   (
     set +e
     cargo fetch --quiet 2>&1 || true
     CARGO_HOME="${CARGO_HOME:-$HOME/.cargo}"
     REGISTRY_SRC="$CARGO_HOME/registry/src"
+    LICENSE_CACHE="${LUNAR_VAR_RUST_LICENSE_CACHE:-$CARGO_HOME/registry/lunar-rust-licenses.json}"
     if [[ -d "$REGISTRY_SRC" ]]; then
       SCRIPT="$PLUGIN_DIR/rust-license-map.py"
       if [[ ! -f "$SCRIPT" ]]; then
         echo "rust-license-map.py not found at $SCRIPT (LUNAR_PLUGIN_ROOT=$LUNAR_PLUGIN_ROOT)" >&2
       else
-        python3 "$SCRIPT" "$REGISTRY_SRC" "$RUST_LICENSE_MAP" 2>&1
+        python3 "$SCRIPT" "$REGISTRY_SRC" "$RUST_LICENSE_MAP" Cargo.lock "$LICENSE_CACHE" 2>&1
       fi
     else
       echo "No registry src dir at $REGISTRY_SRC" >&2
@@ -72,32 +76,16 @@ if ! syft dir:. -o cyclonedx-json > "$SBOM_FILE"; then
   exit 1
 fi
 
-# Skip empty SBOMs
-if jq -e '(.components // []) | length == 0' "$SBOM_FILE" >/dev/null 2>&1; then
+# Post-process in one streaming pass: count components (empty SBOMs are
+# skipped), inject Rust licenses into components that have none, and write the
+# document to collect. Components are handled one at a time, so a 100MB SBOM
+# from a large Java or monorepo build never sits in memory whole.
+SBOM_OUT="/tmp/sbom-collect.json"
+COMPONENTS=$(python3 "$PLUGIN_DIR/sbom-postprocess.py" "$SBOM_FILE" "$SBOM_OUT" "$RUST_LICENSE_MAP")
+if [ "$COMPONENTS" = "0" ]; then
   echo "SBOM has no components; skipping collection" >&2
   exit 0
 fi
 
-# Inject Rust license data into SBOM components that are missing licenses
-if [[ -f "$RUST_LICENSE_MAP" ]] && jq -e 'length > 0' "$RUST_LICENSE_MAP" >/dev/null 2>&1; then
-  SBOM_INJECTED="/tmp/sbom-injected.json"
-  jq --slurpfile lm "$RUST_LICENSE_MAP" '
-    ($lm[0]) as $licenses |
-    .components |= [.[] | if (.licenses == null or .licenses == []) then
-      (.name + "@" + (.version // "")) as $key |
-      if $licenses[$key] then
-        ($licenses[$key]) as $lic |
-        if ($lic | test(" OR | AND ")) then
-          .licenses = [{ "expression": $lic }]
-        else
-          .licenses = [{ "license": { "id": $lic } }]
-        end
-      else . end
-    else . end]
-  ' "$SBOM_FILE" > "$SBOM_INJECTED" && mv "$SBOM_INJECTED" "$SBOM_FILE"
-  count=$(jq '[.components[] | select(.licenses != null and .licenses != [])] | length' "$SBOM_FILE")
-  echo "Injected licenses into SBOM ($count components with licenses)" >&2
-fi
-
 # Collect the full SBOM
-cat "$SBOM_FILE" | lunar collect -j ".sbom.auto.cyclonedx" -
+lunar collect -j ".sbom.auto.cyclonedx" - < "$SBOM_OUT"
@@ -1,31 +1,174 @@
-"""Extract license metadata from cargo registry cache into a JSON map.
+"""Extract license metadata for locked Rust crates into a JSON map.
 
-Reads Cargo.toml files from the cargo registry source directory and outputs
-a JSON object mapping "crate_name@version" to SPDX license expressions.
+Usage: rust-license-map.py REGISTRY_SRC OUTPUT [CARGO_LOCK] [CACHE]
+
+Resolves only the registry crates pinned in Cargo.lock, reads each crate's
+Cargo.toml from the cargo registry source directory, and outputs a JSON object
+mapping "crate_name@version" to SPDX license expressions.
+
+A published crate version is immutable, so licenses are kept in a persistent
+crate@version cache. Warm runs on a long-lived runner only touch the registry
+for crates that are not cached yet. Without a Cargo.lock, every crate in the
+registry is scanned (the previous behavior).
 """
-import os
+import glob
 import json
+import os
 import re
-import glob
 import sys
 
-registry_src = sys.argv[1]
-output_path = sys.argv[2]
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+LICENSE_LINE = re.compile(r'^license\s*=\s*["\']([^"\']+)["\']')
+CRATE_DIR = re.compile(r"^(.+)-(\d+\..*)$")
+CACHE_VERSION = 1
+
 
-license_map = {}
-for toml_path in glob.glob(os.path.join(registry_src, "*", "*", "Cargo.toml")):
-    crate_dir = os.path.basename(os.path.dirname(toml_path))
-    m = re.match(r"^(.+)-(\d+\..*)$", crate_dir)
-    if not m:
-        continue
-    crate_name, crate_version = m.group(1), m.group(2)
+def normalize_license(value):
+    """Cargo accepts the legacy "MIT/Apache-2.0" form; emit SPDX OR."""
+    return value.strip().replace("/", " OR ")
+
+
+def read_toml(path):
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def locked_crates(lock_path):
+    """Return (name, version) for every registry package in Cargo.lock.
+
+    Path and git dependencies have no registry source and are skipped.
+    """
+    if tomllib is not None:
+        packages = read_toml(lock_path).get("package", [])
+    else:
+        packages, current = [], None
+        with open(lock_path) as f:
+            for line in f:
+                line = line.strip()
+                if line == "[[package]]":
+                    current = {}
+                    packages.append(current)
+                elif current is not None and "=" in line:
+                    key, _, value = line.partition("=")
+                    current[key.strip()] = value.strip().strip('"')
+    crates = []
+    for pkg in packages:
+        source = pkg.get("source", "")
+        if pkg.get("name") and pkg.get("version") and source.startswith(("registry+", "sparse+")):
+            crates.append((pkg["name"], pkg["version"]))
+    return crates
+
+
+def manifest_license(toml_path):
+    """Return the manifest's license expression, or None if it declares none."""
+    if tomllib is not None:
+        try:
+            value = read_toml(toml_path).get("package", {}).get("license")
+        except (tomllib.TOMLDecodeError, UnicodeDecodeError):
+            value = None
+        return normalize_license(value) if isinstance(value, str) else None
     with open(toml_path) as f:
         for line in f:
-            lm = re.match(r'^license\s*=\s*["\']([^"\']+)["\']', line)
-            if lm:
-                lic = lm.group(1).strip().replace("/", " OR ")
-                license_map[crate_name + "@" + crate_version] = lic
-                break
-
-json.dump(license_map, open(output_path, "w"))
-print(f"Built license map for {len(license_map)} Rust crates", file=sys.stderr)
+            m = LICENSE_LINE.match(line)
+            if m:
+                return normalize_license(m.group(1))
+    return None
+
+
+def load_cache(path):
+    if not path:
+        return {}
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("licenses", {})
+
+
+def save_cache(path, licenses):
+    """Write the cache atomically so a concurrent run never reads a torn file."""
+    if not path:
+        return
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump({"version": CACHE_VERSION, "licenses": licenses}, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Could not write Rust license cache {path}: {e}", file=sys.stderr)
+
+
+def from_lockfile(registry_src, lock_path, cache):
+    """Build the license map for the locked crates, consulting the cache first.
+
+    Cached entries include crates with no license field (stored as null) so
+    they are not re-read either; crates missing from the registry are not
+    cached and are retried next run.
+    """
+    try:
+        index_dirs = [
+            os.path.join(registry_src, d)
+            for d in sorted(os.listdir(registry_src))
+            if os.path.isdir(os.path.join(registry_src, d))
+        ]
+    except OSError:
+        index_dirs = []
+
+    license_map, hits, misses = {}, 0, 0
+    for name, version in locked_crates(lock_path):
+        key = f"{name}@{version}"
+        if key in cache:
+            hits += 1
+        else:
+            for index_dir in index_dirs:
+                toml_path = os.path.join(index_dir, f"{name}-{version}", "Cargo.toml")
+                if os.path.isfile(toml_path):
+                    cache[key] = manifest_license(toml_path)
+                    misses += 1
+                    break
+        if cache.get(key):
+            license_map[key] = cache[key]
+    print(f"Rust license cache: {hits} hits, {misses} manifests read", file=sys.stderr)
+    return license_map
+
+
+def from_registry(registry_src):
+    """Fallback without a Cargo.lock: scan every crate in the registry."""
+    license_map = {}
+    for toml_path in glob.glob(os.path.join(registry_src, "*", "*", "Cargo.toml")):
+        m = CRATE_DIR.match(os.path.basename(os.path.dirname(toml_path)))
+        if not m:
+            continue
+        lic = manifest_license(toml_path)
+        if lic:
+            license_map[m.group(1) + "@" + m.group(2)] = lic
+    return license_map
+
+
+def main(argv):
+    registry_src, output_path = argv[1], argv[2]
+    lock_path = argv[3] if len(argv) > 3 else "Cargo.lock"
+    cache_path = argv[4] if len(argv) > 4 else ""
+
+    if os.path.isfile(lock_path):
+        cache = load_cache(cache_path)
+        license_map = from_lockfile(registry_src, lock_path, cache)
+        save_cache(cache_path, cache)
+    else:
+        license_map = from_registry(registry_src)
+
+    with open(output_path, "w") as f:
+        json.dump(license_map, f)
+    print(f"Built license map for {len(license_map)} Rust crates", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
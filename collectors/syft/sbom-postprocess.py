@@ -0,0 +1,160 @@
+"""Stream a CycloneDX JSON SBOM once, injecting Rust licenses on the way.
+
+Usage: sbom-postprocess.py SBOM OUTPUT [LICENSE_MAP]
+
+Copies SBOM to OUTPUT in a single pass. Top-level arrays (components,
+dependencies, ...) are streamed element by element, so memory stays bounded by
+the largest single component rather than the whole document. Components with
+no licenses get one from LICENSE_MAP (the "crate@version" -> SPDX map built by
+rust-license-map.py) when it has an entry for them.
+
+Prints the number of top-level components to stdout; 0 means the SBOM is empty
+and should not be collected.
+"""
+import json
+import re
+import sys
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+CHUNK_SIZE = 1 << 20
+COMPACT = (",", ":")
+
+
+class JSONStream:
+    """Incremental reader over one JSON document.
+
+    Values are decoded one at a time with raw_decode; the buffer is refilled
+    (and the consumed prefix dropped) whenever a value runs past its end.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        # Read at least as much as is buffered so a large value costs a
+        # logarithmic number of retries, not a linear one.
+        data = self.f.read(max(CHUNK_SIZE, len(self.buf) - self.pos))
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Return the next non-whitespace character ("" at end of input)."""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars):
+        ch = self.peek()
+        if not ch or ch not in chars:
+            raise ValueError(f"expected one of {chars!r} in SBOM, got {ch!r}")
+        self.pos += 1
+        return ch
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number can end exactly at the buffer boundary and still be
+                # truncated; only trust it once more input (or EOF) follows.
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def inject_license(component, licenses):
+    """Mirror of the former jq injection: fill only components with no licenses."""
+    if component.get("licenses"):
+        return
+    lic = licenses.get(f"{component.get('name', '')}@{component.get('version') or ''}")
+    if not lic:
+        return
+    if " OR " in lic or " AND " in lic:
+        component["licenses"] = [{"expression": lic}]
+    else:
+        component["licenses"] = [{"license": {"id": lic}}]
+
+
+def process(src, out, licenses):
+    """Copy the SBOM from src to out; return (components, licensed) counts."""
+    stream = JSONStream(src)
+    components = licensed = 0
+
+    stream.expect("{")
+    out.write("{")
+    if stream.peek() == "}":
+        stream.pos += 1
+        out.write("}")
+        return 0, 0
+
+    first_key = True
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        out.write(("" if first_key else ",") + json.dumps(key) + ":")
+        first_key = False
+
+        if stream.peek() == "[":
+            stream.pos += 1
+            out.write("[")
+            if stream.peek() == "]":
+                stream.pos += 1
+            else:
+                first_item = True
+                while True:
+                    item = stream.value()
+                    if key == "components" and isinstance(item, dict):
+                        components += 1
+                        if licenses:
+                            inject_license(item, licenses)
+                        if item.get("licenses"):
+                            licensed += 1
+                    out.write(("" if first_item else ",") + json.dumps(item, separators=COMPACT, ensure_ascii=False))
+                    first_item = False
+                    if stream.expect(",]") == "]":
+                        break
+            out.write("]")
+        else:
+            out.write(json.dumps(stream.value(), separators=COMPACT, ensure_ascii=False))
+
+        if stream.expect(",}") == "}":
+            break
+    out.write("}")
+    return components, licensed
+
+
+def main(argv):
+    sbom_path, output_path = argv[1], argv[2]
+    licenses = {}
+    if len(argv) > 3:
+        try:
+            with open(argv[3]) as f:
+                licenses = json.load(f)
+        except (OSError, ValueError):
+            licenses = {}
+
+    with open(sbom_path, encoding="utf-8") as src, open(output_path, "w", encoding="utf-8") as out:
+        components, licensed = process(src, out, licenses)
+
+    if licenses:
+        print(f"Injected licenses into SBOM ({licensed} components with licenses)", file=sys.stderr)
+    print(components)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
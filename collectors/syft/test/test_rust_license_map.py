@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Tests for the syft collector's Rust license map builder."""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(os.path.dirname(HERE), "rust-license-map.py")
+
+LOCK = textwrap.dedent(
+    """\
+    version = 3
+
+    [[package]]
+    name = "serde"
+    version = "1.0.200"
+    source = "registry+https://github.com/rust-lang/crates.io-index"
+
+    [[package]]
+    name = "dual"
+    version = "0.2.0"
+    source = "sparse+https://index.crates.io/"
+
+    [[package]]
+    name = "myapp"
+    version = "0.1.0"
+    """
+)
+
+
+class RustLicenseMapTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.registry = os.path.join(self.root, "registry", "src")
+        self.lock = os.path.join(self.root, "Cargo.lock")
+        self.cache = os.path.join(self.root, "cache.json")
+        self.out = os.path.join(self.root, "map.json")
+        with open(self.lock, "w") as f:
+            f.write(LOCK)
+        self.crate("index-a", "serde", "1.0.200", 'license = "MIT OR Apache-2.0"')
+        self.crate("index-b", "dual", "0.2.0", 'license = "MIT/Apache-2.0"')
+        # Cached on the runner by another project, but not in this lockfile.
+        self.crate("index-a", "unrelated", "9.9.9", 'license = "GPL-3.0"')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def crate(self, index, name, version, license_line):
+        path = os.path.join(self.registry, index, f"{name}-{version}")
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "Cargo.toml"), "w") as f:
+            f.write(f'[package]\nname = "{name}"\nversion = "{version}"\n{license_line}\n')
+
+    def run_script(self, *extra):
+        proc = subprocess.run(
+            [sys.executable, SCRIPT, self.registry, self.out, *extra],
+            capture_output=True, text=True, cwd=self.root,
+        )
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        with open(self.out) as f:
+            return json.load(f), proc.stderr
+
+    def test_only_locked_registry_crates_are_resolved(self):
+        result, _ = self.run_script(self.lock, self.cache)
+        self.assertEqual(result, {
+            "serde@1.0.200": "MIT OR Apache-2.0",
+            "dual@0.2.0": "MIT OR Apache-2.0",
+        })
+
+    def test_warm_run_reads_no_manifests(self):
+        self.run_script(self.lock, self.cache)
+        # Removing the sources proves the second run is served from the cache.
+        subprocess.run(["rm", "-rf", self.registry], check=True)
+        os.makedirs(self.registry)
+        result, stderr = self.run_script(self.lock, self.cache)
+        self.assertEqual(result["serde@1.0.200"], "MIT OR Apache-2.0")
+        self.assertIn("2 hits, 0 manifests read", stderr)
+
+    def test_missing_crate_is_not_cached(self):
+        subprocess.run(["rm", "-rf", os.path.join(self.registry, "index-b")], check=True)
+        self.run_script(self.lock, self.cache)
+        with open(self.cache) as f:
+            self.assertNotIn("dual@0.2.0", json.load(f)["licenses"])
+
+    def test_without_lockfile_scans_whole_registry(self):
+        os.remove(self.lock)
+        result, _ = self.run_script(self.lock)
+        self.assertEqual(result["unrelated@9.9.9"], "GPL-3.0")
+        self.assertEqual(len(result), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Tests for the syft collector's streaming SBOM post-processor."""
+
+import importlib.util
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(os.path.dirname(HERE), "sbom-postprocess.py")
+
+spec = importlib.util.spec_from_file_location("sbom_postprocess", SCRIPT)
+sbom_postprocess = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(sbom_postprocess)
+
+SBOM = {
+    "bomFormat": "CycloneDX",
+    "specVersion": "1.5",
+    "serialNumber": "urn:uuid:1234",
+    "version": 1,
+    "metadata": {"tools": {"components": [{"name": "syft", "version": "1.41.2"}]}},
+    "components": [
+        {"name": "serde", "version": "1.0.200", "type": "library"},
+        {"name": "log", "version": "0.4.21", "licenses": [{"license": {"id": "MIT"}}]},
+        {"name": "tokio", "version": "1.37.0", "licenses": []},
+        {"name": "unknown", "version": "0.0.1", "description": "café ☃"},
+    ],
+    "dependencies": [{"ref": "a", "dependsOn": ["b", "c"]}, {"ref": "b"}],
+}
+LICENSES = {
+    "serde@1.0.200": "MIT OR Apache-2.0",
+    "log@0.4.21": "Apache-2.0",
+    "tokio@1.37.0": "MIT",
+}
+
+
+def process(doc, licenses, chunk_size=None):
+    if chunk_size:
+        sbom_postprocess.CHUNK_SIZE = chunk_size
+    try:
+        out = io.StringIO()
+        counts = sbom_postprocess.process(io.StringIO(json.dumps(doc, indent=2)), out, licenses)
+        return json.loads(out.getvalue()), counts
+    finally:
+        sbom_postprocess.CHUNK_SIZE = 1 << 20
+
+
+class PostprocessTest(unittest.TestCase):
+    def test_injects_only_missing_licenses(self):
+        result, (components, licensed) = process(SBOM, LICENSES)
+        by_name = {c["name"]: c for c in result["components"]}
+        self.assertEqual(by_name["serde"]["licenses"], [{"expression": "MIT OR Apache-2.0"}])
+        self.assertEqual(by_name["log"]["licenses"], [{"license": {"id": "MIT"}}])
+        self.assertEqual(by_name["tokio"]["licenses"], [{"license": {"id": "MIT"}}])
+        self.assertNotIn("licenses", by_name["unknown"])
+        self.assertEqual((components, licensed), (4, 3))
+
+    def test_document_is_otherwise_unchanged(self):
+        result, _ = process(SBOM, {})
+        self.assertEqual(result, SBOM)
+
+    def test_tiny_chunks_match_whole_document(self):
+        # Force every value across buffer boundaries, including the bare number.
+        whole, _ = process(SBOM, LICENSES)
+        for size in (1, 2, 7, 64):
+            chunked, _ = process(SBOM, LICENSES, chunk_size=size)
+            self.assertEqual(chunked, whole, msg=f"chunk size {size}")
+
+    def test_empty_components(self):
+        for doc in ({"bomFormat": "CycloneDX"}, {"components": []}, {}):
+            result, (components, _) = process(doc, LICENSES)
+            self.assertEqual(result, doc)
+            self.assertEqual(components, 0)
+
+    def test_cli_prints_component_count(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "sbom.json")
+            out = os.path.join(tmp, "out.json")
+            lm = os.path.join(tmp, "licenses.json")
+            with open(src, "w") as f:
+                json.dump(SBOM, f)
+            with open(lm, "w") as f:
+                json.dump(LICENSES, f)
+            proc = subprocess.run(
+                [sys.executable, SCRIPT, src, out, lm], capture_output=True, text=True
+            )
+            self.assertEqual(proc.returncode, 0, proc.stderr)
+            self.assertEqual(proc.stdout.strip(), "4")
+            self.assertIn("3 components with licenses", proc.stderr)
+            # A missing license map (non-Rust repo) is not an error.
+            proc = subprocess.run(
+                [sys.executable, SCRIPT, src, out, os.path.join(tmp, "absent.json")],
+                capture_output=True, text=True,
+            )
+            self.assertEqual(proc.returncode, 0, proc.stderr)
+            with open(out) as f:
+                self.assertEqual(json.load(f), SBOM)
+
+
+if __name__ == "__main__":
+    unittest.main()
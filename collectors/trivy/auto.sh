@@ -54,11 +54,27 @@ if [ "$IS_RESCAN" = true ] && { [ "$HIST_SIZE" -gt 0 ] || [ "$MAX_RESCANS" -gt 0
 fi
 # ---------------------------------------------------------------------------
 
+# Compact native storage (opt-in). The raw report is kept under .native so
+# policies can reach fields we don't normalize, but it is usually most of the
+# document. compact_native=true keeps only a pruned projection (identity keys
+# plus the native_fields allowlist) and dedupes .findings by (package, version,
+# CVE) — Trivy reports the same CVE once per lockfile/target. Counts and summary
+# are still computed over every match, so policy results are unchanged. Both are
+# handled by scan_normalize.py.
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+case "${LUNAR_VAR_COMPACT_NATIVE:-false}" in
+  true|1|yes) COMPACT=true ;;
+  *)          COMPACT=false ;;
+esac
+NATIVE_FIELDS="${LUNAR_VAR_NATIVE_FIELDS-cvss,cwe,references}"
+
 # Get Trivy version for source metadata
 TRIVY_VERSION=$(trivy version -f json 2>/dev/null | jq -r '.Version // empty' || trivy version 2>/dev/null | head -1 | grep -oE '[0-9]+\.[0-9]+(\.[0-9]+)?' || echo "")
 
 # Run Trivy filesystem scan (vuln scanner only, JSON output)
 RESULTS_FILE="/tmp/trivy-results.json"
+NATIVE_FILE="/tmp/trivy-native.json"
+NORMALIZED_FILE="/tmp/trivy-normalized.json"
 SCAN_OK=false
 
 if trivy fs --scanners vuln --format json . > "$RESULTS_FILE" 2>/tmp/trivy-stderr.log; then
@@ -107,10 +123,6 @@ if [ "$SCAN_OK" != "true" ]; then
   exit 0
 fi
 
-# Preserve the raw Trivy JSON so policies can read fields we don't normalize
-# (CVSS scores, References, Description, CweIDs, DataSource, etc.).
-lunar collect -j ".sca.native.trivy.results" - < "$RESULTS_FILE"
-
 # Build source metadata JSON. collected_at dates each scan so a snapshot pushed
 # into .sca.history[] is self-describing — integration + timestamp identify the
 # release-time "code" scan vs a scheduled "cron" re-scan.
@@ -122,7 +134,7 @@ SOURCE_JSON=$(jq -n --arg version "$TRIVY_VERSION" --arg integration "$INTEGRATI
 } + (if $version != "" then {version: $version} else {} end)')
 
 # Build the .sca.history + rescan_count fragment, merged into the .sca write
-# below via `+ $extra`. rescan_count is bumped whenever EITHER input is set, so
+# below via --extra. rescan_count is bumped whenever EITHER input is set, so
 # max_rescans works standalone (no dependency on scan_history_size). The history
 # array is maintained only when scan_history_size > 0. The prior scan is
 # snapshotted as a compact {source, vulnerabilities, summary} entry — no
@@ -145,44 +157,20 @@ if [ "$IS_RESCAN" = true ] && { [ "$HIST_SIZE" -gt 0 ] || [ "$MAX_RESCANS" -gt 0
   [ -n "$HISTORY_JSON" ] || HISTORY_JSON="{}"
 fi
 
-# Check if any vulnerabilities found
-VULN_COUNT=$(jq '[.Results[]? | .Vulnerabilities[]?] | length' "$RESULTS_FILE")
-if [ "$VULN_COUNT" = "0" ] || [ -z "$VULN_COUNT" ]; then
-  echo "No vulnerabilities found" >&2
-  # Write everything in a single collect call to avoid merge fragmentation
-  jq -n --argjson source "$SOURCE_JSON" --argjson extra "$HISTORY_JSON" '{
-    source: $source,
-    vulnerabilities: {critical: 0, high: 0, medium: 0, low: 0, total: 0},
-    summary: {has_critical: false, has_high: false, all_fixable: true}
-  } + $extra' | lunar collect -j ".sca" -
-  exit 0
+# Normalize into the tool-agnostic .sca schema in one pass over the report
+# (counts, summary flags and findings together), with source + history merged
+# in so everything lands in a single collect call. The same pass writes the
+# .native payload: the raw report, or in compact mode the pruned projection,
+# with findings deduped by (package, version, CVE). scan_normalize.py is shared
+# with the grype collector.
+NORMALIZE_ARGS=(--source "$SOURCE_JSON" --extra "$HISTORY_JSON" --native-out "$NATIVE_FILE")
+if [ "$COMPACT" = true ]; then
+  NORMALIZE_ARGS+=(--compact --native-fields "$NATIVE_FIELDS")
 fi
+python3 "$SCRIPT_DIR/scan_normalize.py" trivy "$RESULTS_FILE" "${NORMALIZE_ARGS[@]}" > "$NORMALIZED_FILE"
 
-# Build normalized findings, counts, and source in a single JSON blob
-jq -c --argjson source "$SOURCE_JSON" --argjson extra "$HISTORY_JSON" '{
-  source: $source,
-  vulnerabilities: {
-    critical: [.Results[]?.Vulnerabilities[]? | select(.Severity == "CRITICAL")] | length,
-    high:     [.Results[]?.Vulnerabilities[]? | select(.Severity == "HIGH")]     | length,
-    medium:   [.Results[]?.Vulnerabilities[]? | select(.Severity == "MEDIUM")]   | length,
-    low:      [.Results[]?.Vulnerabilities[]? | select(.Severity == "LOW")]      | length,
-    total:    [.Results[]?.Vulnerabilities[]?] | length
-  },
-  findings: [.Results[] as $r | $r.Vulnerabilities[]? | {
-    severity:    (.Severity | ascii_downcase),
-    package:     .PkgName,
-    version:     .InstalledVersion,
-    ecosystem:   $r.Type,
-    cve:         .VulnerabilityID,
-    title:       .Title,
-    fix_version: (.FixedVersion // null),
-    fixable:     (.FixedVersion != null and .FixedVersion != "")
-  }],
-  summary: {
-    has_critical: ([.Results[]?.Vulnerabilities[]? | select(.Severity == "CRITICAL")] | length > 0),
-    has_high:     ([.Results[]?.Vulnerabilities[]? | select(.Severity == "HIGH")] | length > 0),
-    all_fixable:  ([.Results[]?.Vulnerabilities[]? | select(.FixedVersion == null or .FixedVersion == "")] | length == 0)
-  }
-} + $extra' "$RESULTS_FILE" | lunar collect -j ".sca" -
-
-echo "Found $VULN_COUNT vulnerabilities" >&2
+# Store the native record so policies can read fields we don't normalize: the
+# raw Trivy JSON (CVSS scores, References, Description, CweIDs, DataSource,
+# etc.), or in compact mode the identity keys plus the native_fields allowlist.
+lunar collect -j ".sca.native.trivy.results" - < "$NATIVE_FILE"
+lunar collect -j ".sca" - < "$NORMALIZED_FILE"
@@ -21,6 +21,14 @@ case "${LUNAR_COLLECTOR_NAME:-}" in
   *)               INTEGRATION="cron" ;;
 esac
 
+# Compact native storage (opt-in; same inputs and semantics as auto.sh).
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+case "${LUNAR_VAR_COMPACT_NATIVE:-false}" in
+  true|1|yes) COMPACT=true ;;
+  *)          COMPACT=false ;;
+esac
+NATIVE_FIELDS="${LUNAR_VAR_NATIVE_FIELDS-cvss,cwe,references}"
+
 # --- 1. Resolve the image reference to scan ---
 IMAGE_REF="${LUNAR_VAR_CONTAINER_IMAGE:-}"
 
@@ -103,60 +111,24 @@ if ! trivy image --scanners vuln --format json "$IMAGE_REF" > "$RESULTS_FILE" 2>
   exit 0
 fi
 
-OS_FAMILY=$(jq -r '.Metadata.OS.Family // empty' "$RESULTS_FILE")
-OS_VERSION=$(jq -r '.Metadata.OS.Name // empty' "$RESULTS_FILE")
-
-# Preserve the raw Trivy results so policies can read fields we don't normalize.
-lunar collect -j ".container_scan.native.trivy.results" - < "$RESULTS_FILE"
-
 # Source metadata (integration set above: after-json on-push, or cron re-scan).
 SOURCE_JSON=$(jq -n --arg version "$TRIVY_VERSION" --arg integration "$INTEGRATION" '{
   tool: "trivy",
   integration: $integration
 } + (if $version != "" then {version: $version} else {} end)')
 
-OS_JSON=$(jq -n --arg f "$OS_FAMILY" --arg v "$OS_VERSION" '
-  if $f != "" then {os: ({family: $f} + (if $v != "" then {version: $v} else {} end))} else {} end')
-
-VULN_COUNT=$(jq '[.Results[]? | .Vulnerabilities[]?] | length' "$RESULTS_FILE")
-if [ "$VULN_COUNT" = "0" ] || [ -z "$VULN_COUNT" ]; then
-  echo "No vulnerabilities found in $IMAGE_REF" >&2
-  jq -n --argjson source "$SOURCE_JSON" --argjson os "$OS_JSON" --arg image "$IMAGE_REF" '{
-    source: $source,
-    image: $image,
-    vulnerabilities: {critical: 0, high: 0, medium: 0, low: 0, total: 0},
-    summary: {has_critical: false, has_high: false, all_fixable: true}
-  } + $os' | lunar collect -j ".container_scan" -
-  exit 0
+# Normalize into the tool-agnostic .container_scan schema in one pass (same
+# normalizer as auto.sh's .sca, plus image + os). The same pass writes the
+# .native payload — raw, or the compact projection with deduped findings.
+NATIVE_FILE="/tmp/trivy-container-native.json"
+NORMALIZED_FILE="/tmp/trivy-container-normalized.json"
+NORMALIZE_ARGS=(--source "$SOURCE_JSON" --image "$IMAGE_REF" --os --native-out "$NATIVE_FILE")
+if [ "$COMPACT" = true ]; then
+  NORMALIZE_ARGS+=(--compact --native-fields "$NATIVE_FIELDS")
 fi
+python3 "$SCRIPT_DIR/scan_normalize.py" trivy "$RESULTS_FILE" "${NORMALIZE_ARGS[@]}" > "$NORMALIZED_FILE"
 
-# Normalize into the tool-agnostic .container_scan schema (mirrors auto.sh's
-# .sca normalization; adds image + os).
-jq -c --argjson source "$SOURCE_JSON" --argjson os "$OS_JSON" --arg image "$IMAGE_REF" '{
-  source: $source,
-  image: $image,
-  vulnerabilities: {
-    critical: [.Results[]?.Vulnerabilities[]? | select(.Severity == "CRITICAL")] | length,
-    high:     [.Results[]?.Vulnerabilities[]? | select(.Severity == "HIGH")]     | length,
-    medium:   [.Results[]?.Vulnerabilities[]? | select(.Severity == "MEDIUM")]   | length,
-    low:      [.Results[]?.Vulnerabilities[]? | select(.Severity == "LOW")]      | length,
-    total:    [.Results[]?.Vulnerabilities[]?] | length
-  },
-  findings: [.Results[] as $r | $r.Vulnerabilities[]? | {
-    severity:    (.Severity | ascii_downcase),
-    package:     .PkgName,
-    version:     .InstalledVersion,
-    ecosystem:   $r.Type,
-    cve:         .VulnerabilityID,
-    title:       .Title,
-    fix_version: (.FixedVersion // null),
-    fixable:     (.FixedVersion != null and .FixedVersion != "")
-  }],
-  summary: {
-    has_critical: ([.Results[]?.Vulnerabilities[]? | select(.Severity == "CRITICAL")] | length > 0),
-    has_high:     ([.Results[]?.Vulnerabilities[]? | select(.Severity == "HIGH")]     | length > 0),
-    all_fixable:  ([.Results[]?.Vulnerabilities[]? | select(.FixedVersion == null or .FixedVersion == "")] | length == 0)
-  }
-} + $os' "$RESULTS_FILE" | lunar collect -j ".container_scan" -
-
-echo "Found $VULN_COUNT vulnerabilities in $IMAGE_REF" >&2
+# Store the native record (raw Trivy results, or the compact projection) so
+# policies can read fields we don't normalize.
+lunar collect -j ".container_scan.native.trivy.results" - < "$NATIVE_FILE"
+lunar collect -j ".container_scan" - < "$NORMALIZED_FILE"
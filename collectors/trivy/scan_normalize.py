@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""Normalize scanner JSON into the tool-agnostic .sca / .container_scan schema.
+
+Usage: scan_normalize.py TOOL RESULTS [options]
+
+TOOL is trivy or grype. RESULTS is the scanner's JSON report. Counts, summary
+flags and findings are built in a single walk over the report and the
+normalized object is written to stdout, ready for `lunar collect -j .sca -`
+(or `.container_scan`).
+
+Options:
+  --source JSON         Object stored as .source.
+  --extra JSON          Object merged over the result (e.g. history fields).
+  --image REF           Scanned image reference, stored as .image.
+  --os                  Add .os from the report's OS/distro metadata.
+  --native-out PATH     Also write the .native payload for this tool to PATH.
+  --compact             Prune the native payload to identity keys plus
+                        --native-fields, and dedupe findings by
+                        (package, version, CVE) within this report.
+                        Counts and summary still cover every match, so
+                        vulnerabilities.total can exceed len(findings).
+  --native-fields LIST  Comma-separated allowlist for --compact.
+
+This file is shared verbatim by the trivy and grype collectors, which run in
+the lunar-scripts image. Plugins ship as standalone directories, so each
+carries its own copy; keep them identical. The native snyk and semgrep CI
+collectors stay bash + jq.
+"""
+
+import json
+import sys
+
+SEVERITIES = ("critical", "high", "medium", "low")
+
+# Friendly --native-fields names, per tool. Unknown names are used verbatim.
+NATIVE_FIELD_ALIASES = {
+    "trivy": {
+        "cvss": ["CVSS"],
+        "cwe": ["CweIDs"],
+        "references": ["References"],
+        "description": ["Description"],
+        "published": ["PublishedDate"],
+        "datasource": ["DataSource"],
+        "title": ["Title"],
+    },
+    "grype": {
+        "cvss": ["cvss"],
+        "cwe": ["cwes"],
+        "references": ["urls", "dataSource"],
+        "description": ["description"],
+        "namespace": ["namespace"],
+    },
+}
+TRIVY_IDENTITY = ("VulnerabilityID", "PkgName", "InstalledVersion", "FixedVersion", "Severity")
+GRYPE_IDENTITY = ("id", "severity", "fix")
+
+
+class Summary:
+    """Accumulates counts, summary flags and findings in one pass."""
+
+    def __init__(self, dedupe=False):
+        self.counts = dict.fromkeys(SEVERITIES, 0)
+        self.total = 0
+        self.all_fixable = True
+        self.findings = []
+        self._seen = set() if dedupe else None
+
+    def add(self, bucket, fixable, finding):
+        """Count one match. `bucket` may be None (e.g. Unknown): total only.
+
+        Counts cover every match, duplicates included, so that policies see
+        the same totals with or without dedupe; only `findings` is deduped.
+        """
+        self.total += 1
+        if bucket in self.counts:
+            self.counts[bucket] += 1
+        if not fixable:
+            self.all_fixable = False
+        if self._seen is not None:
+            key = (finding.get("package"), finding.get("version"), finding.get("cve"))
+            if key in self._seen:
+                return
+            self._seen.add(key)
+        self.findings.append(finding)
+
+    def result(self):
+        out = {"vulnerabilities": dict(self.counts, total=self.total), "findings": self.findings}
+        # The image scanners have always reported critical/high flags only.
+        summary = {f"has_{s}": self.counts[s] > 0 for s in SEVERITIES[:2]}
+        summary["all_fixable"] = self.all_fixable
+        out["summary"] = summary
+        return out
+
+
+def native_keys(tool, fields, identity):
+    keep = list(identity)
+    aliases = NATIVE_FIELD_ALIASES.get(tool, {})
+    for name in (fields or "").split(","):
+        name = name.strip()
+        if name:
+            keep.extend(aliases.get(name.lower(), [name]))
+    return keep
+
+
+def pick(obj, keys):
+    return {k: obj[k] for k in keys if k in obj}
+
+
+def normalize_trivy(report, acc, compact, fields):
+    keep = native_keys("trivy", fields, TRIVY_IDENTITY)
+    native_results = []
+    for result in report.get("Results") or []:
+        vulns = result.get("Vulnerabilities") or []
+        for v in vulns:
+            severity = (v.get("Severity") or "").lower()
+            fix = v.get("FixedVersion")
+            fixable = fix is not None and fix != ""
+            acc.add(severity, fixable, {
+                "severity": severity,
+                "package": v.get("PkgName"),
+                "version": v.get("InstalledVersion"),
+                "ecosystem": result.get("Type"),
+                "cve": v.get("VulnerabilityID"),
+                "title": v.get("Title"),
+                "fix_version": fix,
+                "fixable": fixable,
+            })
+        if compact and vulns:
+            entry = pick(result, ("Target", "Class", "Type"))
+            entry["Vulnerabilities"] = [pick(v, keep) for v in vulns]
+            native_results.append(entry)
+
+    if not compact:
+        native = report
+    else:
+        native = pick(report, ("SchemaVersion", "ArtifactName", "ArtifactType"))
+        os_info = (report.get("Metadata") or {}).get("OS")
+        if os_info:
+            native["Metadata"] = {"OS": os_info}
+        native["Results"] = native_results
+    meta_os = (report.get("Metadata") or {}).get("OS") or {}
+    return native, meta_os.get("Family"), meta_os.get("Name")
+
+
+def normalize_grype(report, acc, compact, fields):
+    keep = native_keys("grype", fields, GRYPE_IDENTITY)
+    matches = report.get("matches") or []
+    native = []
+    for m in matches:
+        vuln = m.get("vulnerability") or {}
+        artifact = m.get("artifact") or {}
+        severity = (vuln.get("severity") or "Unknown").lower()
+        if severity == "negligible":
+            severity = "low"
+        fix = vuln.get("fix") or {}
+        fixable = fix.get("state") == "fixed"
+        acc.add(severity, fixable, {
+            "severity": severity,
+            "package": artifact.get("name"),
+            "version": artifact.get("version"),
+            "ecosystem": artifact.get("type"),
+            "cve": vuln.get("id"),
+            "title": vuln.get("description"),
+            "fix_version": (fix.get("versions") or [None])[0],
+            "fixable": fixable,
+        })
+        if compact:
+            native.append({
+                "vulnerability": pick(vuln, keep),
+                "artifact": {k: v for k, v in pick(artifact, ("name", "version", "type", "purl")).items() if v is not None},
+            })
+    distro = report.get("distro") or {}
+    return (native if compact else matches), distro.get("name"), distro.get("version")
+
+
+NORMALIZERS = {
+    "trivy": normalize_trivy,
+    "grype": normalize_grype,
+}
+
+
+def parse_args(argv):
+    if len(argv) < 3 or argv[1] not in NORMALIZERS:
+        raise SystemExit(f"usage: {argv[0]} {{{','.join(NORMALIZERS)}}} RESULTS [options]")
+    opts = {"tool": argv[1], "results": argv[2], "compact": False, "os": False}
+    args = iter(argv[3:])
+    for arg in args:
+        if arg in ("--compact", "--os"):
+            opts[arg[2:]] = True
+        elif arg in ("--source", "--extra", "--image", "--native-out", "--native-fields"):
+            opts[arg[2:].replace("-", "_")] = next(args, "")
+        else:
+            raise SystemExit(f"unknown option: {arg}")
+    return opts
+
+
+def normalize(tool, report, source=None, extra=None, image=None, with_os=False, compact=False, native_fields=""):
+    """Return (normalized, native) for one scanner report."""
+    acc = Summary(dedupe=compact)
+    native, os_family, os_version = NORMALIZERS[tool](report, acc, compact, native_fields)
+    out = {}
+    if source is not None:
+        out["source"] = source
+    if image is not None:
+        out["image"] = image
+    out.update(acc.result())
+    if with_os and os_family:
+        out["os"] = {"family": os_family}
+        if os_version:
+            out["os"]["version"] = os_version
+    out.update(extra or {})
+    return out, native
+
+
+def main(argv):
+    opts = parse_args(argv)
+    with open(opts["results"]) as f:
+        report = json.load(f)
+    normalized, native = normalize(
+        opts["tool"],
+        report,
+        source=json.loads(opts["source"]) if opts.get("source") else None,
+        extra=json.loads(opts["extra"]) if opts.get("extra") else None,
+        image=opts.get("image") or None,
+        with_os=opts["os"],
+        compact=opts["compact"],
+        native_fields=opts.get("native_fields", ""),
+    )
+    if opts.get("native_out") and native is not None:
+        with open(opts["native_out"], "w") as f:
+            json.dump(native, f, separators=(",", ":"))
+    json.dump(normalized, sys.stdout, separators=(",", ":"))
+    sys.stdout.write("\n")
+    total = normalized["vulnerabilities"]["total"]
+    print(f"{opts['tool']}: {total} vulnerabilities", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -258,5 +258,60 @@ class SkipSafetyTest(Base):
         self.assertIn("Scanning image: ghcr.io/acme/api:v1", result.stderr)
 
 
+class CompactNativeTest(Base):
+    # The same CVE reported by two targets (two lockfiles / layers), with the
+    # bulky fields compact mode should prune.
+    DUP_RESULTS = json.dumps({
+        "SchemaVersion": 2,
+        "ArtifactName": "app",
+        "Metadata": {"OS": {"Family": "debian", "Name": "12"}, "ImageConfig": {"big": 1}},
+        "Results": [
+            {"Target": t, "Type": "debian", "Vulnerabilities": [{
+                "Severity": "HIGH", "PkgName": "curl", "InstalledVersion": "8.1.0",
+                "VulnerabilityID": "CVE-2026-0001", "Title": "curl flaw",
+                "FixedVersion": "8.2.0", "Description": "long text",
+                "CVSS": {"nvd": {"V3Score": 7.5}}, "CweIDs": ["CWE-400"],
+                "Layer": {"Digest": "sha256:abc"}}]}
+            for t in ("a", "b")
+        ] + [{"Target": "empty", "Type": "debian"}],
+    })
+
+    def test_default_keeps_full_native_and_every_finding(self):
+        self.fixture("trivy-results.json", self.DUP_RESULTS)
+        result, log = self.run_script(dict(self.CRON_ENV))
+        self.assertEqual(result.returncode, 0, msg=result.stderr)
+        native = self.collected(log, ".container_scan.native.trivy.results")
+        self.assertEqual(native, json.loads(self.DUP_RESULTS))
+        self.assertEqual(len(self.collected(log, ".container_scan")["findings"]), 2)
+
+    def test_compact_prunes_native_and_dedupes_findings(self):
+        self.fixture("trivy-results.json", self.DUP_RESULTS)
+        env = dict(self.CRON_ENV, LUNAR_VAR_COMPACT_NATIVE="true")
+        result, log = self.run_script(env)
+        self.assertEqual(result.returncode, 0, msg=result.stderr)
+        native = self.collected(log, ".container_scan.native.trivy.results")
+        self.assertEqual([r["Target"] for r in native["Results"]], ["a", "b"])
+        self.assertEqual(native["Metadata"], {"OS": {"Family": "debian", "Name": "12"}})
+        vuln = native["Results"][0]["Vulnerabilities"][0]
+        self.assertEqual(set(vuln), {
+            "VulnerabilityID", "PkgName", "InstalledVersion", "FixedVersion",
+            "Severity", "CVSS", "CweIDs"})
+        scan = self.collected(log, ".container_scan")
+        self.assertEqual(len(scan["findings"]), 1)
+        self.assertEqual(scan["findings"][0]["cve"], "CVE-2026-0001")
+        # Counts still cover every match, so policy thresholds are unchanged.
+        self.assertEqual(scan["vulnerabilities"]["high"], 2)
+
+    def test_native_fields_allowlist_is_configurable(self):
+        self.fixture("trivy-results.json", self.DUP_RESULTS)
+        env = dict(self.CRON_ENV, LUNAR_VAR_COMPACT_NATIVE="true",
+                   LUNAR_VAR_NATIVE_FIELDS="description, Layer")
+        result, log = self.run_script(env)
+        self.assertEqual(result.returncode, 0, msg=result.stderr)
+        vuln = self.collected(log, ".container_scan.native.trivy.results")["Results"][0]["Vulnerabilities"][0]
+        self.assertIn("Description", vuln)
+        self.assertIn("Layer", vuln)
+        self.assertNotIn("CVSS", vuln)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Tests for scan_normalize.py, the one-pass scanner normalizer.
+
+The same file ships in the trivy and grype collectors; these tests cover both
+normalizers against small hand-written reports, and the CLI's contract with
+the shell collectors (normalized JSON on stdout, native payload via
+--native-out).
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+HERE = os.path.dirname(__file__)
+SCRIPT = os.path.abspath(os.path.join(HERE, "..", "scan_normalize.py"))
+
+sys.path.insert(0, os.path.dirname(SCRIPT))
+import scan_normalize  # noqa: E402
+
+
+TRIVY_REPORT = {
+    "SchemaVersion": 2,
+    "ArtifactName": "repo:tag",
+    "Metadata": {"OS": {"Family": "alpine", "Name": "3.19.1"}},
+    "Results": [
+        {
+            "Target": "app",
+            "Type": "gomod",
+            "Vulnerabilities": [
+                {"VulnerabilityID": "CVE-1", "PkgName": "a", "InstalledVersion": "1", "FixedVersion": "2", "Severity": "CRITICAL", "CVSS": {"x": 1}, "Description": "long"},
+                {"VulnerabilityID": "CVE-2", "PkgName": "b", "InstalledVersion": "1", "FixedVersion": "", "Severity": "LOW"},
+                {"VulnerabilityID": "CVE-3", "PkgName": "c", "InstalledVersion": "1", "Severity": "UNKNOWN"},
+            ],
+        },
+        {"Target": "empty", "Type": "npm"},
+    ],
+}
+
+
+class TrivyTest(unittest.TestCase):
+    def test_counts_and_summary(self):
+        out, native = scan_normalize.normalize("trivy", TRIVY_REPORT, with_os=True)
+        self.assertEqual(out["vulnerabilities"], {"critical": 1, "high": 0, "medium": 0, "low": 1, "total": 3})
+        self.assertEqual(out["summary"], {"has_critical": True, "has_high": False, "all_fixable": False})
+        self.assertEqual(out["os"], {"family": "alpine", "version": "3.19.1"})
+        self.assertEqual([f["cve"] for f in out["findings"]], ["CVE-1", "CVE-2", "CVE-3"])
+        self.assertIs(native, TRIVY_REPORT)
+
+    def test_compact_prunes_native(self):
+        _, native = scan_normalize.normalize("trivy", TRIVY_REPORT, compact=True, native_fields="cvss")
+        self.assertEqual(native["Metadata"], {"OS": {"Family": "alpine", "Name": "3.19.1"}})
+        self.assertEqual(len(native["Results"]), 1)
+        first = native["Results"][0]["Vulnerabilities"][0]
+        self.assertIn("CVSS", first)
+        self.assertNotIn("Description", first)
+
+    def test_compact_dedupes_findings_but_counts_every_match(self):
+        vuln = {"VulnerabilityID": "CVE-7", "PkgName": "d", "InstalledVersion": "1", "Severity": "HIGH"}
+        report = {"Results": [{"Target": "a", "Vulnerabilities": [vuln]}, {"Target": "b", "Vulnerabilities": [vuln]}]}
+        full, _ = scan_normalize.normalize("trivy", report)
+        compact, _ = scan_normalize.normalize("trivy", report, compact=True)
+        self.assertEqual(len(full["findings"]), 2)
+        self.assertEqual(len(compact["findings"]), 1)
+        # Counts are identical in both modes, so total exceeds the deduped
+        # findings as documented.
+        self.assertEqual(compact["vulnerabilities"], full["vulnerabilities"])
+        self.assertEqual(compact["vulnerabilities"]["total"], 2)
+        self.assertEqual(compact["summary"], full["summary"])
+
+    def test_empty_findings_when_clean(self):
+        out, _ = scan_normalize.normalize("trivy", {"Results": []})
+        self.assertEqual(out["findings"], [])
+        self.assertEqual(out["vulnerabilities"]["total"], 0)
+        self.assertTrue(out["summary"]["all_fixable"])
+
+
+class GrypeTest(unittest.TestCase):
+    def test_negligible_counts_as_low_and_dedupe(self):
+        match = {
+            "vulnerability": {"id": "CVE-9", "severity": "Negligible", "fix": {"state": "fixed", "versions": ["2"]}},
+            "artifact": {"name": "z", "version": "1", "type": "deb"},
+        }
+        report = {"matches": [match, match], "distro": {"name": "debian", "version": "12"}}
+        out, native = scan_normalize.normalize("grype", report, compact=True, with_os=True)
+        self.assertEqual(out["vulnerabilities"]["low"], 2)
+        self.assertEqual(out["vulnerabilities"]["total"], 2)
+        self.assertEqual(len(out["findings"]), 1)
+        self.assertTrue(out["summary"]["all_fixable"])
+        self.assertEqual(out["os"], {"family": "debian", "version": "12"})
+        self.assertEqual(len(native), 2)
+
+
+class CliTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="scan-normalize-test-")
+
+    def run_cli(self, tool, report, *args):
+        path = os.path.join(self.tmp, "report.json")
+        with open(path, "w") as f:
+            json.dump(report, f)
+        return subprocess.run(
+            [sys.executable, SCRIPT, tool, path, *args],
+            capture_output=True, text=True, check=True,
+        )
+
+    def test_writes_normalized_and_native(self):
+        native_out = os.path.join(self.tmp, "native.json")
+        proc = self.run_cli(
+            "trivy", TRIVY_REPORT,
+            "--source", '{"tool":"trivy"}', "--extra", '{"history":true}',
+            "--native-out", native_out,
+        )
+        out = json.loads(proc.stdout)
+        self.assertEqual(out["source"], {"tool": "trivy"})
+        self.assertTrue(out["history"])
+        with open(native_out) as f:
+            self.assertEqual(json.load(f), TRIVY_REPORT)
+        self.assertIn("trivy: 3 vulnerabilities", proc.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,7 @@
 
 from lunar_policy import Check, variable_or_default
 
-SEVERITY_ORDER = ["critical", "high", "medium", "low"]
+from severity_index import SEVERITY_ORDER, SeverityIndex, severities_in_scope
 
 
 def main(node=None):
@@ -24,25 +24,20 @@ def main(node=None):
             )
             return c
 
-        issues_node = cq_node.get_node(".issues")
-        if not issues_node.exists():
+        index = SeverityIndex(cq_node, counts_path=".issues", summary_path=None)
+        if not index.has_counts:
             c.fail(
                 "Issue counts not available. Ensure the scanner publishes .code_quality.issues."
             )
             return c
 
-        severity_index = SEVERITY_ORDER.index(min_severity)
-        severities_to_check = SEVERITY_ORDER[: severity_index + 1]
-
-        for severity in severities_to_check:
-            count_node = issues_node.get_node(f".{severity}")
-            if count_node.exists():
-                count = count_node.get_value()
-                if count > 0:
-                    c.fail(
-                        f"{severity.capitalize()} code-quality issues detected ({count} found)"
-                    )
-                    return c
+        breach = index.breach(severities_in_scope(min_severity))
+        if breach is not None:
+            severity, count = breach
+            c.fail(
+                f"{severity.capitalize()} code-quality issues detected ({count} found)"
+            )
+            return c
     return c
 
 
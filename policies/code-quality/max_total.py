@@ -2,6 +2,8 @@
 
 from lunar_policy import Check, variable_or_default
 
+from severity_index import SeverityIndex
+
 
 def main(node=None):
     c = Check("max-total", "Total code-quality issues within threshold", node=node)
@@ -28,14 +30,13 @@ def main(node=None):
             )
             return c
 
-        total_node = cq_node.get_node(".issues.total")
-        if not total_node.exists():
+        total_value = SeverityIndex(cq_node, counts_path=".issues", summary_path=None).total
+        if total_value is None:
             c.fail(
                 "Total issue count not available. Ensure the scanner publishes .code_quality.issues.total."
             )
             return c
 
-        total_value = total_node.get_value()
         c.assert_less_or_equal(
             total_value,
             threshold,
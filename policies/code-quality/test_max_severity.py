@@ -0,0 +1,111 @@
+"""Unit tests for the code-quality max-severity check (max_severity.py).
+
+Run from this directory:
+    python3 -m unittest test_max_severity -v
+
+Code-quality scans report per-severity issue counts at `.code_quality.issues`
+and have no `has_*` summary flags. These cover the count walk and its
+message, that a summary object is ignored, and the failure when no counts
+are published.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lunar_policy import Node, CheckStatus  # noqa: E402
+
+import max_severity  # noqa: E402
+
+
+def node(code_quality=None, lang=True):
+    """Build a policy node mirroring production policy-eval (workflows done)."""
+    data = {}
+    if lang:
+        data["lang"] = {"go": {}}
+    if code_quality is not None:
+        data["code_quality"] = code_quality
+    return Node.from_component_json(data, bundle_info={"workflows_finished": True})
+
+
+@contextlib.contextmanager
+def lunar_env(**overrides):
+    saved = dict(os.environ)
+    for k in list(os.environ):
+        if k.startswith("LUNAR_"):
+            del os.environ[k]
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for k in list(os.environ):
+            if k.startswith("LUNAR_"):
+                del os.environ[k]
+        os.environ.update(saved)
+
+
+def run_check(n, **env):
+    with lunar_env(**env):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return max_severity.main(node=n)
+
+
+def resolved_status(c):
+    for r in getattr(c, "_results", []):
+        if r.result == CheckStatus.SKIPPED:
+            return CheckStatus.SKIPPED
+    return c.status
+
+
+def failure_message(c):
+    reasons = c.failure_reasons
+    return reasons[0] if reasons else ""
+
+
+class MaxSeverityTests(unittest.TestCase):
+    def test_skips_without_language(self):
+        c = run_check(node(code_quality={"issues": {"critical": 1}}, lang=False))
+        self.assertEqual(resolved_status(c), CheckStatus.SKIPPED)
+
+    def test_no_scan_data_fails(self):
+        c = run_check(node())
+        self.assertEqual(resolved_status(c), CheckStatus.FAIL)
+        self.assertIn("No code-quality data found", failure_message(c))
+
+    def test_worst_in_scope_count_fails(self):
+        c = run_check(node(code_quality={"issues": {"critical": 2, "high": 7, "total": 9}}))
+        self.assertEqual(resolved_status(c), CheckStatus.FAIL)
+        self.assertEqual(failure_message(c), "Critical code-quality issues detected (2 found)")
+
+    def test_below_threshold_passes(self):
+        c = run_check(
+            node(code_quality={"issues": {"critical": 0, "high": 0, "medium": 12, "total": 12}}),
+            LUNAR_VAR_min_severity="high",
+        )
+        self.assertEqual(resolved_status(c), CheckStatus.PASS)
+
+    def test_summary_flags_are_ignored(self):
+        # Code-quality has no summary flags; a stray one must not fail the
+        # check when the counts are clean.
+        c = run_check(node(code_quality={
+            "issues": {"critical": 0, "high": 0, "total": 0},
+            "summary": {"has_critical": True},
+        }))
+        self.assertEqual(resolved_status(c), CheckStatus.PASS)
+
+    def test_missing_counts_fails(self):
+        c = run_check(node(code_quality={"coverage_percentage": 80}))
+        self.assertEqual(resolved_status(c), CheckStatus.FAIL)
+        self.assertIn("Issue counts not available", failure_message(c))
+
+    def test_invalid_min_severity_raises(self):
+        with self.assertRaisesRegex(ValueError, "'min_severity' must be one of"):
+            run_check(node(code_quality={"issues": {"high": 1}}), LUNAR_VAR_min_severity="blocker")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""Severity index shared by the threshold checks (max-severity, max-total).
+
+A scan node's summary flags, severity counts and findings array are each read
+once, and the findings are bucketed by severity. Threshold checks and
+failure-message rendering then work on plain dicts: listing the worst few
+findings of a 50k-finding scan is one pass over the array, not a Node lookup
+per field per finding.
+
+The same file ships in the sca, container-scan, sast, iac-scan and code-quality
+policies (plugins are standalone directories); keep the copies identical.
+"""
+
+import heapq
+
+SEVERITY_ORDER = ["critical", "high", "medium", "low"]
+
+
+def severities_in_scope(min_severity):
+    """Severities at or above `min_severity`, most severe first."""
+    return SEVERITY_ORDER[: SEVERITY_ORDER.index(min_severity) + 1]
+
+
+def _read(node, path):
+    """Value at `path`, or None when absent.
+
+    Mirrors `Node.exists()`: a missing path is None, but NoDataError (collectors
+    still running) propagates so the check reports pending.
+    """
+    try:
+        return node.get_value(path)
+    except ValueError:
+        return None
+
+
+def _rank(finding):
+    return (finding["package"] or "", finding["id"] or "")
+
+
+class SeverityIndex:
+    """Summary flags, counts and severity-bucketed findings for one scan node.
+
+    `counts_path` is where the per-severity counts live (`.vulnerabilities` for
+    sca/container_scan, `.findings` for sast/iac_scan, `.issues` for
+    code_quality). Pass `summary_path=None` for categories without `has_*`
+    flags, and `findings_path=None` for categories without a findings array
+    (sast/iac_scan keep their counts at `.findings`). The findings array is
+    read and bucketed on first use only, so count-only checks never load it;
+    each finding is normalized to `{id, severity, package, fix_version}`.
+    """
+
+    def __init__(
+        self, scan_node, counts_path=".vulnerabilities", summary_path=".summary", findings_path=".findings"
+    ):
+        summary = _read(scan_node, summary_path) if summary_path else None
+        counts = _read(scan_node, counts_path)
+        self.summary = summary if isinstance(summary, dict) else {}
+        self.counts = counts if isinstance(counts, dict) else {}
+        self.has_counts = counts is not None
+        self._node = scan_node
+        self._findings_path = findings_path
+        self._findings = None
+        self._buckets = None
+
+    def _build(self):
+        """Read the findings array and bucket it by severity (first use only)."""
+        if self._findings is not None:
+            return
+        raw = _read(self._node, self._findings_path) if self._findings_path else None
+        self._findings = []
+        self._buckets = {severity: [] for severity in SEVERITY_ORDER}
+        if not isinstance(raw, list):
+            return
+        for item in raw:
+            if not isinstance(item, dict):
+                continue
+            severity = (item.get("severity") or "").lower()
+            if severity not in self._buckets:
+                continue
+            finding = {
+                "id": item.get("cve"),
+                "severity": severity,
+                "package": item.get("package"),
+                "fix_version": item.get("fix_version"),
+            }
+            self._findings.append(finding)
+            self._buckets[severity].append(finding)
+
+    @property
+    def total(self):
+        return self.counts.get("total")
+
+    def breach(self, in_scope):
+        """Return (severity, count) for the worst in-scope severity present.
+
+        Summary booleans are preferred; `count` is None when the breach came
+        from a flag rather than a count. Returns None when nothing is in scope.
+        """
+        for severity in in_scope:
+            if self.summary.get(f"has_{severity}"):
+                return severity, None
+        for severity in in_scope:
+            count = self.counts.get(severity)
+            if count is not None and count > 0:
+                return severity, count
+        return None
+
+    def reports(self, in_scope):
+        """True when the scan carries a flag or count for any in-scope severity."""
+        return any(
+            f"has_{severity}" in self.summary or severity in self.counts
+            for severity in in_scope
+        )
+
+    def findings(self, in_scope):
+        """Findings at or above the threshold, in report order."""
+        self._build()
+        scope = set(in_scope)
+        return [f for f in self._findings if f["severity"] in scope]
+
+    def top(self, in_scope, limit):
+        """Return (worst `limit` in-scope findings, number left out).
+
+        Ordered most severe first, then by package and id.
+        """
+        self._build()
+        listed = []
+        remaining = 0
+        for severity in in_scope:
+            bucket = self._buckets[severity]
+            room = limit - len(listed)
+            if room > 0:
+                listed.extend(heapq.nsmallest(room, bucket, key=_rank))
+            remaining += len(bucket)
+        return listed, remaining - len(listed)
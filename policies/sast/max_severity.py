@@ -2,7 +2,7 @@
 
 from lunar_policy import Check, variable_or_default
 
-SEVERITY_ORDER = ["critical", "high", "medium", "low"]
+from severity_index import SEVERITY_ORDER, SeverityIndex, severities_in_scope
 
 
 def main(node=None):
@@ -12,7 +12,7 @@ def main(node=None):
             c.skip("No programming language detected in this component")
 
         min_severity = variable_or_default("min_severity", "high").lower()
-        
+
         if min_severity not in SEVERITY_ORDER:
             raise ValueError(
                 f"Policy misconfiguration: 'min_severity' must be one of {SEVERITY_ORDER}, got '{min_severity}'"
@@ -23,40 +23,22 @@ def main(node=None):
             c.fail("No SAST scanning data found. Ensure a scanner (Semgrep, CodeQL, etc.) is configured.")
             return c
 
-        # Get the index of min_severity to know which severities to check
-        severity_index = SEVERITY_ORDER.index(min_severity)
-        severities_to_check = SEVERITY_ORDER[:severity_index + 1]
+        in_scope = severities_in_scope(min_severity)
+        index = SeverityIndex(sast_node, counts_path=".findings", findings_path=None)
 
-        # Check summary booleans first (preferred)
-        for severity in severities_to_check:
-            summary_key = f".summary.has_{severity}"
-            summary = sast_node.get_node(summary_key)
-            if summary.exists() and summary.get_value():
+        # Summary booleans first (preferred), then counts
+        breach = index.breach(in_scope)
+        if breach is not None:
+            severity, count = breach
+            if count is None:
                 c.fail(f"{severity.capitalize()} SAST findings detected")
-                return c
-
-        # Fall back to counting
-        for severity in severities_to_check:
-            count_key = f".findings.{severity}"
-            count_node = sast_node.get_node(count_key)
-            if count_node.exists():
-                count = count_node.get_value()
-                if count > 0:
-                    c.fail(f"{severity.capitalize()} SAST findings detected ({count} found)")
-                    return c
+            else:
+                c.fail(f"{severity.capitalize()} SAST findings detected ({count} found)")
+            return c
 
         # If scan data exists but has no findings/summary, that's a collector
         # bug — raise ValueError deliberately so it surfaces as a crash.
-        has_any_data = False
-        for severity in severities_to_check:
-            if sast_node.get_node(f".summary.has_{severity}").exists():
-                has_any_data = True
-                break
-            if sast_node.get_node(f".findings.{severity}").exists():
-                has_any_data = True
-                break
-
-        if not has_any_data:
+        if not index.reports(in_scope):
             raise ValueError(
                 "Finding counts not available. Ensure collector reports .sast.findings or .sast.summary."
             )
@@ -0,0 +1,128 @@
+"""Unit tests for the sast max-severity check (max_severity.py).
+
+Run from this directory:
+    python3 -m unittest test_max_severity -v
+
+SAST scans keep their per-severity counts at `.sast.findings` (an object, not
+a findings array). These cover the summary flags being preferred over those
+counts, the count fallback and its message, the ValueError raised when a scan
+carries neither, and that the count keys are never read as findings.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lunar_policy import Node, CheckStatus  # noqa: E402
+
+import max_severity  # noqa: E402
+from severity_index import SeverityIndex, severities_in_scope  # noqa: E402
+
+
+def node(sast=None, lang=True):
+    """Build a policy node mirroring production policy-eval (workflows done)."""
+    data = {}
+    if lang:
+        data["lang"] = {"go": {}}
+    if sast is not None:
+        data["sast"] = sast
+    return Node.from_component_json(data, bundle_info={"workflows_finished": True})
+
+
+@contextlib.contextmanager
+def lunar_env(**overrides):
+    saved = dict(os.environ)
+    for k in list(os.environ):
+        if k.startswith("LUNAR_"):
+            del os.environ[k]
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for k in list(os.environ):
+            if k.startswith("LUNAR_"):
+                del os.environ[k]
+        os.environ.update(saved)
+
+
+def run_check(n, **env):
+    with lunar_env(**env):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return max_severity.main(node=n)
+
+
+def resolved_status(c):
+    for r in getattr(c, "_results", []):
+        if r.result == CheckStatus.SKIPPED:
+            return CheckStatus.SKIPPED
+    return c.status
+
+
+def failure_message(c):
+    reasons = c.failure_reasons
+    return reasons[0] if reasons else ""
+
+
+class MaxSeverityTests(unittest.TestCase):
+    def test_skips_without_language(self):
+        c = run_check(node(sast={"findings": {"critical": 1}}, lang=False))
+        self.assertEqual(resolved_status(c), CheckStatus.SKIPPED)
+
+    def test_no_scan_data_fails(self):
+        c = run_check(node())
+        self.assertEqual(resolved_status(c), CheckStatus.FAIL)
+        self.assertIn("No SAST scanning data found", failure_message(c))
+
+    def test_summary_flag_wins_over_counts(self):
+        # The flag is trusted even when the counts disagree, and the message
+        # carries no count.
+        c = run_check(node(sast={
+            "findings": {"critical": 0, "high": 0, "total": 0},
+            "summary": {"has_critical": False, "has_high": True},
+        }))
+        self.assertEqual(resolved_status(c), CheckStatus.FAIL)
+        self.assertEqual(failure_message(c), "High SAST findings detected")
+
+    def test_counts_fallback_reports_count(self):
+        c = run_check(node(sast={"findings": {"critical": 0, "high": 3, "medium": 5, "total": 8}}))
+        self.assertEqual(resolved_status(c), CheckStatus.FAIL)
+        self.assertEqual(failure_message(c), "High SAST findings detected (3 found)")
+
+    def test_below_threshold_passes(self):
+        c = run_check(
+            node(sast={"findings": {"critical": 0, "high": 0, "medium": 5, "total": 5}}),
+            LUNAR_VAR_min_severity="high",
+        )
+        self.assertEqual(resolved_status(c), CheckStatus.PASS)
+
+    def test_threshold_widens_scope(self):
+        c = run_check(
+            node(sast={"findings": {"critical": 0, "high": 0, "medium": 5, "total": 5}}),
+            LUNAR_VAR_min_severity="medium",
+        )
+        self.assertEqual(resolved_status(c), CheckStatus.FAIL)
+        self.assertEqual(failure_message(c), "Medium SAST findings detected (5 found)")
+
+    def test_missing_counts_and_summary_raises(self):
+        with self.assertRaisesRegex(ValueError, "Finding counts not available"):
+            run_check(node(sast={"source": {"tool": "semgrep"}}))
+
+    def test_invalid_min_severity_raises(self):
+        with self.assertRaisesRegex(ValueError, "'min_severity' must be one of"):
+            run_check(node(sast={"findings": {"high": 1}}), LUNAR_VAR_min_severity="severe")
+
+    def test_counts_are_not_read_as_findings(self):
+        sast = node(sast={"findings": {"critical": 2, "high": 1, "total": 3}}).get_node(".sast")
+        index = SeverityIndex(sast, counts_path=".findings", findings_path=None)
+        in_scope = severities_in_scope("low")
+        self.assertEqual(index.breach(in_scope), ("critical", 2))
+        self.assertEqual(index.findings(in_scope), [])
+        self.assertEqual(index.top(in_scope, 10), ([], 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""Unit tests for the sast max-total check (max_total.py).
+
+Run from this directory:
+    python3 -m unittest test_max_total -v
+
+These cover reading `total` from the counts at `.sast.findings`, the
+threshold comparison, the failure when no total is reported, and the
+misconfiguration errors for the threshold input.
+"""
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lunar_policy import Node, CheckStatus  # noqa: E402
+
+import max_total  # noqa: E402
+
+
+def node(sast=None, lang=True):
+    """Build a policy node mirroring production policy-eval (workflows done)."""
+    data = {}
+    if lang:
+        data["lang"] = {"go": {}}
+    if sast is not None:
+        data["sast"] = sast
+    return Node.from_component_json(data, bundle_info={"workflows_finished": True})
+
+
+@contextlib.contextmanager
+def lunar_env(**overrides):
+    saved = dict(os.environ)
+    for k in list(os.environ):
+        if k.startswith("LUNAR_"):
+            del os.environ[k]
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for k in list(os.environ):
+            if k.startswith("LUNAR_"):
+                del os.environ[k]
+        os.environ.update(saved)
+
+
+def run_check(n, **env):
+    env.setdefault("LUNAR_VAR_max_total_threshold", "10")
+    with lunar_env(**env):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return max_total.main(node=n)
+
+
+def resolved_status(c):
+    for r in getattr(c, "_results", []):
+        if r.result == CheckStatus.SKIPPED:
+            return CheckStatus.SKIPPED
+    return c.status
+
+
+def failure_message(c):
+    reasons = c.failure_reasons
+    return reasons[0] if reasons else ""
+
+
+class MaxTotalTests(unittest.TestCase):
+    def test_skips_without_language(self):
+        c = run_check(node(sast={"findings": {"total": 50}}, lang=False))
+        self.assertEqual(resolved_status(c), CheckStatus.SKIPPED)
+
+    def test_total_within_threshold_passes(self):
+        c = run_check(node(sast={"findings": {"high": 4, "low": 6, "total": 10}}))
+        self.assertEqual(resolved_status(c), CheckStatus.PASS)
+
+    def test_total_over_threshold_fails(self):
+        c = run_check(node(sast={"findings": {"high": 4, "low": 7, "total": 11}}))
+        self.assertEqual(resolved_status(c), CheckStatus.FAIL)
+        self.assertIn("Total code findings (11) exceeds threshold (10)", failure_message(c))
+
+    def test_total_is_read_not_summed(self):
+        # `total` is authoritative, even when the severity buckets don't add
+        # up to it (e.g. unknown-severity findings).
+        c = run_check(node(sast={"findings": {"high": 1, "total": 12}}))
+        self.assertEqual(resolved_status(c), CheckStatus.FAIL)
+        self.assertIn("(12)", failure_message(c))
+
+    def test_missing_total_fails(self):
+        c = run_check(node(sast={"findings": {"high": 1}, "summary": {"has_high": True}}))
+        self.assertEqual(resolved_status(c), CheckStatus.FAIL)
+        self.assertIn("Total findings count not available", failure_message(c))
+
+    def test_no_scan_data_fails(self):
+        c = run_check(node())
+        self.assertEqual(resolved_status(c), CheckStatus.FAIL)
+        self.assertIn("No SAST scanning data found", failure_message(c))
+
+    def test_non_positive_threshold_raises(self):
+        with self.assertRaisesRegex(ValueError, "must be a positive integer"):
+            run_check(node(sast={"findings": {"total": 1}}), LUNAR_VAR_max_total_threshold="0")
+
+    def test_non_integer_threshold_raises(self):
+        with self.assertRaisesRegex(ValueError, "must be an integer"):
+            run_check(node(sast={"findings": {"total": 1}}), LUNAR_VAR_max_total_threshold="ten")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,8 +15,7 @@ import sys
 from lunar_policy import Check, variable_or_default
 
 import webhook
-
-SEVERITY_ORDER = ["critical", "high", "medium", "low"]
+from severity_index import SEVERITY_ORDER, SeverityIndex, severities_in_scope
 
 # Cap on how many individual findings to enumerate in the failure message: a
 # GitHub check / PR comment listing more than this is a wall of text, and the
@@ -24,36 +23,7 @@ SEVERITY_ORDER = ["critical", "high", "medium", "low"]
 MAX_LISTED_FINDINGS = 10
 
 
-def _severities_in_scope(min_severity):
-    return SEVERITY_ORDER[: SEVERITY_ORDER.index(min_severity) + 1]
-
-
-def _collect_findings(sca_node, in_scope):
-    """Return findings at/above threshold from .sca.findings[], normalized.
-
-    Returns [] when the collector did not emit per-finding detail (e.g. a
-    summary-only SCA collector) — the alert still carries the failure message.
-    """
-    findings_node = sca_node.get_node(".findings")
-    if not findings_node.exists():
-        return []
-    out = []
-    for finding in findings_node:
-        severity = (finding.get_value_or_default(".severity", "") or "").lower()
-        if severity not in in_scope:
-            continue
-        out.append(
-            {
-                "id": finding.get_value_or_default(".cve", None),
-                "severity": severity,
-                "package": finding.get_value_or_default(".package", None),
-                "fix_version": finding.get_value_or_default(".fix_version", None),
-            }
-        )
-    return out
-
-
-def _with_findings(headline, findings, multiline=False):
+def _with_findings(headline, index, in_scope, multiline=False):
     """Return the failure headline with the offending findings enumerated.
 
     When the collector emitted per-finding detail, append an explicit list of
@@ -70,20 +40,11 @@ def _with_findings(headline, findings, multiline=False):
     `message`, which is consumed as plain text and also ships structured
     findings separately.
     """
-    if not findings:
+    listed, hidden = index.top(in_scope, MAX_LISTED_FINDINGS)
+    if not listed:
         return headline
 
-    def _rank(finding):
-        severity = finding.get("severity")
-        return (
-            SEVERITY_ORDER.index(severity) if severity in SEVERITY_ORDER else len(SEVERITY_ORDER),
-            finding.get("package") or "",
-            finding.get("id") or "",
-        )
-
-    ordered = sorted(findings, key=_rank)
-    lines = [webhook.finding_text(f) for f in ordered[:MAX_LISTED_FINDINGS]]
-    hidden = len(ordered) - len(lines)
+    lines = [webhook.finding_text(f) for f in listed]
     if hidden > 0:
         lines.append(f"+{hidden} more (see component JSON for full list)")
     if multiline:
@@ -141,48 +102,28 @@ def main(node=None):
             c.fail("No SCA scanning data found. Ensure a scanner (Snyk, Semgrep, etc.) is configured.")
             return c
 
-        in_scope = _severities_in_scope(min_severity)
+        in_scope = severities_in_scope(min_severity)
+        index = SeverityIndex(sca_node)
 
         # Determine the failing severity: summary booleans first (preferred),
         # then counts. Build the same human-readable message we fail with.
-        fail_message = None
-        for severity in in_scope:
-            summary = sca_node.get_node(f".summary.has_{severity}")
-            if summary.exists() and summary.get_value():
-                fail_message = f"{severity.capitalize()} vulnerability findings detected"
-                break
-        if fail_message is None:
-            for severity in in_scope:
-                count_node = sca_node.get_node(f".vulnerabilities.{severity}")
-                if count_node.exists() and count_node.get_value() > 0:
-                    fail_message = (
-                        f"{severity.capitalize()} vulnerability findings detected "
-                        f"({count_node.get_value()} found)"
-                    )
-                    break
-
-        if fail_message is not None:
+        breach = index.breach(in_scope)
+        if breach is not None:
+            severity, count = breach
+            fail_message = f"{severity.capitalize()} vulnerability findings detected"
+            if count is not None:
+                fail_message += f" ({count} found)"
             # Name the offending packages/CVEs, not just that the threshold was
             # crossed. The check failure text renders them as a Markdown sub-list
             # (nests tidily in the GitHub PR comment); the webhook gets the
             # compact single-line form plus the structured findings array.
-            findings = _collect_findings(sca_node, set(in_scope))
-            _fire_alert(min_severity, _with_findings(fail_message, findings), findings)
-            c.fail(_with_findings(fail_message, findings, multiline=True))
+            _fire_alert(min_severity, _with_findings(fail_message, index, in_scope), index.findings(in_scope))
+            c.fail(_with_findings(fail_message, index, in_scope, multiline=True))
             return c
 
         # Scan data exists but reports no findings/summary — that's a collector
         # bug; raise ValueError deliberately so it surfaces.
-        has_any_data = False
-        for severity in in_scope:
-            if sca_node.get_node(f".summary.has_{severity}").exists():
-                has_any_data = True
-                break
-            if sca_node.get_node(f".vulnerabilities.{severity}").exists():
-                has_any_data = True
-                break
-
-        if not has_any_data:
+        if not index.reports(in_scope):
             raise ValueError(
                 "Vulnerability counts not available. Ensure collector reports .sca.vulnerabilities or .sca.summary."
             )
@@ -2,6 +2,8 @@
 
 from lunar_policy import Check, variable_or_default
 
+from severity_index import SeverityIndex
+
 
 def main(node=None):
     c = Check("max-total", "Total vulnerability findings within threshold", node=node)
@@ -26,12 +28,11 @@ def main(node=None):
         if not sca_node.exists():
             c.fail("No SCA scanning data found. Ensure a scanner (Snyk, Semgrep, etc.) is configured.")
             return c
-        total_node = sca_node.get_node(".vulnerabilities.total")
-        if not total_node.exists():
+        total_value = SeverityIndex(sca_node).total
+        if total_value is None:
             c.fail("Total findings count not available. Ensure collector reports .sca.vulnerabilities.total.")
             return c
 
-        total_value = total_node.get_value()
         c.assert_less_or_equal(
             total_value,
             threshold,
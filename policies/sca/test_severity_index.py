@@ -0,0 +1,92 @@
+"""Unit tests for the shared severity index (severity_index.py).
+
+Run from this directory:
+    python3 -m unittest test_severity_index -v
+
+The same module ships in the container-scan, sast, iac-scan and code-quality
+policies; these tests cover the threshold walk (summary flags before counts),
+the lazy findings index and the top-N ordering used for failure text.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lunar_policy import Node  # noqa: E402
+
+from severity_index import SeverityIndex, severities_in_scope  # noqa: E402
+
+
+def scan(data, key="sca"):
+    n = Node.from_component_json({key: data}, bundle_info={"workflows_finished": True})
+    return n.get_node(f".{key}")
+
+
+def finding(severity, package, cve, fix=None):
+    return {"severity": severity, "package": package, "cve": cve, "fix_version": fix}
+
+
+class SeverityIndexTests(unittest.TestCase):
+    def test_summary_flag_wins_over_counts(self):
+        index = SeverityIndex(scan({
+            "vulnerabilities": {"critical": 0, "high": 4, "total": 4},
+            "summary": {"has_critical": False, "has_high": True},
+        }))
+        self.assertEqual(index.breach(severities_in_scope("high")), ("high", None))
+
+    def test_counts_fallback_reports_count(self):
+        index = SeverityIndex(scan({"vulnerabilities": {"critical": 2, "total": 2}}))
+        self.assertEqual(index.breach(severities_in_scope("high")), ("critical", 2))
+        self.assertEqual(index.total, 2)
+
+    def test_clean_scan_reports_without_breach(self):
+        index = SeverityIndex(scan({"vulnerabilities": {"critical": 0, "high": 0, "total": 0}}))
+        self.assertIsNone(index.breach(severities_in_scope("high")))
+        self.assertTrue(index.reports(severities_in_scope("high")))
+
+    def test_missing_data_does_not_report(self):
+        index = SeverityIndex(scan({"source": {"tool": "snyk"}}))
+        self.assertFalse(index.reports(severities_in_scope("critical")))
+        self.assertIsNone(index.total)
+
+    def test_sast_counts_live_under_findings(self):
+        index = SeverityIndex(
+            scan({"findings": {"high": 3, "total": 3}}, key="sast"), counts_path=".findings", findings_path=None
+        )
+        self.assertEqual(index.breach(severities_in_scope("medium")), ("high", 3))
+        self.assertEqual(index.findings(severities_in_scope("low")), [])
+        self.assertEqual(index.top(severities_in_scope("low"), 10), ([], 0))
+
+    def test_top_orders_by_severity_then_package(self):
+        index = SeverityIndex(scan({
+            "vulnerabilities": {"critical": 1, "high": 3, "total": 5},
+            "findings": [
+                finding("high", "zlib", "CVE-3"),
+                finding("low", "aaa", "CVE-9"),
+                finding("HIGH", "libssl", "CVE-2", "3.0.1"),
+                finding("critical", "xz", "CVE-1"),
+                finding("high", "bash", "CVE-4"),
+            ],
+        }))
+        in_scope = severities_in_scope("high")
+        listed, hidden = index.top(in_scope, 3)
+        self.assertEqual([f["id"] for f in listed], ["CVE-1", "CVE-4", "CVE-2"])
+        self.assertEqual(hidden, 1)
+        self.assertEqual(listed[2]["fix_version"], "3.0.1")
+        # Report order is kept for the webhook's structured findings.
+        self.assertEqual([f["id"] for f in index.findings(in_scope)], ["CVE-3", "CVE-2", "CVE-1", "CVE-4"])
+
+    def test_top_over_large_scan(self):
+        findings = [finding("medium", f"pkg-{i:05d}", f"CVE-{i}") for i in range(50000)]
+        findings.append(finding("critical", "zz", "CVE-CRIT"))
+        index = SeverityIndex(scan({"vulnerabilities": {"total": 50001}, "findings": findings}))
+        listed, hidden = index.top(severities_in_scope("medium"), 10)
+        self.assertEqual(listed[0]["id"], "CVE-CRIT")
+        self.assertEqual(listed[1]["package"], "pkg-00000")
+        self.assertEqual(hidden, 50001 - 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,6 +7,15 @@
 # write when it pins a Python package to a version inside a known-
 # vulnerable range listed in ../data/disallowed-deps.json.
 #
+# The list is read from its precompiled index, ../data/disallowed-deps.idx
+# (normalised name -> ranges sorted by lower bound; see
+# compile-disallowed-deps.sh), and the proposed content is scanned once
+# by a single awk process: every pin is extracted, looked up by name and
+# checked against that name's ranges. Cost stays flat as the list grows.
+# When consumers pass `extra_disallowed` / `replace_defaults`
+# (LUNAR_VAR_EXTRA_DISALLOWED / LUNAR_VAR_REPLACE_DEFAULTS) the index is
+# compiled for this run instead.
+#
 # Stdin:  PreToolUse JSON (Write → .tool_input.content, Edit →
 #         .tool_input.new_string, MultiEdit → .tool_input.edits[].new_string;
 #         .tool_input.file_path is normalised across frameworks by lunar-probe).
@@ -21,7 +30,7 @@
 #     are deferred — we don't guess what the resolver will pick).
 #
 # POSIX sh only — no bash arrays / [[ ]] / pipefail. Runs under dash and
-# Alpine BusyBox sh. Needs jq, grep -E, sed, awk, cut, tr (all BusyBox-ok).
+# Alpine BusyBox sh. Needs jq and a POSIX awk (BusyBox-ok).
 
 set -u
 
@@ -29,7 +38,7 @@ command -v jq >/dev/null 2>&1 || exit 0
 
 SCRIPT_DIR="$(CDPATH= cd -- "$(dirname -- "$0")" && pwd)" || exit 0
 DATA="$SCRIPT_DIR/../data/disallowed-deps.json"
-[ -f "$DATA" ] || exit 0
+INDEX="$SCRIPT_DIR/../data/disallowed-deps.idx"
 
 payload="$(cat)" || exit 0
 [ -n "$payload" ] || exit 0
@@ -43,94 +52,109 @@ CONTENT="$(printf '%s' "$payload" | jq -r '
 ' 2>/dev/null)" || exit 0
 [ -n "$CONTENT" ] || exit 0
 
-# Normalise a PyPI package name: lowercase, unify -, _ and . to a single -.
-norm() { printf '%s' "$1" | tr '[:upper:]' '[:lower:]' | tr '_.' '--'; }
-
-# Echo -1 / 0 / 1 for dotted numeric version compare (up to 4 fields; any
-# pre-release / local suffix is dropped before comparing).
-vercmp() {
-    _a="$(printf '%s' "$1" | sed 's/^[vV]//; s/[^0-9.].*$//')"
-    _b="$(printf '%s' "$2" | sed 's/^[vV]//; s/[^0-9.].*$//')"
-    _i=1
-    while [ "$_i" -le 4 ]; do
-        _fa="$(printf '%s' "$_a" | cut -d. -f"$_i" | sed 's/^0*//')"; [ -n "$_fa" ] || _fa=0
-        _fb="$(printf '%s' "$_b" | cut -d. -f"$_i" | sed 's/^0*//')"; [ -n "$_fb" ] || _fb=0
-        if [ "$_fa" -gt "$_fb" ] 2>/dev/null; then printf '1'; return; fi
-        if [ "$_fa" -lt "$_fb" ] 2>/dev/null; then printf -- '-1'; return; fi
-        _i=$(( _i + 1 ))
-    done
-    printf '0'
-}
-
-# in_range VERSION RANGE  — RANGE like "[0.8.3, 1.0.1)". Returns 0 if in.
-in_range() {
-    _v="$1"; _r="$2"
-    _lb="$(printf '%s' "$_r" | cut -c1)"
-    _rb="$(printf '%s' "$_r" | sed 's/.*\(.\)$/\1/')"
-    _inner="$(printf '%s' "$_r" | sed 's/^.//; s/.$//')"
-    _low="$(printf '%s' "$_inner" | sed 's/,.*//' | tr -d '[:space:]')"
-    _high="$(printf '%s' "$_inner" | sed 's/.*,//' | tr -d '[:space:]')"
-
-    _c="$(vercmp "$_v" "$_low")"
-    if [ "$_lb" = "[" ]; then [ "$_c" -ge 0 ] || return 1; else [ "$_c" -gt 0 ] || return 1; fi
-    _c="$(vercmp "$_v" "$_high")"
-    if [ "$_rb" = ")" ]; then [ "$_c" -lt 0 ] || return 1; else [ "$_c" -le 0 ] || return 1; fi
-    return 0
-}
-
-# pinned_versions PKG  — echo every concrete version PKG is pinned to in the
-# proposed content, across the dep-file formats we understand.
-pinned_versions() {
-    _pn="$(norm "$1")"
-    _re="$(printf '%s' "$_pn" | sed 's/-/[-_.]/g')"   # separator-flexible
-
-    # 1. requirements / PEP 508: name[extras] == X.Y.Z  (concrete pins only)
-    printf '%s\n' "$CONTENT" \
-        | grep -iE "(^|[^a-zA-Z0-9_.-])${_re}(\[[^]]*\])?[[:space:]]*==[=]?[[:space:]]*[0-9]" 2>/dev/null \
-        | sed -E 's/.*==[=]?[[:space:]]*//; s/[^0-9.].*$//' 2>/dev/null
-
-    # 2. bare TOML exact: name = "X.Y.Z"  (e.g. poetry exact dep in pyproject)
-    printf '%s\n' "$CONTENT" \
-        | grep -iE "(^|[^a-zA-Z0-9_.-])${_re}[[:space:]]*=[[:space:]]*\"[0-9]" 2>/dev/null \
-        | sed -E 's/.*=[[:space:]]*"//; s/[^0-9.].*$//' 2>/dev/null
-
-    # 3. TOML lockfile [[package]] blocks: poetry.lock / uv.lock
-    printf '%s\n' "$CONTENT" | awk -v want="$_pn" '
-        function norm(s){ gsub(/[_.]/, "-", s); return tolower(s) }
-        /^[[:space:]]*\[\[package\]\]/ { name=""; next }
-        /^[[:space:]]*name[[:space:]]*=/ {
-            l=$0; sub(/^[^"]*"/, "", l); sub(/".*/, "", l); name=l; next
+# Consumer overrides: compile defaults + extras (or extras alone) for this
+# run. Malformed extras fall back to the shipped index.
+extra="${LUNAR_VAR_EXTRA_DISALLOWED:-[]}"
+replace="$(printf '%s' "${LUNAR_VAR_REPLACE_DEFAULTS:-false}" | tr '[:upper:]' '[:lower:]')"
+if [ "$replace" = "true" ] || [ "$(printf '%s' "$extra" | tr -d '[:space:]')" != "[]" ]; then
+    tmp="$(mktemp)" || exit 0
+    trap 'rm -f "$tmp"' EXIT
+    if [ "$replace" = "true" ]; then
+        printf '%s' "$extra" | sh "$SCRIPT_DIR/compile-disallowed-deps.sh" > "$tmp" 2>/dev/null
+    else
+        printf '%s' "$extra" | sh "$SCRIPT_DIR/compile-disallowed-deps.sh" "$DATA" - > "$tmp" 2>/dev/null
+    fi && INDEX="$tmp"
+elif [ ! -f "$INDEX" ] && [ -f "$DATA" ]; then
+    # Index not shipped (e.g. a hand-edited checkout): compile it in memory.
+    tmp="$(mktemp)" || exit 0
+    trap 'rm -f "$tmp"' EXIT
+    sh "$SCRIPT_DIR/compile-disallowed-deps.sh" "$DATA" > "$tmp" 2>/dev/null && INDEX="$tmp"
+fi
+[ -s "$INDEX" ] || exit 0
+
+# One pass over the content. Pin forms understood:
+#   1. requirements / PEP 508: name[extras] == X.Y.Z  (concrete pins only)
+#   2. bare TOML exact: name = "X.Y.Z"  (e.g. poetry exact dep in pyproject)
+#   3. TOML lockfile [[package]] blocks: poetry.lock / uv.lock
+printf '%s\n' "$CONTENT" | awk -v index_file="$INDEX" '
+    function norm(s) { s = tolower(s); gsub(/[-_.]+/, "-", s); return s }
+    # Same key as compile-disallowed-deps.sh: 4 numeric fields, 12 digits each.
+    function vkey(v,    f, n, i, k, out) {
+        sub(/^[vV]/, "", v); sub(/[^0-9.].*$/, "", v)
+        n = split(v, f, ".")
+        out = ""
+        for (i = 1; i <= 4; i++) {
+            k = (i <= n) ? f[i] : ""
+            sub(/^0+/, "", k)
+            if (k == "") k = "0"
+            out = out (i > 1 ? "." : "") substr("000000000000" k, length(k) + 1)
         }
-        /^[[:space:]]*version[[:space:]]*=/ {
-            l=$0; sub(/^[^"]*"/, "", l); sub(/".*/, "", l)
-            if (name != "" && norm(name) == want && l ~ /^[0-9]/) print l
-            next
+        return out
+    }
+    function check(name, v,    n, k, i, e) {
+        sub(/[^0-9.].*$/, "", v)
+        n = norm(name)
+        if (!(n in count) || v == "") return
+        k = vkey(v)
+        for (i = 1; i <= count[n]; i++) {
+            e = n SUBSEP i
+            if (low[e] > k) break                      # ranges sorted by low
+            if (low[e] == k && !low_incl[e]) continue
+            if (k > high[e] || (k == high[e] && !high_incl[e])) continue
+            printf "%s==%s is in the disallowed range %s\n", label[e], v, range[e]
+            printf "%s (%s): %s\n", cve[e], sev[e], why[e]
+            if (fix[e] != "")
+                printf "Fixed in %s — pin %s>=%s (or off the vulnerable range) and retry.\n", fix[e], label[e], fix[e]
+            exit 1
+        }
+    }
+    # Name must not be glued onto a preceding name character.
+    function boundary(s, start) {
+        return start == 1 || substr(s, start - 1, 1) !~ /[A-Za-z0-9_.-]/
+    }
+    BEGIN {
+        while ((getline line < index_file) > 0) {
+            split(line, f, "\t")
+            e = f[1] SUBSEP (++count[f[1]])
+            low[e] = f[2]; low_incl[e] = f[3]; high[e] = f[4]; high_incl[e] = f[5]
+            label[e] = f[6]; range[e] = f[7]; cve[e] = f[8]; sev[e] = f[9]
+            fix[e] = f[10]; why[e] = f[11]
+        }
+    }
+    {
+        line = $0
+
+        rest = line; off = 0
+        while (match(rest, /[A-Za-z0-9][A-Za-z0-9._-]*(\[[^]]*\])?[ \t]*===?[ \t]*[0-9][0-9.]*/)) {
+            tok = substr(rest, RSTART, RLENGTH)
+            if (boundary(line, off + RSTART)) {
+                name = tok; sub(/[[ \t=].*$/, "", name)
+                v = tok; sub(/^[^=]*===?[ \t]*/, "", v)
+                check(name, v)
+            }
+            off += RSTART + RLENGTH - 1
+            rest = substr(rest, RSTART + RLENGTH)
         }
-    ' 2>/dev/null
-}
-
-count="$(jq 'length' "$DATA" 2>/dev/null)" || exit 0
-[ "$count" -gt 0 ] 2>/dev/null || exit 0
-
-i=0
-while [ "$i" -lt "$count" ]; do
-    name="$(jq -r ".[$i].name" "$DATA" 2>/dev/null)"
-    range="$(jq -r ".[$i].vulnerable_range" "$DATA" 2>/dev/null)"
-    [ -n "$name" ] && [ -n "$range" ] || { i=$(( i + 1 )); continue; }
 
-    for v in $(pinned_versions "$name"); do
-        if in_range "$v" "$range"; then
-            cve="$(jq -r ".[$i].cve // \"\"" "$DATA" 2>/dev/null)"
-            sev="$(jq -r ".[$i].severity // \"\"" "$DATA" 2>/dev/null)"
-            fix="$(jq -r ".[$i].fix // \"\"" "$DATA" 2>/dev/null)"
-            why="$(jq -r ".[$i].why // \"\"" "$DATA" 2>/dev/null)"
-            printf '%s==%s is in the disallowed range %s\n' "$name" "$v" "$range"
-            printf '%s (%s): %s\n' "$cve" "$sev" "$why"
-            [ -n "$fix" ] && printf 'Fixed in %s — pin %s>=%s (or off the vulnerable range) and retry.\n' "$fix" "$name" "$fix"
-            exit 1
-        fi
-    done
-    i=$(( i + 1 ))
-done
+        rest = line; off = 0
+        while (match(rest, /[A-Za-z0-9][A-Za-z0-9._-]*[ \t]*=[ \t]*"[0-9][0-9.]*/)) {
+            tok = substr(rest, RSTART, RLENGTH)
+            if (boundary(line, off + RSTART)) {
+                name = tok; sub(/[ \t=].*$/, "", name)
+                v = tok; sub(/^[^"]*"/, "", v)
+                check(name, v)
+            }
+            off += RSTART + RLENGTH - 1
+            rest = substr(rest, RSTART + RLENGTH)
+        }
 
-exit 0
+        if (line ~ /^[ \t]*\[\[package\]\]/) { pkg = ""; next }
+        if (line ~ /^[ \t]*name[ \t]*=/) {
+            pkg = line; sub(/^[^"]*"/, "", pkg); sub(/".*/, "", pkg); next
+        }
+        if (line ~ /^[ \t]*version[ \t]*=/ && pkg != "") {
+            v = line; sub(/^[^"]*"/, "", v); sub(/".*/, "", v)
+            if (v ~ /^[0-9]/) check(pkg, v)
+        }
+    }
+'
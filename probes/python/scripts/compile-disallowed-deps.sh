@@ -0,0 +1,46 @@
+#!/bin/sh
+# compile-disallowed-deps.sh — compile disallowed-deps JSON into the
+# lookup index read by check-disallowed-deps.sh.
+#
+# Usage:  compile-disallowed-deps.sh [FILE...]   (JSON arrays; stdin if none)
+# Stdout: one tab-separated line per well-formed entry, sorted by
+#         normalised name then lower bound:
+#
+#   norm-name  low-key  low-inclusive  high-key  high-inclusive
+#   name  vulnerable_range  cve  severity  fix  why
+#
+# Names are PEP 503-normalised (lowercase, runs of -_. become -). Bounds
+# are stored as fixed-width keys — up to 4 numeric fields, each
+# zero-padded to 12 digits, pre-release / local suffix dropped — so the
+# matcher compares versions as plain strings.
+#
+# data/disallowed-deps.idx is this script's output for
+# data/disallowed-deps.json; regenerate it whenever the JSON changes:
+#
+#   sh scripts/compile-disallowed-deps.sh data/disallowed-deps.json > data/disallowed-deps.idx
+#
+# The test harness fails when the two drift apart.
+
+set -u
+
+jq -rs '
+  def vkey:
+    sub("^[vV]"; "") | sub("[^0-9.].*$"; "")
+    | (split(".") + ["", "", "", ""])[0:4]
+    | map(sub("^0+"; "") | if . == "" then "0" else . end | ("000000000000" + .)[-12:])
+    | join(".");
+  def clean: tostring | gsub("[\t\n\r]"; " ");
+  [ add // [] | .[]
+    | select(type == "object" and (.name // "") != "" and (.vulnerable_range // "") != "")
+    | (.vulnerable_range | ltrimstr(" ") | rtrimstr(" ")) as $r
+    | ($r[1:-1] | split(",")) as $b
+    | { norm: (.name | ascii_downcase | gsub("[-_.]+"; "-")),
+        low: ($b[0] // "" | gsub("\\s"; "") | vkey),
+        low_incl: (if $r[0:1] == "[" then 1 else 0 end),
+        high: ($b[-1] // "" | gsub("\\s"; "") | vkey),
+        high_incl: (if $r[-1:] == ")" then 0 else 1 end),
+        rest: [.name, $r, (.cve // ""), (.severity // ""), (.fix // ""), (.why // "")] } ]
+  | sort_by(.norm, .low)[]
+  | [.norm, .low, .low_incl, .high, .high_incl] + .rest
+  | map(clean) | join("\t")
+' "$@"
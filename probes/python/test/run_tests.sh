@@ -19,6 +19,12 @@ run() {
     RES_EXIT=$?
 }
 
+# run_env PAYLOAD EXTRA_DISALLOWED REPLACE_DEFAULTS
+run_env() {
+    RES_OUT="$(printf '%s' "$1" | env LUNAR_VAR_EXTRA_DISALLOWED="$2" LUNAR_VAR_REPLACE_DEFAULTS="$3" sh "$SCRIPT" 2>/dev/null)"
+    RES_EXIT=$?
+}
+
 assert_exit() {
     name="$1"
     want="$2"
@@ -150,6 +156,54 @@ assert_exit "non-JSON stdin -> allow" 0
 run '{"tool_input":{"file_path":"README.md","content":"starlette==1.0.0 is vulnerable"}}'
 assert_block "prose mentioning a pin still matches the pin -> block" "CVE-2026-48710"
 
+# ============================================================
+# Single-pass scan: several pins per line / per file
+# ============================================================
+
+run '{"tool_input":{"file_path":"requirements.txt","content":"numpy==1.26.0\nflask==3.0.0\nWerkzeug==3.0.1"}}'
+assert_block "vulnerable pin after clean ones -> block" "CVE-2024-34069"
+
+run '{"tool_input":{"file_path":"README.md","content":"pin numpy==1.26.0 and urllib3==2.2.1 together"}}'
+assert_block "second pin on the same line -> block" "CVE-2024-37891"
+
+run '{"tool_input":{"file_path":"requirements.txt","content":"py_yaml==5.3\npyyaml===5.3.1"}}'
+assert_block "=== arbitrary-equality pin -> block" "CVE-2020-14343"
+
+run '{"tool_input":{"file_path":"requirements.txt","content":"setuptools==69.5.1"}}'
+assert_block "multi-digit version fields compare numerically -> block" "CVE-2024-6345"
+
+run '{"tool_input":{"file_path":"requirements.txt","content":"setuptools==100.0.0"}}'
+assert_exit "setuptools==100.0.0 (above high) -> allow" 0
+
+# ============================================================
+# Precompiled index + consumer overrides
+# ============================================================
+
+DATA_DIR="$(cd "$(dirname "$0")/.." && pwd)/data"
+COMPILER="$(cd "$(dirname "$0")/.." && pwd)/scripts/compile-disallowed-deps.sh"
+if sh "$COMPILER" "$DATA_DIR/disallowed-deps.json" | cmp -s - "$DATA_DIR/disallowed-deps.idx"; then
+    PASS=$((PASS + 1))
+else
+    FAIL=$((FAIL + 1))
+    DETAILS="${DETAILS}
+  [FAIL] data/disallowed-deps.idx is stale
+         regenerate: sh scripts/compile-disallowed-deps.sh data/disallowed-deps.json > data/disallowed-deps.idx"
+fi
+
+EXTRA='[{"name":"Django","vulnerable_range":"[0.0.0, 4.2.13)","cve":"CVE-2024-39329","severity":"medium","fix":"4.2.13","why":"User enumeration"}]'
+
+run_env '{"tool_input":{"file_path":"requirements.txt","content":"django==4.2.0"}}' "$EXTRA" "false"
+assert_block "extra_disallowed entry -> block" "CVE-2024-39329"
+
+run_env '{"tool_input":{"file_path":"requirements.txt","content":"starlette==1.0.0"}}' "$EXTRA" "false"
+assert_block "extra_disallowed keeps the defaults -> block" "CVE-2026-48710"
+
+run_env '{"tool_input":{"file_path":"requirements.txt","content":"starlette==1.0.0"}}' "$EXTRA" "true"
+assert_exit "replace_defaults drops the defaults -> allow" 0
+
+run_env '{"tool_input":{"file_path":"requirements.txt","content":"starlette==1.0.0"}}' "not-json" "false"
+assert_block "malformed extra_disallowed falls back to defaults -> block" "CVE-2026-48710"
+
 # ============================================================
 # Report
 # ============================================================